@@ -0,0 +1,84 @@
+# Benchmark the bytes on disk and the write and read throughput of attachments stored as is, with zlib and with lzma.
+# Run from the project main folder: python benchmarks/bench_attachment_compression.py --size-mb 8
+# Pass --corpus with a folder of real attachments to measure them instead of the generated sample.
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import mimetypes
+import random
+import tempfile
+import time
+from utilities import LocalBlobStore, CODECS
+
+WRITE_CHUNK = 256 * 1024
+DESCRIPTIONS = ["Coffee shop", "Groceries", "Rent", "Electricity bill", "Salary", "Pharmacy", "Fuel", "Restaurant", "Internet", "Gym"]
+
+def sample_corpus(size: int) -> list[tuple[str, bytes]]:
+    """
+    Generate attachments shaped like the ones families upload: transaction exports as CSV and JSON,
+    photos of receipts, which are already compressed, and PDFs mixing text with compressed images.
+    """
+    generator = random.Random(42)
+    def rows():
+        for number in range(sys.maxsize):
+            yield number, f"2024-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}", generator.choice(DESCRIPTIONS), f"{generator.uniform(1, 500):.2f}"
+    csv_lines, csv_size = ["id,date,description,amount\n"], 0
+    for number, day, description, amount in rows():
+        line = f"{number},{day},{description},{amount}\n"
+        csv_lines.append(line)
+        csv_size += len(line)
+        if csv_size >= size:
+            break
+    json_lines, json_size = [], 0
+    for number, day, description, amount in rows():
+        line = json.dumps({"id": number, "date": day, "description": description, "amount": amount, "transaction_type": "expense"}) + "\n"
+        json_lines.append(line)
+        json_size += len(line)
+        if json_size >= size:
+            break
+    pdf = bytearray()
+    while len(pdf) < size:
+        pdf += f"BT /F1 12 Tf 72 {generator.randint(0, 700)} Td ({generator.choice(DESCRIPTIONS)} {generator.uniform(1, 500):.2f}) Tj ET\n".encode() * 20
+        pdf += generator.randbytes(2048)
+    return [("text/csv", "".join(csv_lines).encode()), ("application/json", "".join(json_lines).encode()),
+            ("image/jpeg", generator.randbytes(size)), ("application/pdf", bytes(pdf))]
+
+def load_corpus(folder: str) -> list[tuple[str, bytes]]:
+    corpus = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                corpus.append((mimetypes.guess_type(name)[0] or "application/octet-stream", file.read()))
+    return corpus
+
+def measure(store: LocalBlobStore, content: bytes, compression):
+    start = time.perf_counter()
+    writer = store.writer(compression)
+    for offset in range(0, len(content), WRITE_CHUNK):
+        writer.write(content[offset:offset + WRITE_CHUNK])
+    digest = writer.commit()
+    written = time.perf_counter() - start
+    start = time.perf_counter()
+    read = sum(len(chunk) for chunk in store.iter_chunks(digest, compression=compression))
+    elapsed = time.perf_counter() - start
+    assert read == len(content)
+    return writer.stored_size, written, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the storage and throughput of the attachment compression codecs")
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--corpus", default=None)
+    args = parser.parse_args()
+    corpus = load_corpus(args.corpus) if args.corpus else sample_corpus(args.size_mb * 1024 * 1024)
+    print(f"{'content type':18} {'codec':6} {'size MB':>9} {'stored MB':>10} {'ratio':>6} {'write MB/s':>11} {'read MB/s':>10}")
+    for content_type, content in corpus:
+        for compression in (None, *CODECS):
+            with tempfile.TemporaryDirectory() as root:
+                stored_size, written, read = measure(LocalBlobStore(root), content, compression)
+            megabytes = len(content) / 1024 / 1024
+            print(f"{content_type:18} {compression or 'none':6} {megabytes:9.2f} {stored_size / 1024 / 1024:10.2f} {len(content) / stored_size:6.1f} "
+                  f"{megabytes / written:11.1f} {megabytes / read:10.1f}")
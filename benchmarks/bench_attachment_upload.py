@@ -0,0 +1,75 @@
+# Benchmark the peak memory of concurrent attachment uploads, streamed to the blob store or buffered as the previous implementation did.
+# Run from the project main folder: python benchmarks/bench_attachment_upload.py --uploads 50 --size-mb 20
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import tempfile
+import time
+from starlette.datastructures import Headers
+from starlette.formparsers import MultiPartParser
+from utilities import LocalBlobStore, store_multipart_upload
+
+BOUNDARY = "benchmarkboundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+NETWORK_CHUNK = 64 * 1024
+
+async def multipart_body(size: int):
+    """
+    Produce a multipart body carrying one file of the given size in network sized chunks, without holding it in memory.
+    """
+    yield f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="receipt.pdf"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+    chunk = os.urandom(NETWORK_CHUNK)
+    for _ in range(size // NETWORK_CHUNK):
+        yield chunk
+        # Let the other uploads progress, as concurrent requests on a server do
+        await asyncio.sleep(0)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+async def buffered(store: LocalBlobStore, size: int):
+    """
+    The previous path: starlette parses the form into an UploadFile, then file.read() loads the whole file before it is stored.
+    """
+    form = await MultiPartParser(Headers({"content-type": CONTENT_TYPE}), multipart_body(size), max_part_size=size * 2).parse()
+    content = await form["file"].read()
+    store.put(content)
+    await form.close()
+
+async def streamed(store: LocalBlobStore, size: int):
+    """
+    The streaming path used by upload_attachment_for_transaction.
+    """
+    await store_multipart_upload(CONTENT_TYPE, multipart_body(size), store, max_file_size=size, max_total_size=size, max_files=1, chunk_size=256 * 1024)
+
+def run(name: str, uploads: int, size: int, results):
+    # Runs in its own process so ru_maxrss only covers this path
+    method = {"buffered": buffered, "streamed": streamed}[name]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalBlobStore(root)
+        async def main():
+            await asyncio.gather(*(method(store, size) for _ in range(uploads)))
+        start = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - start
+    results.put((name, elapsed, baseline, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the peak memory of streamed and buffered attachment uploads")
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=int, default=20)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    for name in ("buffered", "streamed"):
+        process = context.Process(target=run, args=(name, args.uploads, size, results))
+        process.start()
+        name, elapsed, baseline, peak = results.get()
+        process.join()
+        # ru_maxrss is reported in kilobytes on Linux
+        print(f"{name:9}: {args.uploads} x {args.size_mb} MB in {elapsed:6.2f} s, peak RSS {peak / 1024:8.1f} MB ({(peak - baseline) / 1024:+8.1f} MB over start)")
@@ -0,0 +1,75 @@
+# Benchmark the family membership check against the previous selectinload based implementation.
+# Run from the project main folder: python benchmarks/bench_authorization.py --members 500 --iterations 2000
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+import uuid
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from models import Base,FamilyModel,UserModel,FamilyUserModel,FamilyUserRole
+from controllers.authorization import check_user_in_family
+
+async def legacy_check_user_in_family(family_id: str, user_id: uuid.UUID, db: AsyncSession):
+    """
+    The previous implementation: load the family with every membership row and scan them in Python.
+    """
+    family = await db.execute(select(FamilyModel).options(selectinload(FamilyModel.users)).where(FamilyModel.id == uuid.UUID(family_id)))
+    family = family.scalars().first()
+    if not family:
+        raise LookupError("Family not found")
+    if not any(family_user.user_id == user_id for family_user in family.users):
+        raise PermissionError("User is not a member of this family")
+
+async def seed(session_factory, members: int):
+    """
+    Create one family with the requested number of members and return the family id and the last member id.
+    """
+    async with session_factory() as db:
+        family = FamilyModel(name="Benchmark Family")
+        db.add(family)
+        await db.flush()
+        users = [UserModel(name=f"user{i}", email=f"user{i}@example.com", password="x") for i in range(members)]
+        db.add_all(users)
+        await db.flush()
+        db.add_all([FamilyUserModel(family_id=family.id, user_id=user.id,
+                                    role=FamilyUserRole.OWNER if i == 0 else FamilyUserRole.PARENT) for i, user in enumerate(users)])
+        await db.commit()
+        return str(family.id), users[-1].id
+
+async def run(check, session_factory, family_id: str, user_id: uuid.UUID, iterations: int) -> float:
+    """
+    Run the membership check with a fresh session per call, as a request would, and return the mean latency in ms.
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        async with session_factory() as db:
+            await check(family_id, user_id, db)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+async def main(members: int, iterations: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    family_id, user_id = await seed(session_factory, members)
+    legacy = await run(legacy_check_user_in_family, session_factory, family_id, user_id, iterations)
+    current = await run(check_user_in_family, session_factory, family_id, user_id, iterations)
+    print(f"members={members} iterations={iterations}")
+    print(f"legacy selectinload scan : {legacy:.3f} ms/check")
+    print(f"single indexed lookup    : {current:.3f} ms/check")
+    print(f"speedup                  : {legacy / current:.1f}x")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare family membership check implementations")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///:memory:")
+    args = parser.parse_args()
+    asyncio.run(main(args.members, args.iterations, args.db_url))
@@ -0,0 +1,102 @@
+# Benchmark the budget utilization report of a family with many transactions, against recomputing the totals of every budget with the grouped query.
+# Run from the project main folder: python benchmarks/bench_budget_utilization.py --transactions 100000
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models import Base,FamilyModel,UserModel,FamilyUserModel,FamilyUserRole,AccountModel,AccountType,CategoryModel,EntryType,TransactionModel
+from models import BudgetModel,BudgetTransactionModel
+from controllers.budget import get_budget_utilization_of_family
+from controllers.ledger import refresh_budget_totals
+
+START = datetime(2024, 1, 1)
+INSERT_BATCH = 10000
+
+async def seed(session_factory, transactions: int, categories: int, months: int, assigned_ratio: float):
+    """
+    Create a family with one account, a budget per category and month, and transactions spread over the months,
+    a share of them assigned to the budget of their month.
+    """
+    generator = random.Random(42)
+    async with session_factory() as db:
+        user = UserModel(name="owner", email="owner@example.com", password="x")
+        family = FamilyModel(name="Benchmark Family")
+        db.add_all([user, family])
+        await db.flush()
+        account = AccountModel(user_id=user.id, family_id=family.id, name="Checking", type=AccountType.ASSET)
+        category_rows = [CategoryModel(user_id=user.id, family_id=family.id, name=f"Category {index}", type=EntryType.EXPENSE) for index in range(categories)]
+        db.add_all([FamilyUserModel(family_id=family.id, user_id=user.id, role=FamilyUserRole.OWNER), account, *category_rows])
+        await db.flush()
+        budgets = {}
+        for category in category_rows:
+            for month in range(months):
+                start = datetime(START.year + month // 12, month % 12 + 1, 1)
+                end = datetime(start.year + (start.month == 12), start.month % 12 + 1, 1) - timedelta(seconds=1)
+                budget = {"id": uuid.uuid4(), "user_id": user.id, "family_id": family.id, "category_id": category.id, "account_id": account.id,
+                          "amount": Decimal(1000), "start_date": start, "end_date": end}
+                budgets[(category.id, month)] = budget
+        await db.execute(insert(BudgetModel), list(budgets.values()))
+        span = (datetime(START.year + months // 12, months % 12 + 1, 1) - START).total_seconds()
+        for offset in range(0, transactions, INSERT_BATCH):
+            rows, assignments = [], []
+            for _ in range(min(INSERT_BATCH, transactions - offset)):
+                category = generator.choice(category_rows)
+                date = START + timedelta(seconds=generator.uniform(0, span))
+                row = {"id": uuid.uuid4(), "user_id": user.id, "family_id": family.id, "account_id": account.id, "category_id": category.id,
+                       "amount": Decimal(generator.randint(100, 10000)) / 100, "date": date, "transaction_type": EntryType.EXPENSE}
+                rows.append(row)
+                if generator.random() < assigned_ratio:
+                    budget = budgets[(category.id, (date.year - START.year) * 12 + date.month - 1)]
+                    assignments.append({"family_id": family.id, "budget_id": budget["id"], "transaction_id": row["id"], "assigned_amount": row["amount"]})
+            await db.execute(insert(TransactionModel), rows)
+            if assignments:
+                await db.execute(insert(BudgetTransactionModel), assignments)
+        await db.commit()
+        return str(family.id), user, len(budgets)
+
+async def main(transactions: int, categories: int, months: int, assigned_ratio: float, iterations: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    family_id, user, budgets = await seed(session_factory, transactions, categories, months, assigned_ratio)
+    # The rows were inserted without the ledger, the totals are computed once as the migration does
+    async with session_factory() as db:
+        budget_ids = (await db.execute(select(BudgetModel.id))).scalars().all()
+        start = time.perf_counter()
+        await refresh_budget_totals(budget_ids, db)
+        await db.commit()
+        print(f"grouped recompute of {budgets} budgets: {(time.perf_counter() - start) * 1000:.1f} ms")
+    timings = []
+    async with session_factory() as db:
+        for _ in range(iterations + 1):
+            start = time.perf_counter()
+            response = await get_budget_utilization_of_family(family_id, user, db)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings = sorted(timings[1:])
+    assert response.code == 1 and len(response.budgets) == budgets
+    print(f"utilization report over {transactions} transactions: median {statistics.median(timings):.1f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms, max {timings[-1]:.1f} ms")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the latency of the budget utilization report")
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--assigned-ratio", type=float, default=0.5)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///:memory:")
+    args = parser.parse_args()
+    asyncio.run(main(args.transactions, args.categories, args.months, args.assigned_ratio, args.iterations, args.db_url))
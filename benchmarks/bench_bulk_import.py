@@ -0,0 +1,84 @@
+# Benchmark the bulk transaction import against creating the same transactions one at a time.
+# Run from the project main folder: python benchmarks/bench_bulk_import.py --rows 10000
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models import Base,FamilyModel,UserModel,FamilyUserModel,FamilyUserRole,AccountModel,AccountType,CategoryModel,EntryType,TransactionModel
+from serializers import CreateTransaction
+from controllers.transaction_bulk import validate_rows, check_references, insert_transactions
+
+async def seed(session_factory):
+    """
+    Create a family with one owner, one account and one category and return their ids.
+    """
+    async with session_factory() as db:
+        user = UserModel(name="owner", email="owner@example.com", password="x")
+        family = FamilyModel(name="Benchmark Family")
+        db.add_all([user, family])
+        await db.flush()
+        account = AccountModel(user_id=user.id, family_id=family.id, name="Checking", type=AccountType.ASSET)
+        category = CategoryModel(user_id=user.id, family_id=family.id, name="Groceries", type=EntryType.EXPENSE)
+        db.add_all([FamilyUserModel(family_id=family.id, user_id=user.id, role=FamilyUserRole.OWNER), account, category])
+        await db.commit()
+        return family.id, user.id, account.id, category.id
+
+def make_rows(rows: int, account_id, category_id) -> list[dict]:
+    start = datetime(2024, 1, 1)
+    return [{"account_id": str(account_id), "category_id": str(category_id), "amount": f"{index % 500}.25",
+             "date": (start + timedelta(minutes=index)).isoformat(), "description": f"Card payment {index}", "transaction_type": "expense"}
+            for index in range(rows)]
+
+async def one_at_a_time(session_factory, rows: list[dict], family_id, user_id):
+    """
+    The previous path: one ORM object, commit and refresh per transaction, as create_transaction_for_family does.
+    """
+    for row in rows:
+        async with session_factory() as db:
+            transaction = TransactionModel(**CreateTransaction.model_validate(row).model_dump(), family_id=family_id, user_id=user_id)
+            db.add(transaction)
+            await db.commit()
+            await db.refresh(transaction)
+
+async def bulk(session_factory, rows: list[dict], family_id, user_id):
+    """
+    The bulk path: validate, check references with one query and insert with one executemany.
+    """
+    async with session_factory() as db:
+        transactions, numbers, errors = validate_rows(rows)
+        errors += await check_references(family_id, transactions, numbers, db)
+        assert not errors
+        await insert_transactions([{**transaction.model_dump(), "family_id": family_id, "user_id": user_id} for transaction in transactions], db)
+        await db.commit()
+
+async def main(rows: int, single_rows: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    family_id, user_id, account_id, category_id = await seed(session_factory)
+    for name, method, count in (("one at a time", one_at_a_time, single_rows), ("bulk executemany", bulk, rows)):
+        data = make_rows(count, account_id, category_id)
+        start = time.perf_counter()
+        await method(session_factory, data, family_id, user_id)
+        elapsed = time.perf_counter() - start
+        print(f"{name:18}: {count:7d} rows in {elapsed:7.2f} s, {count / elapsed:9.0f} rows/s")
+        async with session_factory() as db:
+            await db.execute(delete(TransactionModel))
+            await db.commit()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare bulk transaction import with single inserts")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--single-rows", type=int, default=1000, help="rows inserted one at a time, kept lower because that path is slow")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///:memory:")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.single_rows, args.db_url))
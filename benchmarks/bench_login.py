@@ -0,0 +1,57 @@
+# Benchmark password verification throughput during a login storm and the event loop lag it causes.
+# Run from the project main folder: python benchmarks/bench_login.py --logins 64
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+from argon2 import PasswordHasher, exceptions
+from utilities import hash_a_password, verify_password, hashing_executor
+
+async def inline_verify_password(password: str, hashed_password: str) -> bool:
+    """
+    The previous implementation: a new hasher verifying on the event loop thread.
+    """
+    try:
+        PasswordHasher().verify(hashed_password, password)
+        return True
+    except exceptions.VerifyMismatchError:
+        return False
+
+async def heartbeat(interval: float, lags: list, stop: asyncio.Event):
+    """
+    Wake up every interval seconds and record how late the event loop scheduled the wake up.
+    """
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+async def storm(verify, hashed_password: str, logins: int) -> tuple[float, float, float]:
+    """
+    Run concurrent verifications and return the throughput and the worst and median heartbeat lag in ms.
+    """
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(0.005, lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[verify("CorrectHorse1!", hashed_password) for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    lags.sort()
+    return logins / elapsed, lags[-1] if lags else elapsed * 1000, lags[len(lags) // 2] if lags else elapsed * 1000
+
+async def main(logins: int):
+    hashed_password = hash_a_password("CorrectHorse1!")
+    for name, verify in (("inline on the event loop", inline_verify_password), (f"hashing pool ({hashing_executor.max_workers} workers)", verify_password)):
+        throughput, worst_lag, median_lag = await storm(verify, hashed_password, logins)
+        print(f"{name:32}: {throughput:8.1f} logins/s, event loop lag worst {worst_lag:8.1f} ms, median {median_lag:6.1f} ms")
+    print(f"pool stats: {hashing_executor.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure login throughput and event loop responsiveness")
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from dotenv import dotenv_values
 
 class Config(BaseModel):
@@ -8,6 +9,33 @@ class Config(BaseModel):
     db_password:str
     db_name:str
     token_secret:str
+    membership_cache_size:int=10000
+    membership_cache_ttl:int=60
+    principal_cache_size:int=10000
+    principal_cache_ttl:int=300
+    net_worth_cache_size:int=1000
+    net_worth_cache_ttl:int=300
+    hashing_max_workers:int=4
+    db_pool_size:int=5
+    db_max_overflow:int=10
+    db_pool_timeout:float=30
+    db_pool_recycle:int=1800
+    db_pool_pre_ping:bool=True
+    bulk_max_rows:int=50000
+    import_max_bytes:int=536870912
+    import_chunk_size:int=1000
+    import_tmp_dir:Optional[str]=None
+    blob_store_backend:str="local"
+    blob_store_root:str="attachments"
+    attachment_max_bytes:int=26214400
+    attachment_max_family_bytes:int=1073741824
+    attachment_chunk_size:int=262144
+    attachment_max_files:int=10
+    attachment_compression:str=""
+    upload_staging_dir:str="uploads"
+    upload_session_ttl:int=86400
+    upload_sweep_interval:int=3600
+    balance_reconcile_interval:int=86400
 
 config_env=dotenv_values(".env")
 
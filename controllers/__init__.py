@@ -1,9 +1,10 @@
 from .account import get_all_family_accounts as ControllerGetAllFamilyAccounts,create_new_account as ControllerCreateNewAccount
 from .account import delete_account as ControllerDeleteAccount,update_account as ControllerUpdateAccount,get_account as ControllerGetAccount
 from .attachment import upload_attachment_for_transaction as ControllerUploadAttachmentForTransaction,get_attachement_of_transaction as ControllerGetAttachementOfTransaction
-from .attachment import retrieve_attachment as ControllerRetrieveAttachment,delete_attachment as ControllerDeleteAttachment
+from .attachment import retrieve_attachment as ControllerRetrieveAttachment,delete_attachment as ControllerDeleteAttachment,get_all_attachments_of_family as ControllerGetAllAttachmentsOfFamily
 from .budget import get_all_budgets_of_family as ControllerGetAllBudgetsOfFamily,create_budget_for_family as ControllerCreateBudgetForFamily
 from .budget import retrieve_budget as ControllerRetrieveBudget,update_budget as ControllerUpdateBudget,delete_budget as ControllerDeleteBudget
+from .budget import get_budget_utilization_of_family as ControllerGetBudgetUtilizationOfFamily
 from .budget_transaction import get_all_budget_transactions_of_family as ControllerGetAllBudgetTransactionsOfFamily,add_budget_transaction_for_family as ControllerAddBudgetTransactionForFamily
 from .budget_transaction import retrieve_budget_transaction as ControllerRetrieveBudgetTransaction,delete_budget_transaction as ControllerDeleteBudgetTransaction
 from .category import get_all_categories_of_family as ControllerGetAllCategoriesOfFamily,create_category_for_family as ControllerCreateCategoryForFamily
@@ -15,9 +16,23 @@ from .family_user import remove_user_from_family as ControllerRemoveUserFromFami
 from .get_current_user import get_current_user
 from .goal import get_all_goals_of_family as ControllerGetAllGoalsOfFamily,create_goal_for_family as ControllerCreateGoalForFamily
 from .goal import retrieve_goal as ControllerRetrieveGoal,update_goal as ControllerUpdateGoal,delete_goal as ControllerDeleteGoal
+from .goal import recompute_goals_of_family as ControllerRecomputeGoalsOfFamily
 from .transaction import get_all_transactions_of_family as ControllerGetAllTransactionsOfFamily,create_transaction_for_family as ControllerCreateTransactionForFamily
+from .transaction import get_duplicate_transactions_of_family as ControllerGetDuplicateTransactionsOfFamily
 from .transaction import retrieve_transaction as ControllerRetrieveTransaction,update_transaction as ControllerUpdateTransaction,delete_transaction as ControllerDeleteTransaction
 from .user import create_user as ControllerCreateUser,user_login as ControllerUserLogin
 from .user import update_user as ControllerUpdateUser,delete_user as ControllerDeleteUser,get_all_users as ControllerGetAllUsers
 from .user import get_user as ControllerGetUser
-from .user import get_user_by_id as ControllerGetUserById
\ No newline at end of file
+from .user import get_user_by_id as ControllerGetUserById
+from .metrics import get_metrics as ControllerGetMetrics
+from .transaction_export import export_transactions_of_family as ControllerExportTransactionsOfFamily
+from .transaction_bulk import bulk_create_transactions as ControllerBulkCreateTransactions
+from .statement_import import create_statement_import as ControllerCreateStatementImport
+from .statement_import import get_statement_import as ControllerGetStatementImport
+from .statement_import import upload_statement_content as ControllerUploadStatementContent
+from .upload_session import create_upload_session as ControllerCreateUploadSession,get_upload_session as ControllerGetUploadSession,get_upload_offset as ControllerGetUploadOffset
+from .upload_session import upload_chunk as ControllerUploadChunk,finalize_upload_session as ControllerFinalizeUploadSession,delete_upload_session as ControllerDeleteUploadSession
+from .upload_session import run_upload_sweeper
+from .report import get_monthly_report as ControllerGetMonthlyReport
+from .report import get_net_worth_report as ControllerGetNetWorthReport
+from .ledger import run_balance_reconciler,reconcile_account_balances
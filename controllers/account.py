@@ -5,32 +5,39 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from serializers import RestCreateAccountResponse, RestGetAccountResponse, RestGetAllAccountsOfamilyResponse, BaseRestResponse,UpdateAccount
 from .authorization import check_user_in_family,check_user_is_family_owner
-from .family import get_family_by_id_with_account
+from .family import get_family_by_id
+from .ledger import invalidate_net_worth
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from typing import Optional
 from uuid import UUID
 
-async def get_all_family_accounts(family_id: str,current_user:UserModel,db:AsyncSession)->RestGetAllAccountsOfamilyResponse:
+async def get_all_family_accounts(family_id: str,current_user:UserModel,db:AsyncSession,cursor:Optional[str]=None,limit:int=DEFAULT_PAGE_SIZE)->RestGetAllAccountsOfamilyResponse:
     """
-    Retrieve all accounts associated with a specific family.
+    Retrieve a page of the accounts associated with a specific family, ordered by creation time.
     Args:
         family_id (str): The unique identifier of the family.
         current_user (UserModel): The user making the request.
         db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of accounts in the page.
     Returns:
-        RestGetAllAccountsOfamilyResponse: A response object containing the status, message, and a list of family accounts.
-            If the family is not found, returns a response with code 0 and status "FAILED".
-            On success, returns code 1, status "SUCCESS", and the list of accounts.
+        RestGetAllAccountsOfamilyResponse: A response object containing the status, message, a page of family accounts and the cursor of the next page.
+            If the cursor is invalid, returns a response with code 0 and status "FAILED".
+            On success, returns code 1, status "SUCCESS", and the page of accounts.
     Raises:
         Exception: If the user is not a member of the specified family.
     """
 
-    #Check if the user is a member of the family
+    #Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    #Get family
-    family = await get_family_by_id_with_account(family_id, db)
-    if not family:
-        return BaseRestResponse(code=0,status="FAILED",message="Family not found")
-    #Return all accounts of the family from the family
-    return RestGetAllAccountsOfamilyResponse(code=1,status="SUCCESS",message="Family accounts retrieved successfully",accounts=[AccountInfo(**account.__dict__) for account in family.account])
+    #Return a page of accounts of the family
+    try:
+        statement = paginate(select(AccountModel).where(AccountModel.family_id == UUID(family_id)), AccountModel.created_at, AccountModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllAccountsOfamilyResponse(code=0,status="FAILED",message="Invalid cursor")
+    result = await db.execute(statement)
+    accounts, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    return RestGetAllAccountsOfamilyResponse(code=1,status="SUCCESS",message="Family accounts retrieved successfully",accounts=[AccountInfo(**account.__dict__) for account in accounts],next_cursor=next_cursor)
 
 async def create_new_account(family_id: str,new_account:CreateAccount, current_user: UserModel, db: AsyncSession)-> RestCreateAccountResponse:
     """
@@ -51,7 +58,7 @@ async def create_new_account(family_id: str,new_account:CreateAccount, current_u
     #Check if the user is the owner of the family
     await check_user_is_family_owner(family_id, current_user.id, db)
     #Check if the family exists
-    family = await get_family_by_id_with_account(family_id, db)
+    family = await get_family_by_id(family_id, db)
     if not family:
         return BaseRestResponse(code=0,status="FAILED",message="Family not found")
     #Create new account
@@ -88,9 +95,11 @@ async def delete_account(account_id: str,current_user: UserModel, db: AsyncSessi
         return BaseRestResponse(code=0,status="FAILED",message="Account not found")
     await check_user_is_family_owner(str(account.family_id), current_user.id, db)
     #Delete account
+    family_id = account.family_id
     await db.delete(account)
     try:
         await db.commit()
+        invalidate_net_worth([family_id])
         return BaseRestResponse(code=1,status="SUCCESS",message="Account deleted successfully")
     except Exception as e:
         await db.rollback()
@@ -126,6 +135,7 @@ async def update_account(account_id: str,updated_account:UpdateAccount,current_u
     try:
         await db.commit()
         await db.refresh(account)
+        invalidate_net_worth([account.family_id])
         return RestCreateAccountResponse(code=1,status="SUCCESS",message="Account updated successfully",account=AccountInfo(**account.__dict__))
     except Exception as e:
         await db.rollback()
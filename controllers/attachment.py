@@ -1,84 +1,254 @@
-from models import UserModel,AttachmentModel
+from models import UserModel,AttachmentModel,ATTACHMENT_METADATA_COLUMNS
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from fastapi.responses import StreamingResponse
-from fastapi import UploadFile
-from serializers import RestCreateAttachmentResponse, RestGetAttachmentOfTransactionResponse, BaseRestResponse
+from sqlalchemy.orm import selectinload, load_only, raiseload
+import os
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi import Request
+from sqlalchemy import func, insert, text
+from starlette.concurrency import run_in_threadpool
+from serializers import RestCreateAttachmentResponse, RestGetAttachmentOfTransactionResponse, RestGetAllAttachmentsOfFamilyResponse, BaseRestResponse
 from serializers import AttachmentInfo
 from .authorization import check_user_in_family, check_user_is_family_owner
 from .family import get_family_by_id
-from .transaction import get_transaction_by_id,get_transaction_by_id_with_attachment_family
+from .transaction import get_transaction_by_id
+from utilities import get_blob_store,store_multipart_upload,UploadError,MULTIPART_OVERHEAD,paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from config import config
+from typing import Iterable, Optional
 from uuid import UUID
 
-async def get_attachement_of_transaction(transaction_id: str, current_user: UserModel, db: AsyncSession)->RestGetAttachmentOfTransactionResponse:
+async def get_attachement_of_transaction(transaction_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str]=None, limit: int=DEFAULT_PAGE_SIZE)->RestGetAttachmentOfTransactionResponse:
+    """
+    Retrieve a page of the attachments of a transaction, ordered by creation time. Only their metadata is read.
+    Args:
+        transaction_id (str): The unique identifier of the transaction.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of attachments in the page.
+    Returns:
+        RestGetAttachmentOfTransactionResponse: The page of attachments, the first one also in attachment for the clients of a single attachment,
+            or a response with code 0 if the transaction does not exist or the cursor is invalid.
+    Raises:
+        HTTPException: If the user is not a member of the family of the transaction.
+    """
     # Check if the transaction exists
-    transaction = await get_transaction_by_id_with_attachment_family(transaction_id, db)
+    transaction = await get_transaction_by_id(transaction_id, db)
     if not transaction:
         return BaseRestResponse(code=0, status="FAILED", message="Transaction not found")
     # Check if the user is a member of the family based on the transaction
     await check_user_in_family(str(transaction.family_id), current_user.id, db)
-    # Get the attachment associated with the transaction
-    attachment = transaction.attachment
-    if not attachment:
-        return BaseRestResponse(code=0, status="FAILED", message="Attachment not found")
-    return RestGetAttachmentOfTransactionResponse(code=1, status="SUCCESS", message="Attachment retrieved successfully", attachment=AttachmentInfo(**attachment.__dict__))
+    try:
+        statement = paginate(select(AttachmentModel).options(load_only(*ATTACHMENT_METADATA_COLUMNS), raiseload("*")).where(AttachmentModel.transaction_id == transaction.id),
+                             AttachmentModel.created_at, AttachmentModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAttachmentOfTransactionResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    attachments, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    attachments = [AttachmentInfo(**attachment.__dict__) for attachment in attachments]
+    return RestGetAttachmentOfTransactionResponse(code=1, status="SUCCESS", message="Attachments retrieved successfully", attachment=attachments[0] if attachments else None,
+                                                  attachments=attachments, next_cursor=next_cursor)
+
+async def get_all_attachments_of_family(family_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str]=None, limit: int=DEFAULT_PAGE_SIZE)->RestGetAllAttachmentsOfFamilyResponse:
+    """
+    Retrieve a page of the attachments of every transaction of a family, ordered by creation time. Only their metadata is read.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of attachments in the page.
+    Returns:
+        RestGetAllAttachmentsOfFamilyResponse: The page of attachments and the cursor of the next page, or a response with code 0 if the cursor is invalid.
+    Raises:
+        HTTPException: If the user is not a member of the family.
+    """
+    #Check if the user is a member of the family, this also confirms the family exists
+    await check_user_in_family(family_id, current_user.id, db)
+    try:
+        statement = paginate(select(AttachmentModel).options(load_only(*ATTACHMENT_METADATA_COLUMNS), raiseload("*")).where(AttachmentModel.family_id == UUID(family_id)),
+                             AttachmentModel.created_at, AttachmentModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllAttachmentsOfFamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    attachments, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    return RestGetAllAttachmentsOfFamilyResponse(code=1, status="SUCCESS", message="Family attachments retrieved successfully",
+                                                 attachments=[AttachmentInfo(**attachment.__dict__) for attachment in attachments], next_cursor=next_cursor)
+
+async def get_family_attachment_bytes(family_id: UUID, db: AsyncSession) -> int:
+    """
+    Sum the sizes of the attachments of a family.
+    Args:
+        family_id (UUID): The unique identifier of the family.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        int: The bytes the family stores in attachments.
+    """
+    result = await db.execute(select(func.coalesce(func.sum(AttachmentModel.size), 0)).where(AttachmentModel.family_id == family_id))
+    return int(result.scalar_one())
 
-async def upload_attachment_for_transaction(transaction_id: str, file: UploadFile, current_user: UserModel, db: AsyncSession)-> RestCreateAttachmentResponse:
+async def upload_attachment_for_transaction(transaction_id: str, request: Request, current_user: UserModel, db: AsyncSession)-> RestCreateAttachmentResponse:
+    """
+    Upload the files of a multipart/form-data request as attachments of a transaction, up to attachment_max_files per request.
+    The files are streamed to the blob store in chunks while their digests are computed, committed concurrently once the body is read,
+    and recorded with one multi-row insert. The upload stops as soon as a file exceeds attachment_max_bytes or the files exceed
+    the space the family has left under attachment_max_family_bytes.
+    Args:
+        transaction_id (str): The unique identifier of the transaction.
+        request (Request): The request carrying the files in its file fields.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestCreateAttachmentResponse: The created attachments, the first one also in attachment, or a response with code 0 if the upload is invalid or too large.
+    Raises:
+        HTTPException: If the user is not a member of the family of the transaction.
+    """
     # Check if the transaction exists
     transaction = await get_transaction_by_id(transaction_id, db)
     if not transaction:
         return BaseRestResponse(code=0, status="FAILED", message="Transaction not found")
     # Check if the user is a member of the family based on the transaction
     await check_user_in_family(str(transaction.family_id), current_user.id, db)
-    # Read file content and create new attachment
-    content = await file.read()
-    new_attachment = AttachmentModel(
-        file_content=content,
-        transaction_id=UUID(transaction_id)
-    )
-    db.add(new_attachment)
+    transaction_uuid, family_id = transaction.id, transaction.family_id
+    family_left = config.attachment_max_family_bytes - await get_family_attachment_bytes(family_id, db)
+    max_size = min(config.attachment_max_bytes * config.attachment_max_files, family_left)
+    # Reject uploads announcing a larger body before reading it
+    if int(request.headers.get("content-length") or 0) > max_size + MULTIPART_OVERHEAD:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"The upload exceeds the {max_size} bytes allowed")
+    # Give the connection back to the pool while the body is received
+    await db.commit()
+    try:
+        uploads = await store_multipart_upload(request.headers.get("content-type", ""), request.stream(), get_blob_store(), max_file_size=config.attachment_max_bytes,
+                                               max_total_size=family_left, max_files=config.attachment_max_files, chunk_size=config.attachment_chunk_size,
+                                               compression_rules=config.attachment_compression)
+    except UploadError as e:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message=str(e))
+    if not uploads:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message="The upload must contain a file field")
     try:
+        # A concurrent release may have removed a blob the upload found already stored, check them under the blob locks
+        await lock_blobs({upload.digest for upload in uploads}, db)
+        store = get_blob_store()
+        for upload in uploads:
+            if not await run_in_threadpool(store.exists, upload.digest, upload.compression):
+                await db.rollback()
+                for digest, compression in {(upload.digest, upload.compression) for upload in uploads}:
+                    await release_blob(digest, db, compression)
+                return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"The content of {upload.filename or 'a file'} was removed while it was uploaded, upload it again")
+        result = await db.execute(insert(AttachmentModel).returning(AttachmentModel, sort_by_parameter_order=True),
+                                  [{"transaction_id": transaction_uuid, "family_id": family_id, "digest": upload.digest, "size": upload.size,
+                                    "content_type": upload.content_type, "filename": upload.filename, "compression": upload.compression, "stored_size": upload.stored_size}
+                                   for upload in uploads])
+        attachments = [AttachmentInfo(**attachment.__dict__) for attachment in result.scalars().all()]
         await db.commit()
-        await db.refresh(new_attachment)
-        return RestCreateAttachmentResponse(code=1, status="SUCCESS", message="Attachment created successfully", attachment=AttachmentInfo(**new_attachment.__dict__))
+        return RestCreateAttachmentResponse(code=1, status="SUCCESS", message="Attachments created successfully", attachment=attachments[0], attachments=attachments)
     except Exception as e:
         await db.rollback()
+        for digest, compression in {(upload.digest, upload.compression) for upload in uploads}:
+            await release_blob(digest, db, compression)
         return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"Failed to create attachment: {str(e)}")
 
-async def retrieve_attachment(attachment_id: str, current_user: UserModel, db: AsyncSession)-> StreamingResponse:
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against the entity tag of a download, weak tags compare equal to strong ones.
+    Args:
+        if_none_match (str): The If-None-Match header of the request.
+        etag (str): The quoted entity tag of the download.
+    Returns:
+        bool: True if the client already holds this content.
+    """
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+async def retrieve_attachment(attachment_id: str, request: Request, current_user: UserModel, db: AsyncSession)-> Response:
+    """
+    Download the content of an attachment.
+    Blobs on the local filesystem are served by a FileResponse, which honours Range and If-Range and reads the file
+    in chunks off the event loop. Compressed blobs are decompressed as they are streamed and always sent whole.
+    The ETag is the digest of the original content, so a matching If-None-Match gets a 304.
+    Args:
+        attachment_id (str): The unique identifier of the attachment.
+        request (Request): The request, holding the conditional and Range headers.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        Response: The content of the attachment, a 206 for a Range, a 304 if the client copy is current, or a BaseRestResponse with code 0 if the attachment does not exist.
+    Raises:
+        HTTPException: If the user is not a member of the family of the attachment.
+    """
     #Check if the attachment exists
-    attachment = await get_attachment_by_id(attachment_id, db)
+    attachment, family_id = await get_attachment_with_family_id(attachment_id, db)
     if not attachment:
         return BaseRestResponse(code=0, status="FAILED", message="Attachment not found")
-    transaction = await get_transaction_by_id(str(attachment.transaction_id), db)
     
     # Check if the user is a member of the family based on the attachment transaction
-    await check_user_in_family(str(transaction.family_id), current_user.id, db)
-    # Create a streaming response for the attachment
-    response = StreamingResponse(
-        iter([attachment.file_content]),
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={str(attachment.id)}"}
-    )
-    return response
+    await check_user_in_family(str(family_id), current_user.id, db)
+    etag = f'"{attachment.digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    store = get_blob_store()
+    path = store.local_path(attachment.digest, attachment.compression)
+    if path is None:
+        # Remote backends and compressed blobs cannot be sent from a path, stream them in chunks instead, decompressing on the way
+        if not await run_in_threadpool(store.exists, attachment.digest, attachment.compression):
+            return BaseRestResponse(code=0, status="FAILED", message="Attachment content not found")
+        return StreamingResponse(store.iter_chunks(attachment.digest, compression=attachment.compression), media_type=attachment.content_type,
+                                 headers={**headers, "Content-Disposition": f"attachment; filename={str(attachment.id)}", "Content-Length": str(attachment.size)})
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        return BaseRestResponse(code=0, status="FAILED", message="Attachment content not found")
+    return FileResponse(path, stat_result=stat_result, media_type=attachment.content_type, filename=str(attachment.id), content_disposition_type="attachment", headers=headers)
 
 async def delete_attachment(attachment_id: str, current_user: UserModel, db: AsyncSession)->BaseRestResponse:
     # Check if the attachment exists
-    attachment = await get_attachment_by_id(attachment_id, db)
+    attachment, family_id = await get_attachment_with_family_id(attachment_id, db)
     if not attachment:
         return BaseRestResponse(code=0, status="FAILED", message="Attachment not found")
-    transaction = await get_transaction_by_id(str(attachment.transaction_id), db)
     # Check if the user is a the owner of the family based on the attachment transaction
-    await check_user_is_family_owner(str(transaction.family_id), current_user.id, db)
-    # Delete the attachment
+    await check_user_is_family_owner(str(family_id), current_user.id, db)
+    # Delete the attachment, then its blob if no other attachment shares the content
+    digest, compression = attachment.digest, attachment.compression
     try:
         await db.delete(attachment)
         await db.commit()
-        return BaseRestResponse(code=1, status="SUCCESS", message="Attachment deleted successfully")
     except Exception as e:
         await db.rollback()
         return BaseRestResponse(code=0, status="FAILED", message=f"Failed to delete attachment: {str(e)}")
+    await release_blob(digest, db, compression)
+    return BaseRestResponse(code=1, status="SUCCESS", message="Attachment deleted successfully")
+
+async def lock_blobs(digests: Iterable[str], db: AsyncSession):
+    """
+    Lock digests until the end of the database transaction, so a blob is never removed between the moment an upload finds it
+    stored and the commit of the attachment referencing it. PostgreSQL takes an advisory lock per digest, in sorted order so
+    concurrent requests cannot deadlock. SQLite has no advisory locks, an empty UPDATE takes its database write lock instead.
+    Args:
+        digests (Iterable[str]): The digests of the blobs.
+        db (AsyncSession): The asynchronous database session, the caller commits or rolls back to release the locks.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        for digest in sorted(set(digests)):
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtextextended(f"blob:{digest}", 0))))
+    else:
+        await db.execute(text("UPDATE attachments SET digest = digest WHERE 0 = 1"))
+
+async def release_blob(digest: str, db: AsyncSession, compression: Optional[str] = None):
+    """
+    Remove a blob from the blob store once no attachment references its digest and codec anymore.
+    The references are counted and the blob removed under the lock of its digest, in a database transaction of its own.
+    Args:
+        digest (str): The digest of the blob.
+        db (AsyncSession): The asynchronous database session, without pending changes as it is committed.
+        compression (Optional[str]): The codec the blob is stored with.
+    """
+    await lock_blobs([digest], db)
+    result = await db.execute(select(func.count()).select_from(AttachmentModel)
+                              .where(AttachmentModel.digest == digest, AttachmentModel.compression.is_(None) if compression is None else AttachmentModel.compression == compression))
+    if result.scalar_one() == 0:
+        await run_in_threadpool(get_blob_store().delete, digest, compression)
+    await db.commit()
 
 async def get_attachment_by_id(attachment_id: str, db: AsyncSession)->AttachmentModel:
     """
@@ -89,9 +259,22 @@ async def get_attachment_by_id(attachment_id: str, db: AsyncSession)->Attachment
     Returns:
         AttachmentModel: The attachment object if found, otherwise None.
     """
-    result = await db.execute(select(AttachmentModel).where(AttachmentModel.id == UUID(attachment_id)))
+    result = await db.execute(select(AttachmentModel).options(load_only(*ATTACHMENT_METADATA_COLUMNS), raiseload("*")).where(AttachmentModel.id == UUID(attachment_id)))
     return result.scalars().first()
 
+async def get_attachment_with_family_id(attachment_id: str, db: AsyncSession)->tuple[Optional[AttachmentModel], Optional[UUID]]:
+    """
+    Retrieve the metadata of an attachment and the family it belongs to.
+    Args:
+        attachment_id (str): The unique identifier of the attachment.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        tuple[Optional[AttachmentModel], Optional[UUID]]: The attachment and the id of its family, (None, None) if it does not exist.
+    """
+    result = await db.execute(select(AttachmentModel).options(load_only(*ATTACHMENT_METADATA_COLUMNS), raiseload("*")).where(AttachmentModel.id == UUID(attachment_id)))
+    attachment = result.scalars().first()
+    return (attachment, attachment.family_id) if attachment else (None, None)
+
 async def get_attachment_by_id_with_transaction(attachment_id: str, db: AsyncSession)->AttachmentModel:
     """
     Retrieve an attachment by its ID from the database.
@@ -1,12 +1,65 @@
 from fastapi import HTTPException
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from models import FamilyModel,FamilyUserRole
+from models import FamilyModel,FamilyUserModel,FamilyUserRole
+from utilities import TTLCache
+from config import config
+from typing import Optional
 from uuid import UUID
 
+# Cache of (family_id, user_id) -> role, None is cached for users that are not members of an existing family.
+# The cache is per process, so membership changes made through another worker are visible after membership_cache_ttl seconds.
+membership_cache = TTLCache(name="membership", maxsize=config.membership_cache_size, ttl=config.membership_cache_ttl)
+_NOT_CACHED = object()
+
+def invalidate_family_membership(family_id: str, user_id: Optional[str] = None):
+    """
+    Drop cached memberships after the families_users table has changed.
+    Args:
+        family_id (str): The unique identifier of the family.
+        user_id (Optional[str]): The unique identifier of the user, all members of the family are dropped when omitted.
+    """
+    family_id = UUID(str(family_id))
+    if user_id is None:
+        membership_cache.discard_where(lambda key, _: key[0] == family_id)
+    else:
+        membership_cache.discard((family_id, UUID(str(user_id))))
+
+# Get the role of the user in the family through a single indexed lookup on families_users
+async def get_user_family_role(family_id: str, user_id: UUID, db: AsyncSession) -> Optional[FamilyUserRole]:
+    """
+    Resolve the role of a user in a family with a single query.
+    The family row is outer joined with the matching families_users row so that one round trip
+    both confirms the family exists and returns the membership role through the (family_id, user_id) index.
+    Results are served from the membership cache when available.
+    Args:
+        family_id (str): The unique identifier of the family.
+        user_id (UUID): The unique identifier of the user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        Optional[FamilyUserRole]: The role of the user in the family, None if the user is not a member.
+    Raises:
+        HTTPException:
+            - 404 NOT FOUND if the family does not exist.
+    """
+    cache_key = (UUID(family_id), user_id)
+    role = membership_cache.get(cache_key, _NOT_CACHED)
+    if role is not _NOT_CACHED:
+        return role
+    result = await db.execute(
+        select(FamilyModel.id, FamilyUserModel.role)
+        .outerjoin(FamilyUserModel, and_(FamilyUserModel.family_id == FamilyModel.id, FamilyUserModel.user_id == user_id))
+        .where(FamilyModel.id == cache_key[0])
+        .limit(1))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Family not found")
+    membership_cache.set(cache_key, row.role)
+    return row.role
+
 # Check if the user is a member of the family
-async def check_user_in_family(family_id: str, user_id: UUID, db: AsyncSession):
+async def check_user_in_family(family_id: str, user_id: UUID, db: AsyncSession) -> FamilyUserRole:
     """
     Check if the user is a member of the family.
     Args:
@@ -14,24 +67,19 @@ async def check_user_in_family(family_id: str, user_id: UUID, db: AsyncSession):
         user_id (str): The unique identifier of the user.
         db (AsyncSession): The asynchronous database session.
     Returns:
-        bool: True if the user is a member of the family, False otherwise.
+        FamilyUserRole: The role of the user in the family.
     Raises:
-        HTTPException: 
+        HTTPException:
             - 404 NOT FOUND if the family does not exist.
             - 403 FORBIDDEN if the user is not a member of the family.
     """
-    # Check if the family exists
-    family = await db.execute(select(FamilyModel).options(selectinload(FamilyModel.users)).where(FamilyModel.id == UUID(family_id)))
-    family = family.scalars().first()
-    if not family:
-        raise HTTPException(status_code=404, detail="Family not found")
-
-    # Check if the user is a member of the family
-    if not any(family_user.user_id == user_id for family_user in family.users):
+    role = await get_user_family_role(family_id, user_id, db)
+    if role is None:
         raise HTTPException(status_code=403, detail="User is not a member of this family")
+    return role
 
 # Check if the user is the owner of the family
-async def check_user_is_family_owner(family_id: str, user_id: UUID, db: AsyncSession):
+async def check_user_is_family_owner(family_id: str, user_id: UUID, db: AsyncSession) -> FamilyUserRole:
     """
     Check if the user is the owner of the family.
     Args:
@@ -39,24 +87,19 @@ async def check_user_is_family_owner(family_id: str, user_id: UUID, db: AsyncSes
         user_id (str): The unique identifier of the user.
         db (AsyncSession): The asynchronous database session.
     Returns:
-        bool: True if the user is the owner of the family, False otherwise.
+        FamilyUserRole: The role of the user in the family (always FamilyUserRole.OWNER).
     Raises:
-        HTTPException: 
+        HTTPException:
             - 404 NOT FOUND if the family does not exist.
             - 403 FORBIDDEN if the user is not the owner of the family.
     """
-    # Check if the family exists
-    family = await db.execute(select(FamilyModel).options(selectinload(FamilyModel.users)).where(FamilyModel.id == UUID(family_id)))
-    family = family.scalars().first()
-    if not family:
-        raise HTTPException(status_code=404, detail="Family not found")
-
-    # Check if the user is the owner of the family based on the family_user table
-    if not any(family_user.user_id == user_id and family_user.role==FamilyUserRole.OWNER for family_user in family.users):
+    role = await get_user_family_role(family_id, user_id, db)
+    if role != FamilyUserRole.OWNER:
         raise HTTPException(status_code=403, detail="User is not the owner of this family")
-    
+    return role
+
 # Check if user has one of the ROLEs mentioned in the array based on the family_user table
-async def check_user_has_role(family_id: str, user_id: UUID, roles: list[FamilyUserRole], db: AsyncSession):
+async def check_user_has_role(family_id: str, user_id: UUID, roles: list[FamilyUserRole], db: AsyncSession) -> FamilyUserRole:
     """
     Check if the user has one of the specified roles in the family.
     Args:
@@ -65,18 +108,13 @@ async def check_user_has_role(family_id: str, user_id: UUID, roles: list[FamilyU
         roles (list[FamilyUserRole]): List of roles to check against.
         db (AsyncSession): The asynchronous database session.
     Returns:
-        bool: True if the user has one of the specified roles, False otherwise.
+        FamilyUserRole: The role of the user in the family.
     Raises:
-        HTTPException: 
+        HTTPException:
             - 404 NOT FOUND if the family does not exist.
             - 403 FORBIDDEN if the user does not have any of the specified roles in the family.
     """
-    # Check if the family exists
-    family = await db.execute(select(FamilyModel).options(selectinload(FamilyModel.users)).where(FamilyModel.id == UUID(family_id)))
-    family = family.scalars().first()
-    if not family:
-        raise HTTPException(status_code=404, detail="Family not found")
-
-    # Check if the user has one of the specified roles in the family based on the family_user table
-    if not any(family_user.user_id == user_id and family_user.role in roles for family_user in family.users):
-        raise HTTPException(status_code=403, detail="User does not have any of the specified roles in this family")
\ No newline at end of file
+    role = await get_user_family_role(family_id, user_id, db)
+    if role is None or role not in roles:
+        raise HTTPException(status_code=403, detail="User does not have any of the specified roles in this family")
+    return role
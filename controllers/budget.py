@@ -2,20 +2,49 @@ from models import UserModel,BudgetModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from serializers import CreateBudget, UpdateBudget, RestCreateBudgetResponse, RestGetBudgetResponse, RestGetAllBudgetsOfamilyResponse, BaseRestResponse,BudgetInfo
+from serializers import BudgetUtilization,RestGetBudgetUtilizationResponse
 from uuid import UUID
 from .authorization import check_user_in_family,check_user_is_family_owner
-from .family import get_family_by_id,get_family_by_id_with_budget
+from .family import get_family_by_id
+from .ledger import refresh_budget_totals
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from typing import Optional
  
 
-async def get_all_budgets_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestGetAllBudgetsOfamilyResponse:
-    # Check if the user is a member of the family
+async def get_all_budgets_of_family(family_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE)->RestGetAllBudgetsOfamilyResponse:
+    # Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    # Get family
-    family = await get_family_by_id_with_budget(family_id, db)
-    if not family:
-        return RestGetAllBudgetsOfamilyResponse(code=0, status="FAILED", message="Family not found")
-    # Return all budgets of the family from the family
-    return RestGetAllBudgetsOfamilyResponse(code=1, status="SUCCESS", message="Family budgets retrieved successfully", budgets=[BudgetInfo(**budget.__dict__) for budget in family.budget])
+    # Return a page of budgets of the family ordered by creation time
+    try:
+        statement = paginate(select(BudgetModel).where(BudgetModel.family_id == UUID(family_id)), BudgetModel.created_at, BudgetModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllBudgetsOfamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    budgets, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    return RestGetAllBudgetsOfamilyResponse(code=1, status="SUCCESS", message="Family budgets retrieved successfully", budgets=[BudgetInfo(**budget.__dict__) for budget in budgets], next_cursor=next_cursor)
+
+async def get_budget_utilization_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestGetBudgetUtilizationResponse:
+    """
+    Report how much of every budget of a family is assigned and spent.
+    The transactions of a budget are those of its category, and of its account when it has one, dated from start_date to end_date included.
+    Their totals are kept on the budget by every transaction and budget transaction write, so the report reads the budgets of the family alone.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestGetBudgetUtilizationResponse: The assigned, spent and remaining amounts of every budget with the transactions not assigned to it yet, ordered by start date.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    result = await db.execute(select(BudgetModel.id, BudgetModel.category_id, BudgetModel.account_id, BudgetModel.amount, BudgetModel.start_date, BudgetModel.end_date,
+                                     BudgetModel.spent, BudgetModel.spent_count, BudgetModel.assigned, BudgetModel.assigned_spent, BudgetModel.assigned_count)
+                              .where(BudgetModel.family_id == UUID(family_id)).order_by(BudgetModel.start_date, BudgetModel.id))
+    budgets = [BudgetUtilization(budget_id=row.id, category_id=row.category_id, account_id=row.account_id, amount=row.amount, start_date=row.start_date, end_date=row.end_date,
+                                 assigned=row.assigned, spent=row.spent, remaining=row.amount - row.spent, transaction_count=row.spent_count,
+                                 unassigned_amount=row.spent - row.assigned_spent, unassigned_count=row.spent_count - row.assigned_count) for row in result.all()]
+    return RestGetBudgetUtilizationResponse(code=1, status="SUCCESS", message="Budget utilization retrieved successfully", budgets=budgets)
 
 async def create_budget_for_family(family_id: str, new_budget: CreateBudget, current_user: UserModel, db: AsyncSession)-> RestCreateBudgetResponse:
     # Check if the user is the owner of the family
@@ -28,6 +57,8 @@ async def create_budget_for_family(family_id: str, new_budget: CreateBudget, cur
     new_budget = BudgetModel(**new_budget.model_dump(exclude={"entry_category_id", "entry_account_id"}), family_id=family.id, user_id=current_user.id)
     db.add(new_budget)
     try:
+        await db.flush()
+        await refresh_budget_totals([new_budget.id], db)
         await db.commit()
         await db.refresh(new_budget)
         return RestCreateBudgetResponse(code=1, status="SUCCESS", message="Budget created successfully", budget=BudgetInfo(**new_budget.__dict__))
@@ -59,6 +90,8 @@ async def update_budget(budget_id: str, updated_budget: UpdateBudget, current_us
             setattr(budget, key, value)
     db.add(budget)
     try:
+        await db.flush()
+        await refresh_budget_totals([budget.id], db)
         await db.commit()
         await db.refresh(budget)
         return RestCreateBudgetResponse(code=1, status="SUCCESS", message="Budget updated successfully", budget=BudgetInfo(**budget.__dict__))
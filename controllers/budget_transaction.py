@@ -6,32 +6,38 @@ from serializers import BudgetTransactionInfo
 from uuid import UUID
 from .authorization import check_user_in_family,check_user_is_family_owner
 from .family import get_family_by_id
+from .ledger import record_budget_assignment
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from typing import Optional
 
-async def get_all_budget_transactions_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestGetAllBudgetTransactionsOfamilyResponse:
+async def get_all_budget_transactions_of_family(family_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE)->RestGetAllBudgetTransactionsOfamilyResponse:
     """
-    Retrieve all budget transactions associated with a specific family.
+    Retrieve a page of the budget transactions associated with a specific family, ordered by creation time.
     Args:
         family_id (str): The unique identifier of the family.
         current_user (UserModel): The currently authenticated user.
         db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of budget transactions in the page.
     Returns:
-        RestGetAllBudgetTransactionsOfamilyResponse: Response object containing the status, message, and a list of budget transactions for the family.
+        RestGetAllBudgetTransactionsOfamilyResponse: Response object containing the status, message, a page of budget transactions for the family and the cursor of the next page.
     Raises:
         HTTPException: If the user is not a member of the family or if the family does not exist.
     """
 
-    # Check if the user is a member of the family
+    # Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    # Get family
-    family = await get_family_by_id(family_id, db)
-    if not family:
-        return RestGetAllBudgetTransactionsOfamilyResponse(code=0, status="FAILED", message="Family not found")
-    # Get all budget transactions of the family
-    budget_transactions = await get_budget_transaction_by_family_id(family_id, db)
-    if not budget_transactions:
+    # Get a page of budget transactions of the family
+    try:
+        statement = paginate(select(BudgetTransactionModel).where(BudgetTransactionModel.family_id == UUID(family_id)), BudgetTransactionModel.created_at, BudgetTransactionModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllBudgetTransactionsOfamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    budget_transactions, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    if not budget_transactions and not cursor:
         return RestGetAllBudgetTransactionsOfamilyResponse(code=0, status="FAILED", message="No budget transactions found for the family")
-    # Return all budget transactions of the family from the family
-    return RestGetAllBudgetTransactionsOfamilyResponse(code=1, status="SUCCESS", message="Family budget transactions retrieved successfully", budget_transactions=[BudgetTransactionInfo(**item.__dict__) for item in budget_transactions])
+    # Return the page of budget transactions of the family
+    return RestGetAllBudgetTransactionsOfamilyResponse(code=1, status="SUCCESS", message="Family budget transactions retrieved successfully", budget_transactions=[BudgetTransactionInfo(**item.__dict__) for item in budget_transactions], next_cursor=next_cursor)
 
 async def add_budget_transaction_for_family(family_id: str, new_budget_transaction: CreateBudgetTransaction, current_user: UserModel, db: AsyncSession)-> RestCreateBudgetTransactionResponse:
     """
@@ -60,6 +66,7 @@ async def add_budget_transaction_for_family(family_id: str, new_budget_transacti
     new_budget_transaction = BudgetTransactionModel(**new_budget_transaction.model_dump(exclude={"entry_budget_id", "entry_transaction_id"}), family_id=family.id)
     db.add(new_budget_transaction)
     try:
+        await record_budget_assignment(new_budget_transaction.budget_id, new_budget_transaction.transaction_id, new_budget_transaction.assigned_amount, 1, db)
         await db.commit()
         await db.refresh(new_budget_transaction)
         return RestCreateBudgetTransactionResponse(code=1, status="SUCCESS", message="Budget transaction created successfully", budget_transaction=BudgetTransactionInfo(**new_budget_transaction.__dict__))
@@ -112,8 +119,10 @@ async def delete_budget_transaction(budget_transaction_id: str, current_user: Us
     await check_user_is_family_owner(str(budget_transaction.family_id), current_user.id, db)
     
     # Delete budget transaction
+    budget_id, transaction_id, assigned_amount = budget_transaction.budget_id, budget_transaction.transaction_id, budget_transaction.assigned_amount
     await db.delete(budget_transaction)
     try:
+        await record_budget_assignment(budget_id, transaction_id, assigned_amount, -1, db)
         await db.commit()
         return BaseRestResponse(code=1, status="SUCCESS", message="Budget transaction deleted successfully")
     except:
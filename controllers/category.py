@@ -6,28 +6,34 @@ from sqlalchemy.orm import selectinload
 from serializers import CreatedCategory,CreateCategory, UpdateCategory, RestCreateCategoryResponse, RestGetCategoryResponse, RestGetAllCategoriesOfamilyResponse, BaseRestResponse
 from uuid import UUID
 from .authorization import check_user_in_family,check_user_is_family_owner
-from .family import get_family_by_id,get_family_by_id_with_category
+from .family import get_family_by_id
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from typing import Optional
 
-async def get_all_categories_of_family(family_id:str,current_user:UserModel,db:AsyncSession)->RestGetAllCategoriesOfamilyResponse:
+async def get_all_categories_of_family(family_id:str,current_user:UserModel,db:AsyncSession,cursor:Optional[str]=None,limit:int=DEFAULT_PAGE_SIZE)->RestGetAllCategoriesOfamilyResponse:
     """
-    Retrieve all categories associated with a specific family.
+    Retrieve a page of the categories associated with a specific family, ordered by creation time.
     Args:
         family_id (str): The unique identifier of the family.
         current_user (UserModel): The currently authenticated user.
         db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of categories in the page.
     Returns:
-        RestGetAllCategoriesOfamilyResponse: A response object containing the status, message, and a list of categories if successful.
-            If the family is not found, returns a response with code 0 and an appropriate message.
+        RestGetAllCategoriesOfamilyResponse: A response object containing the status, message, a page of categories and the cursor of the next page if successful.
+            If the cursor is invalid, returns a response with code 0 and an appropriate message.
     """
 
-    # Check if the user is a member of the family
+    # Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    # Get family
-    family = await get_family_by_id_with_category(family_id, db)
-    if not family:
-        return RestGetAllCategoriesOfamilyResponse(code=0, status="FAILED", message="Family not found")
-    # Return all categories of the family from the family
-    return RestGetAllCategoriesOfamilyResponse(code=1, status="SUCCESS", message="Family categories retrieved successfully", categories=[CreatedCategory(**category.__dict__) for category in family.category])
+    # Return a page of categories of the family
+    try:
+        statement = paginate(select(CategoryModel).where(CategoryModel.family_id == UUID(family_id)), CategoryModel.created_at, CategoryModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllCategoriesOfamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    categories, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    return RestGetAllCategoriesOfamilyResponse(code=1, status="SUCCESS", message="Family categories retrieved successfully", categories=[CreatedCategory(**category.__dict__) for category in categories], next_cursor=next_cursor)
 
 async def create_category_for_family(family_id:str,new_category:CreateCategory,current_user:UserModel,db:AsyncSession)-> RestCreateCategoryResponse:
     """
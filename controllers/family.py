@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from uuid import UUID
-from .authorization import check_user_is_family_owner,check_user_in_family
+from .authorization import check_user_is_family_owner,check_user_in_family,invalidate_family_membership
 
 async def create_family(new_family: CreateFamily,current_user: UserModel,db: AsyncSession)->RestFamilyCreationResponse:
     """
@@ -92,6 +92,7 @@ async def delete_family(family_id: str,current_user:UserModel,db: AsyncSession)-
         await db.flush()
         await db.delete(family)
         await db.commit()
+        invalidate_family_membership(family_id)
         return RestFamilyCreationResponse(code=1,status="SUCCESSFUL",message="Family deleted successfully")
     except Exception as e:
         return RestFamilyCreationResponse(code=0,status="FAILED",message=f"Failed to delete family: {str(e)}")
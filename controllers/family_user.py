@@ -3,7 +3,7 @@ from serializers import FamilyUserInfo,FamilyInfo,RestGetAllUsersInFamilyRespons
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from .authorization import check_user_is_family_owner
+from .authorization import check_user_is_family_owner,invalidate_family_membership
 from uuid import UUID
 
 async def get_all_users_in_family(family_id: str,current_user: UserModel, db: AsyncSession) -> RestGetAllUsersInFamilyResponse:
@@ -74,6 +74,7 @@ async def add_user_to_family(family_id:str,user_addition: AddUserToFamily,curren
     try:
         await db.flush()
         await db.commit()
+        invalidate_family_membership(family_id, user_addition.user_id)
         await db.refresh(family_user)
         return RestAddUserToFamilyResponse(code=1, status="SUCCESS", message="User added to family",
                                        family_user_info=FamilyUserInfo(**family_user.__dict__))
@@ -108,9 +109,10 @@ async def remove_user_from_family(family_id:str,user_id: str,current_user: UserM
         return BaseRestResponse(code=0, status="FAILED", message="User not found in family")
     if family_user.role == FamilyUserRole.OWNER:
         return BaseRestResponse(code=0, status="FAILED", message="Cannot remove the owner of the family")
-    db.delete(family_user)
+    await db.delete(family_user)
     try:
         await db.commit()
+        invalidate_family_membership(family_id, user_id)
         return BaseRestResponse(code=1, status="SUCCESS", message="User removed from family")
     except:
         return BaseRestResponse(code=0, status="FAILED", message="Failed to remove user from family")
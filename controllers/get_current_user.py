@@ -1,39 +1,74 @@
 from typing import Annotated
+from datetime import datetime, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer,HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from models.user import UserModel
 from database import get_db
 from jwt import DecodeError, ExpiredSignatureError
-from utilities import decode_token
-from .user import get_user_by_id as ControllerGetUserById
+from serializers import AuthenticatedUser
+from utilities import decode_token_claims,TTLCache
+from config import config
+from uuid import UUID
 
 http_bearer = HTTPBearer()
 
-async def get_current_user(token: Annotated[HTTPAuthorizationCredentials, Depends(http_bearer)], db: AsyncSession = Depends(get_db))->UserModel:
+# Cache of bearer token -> AuthenticatedUser, an entry never outlives the token expiry.
+# The cache is per process, so a user deleted through another worker keeps access for at most principal_cache_ttl seconds.
+principal_cache = TTLCache(name="principal", maxsize=config.principal_cache_size, ttl=config.principal_cache_ttl)
+
+def invalidate_principal(user_id: UUID):
+    """
+    Drop every cached principal of a user after the user has been updated or deleted.
+    Args:
+        user_id (UUID): The unique identifier of the user.
+    """
+    principal_cache.discard_where(lambda _, principal: principal.id == user_id)
+
+async def get_principal_by_id(user_id: str, db: AsyncSession) -> AuthenticatedUser:
+    """
+    Fetch the columns needed to identify a user, without the password hash.
+    Args:
+        user_id (str): The ID of the user to fetch.
+        db (AsyncSession): The database session to use for the query.
+    Returns:
+        AuthenticatedUser: The slim user record if found, None otherwise.
+    """
+    result = await db.execute(select(UserModel.id, UserModel.name, UserModel.email).where(UserModel.id == UUID(user_id)))
+    row = result.first()
+    return AuthenticatedUser.model_validate(row) if row else None
+
+async def get_current_user(token: Annotated[HTTPAuthorizationCredentials, Depends(http_bearer)], db: AsyncSession = Depends(get_db))->AuthenticatedUser:
     """
     Retrieves the current authenticated user based on the provided JWT token.
+    Tokens that were already verified are answered from the principal cache without decoding or querying the database.
     Args:
         token (Annotated[HTTPAuthorizationCredentials, Depends(http_bearer)]): The HTTP bearer token credentials extracted from the request.
         db (AsyncSession, optional): SQLAlchemy database session dependency.
     Returns:
-        UserModel: The user model instance corresponding to the authenticated user.
+        AuthenticatedUser: The immutable record of the authenticated user.
     Raises:
-        HTTPException: 
+        HTTPException:
             - 403 FORBIDDEN if the token cannot be decoded or has expired.
             - 401 UNAUTHORIZED if the user does not exist.
             - 403 FORBIDDEN if there is an error retrieving the user from the database.
     """
 
-    sub_val = None
+    principal = principal_cache.get(token.credentials)
+    if principal is not None:
+        return principal
     try:
-        sub_val = decode_token(token.credentials)
+        claims = decode_token_claims(token.credentials)
+        sub_val = claims.get("sub")
         if sub_val:
             try:
-                user = await ControllerGetUserById(sub_val, db)
+                user = await get_principal_by_id(sub_val, db)
                 if not user:
                     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                  detail="Invalid username or password")
+                if "exp" in claims:
+                    principal_cache.set(token.credentials, user, ttl=claims["exp"] - datetime.now(timezone.utc).timestamp())
                 return user
             except Exception as e:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
@@ -47,4 +82,3 @@ async def get_current_user(token: Annotated[HTTPAuthorizationCredentials, Depend
     except ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                              detail='Token has expired')
-
@@ -1,83 +1,155 @@
-from models import UserModel,GoalModel
+from models import UserModel,GoalModel,AccountModel,CategoryModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from serializers import CreateGoal, UpdateGoal, RestCreateGoalResponse, RestGetGoalResponse, RestGetAllGoalsOfamilyResponse, BaseRestResponse
-from serializers import GoalInfo
+from serializers import GoalInfo,RestRecomputeGoalsResponse
 from .authorization import check_user_in_family,check_user_is_family_owner
-from .family import get_family_by_id
+from .ledger import refresh_goal_savings
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE
+from datetime import date,datetime,timedelta,timezone
+from typing import Optional
 from uuid import UUID
+import math
 
-async def get_all_goals_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestGetAllGoalsOfamilyResponse:
+# The fields that decide which transactions count towards a goal
+GOAL_LINK_FIELDS = ("account_id", "category_id", "start_date")
+
+def projected_completion_date(goal: GoalModel, today: Optional[date] = None) -> Optional[date]:
+    """
+    Project the day a goal reaches its target if the family keeps saving at the average daily rate since its start date.
+    Args:
+        goal (GoalModel): The goal.
+        today (Optional[date]): The day the projection is made on, today in UTC when omitted.
+    Returns:
+        Optional[date]: The projected day, today once the target is reached, None when nothing was saved yet or the target is out of reach.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    saved, target = float(goal.saved_amount or 0), float(goal.target_amount or 0)
+    if saved >= target:
+        return today
+    elapsed = (today - goal.start_date.date()).days + 1
+    if saved <= 0 or elapsed <= 0:
+        return None
+    try:
+        return today + timedelta(days=math.ceil((target - saved) * elapsed / saved))
+    except OverflowError:
+        return None
+
+def goal_info(goal: GoalModel) -> GoalInfo:
+    """
+    The GoalInfo of a loaded goal with its projected completion date.
+    """
+    return GoalInfo(**goal.__dict__, projected_completion_date=projected_completion_date(goal))
+
+async def check_goal_links(family_id: UUID, account_id: Optional[UUID], category_id: Optional[UUID], db: AsyncSession) -> Optional[str]:
     """
-    Retrieve all goals associated with a specific family.
+    Check that the account and the category a goal is linked to belong to its family.
+    Args:
+        family_id (UUID): The unique identifier of the family of the goal.
+        account_id (Optional[UUID]): The account of the goal.
+        category_id (Optional[UUID]): The category of the goal.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        Optional[str]: The reason the links are refused, None when they are valid.
+    """
+    if account_id and not await db.scalar(select(AccountModel.id).where(AccountModel.id == account_id, AccountModel.family_id == family_id)):
+        return "Account not found in the family"
+    if category_id and not await db.scalar(select(CategoryModel.id).where(CategoryModel.id == category_id, CategoryModel.family_id == family_id)):
+        return "Category not found in the family"
+    return None
+
+async def get_all_goals_of_family(family_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE)->RestGetAllGoalsOfamilyResponse:
+    """
+    Retrieve a page of the goals associated with a specific family, ordered by creation time.
     Args:
         family_id (str): The unique identifier of the family.
         current_user (UserModel): The currently authenticated user.
         db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of goals in the page.
     Returns:
-        RestGetAllGoalsOfamilyResponse: Response object containing the status, message, and a list of goals for the family.
+        RestGetAllGoalsOfamilyResponse: Response object containing the status, message, a page of goals for the family and the cursor of the next page.
     Raises:
         HTTPException: If the user is not a member of the family or if the family does not exist.
     """
-    # Check if the user is a member of the family
+    # Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    # Get family
-    family = await get_family_by_id(family_id, db)
-    if not family:
-        return BaseRestResponse(code=0, status="FAILED", message="Family not found")
-    # Return all goals of the family from the family
-    return RestGetAllGoalsOfamilyResponse(code=1, status="SUCCESS", message="Family goals retrieved successfully", goals=[GoalInfo(**goal) for goal in family.goals])
+    # Return a page of goals of the family
+    try:
+        statement = paginate(select(GoalModel).where(GoalModel.family_id == UUID(family_id)), GoalModel.created_at, GoalModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllGoalsOfamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    goals, next_cursor = page_results(result.scalars().all(), "created_at", limit)
+    return RestGetAllGoalsOfamilyResponse(code=1, status="SUCCESS", message="Family goals retrieved successfully", goals=[goal_info(goal) for goal in goals], next_cursor=next_cursor)
 
 async def create_goal_for_family(family_id: str, new_goal: CreateGoal, current_user: UserModel, db: AsyncSession)-> RestCreateGoalResponse:
     # Check if the user is the owner of the family
     await check_user_is_family_owner(family_id, current_user.id, db)
-    # Create new goal
-    new_goal = GoalModel(**new_goal.model_dump(), family_id=UUID(family_id), user_id=current_user.id)
+    # Check the account and the category the goal is linked to
+    error = await check_goal_links(UUID(family_id), new_goal.account_id, new_goal.category_id, db)
+    if error:
+        return RestCreateGoalResponse(code=0, status="FAILED", message=error)
+    # Create new goal, a linked goal starts counting its transactions when it is created unless a start date is given
+    values = new_goal.model_dump()
+    values["start_date"] = values["start_date"] or datetime.now(timezone.utc).replace(tzinfo=None)
+    new_goal = GoalModel(**values, family_id=UUID(family_id), user_id=current_user.id)
     db.add(new_goal)
     try:
+        await db.flush()
+        await refresh_goal_savings(db, goal_ids=[new_goal.id])
         await db.commit()
         await db.refresh(new_goal)
-        return RestCreateGoalResponse(code=1, status="SUCCESS", message="Goal created successfully", goal=GoalInfo(**new_goal.model_dump()))
+        return RestCreateGoalResponse(code=1, status="SUCCESS", message="Goal created successfully", goal=goal_info(new_goal))
     except Exception as e:
         await db.rollback()
-        return BaseRestResponse(code=0, status="FAILED", message=f"Failed to create goal: {str(e)}")
+        return RestCreateGoalResponse(code=0, status="FAILED", message=f"Failed to create goal: {str(e)}")
 
 async def retrieve_goal(goal_id: str, current_user: UserModel, db: AsyncSession)->RestGetGoalResponse:
-    # Check if the user is a member of the family
-    await check_user_in_family(goal_id, current_user.id, db)
     # Get goal
     goal = await get_goal_by_id(goal_id, db)
     if not goal:
-        return BaseRestResponse(code=0, status="FAILED", message="Goal not found")
-    return RestGetGoalResponse(code=1, status="SUCCESS", message="Goal retrieved successfully", goal=GoalInfo(**goal.model_dump()))
+        return RestGetGoalResponse(code=0, status="FAILED", message="Goal not found")
+    # Check if the user is a member of the family
+    await check_user_in_family(str(goal.family_id), current_user.id, db)
+    return RestGetGoalResponse(code=1, status="SUCCESS", message="Goal retrieved successfully", goal=goal_info(goal))
 
 async def update_goal(goal_id: str, updated_goal: UpdateGoal, current_user: UserModel, db: AsyncSession)->RestCreateGoalResponse:
-    # Check if the user is the owner of the family
-    await check_user_is_family_owner(goal_id, current_user.id, db)
     # Get goal
     goal = await get_goal_by_id(goal_id, db)
     if not goal:
-        return BaseRestResponse(code=0, status="FAILED", message="Goal not found")
-    # Update goal
-    for key, value in updated_goal.model_dump().items():
-        if value is not None:
-            setattr(goal, key, value)
+        return RestCreateGoalResponse(code=0, status="FAILED", message="Goal not found")
+    # Check if the user is the owner of the family
+    await check_user_is_family_owner(str(goal.family_id), current_user.id, db)
+    # Update goal, an account or a category set to null unlinks the goal
+    changes = {key: value for key, value in updated_goal.model_dump(exclude_unset=True).items() if value is not None or key in ("account_id", "category_id")}
+    error = await check_goal_links(goal.family_id, changes.get("account_id"), changes.get("category_id"), db)
+    if error:
+        return RestCreateGoalResponse(code=0, status="FAILED", message=error)
+    linked = any(changes.get(key, getattr(goal, key)) is not None for key in ("account_id", "category_id"))
+    if linked and "saved_amount" in changes:
+        return RestCreateGoalResponse(code=0, status="FAILED", message="The saved amount of a goal linked to an account or a category follows its transactions")
+    for key, value in changes.items():
+        setattr(goal, key, value)
     db.add(goal)
     try:
+        if linked and any(key in changes for key in GOAL_LINK_FIELDS):
+            await db.flush()
+            await refresh_goal_savings(db, goal_ids=[goal.id])
         await db.commit()
         await db.refresh(goal)
-        return RestCreateGoalResponse(code=1, status="SUCCESS", message="Goal updated successfully", goal=GoalInfo(**goal.model_dump()))
+        return RestCreateGoalResponse(code=1, status="SUCCESS", message="Goal updated successfully", goal=goal_info(goal))
     except Exception as e:
         await db.rollback()
-        return BaseRestResponse(code=0, status="FAILED", message=f"Failed to update goal: {str(e)}")
+        return RestCreateGoalResponse(code=0, status="FAILED", message=f"Failed to update goal: {str(e)}")
 
 async def delete_goal(goal_id: str, current_user: UserModel, db: AsyncSession)->BaseRestResponse:
-    # Check if the user is the owner of the family
-    await check_user_is_family_owner(goal_id, current_user.id, db)
     # Get goal
     goal = await get_goal_by_id(goal_id, db)
     if not goal:
         return BaseRestResponse(code=0, status="FAILED", message="Goal not found")
+    # Check if the user is the owner of the family
+    await check_user_is_family_owner(str(goal.family_id), current_user.id, db)
     # Delete goal
     try:
         await db.delete(goal)
@@ -87,6 +159,27 @@ async def delete_goal(goal_id: str, current_user: UserModel, db: AsyncSession)->
         await db.rollback()
         return BaseRestResponse(code=0, status="FAILED", message=f"Failed to delete goal: {str(e)}")
 
+async def recompute_goals_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestRecomputeGoalsResponse:
+    """
+    Recompute the saved amount of every goal of a family linked to an account or a category from its transactions, with one UPDATE.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestRecomputeGoalsResponse: Response object containing the number of goals recomputed.
+    Raises:
+        HTTPException: If the user is not the owner of the family or if the family does not exist.
+    """
+    await check_user_is_family_owner(family_id, current_user.id, db)
+    try:
+        recomputed = await refresh_goal_savings(db, family_id=UUID(family_id))
+        await db.commit()
+        return RestRecomputeGoalsResponse(code=1, status="SUCCESS", message="Family goals recomputed successfully", recomputed=recomputed)
+    except Exception as e:
+        await db.rollback()
+        return RestRecomputeGoalsResponse(code=0, status="FAILED", message=f"Failed to recompute goals: {str(e)}")
+
 async def get_goal_by_id(goal_id: str, db: AsyncSession)->GoalModel:
     """
     Retrieve a goal by its ID.
@@ -96,5 +189,5 @@ async def get_goal_by_id(goal_id: str, db: AsyncSession)->GoalModel:
     Returns:
         GoalModel: The goal object if found, None otherwise.
     """
-    result = await db.execute(select(GoalModel).where(GoalModel.id == goal_id))
-    return result.scalars().first()
\ No newline at end of file
+    result = await db.execute(select(GoalModel).where(GoalModel.id == UUID(goal_id)))
+    return result.scalars().first()
@@ -0,0 +1,498 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional
+from uuid import UUID
+from sqlalchemy import Date, and_, bindparam, case, cast, delete, func, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+from models import FamilyMonthlyCategoryTotalModel,TransactionModel,BudgetModel,BudgetTransactionModel,AccountModel,AccountDailyBalanceModel,GoalModel,EntryType
+from utilities import TTLCache
+from config import config
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_SCALE = Decimal("0.001")
+# The columns of a transaction the rollups are computed from
+LEDGER_COLUMNS = ("id", "family_id", "category_id", "account_id", "date", "transaction_type", "amount")
+# The running totals of a budget, kept in step by the ledger and the budget transaction controllers
+BUDGET_TOTAL_COLUMNS = ("spent", "spent_count", "assigned", "assigned_spent", "assigned_count")
+# The sign a transaction of every type applies to the balance of its account, a transfer keeps the sign of its amount
+BALANCE_SIGNS = {EntryType.INCOME: 1, EntryType.EXPENSE: -1, EntryType.TRANSFER: 1}
+
+# Cache of (family_id, from, to, interval) -> net-worth points, dropped on every write to the balances of the family.
+# The cache is per process, so writes made through another worker are visible after net_worth_cache_ttl seconds.
+net_worth_cache = TTLCache(name="net_worth", maxsize=config.net_worth_cache_size, ttl=config.net_worth_cache_ttl)
+
+class BalanceDrift(NamedTuple):
+    """
+    An account whose stored balance or daily changes did not match its transactions when it was reconciled.
+    Attributes:
+        account_id (UUID): The unique identifier of the account.
+        family_id (UUID): The unique identifier of the family of the account.
+        stored (Decimal): The balance stored on the account before it was rebuilt.
+        expected (Decimal): The balance computed from the transactions.
+        days (int): The number of days whose stored change was wrong or missing.
+    """
+    account_id: UUID
+    family_id: UUID
+    stored: Decimal
+    expected: Decimal
+    days: int
+
+def invalidate_net_worth(family_ids: Iterable):
+    """
+    Drop the cached net-worth reports of families whose balances have changed.
+    Args:
+        family_ids (Iterable): The unique identifiers of the families.
+    """
+    family_ids = {UUID(str(family_id)) for family_id in family_ids}
+    if family_ids:
+        net_worth_cache.discard_where(lambda key, _: key[0] in family_ids)
+
+def month_of(moment: datetime) -> date:
+    """
+    The first day of the month of a date or a datetime, the key of the monthly totals.
+    """
+    return date(moment.year, moment.month, 1)
+
+def as_amount(amount) -> Decimal:
+    """
+    An amount as a Decimal with the scale of the amount columns.
+    """
+    return Decimal(str(amount)).quantize(AMOUNT_SCALE)
+
+def as_naive(moment: datetime) -> datetime:
+    """
+    A datetime without its timezone, as the DateTime columns store it.
+    """
+    return moment.replace(tzinfo=None) if moment.tzinfo else moment
+
+def signed_amount(entry: dict) -> Decimal:
+    """
+    The amount a transaction adds to the balance of its account, following BALANCE_SIGNS.
+    """
+    return BALANCE_SIGNS[entry["transaction_type"]] * as_amount(entry["amount"])
+
+def signed_amount_column():
+    """
+    The SQL expression of signed_amount over the transactions table.
+    """
+    return case((TransactionModel.transaction_type == EntryType.EXPENSE, -TransactionModel.amount), else_=TransactionModel.amount)
+
+def day_column(db: AsyncSession):
+    """
+    The SQL expression of the day of the transactions, date() returns text on SQLite so its result is typed as a Date.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(TransactionModel.date, Date)
+    return func.date(TransactionModel.date, type_=Date)
+
+def ledger_entry(transaction: TransactionModel) -> dict:
+    """
+    Copy the columns the rollups depend on out of a loaded transaction, before it is changed or deleted.
+    Args:
+        transaction (TransactionModel): The loaded transaction.
+    Returns:
+        dict: The values of LEDGER_COLUMNS.
+    """
+    return {column: getattr(transaction, column) for column in LEDGER_COLUMNS}
+
+def upsert_insert(db: AsyncSession):
+    """
+    The INSERT construct of the dialect of the session, both PostgreSQL and SQLite support ON CONFLICT DO UPDATE.
+    """
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def monthly_deltas(removed: Iterable[dict], added: Iterable[dict]) -> dict[tuple, list]:
+    """
+    Net the changes of a write per family, month, category and type, so every row of the rollup is touched once.
+    Args:
+        removed (Iterable[dict]): The values of the transactions taken out, deleted or before an update.
+        added (Iterable[dict]): The values of the transactions put in, created or after an update.
+    Returns:
+        dict[tuple, list]: The amount and count to add to every (family_id, month, category_id, transaction_type) key.
+    """
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for sign, entries in ((-1, removed), (1, added)):
+        for entry in entries:
+            delta = deltas[(entry["family_id"], month_of(entry["date"]), entry["category_id"], entry["transaction_type"])]
+            delta[0] += sign * as_amount(entry["amount"])
+            delta[1] += sign
+    return {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+async def apply_monthly_deltas(deltas: dict[tuple, list], db: AsyncSession):
+    """
+    Add the deltas to family_monthly_category_totals with one executemany upsert, rows left without transactions are removed.
+    The keys are written in sorted order so concurrent writers lock the rows in the same order and cannot deadlock.
+    Args:
+        deltas (dict[tuple, list]): The deltas returned by monthly_deltas.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    if not deltas:
+        return
+    table = FamilyMonthlyCategoryTotalModel
+    rows = [{"family_id": family_id, "month": month, "category_id": category_id, "transaction_type": transaction_type, "total": total, "transaction_count": count}
+            for (family_id, month, category_id, transaction_type), (total, count) in sorted(deltas.items(), key=lambda item: (str(item[0][0]), item[0][1], str(item[0][2]), item[0][3].name))]
+    statement = upsert_insert(db)(table)
+    statement = statement.on_conflict_do_update(index_elements=[table.family_id, table.month, table.category_id, table.transaction_type],
+                                                set_={"total": table.total + statement.excluded.total,
+                                                      "transaction_count": table.transaction_count + statement.excluded.transaction_count,
+                                                      "modified_at": func.now()})
+    await db.execute(statement, rows)
+    emptied = {family_id for (family_id, _, _, _), (_, count) in deltas.items() if count < 0}
+    if emptied:
+        await db.execute(delete(table).where(table.family_id.in_(emptied), table.transaction_count <= 0))
+
+def budget_matches(budget, category_id: UUID, account_id: UUID, moment: datetime) -> bool:
+    """
+    Whether a transaction of the category and account dated at a moment counts in the spent total of a budget.
+    """
+    return (budget.category_id == category_id and (budget.account_id is None or budget.account_id == account_id)
+            and as_naive(budget.start_date) <= as_naive(moment) <= as_naive(budget.end_date))
+
+async def apply_budget_deltas(deltas: dict[UUID, dict], db: AsyncSession):
+    """
+    Add deltas to the running totals of budgets with one executemany UPDATE, in budget id order so concurrent writers cannot deadlock.
+    Args:
+        deltas (dict[UUID, dict]): The amounts to add to the BUDGET_TOTAL_COLUMNS of every budget, missing columns are left unchanged.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    if not deltas:
+        return
+    table = BudgetModel.__table__
+    statement = update(table).where(table.c.id == bindparam("budget_id")).values(
+        **{column: table.c[column] + bindparam(f"{column}_delta") for column in BUDGET_TOTAL_COLUMNS})
+    await db.execute(statement, [{"budget_id": budget_id, **{f"{column}_delta": delta.get(column, 0) for column in BUDGET_TOTAL_COLUMNS}}
+                                 for budget_id, delta in sorted(deltas.items(), key=lambda item: str(item[0]))])
+
+async def budget_transaction_deltas(removed: list[dict], added: list[dict], db: AsyncSession) -> dict[UUID, dict]:
+    """
+    Compute how a write of transactions changes the spent and assigned_spent totals of the budgets of their categories.
+    The budgets of the categories written are loaded with one query through the category_id index and matched in Python,
+    then the assignments of the updated or deleted transactions to those budgets are loaded with one more query.
+    Args:
+        removed (list[dict]): The ledger entries of the transactions deleted or before an update.
+        added (list[dict]): The ledger entries of the transactions created or after an update.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        dict[UUID, dict]: The deltas of every budget that changes.
+    """
+    entries = [(-1, entry) for entry in removed] + [(1, entry) for entry in added]
+    keys = {(entry["family_id"], entry["category_id"]) for _, entry in entries}
+    result = await db.execute(select(BudgetModel.id, BudgetModel.family_id, BudgetModel.category_id, BudgetModel.account_id, BudgetModel.start_date, BudgetModel.end_date)
+                              .where(BudgetModel.family_id.in_({family_id for family_id, _ in keys}), BudgetModel.category_id.in_({category_id for _, category_id in keys})))
+    budgets = defaultdict(list)
+    for budget in result.all():
+        budgets[(budget.family_id, budget.category_id)].append(budget)
+    if not budgets:
+        return {}
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, entry in entries:
+        for budget in budgets[(entry["family_id"], entry["category_id"])]:
+            if budget_matches(budget, entry["category_id"], entry["account_id"], entry["date"]):
+                deltas[budget.id]["spent"] += sign * as_amount(entry["amount"])
+                deltas[budget.id]["spent_count"] += sign
+    # Only transactions that existed before the write can already be assigned to a budget
+    transaction_ids = {entry["id"] for entry in removed if entry.get("id")}
+    if transaction_ids:
+        by_id = {budget.id: budget for family_budgets in budgets.values() for budget in family_budgets}
+        assignments = await db.execute(select(BudgetTransactionModel.budget_id, BudgetTransactionModel.transaction_id)
+                                       .where(BudgetTransactionModel.transaction_id.in_(transaction_ids), BudgetTransactionModel.budget_id.in_(by_id)))
+        for budget_id, transaction_id in assignments.all():
+            for sign, entry in entries:
+                if entry.get("id") == transaction_id and budget_matches(by_id[budget_id], entry["category_id"], entry["account_id"], entry["date"]):
+                    deltas[budget_id]["assigned_spent"] += sign * as_amount(entry["amount"])
+                    deltas[budget_id]["assigned_count"] += sign
+    return {budget_id: delta for budget_id, delta in deltas.items() if any(delta.values())}
+
+async def record_budget_assignment(budget_id: UUID, transaction_id: UUID, assigned_amount, sign: int, db: AsyncSession):
+    """
+    Add a budget transaction to the totals of its budget, or take it out with a sign of -1.
+    Args:
+        budget_id (UUID): The unique identifier of the budget.
+        transaction_id (UUID): The unique identifier of the assigned transaction.
+        assigned_amount: The amount assigned to the transaction.
+        sign (int): 1 when the budget transaction is created, -1 when it is deleted.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    budget = (await db.execute(select(BudgetModel.category_id, BudgetModel.account_id, BudgetModel.start_date, BudgetModel.end_date).where(BudgetModel.id == budget_id))).first()
+    transaction = (await db.execute(select(TransactionModel.category_id, TransactionModel.account_id, TransactionModel.date, TransactionModel.amount)
+                                    .where(TransactionModel.id == transaction_id))).first()
+    if budget is None:
+        return
+    delta = {"assigned": sign * as_amount(assigned_amount)}
+    if transaction is not None and budget_matches(budget, transaction.category_id, transaction.account_id, transaction.date):
+        delta.update(assigned_spent=sign * as_amount(transaction.amount), assigned_count=sign)
+    await apply_budget_deltas({budget_id: delta}, db)
+
+def budget_totals_statement():
+    """
+    The statement computing the running totals of budgets from scratch, one row per budget, restrict it with where().
+    The transactions of every budget are read through the (family_id, category_id, date, id) index of the transactions.
+    Returns:
+        Select: The id and the BUDGET_TOTAL_COLUMNS of every budget.
+    """
+    matches = and_(TransactionModel.category_id == BudgetModel.category_id, TransactionModel.date >= BudgetModel.start_date, TransactionModel.date <= BudgetModel.end_date,
+                   or_(BudgetModel.account_id.is_(None), TransactionModel.account_id == BudgetModel.account_id))
+    assignments = BudgetTransactionModel.budget_id == BudgetModel.id
+    assigned_transactions = (select(TransactionModel.amount).join(BudgetTransactionModel, BudgetTransactionModel.transaction_id == TransactionModel.id)
+                             .where(assignments, matches).subquery())
+    return (select(BudgetModel.id,
+                   func.coalesce(func.sum(TransactionModel.amount), 0).label("spent"),
+                   func.count(TransactionModel.id).label("spent_count"),
+                   select(func.coalesce(func.sum(BudgetTransactionModel.assigned_amount), 0)).where(assignments).scalar_subquery().label("assigned"),
+                   select(func.coalesce(func.sum(assigned_transactions.c.amount), 0)).scalar_subquery().label("assigned_spent"),
+                   select(func.count()).select_from(assigned_transactions).scalar_subquery().label("assigned_count"))
+            .outerjoin(TransactionModel, and_(TransactionModel.family_id == BudgetModel.family_id, matches))
+            .group_by(BudgetModel.id))
+
+async def refresh_budget_totals(budget_ids: list[UUID], db: AsyncSession):
+    """
+    Recompute the running totals of budgets from their transactions, after a budget is created or its period, category or account changes.
+    The budgets are locked in id order first, a concurrent transaction write that already updated their totals commits before they are read again,
+    so its delta is part of the sums instead of being overwritten.
+    Args:
+        budget_ids (list[UUID]): The unique identifiers of the budgets.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    budget_ids = (await db.execute(select(BudgetModel.id).where(BudgetModel.id.in_(budget_ids)).order_by(BudgetModel.id).with_for_update())).scalars().all()
+    if not budget_ids:
+        return
+    result = await db.execute(budget_totals_statement().where(BudgetModel.id.in_(budget_ids)))
+    rows = [{"budget_id": row.id, **{f"{column}_total": getattr(row, column) for column in BUDGET_TOTAL_COLUMNS}} for row in result.all()]
+    if rows:
+        table = BudgetModel.__table__
+        await db.execute(update(table).where(table.c.id == bindparam("budget_id")).values(**{column: bindparam(f"{column}_total") for column in BUDGET_TOTAL_COLUMNS}), rows)
+
+def account_deltas(removed: Iterable[dict], added: Iterable[dict]) -> tuple[dict[UUID, Decimal], dict[tuple, list]]:
+    """
+    Net the changes of a write per account and per account and day.
+    Args:
+        removed (Iterable[dict]): The ledger entries of the transactions deleted or before an update.
+        added (Iterable[dict]): The ledger entries of the transactions created or after an update.
+    Returns:
+        tuple[dict[UUID, Decimal], dict[tuple, list]]: The amount to add to the balance of every account, and the change and count to add to every (account_id, family_id, day) key.
+    """
+    balances = defaultdict(Decimal)
+    days = defaultdict(lambda: [Decimal(0), 0])
+    for sign, entries in ((-1, removed), (1, added)):
+        for entry in entries:
+            amount = sign * signed_amount(entry)
+            balances[entry["account_id"]] += amount
+            day = days[(entry["account_id"], entry["family_id"], entry["date"].date())]
+            day[0] += amount
+            day[1] += sign
+    return ({account_id: amount for account_id, amount in balances.items() if amount},
+            {key: delta for key, delta in days.items() if delta[0] or delta[1]})
+
+async def apply_account_deltas(balances: dict[UUID, Decimal], days: dict[tuple, list], db: AsyncSession):
+    """
+    Add the deltas to the balances of the accounts and to account_daily_balances, rows left without transactions are removed.
+    The accounts are updated first and in id order, the update locks the account rows so it also serializes the write with a reconciliation.
+    Args:
+        balances (dict[UUID, Decimal]): The amounts to add to the balance of every account.
+        days (dict[tuple, list]): The change and count to add to every (account_id, family_id, day) key.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    if balances:
+        table = AccountModel.__table__
+        await db.execute(update(table).where(table.c.id == bindparam("account_id")).values(balance=table.c.balance + bindparam("balance_delta")),
+                         [{"account_id": account_id, "balance_delta": amount} for account_id, amount in sorted(balances.items(), key=lambda item: str(item[0]))])
+    if not days:
+        return
+    table = AccountDailyBalanceModel
+    rows = [{"account_id": account_id, "family_id": family_id, "day": day, "net_change": change, "transaction_count": count}
+            for (account_id, family_id, day), (change, count) in sorted(days.items(), key=lambda item: (str(item[0][0]), item[0][2]))]
+    statement = upsert_insert(db)(table)
+    statement = statement.on_conflict_do_update(index_elements=[table.account_id, table.day],
+                                                set_={"net_change": table.net_change + statement.excluded.net_change,
+                                                      "transaction_count": table.transaction_count + statement.excluded.transaction_count,
+                                                      "modified_at": func.now()})
+    await db.execute(statement, rows)
+    emptied = {account_id for (account_id, _, _), (_, count) in days.items() if count < 0}
+    if emptied:
+        await db.execute(delete(table).where(table.account_id.in_(emptied), table.transaction_count <= 0))
+
+async def reconcile_family_balances(family_id: UUID, db: AsyncSession) -> list[BalanceDrift]:
+    """
+    Rebuild the balances and the daily changes of the accounts of a family from its transactions and report the accounts that drifted.
+    The accounts are locked first, a concurrent write then waits on its balance update and applies its delta on top of the rebuilt balance.
+    Args:
+        family_id (UUID): The unique identifier of the family.
+        db (AsyncSession): The asynchronous database session, the caller commits and then drops the cached net-worth reports of the family.
+    Returns:
+        list[BalanceDrift]: The accounts whose balance or daily changes were rebuilt.
+    """
+    accounts = (await db.execute(select(AccountModel.id, AccountModel.balance).where(AccountModel.family_id == family_id)
+                                 .order_by(AccountModel.id).with_for_update(key_share=True))).all()
+    if not accounts:
+        return []
+    day = day_column(db)
+    expected = {(row.account_id, row.day): (row.net_change, row.transaction_count) for row in (await db.execute(
+        select(TransactionModel.account_id, day.label("day"), func.sum(signed_amount_column()).label("net_change"), func.count().label("transaction_count"))
+        .where(TransactionModel.family_id == family_id).group_by(TransactionModel.account_id, day))).all()}
+    stored = {(row.account_id, row.day): (row.net_change, row.transaction_count) for row in (await db.execute(
+        select(AccountDailyBalanceModel.account_id, AccountDailyBalanceModel.day, AccountDailyBalanceModel.net_change, AccountDailyBalanceModel.transaction_count)
+        .where(AccountDailyBalanceModel.family_id == family_id))).all()}
+    wrong_days = defaultdict(int)
+    for key in expected.keys() | stored.keys():
+        if expected.get(key) != stored.get(key):
+            wrong_days[key[0]] += 1
+    balances = defaultdict(Decimal)
+    for (account_id, _), (change, _) in expected.items():
+        balances[account_id] += Decimal(change)
+    drifts = [BalanceDrift(account.id, family_id, account.balance, balances[account.id].quantize(AMOUNT_SCALE), wrong_days[account.id])
+              for account in accounts if account.balance != balances[account.id] or wrong_days[account.id]]
+    if not drifts:
+        return []
+    table = AccountModel.__table__
+    await db.execute(update(table).where(table.c.id == bindparam("account_id")).values(balance=bindparam("expected_balance")),
+                     [{"account_id": drift.account_id, "expected_balance": drift.expected} for drift in drifts])
+    if wrong_days:
+        await db.execute(delete(AccountDailyBalanceModel).where(AccountDailyBalanceModel.family_id == family_id))
+        await db.execute(insert(AccountDailyBalanceModel), [{"account_id": account_id, "family_id": family_id, "day": day, "net_change": change, "transaction_count": count}
+                                                            for (account_id, day), (change, count) in sorted(expected.items(), key=lambda item: (str(item[0][0]), item[0][1]))])
+    return drifts
+
+async def reconcile_account_balances(bind: AsyncEngine, family_id: Optional[UUID] = None) -> list[BalanceDrift]:
+    """
+    Rebuild the stored balances from scratch, one family per database transaction, and report the drift found.
+    Args:
+        bind (AsyncEngine): The engine to open the sessions on.
+        family_id (Optional[UUID]): Only reconcile this family, every family with accounts when omitted.
+    Returns:
+        list[BalanceDrift]: The accounts whose balance or daily changes were rebuilt.
+    """
+    if family_id is None:
+        async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+            family_ids = (await db.execute(select(AccountModel.family_id).distinct())).scalars().all()
+    else:
+        family_ids = [family_id]
+    drifts = []
+    for family in family_ids:
+        async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+            family_drifts = await reconcile_family_balances(family, db)
+            await db.commit()
+        if family_drifts:
+            invalidate_net_worth([family])
+        drifts += family_drifts
+    return drifts
+
+async def run_balance_reconciler(bind: AsyncEngine, interval: float):
+    """
+    Reconcile the balances of every family every interval seconds until cancelled, started with the application.
+    Args:
+        bind (AsyncEngine): The engine to open the sessions on.
+        interval (float): The seconds between two reconciliations, the first one runs after the first interval.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for drift in await reconcile_account_balances(bind):
+                logger.warning("Rebuilt the balance of account %s of family %s: stored %s, expected %s, %d days wrong",
+                               drift.account_id, drift.family_id, drift.stored, drift.expected, drift.days)
+        except Exception:
+            logger.exception("Failed to reconcile the account balances")
+
+def goal_matches(goal, entry: dict) -> bool:
+    """
+    Whether a transaction counts towards a goal linked to an account, a category or both.
+    """
+    return ((goal.account_id is None or goal.account_id == entry["account_id"]) and (goal.category_id is None or goal.category_id == entry["category_id"])
+            and as_naive(entry["date"]) >= as_naive(goal.start_date))
+
+def goal_contribution(goal, entry: dict) -> Decimal:
+    """
+    The amount a matching transaction adds to the saved amount of a goal: its amount when the goal has a category,
+    the change it makes to the balance of the account otherwise.
+    """
+    return as_amount(entry["amount"]) if goal.category_id is not None else signed_amount(entry)
+
+async def goal_deltas(removed: list[dict], added: list[dict], db: AsyncSession) -> dict[UUID, Decimal]:
+    """
+    Compute how a write of transactions changes the saved amount of the goals linked to their accounts or categories.
+    The goals are loaded with one query through the account_id and category_id indexes and matched in Python.
+    Args:
+        removed (list[dict]): The ledger entries of the transactions deleted or before an update.
+        added (list[dict]): The ledger entries of the transactions created or after an update.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        dict[UUID, Decimal]: The amount to add to the saved amount of every goal that changes.
+    """
+    entries = [(-1, entry) for entry in removed] + [(1, entry) for entry in added]
+    if not entries:
+        return {}
+    result = await db.execute(select(GoalModel.id, GoalModel.family_id, GoalModel.account_id, GoalModel.category_id, GoalModel.start_date)
+                              .where(GoalModel.family_id.in_({entry["family_id"] for _, entry in entries}),
+                                     or_(GoalModel.account_id.in_({entry["account_id"] for _, entry in entries}),
+                                         GoalModel.category_id.in_({entry["category_id"] for _, entry in entries}))))
+    deltas = defaultdict(Decimal)
+    for goal in result.all():
+        for sign, entry in entries:
+            if goal.family_id == entry["family_id"] and goal_matches(goal, entry):
+                deltas[goal.id] += sign * goal_contribution(goal, entry)
+    return {goal_id: delta for goal_id, delta in deltas.items() if delta}
+
+async def apply_goal_deltas(deltas: dict[UUID, Decimal], db: AsyncSession):
+    """
+    Add deltas to the saved amount of goals with one executemany UPDATE, in goal id order so concurrent writers cannot deadlock.
+    Args:
+        deltas (dict[UUID, Decimal]): The amount to add to the saved amount of every goal.
+        db (AsyncSession): The asynchronous database session, the caller commits.
+    """
+    if not deltas:
+        return
+    table = GoalModel.__table__
+    await db.execute(update(table).where(table.c.id == bindparam("goal_id")).values(saved_amount=func.coalesce(table.c.saved_amount, 0) + bindparam("saved_delta")),
+                     [{"goal_id": goal_id, "saved_delta": delta} for goal_id, delta in sorted(deltas.items(), key=lambda item: str(item[0]))])
+
+async def refresh_goal_savings(db: AsyncSession, family_id: Optional[UUID] = None, goal_ids: Optional[list[UUID]] = None) -> int:
+    """
+    Recompute the saved amount of the linked goals of a family, or of some goals, from their transactions.
+    A single UPDATE sets every goal from a correlated sum over the transactions of its account or category,
+    read through the account_id and (family_id, category_id, date, id) indexes of the transactions. Goals without a link keep their saved amount.
+    The goals are locked in id order before the UPDATE, like the accounts in reconcile_family_balances, so a transaction write that already
+    applied its delta to a goal commits first and is part of the sum instead of being overwritten.
+    Args:
+        db (AsyncSession): The asynchronous database session, the caller commits.
+        family_id (Optional[UUID]): Recompute the linked goals of this family.
+        goal_ids (Optional[list[UUID]]): Recompute these goals.
+    Returns:
+        int: The number of goals recomputed.
+    """
+    table = GoalModel.__table__
+    transactions = TransactionModel.__table__
+    linked = select(table.c.id).where(or_(table.c.account_id.is_not(None), table.c.category_id.is_not(None)))
+    if family_id is not None:
+        linked = linked.where(table.c.family_id == family_id)
+    if goal_ids is not None:
+        linked = linked.where(table.c.id.in_(goal_ids))
+    locked = (await db.execute(linked.order_by(table.c.id).with_for_update())).scalars().all()
+    if not locked:
+        return 0
+    contribution = case((table.c.category_id.is_(None), signed_amount_column()), else_=transactions.c.amount)
+    saved = (select(func.coalesce(func.sum(contribution), 0))
+             .where(transactions.c.family_id == table.c.family_id, transactions.c.date >= table.c.start_date,
+                    or_(table.c.account_id.is_(None), transactions.c.account_id == table.c.account_id),
+                    or_(table.c.category_id.is_(None), transactions.c.category_id == table.c.category_id))
+             .scalar_subquery())
+    return (await db.execute(update(table).where(table.c.id.in_(locked)).values(saved_amount=saved))).rowcount
+
+async def record_transaction_changes(db: AsyncSession, removed: Optional[Iterable[dict]] = None, added: Optional[Iterable[dict]] = None):
+    """
+    Keep the rollups of the transactions in step with a write, in the same database transaction as the write itself.
+    The caller drops the cached net-worth reports with invalidate_net_worth once the write is committed, a report read before the commit would cache the old balances.
+    Args:
+        db (AsyncSession): The asynchronous database session, the caller commits.
+        removed (Optional[Iterable[dict]]): The ledger entries of the transactions deleted or before an update.
+        added (Optional[Iterable[dict]]): The ledger entries, or column values, of the transactions created or after an update.
+    """
+    removed, added = list(removed or ()), list(added or ())
+    await apply_monthly_deltas(monthly_deltas(removed, added), db)
+    await apply_budget_deltas(await budget_transaction_deltas(removed, added, db), db)
+    await apply_account_deltas(*account_deltas(removed, added), db)
+    await apply_goal_deltas(await goal_deltas(removed, added, db), db)
@@ -0,0 +1,20 @@
+from models import UserModel
+from serializers import CacheStats,ExecutorStats,PoolStats,RestGetMetricsResponse
+from utilities import hashing_executor
+from database import engine
+from .authorization import membership_cache
+from .get_current_user import principal_cache
+from .ledger import net_worth_cache
+
+async def get_metrics(current_user: UserModel)->RestGetMetricsResponse:
+    """
+    Report the runtime counters of the in-process caches, worker pools and database connection pool so they can be sized.
+    Args:
+        current_user (UserModel): The currently authenticated user.
+    Returns:
+        RestGetMetricsResponse: A response object containing the statistics of every cache, worker pool and connection pool.
+    """
+    caches = [membership_cache, principal_cache, net_worth_cache]
+    return RestGetMetricsResponse(code=1, status="SUCCESS", message="Metrics retrieved successfully", caches=[CacheStats(**cache.stats()) for cache in caches],
+                                  executors=[ExecutorStats(**hashing_executor.stats())],
+                                  pools=[PoolStats(**engine.pool.stats())])
@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import Date, cast, func, literal_column, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models import UserModel,FamilyMonthlyCategoryTotalModel,EntryType,AccountModel,AccountType,AccountDailyBalanceModel
+from serializers import MonthlyCategoryTotal,MonthlyTotals,RestGetMonthlyReportResponse,NetWorthInterval,NetWorthPoint,RestGetNetWorthReportResponse
+from .authorization import check_user_in_family
+from .ledger import month_of,net_worth_cache
+
+# The most points a net-worth report returns, a longer range must use a longer interval
+NET_WORTH_MAX_POINTS = 1000
+
+async def get_monthly_report(family_id: str, current_user: UserModel, db: AsyncSession, month_from: Optional[date] = None, month_to: Optional[date] = None, category_id: Optional[UUID] = None)->RestGetMonthlyReportResponse:
+    """
+    Report the income, expense and transfer totals of a family per month and category.
+    The report reads family_monthly_category_totals through its (family_id, month, category_id, transaction_type) index,
+    so its cost grows with the months and categories reported, not with the number of transactions.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        month_from (Optional[date]): Only the months from the month of this date.
+        month_to (Optional[date]): Only the months up to and including the month of this date.
+        category_id (Optional[UUID]): Only the totals of this category.
+    Returns:
+        RestGetMonthlyReportResponse: The totals of every month having transactions, oldest first.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    if month_from and month_to and month_of(month_from) > month_of(month_to):
+        return RestGetMonthlyReportResponse(code=0, status="FAILED", message="Invalid month range")
+    table = FamilyMonthlyCategoryTotalModel
+    statement = select(table.month, table.category_id, table.transaction_type, table.total, table.transaction_count).where(table.family_id == UUID(family_id))
+    if month_from:
+        statement = statement.where(table.month >= month_of(month_from))
+    if month_to:
+        statement = statement.where(table.month <= month_of(month_to))
+    if category_id:
+        statement = statement.where(table.category_id == category_id)
+    result = await db.execute(statement.order_by(table.month, table.category_id, table.transaction_type))
+    months = {}
+    for month, row_category_id, transaction_type, total, count in result.all():
+        totals = months.setdefault(month, MonthlyTotals(month=month, income=0, expense=0, transfer=0, categories=[]))
+        totals.categories.append(MonthlyCategoryTotal(category_id=row_category_id, transaction_type=transaction_type, total=total, transaction_count=count))
+        field = {EntryType.INCOME: "income", EntryType.EXPENSE: "expense", EntryType.TRANSFER: "transfer"}[transaction_type]
+        setattr(totals, field, getattr(totals, field) + float(total))
+    return RestGetMonthlyReportResponse(code=1, status="SUCCESS", message="Monthly report retrieved successfully", months=list(months.values()))
+
+def interval_start(day: date, interval: NetWorthInterval) -> date:
+    """
+    The first day of the day, week (starting on Monday) or month holding a date.
+    """
+    if interval == NetWorthInterval.WEEK:
+        return day - timedelta(days=day.weekday())
+    if interval == NetWorthInterval.MONTH:
+        return month_of(day)
+    return day
+
+def shift_interval(start: date, interval: NetWorthInterval, count: int) -> date:
+    """
+    The start of the interval count intervals after, or before when negative, the interval starting on start.
+    """
+    if interval == NetWorthInterval.MONTH:
+        months = start.year * 12 + start.month - 1 + count
+        return date(months // 12, months % 12 + 1, 1)
+    return start + timedelta(days=count * (7 if interval == NetWorthInterval.WEEK else 1))
+
+def interval_column(db: AsyncSession, interval: NetWorthInterval):
+    """
+    The SQL expression of interval_start over account_daily_balances.day.
+    The modifiers are rendered as literals so the expression grouped by and the one ordering the window are the same.
+    """
+    day = AccountDailyBalanceModel.day
+    if interval == NetWorthInterval.DAY:
+        return day
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(literal_column(f"'{interval.value}'"), day), Date)
+    modifiers = ("'-6 days'", "'weekday 1'") if interval == NetWorthInterval.WEEK else ("'start of month'",)
+    return func.date(day, *map(literal_column, modifiers), type_=Date)
+
+async def get_net_worth_report(family_id: str, current_user: UserModel, db: AsyncSession, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                               interval: NetWorthInterval = NetWorthInterval.MONTH)->RestGetNetWorthReportResponse:
+    """
+    Report the net worth of a family at the end of every day, week or month of a range.
+    The running balances of the asset and liability accounts are computed by a window sum over the daily changes of account_daily_balances,
+    read through its (family_id, day) index, so the cost grows with the days having transactions and not with the transactions.
+    Liability balances are negative while money is owed, an expense paid from a credit card subtracts from it, so the liabilities are reported as the amount owed
+    and the net worth is the assets minus the liabilities. Reports are cached per family until its next transaction or account write.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        date_from (Optional[date]): The first reported interval holds this date, the first day with transactions when omitted,
+            limited to the NET_WORTH_MAX_POINTS intervals ending with date_to.
+        date_to (Optional[date]): The last reported day, today when omitted.
+        interval (NetWorthInterval): The length of the intervals, a point is reported for every one of them, with or without transactions.
+    Returns:
+        RestGetNetWorthReportResponse: The points of the report, oldest first, each dated on the first day of its interval.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    family = UUID(family_id)
+    table = AccountDailyBalanceModel
+    date_to = date_to or datetime.now(timezone.utc).date()
+    if date_from and date_from > date_to:
+        return RestGetNetWorthReportResponse(code=0, status="FAILED", message="Invalid date range")
+    last = interval_start(date_to, interval)
+    if date_from:
+        first = interval_start(date_from, interval)
+    else:
+        earliest = await db.scalar(select(func.min(table.day)).where(table.family_id == family))
+        first = max(interval_start(min(earliest or date_to, date_to), interval), shift_interval(last, interval, 1 - NET_WORTH_MAX_POINTS))
+    starts = [first]
+    while starts[-1] < last:
+        if len(starts) == NET_WORTH_MAX_POINTS:
+            return RestGetNetWorthReportResponse(code=0, status="FAILED", message=f"The report is limited to {NET_WORTH_MAX_POINTS} points, narrow the range or use a longer interval")
+        starts.append(shift_interval(starts[-1], interval, 1))
+    cache_key = (family, first, date_to, interval)
+    points = net_worth_cache.get(cache_key)
+    if points is None:
+        bucket = interval_column(db, interval)
+        window = {"partition_by": AccountModel.type, "order_by": bucket}
+        # One row per interval with transactions and account type, carrying the balance at its end; the rows before the
+        # first interval are only needed for the opening balance, so the last one of every type is kept
+        balances = (select(bucket.label("bucket"), AccountModel.type.label("account_type"), func.sum(func.sum(table.net_change)).over(**window).label("balance"),
+                           func.lead(bucket, type_=Date).over(**window).label("next_bucket"))
+                    .select_from(table).join(AccountModel, AccountModel.id == table.account_id)
+                    .where(table.family_id == family, table.day <= date_to, AccountModel.type.in_([AccountType.ASSET, AccountType.LIABILITY]))
+                    .group_by(bucket, AccountModel.type).subquery())
+        rows = (await db.execute(select(balances.c.bucket, balances.c.account_type, balances.c.balance)
+                                 .where(or_(balances.c.bucket >= first, balances.c.next_bucket >= first, balances.c.next_bucket.is_(None)))
+                                 .order_by(balances.c.bucket))).all()
+        running = {AccountType.ASSET: 0.0, AccountType.LIABILITY: 0.0}
+        points, index = [], 0
+        for start in starts:
+            while index < len(rows) and rows[index].bucket <= start:
+                running[rows[index].account_type] = float(rows[index].balance)
+                index += 1
+            assets, liabilities = running[AccountType.ASSET], -running[AccountType.LIABILITY]
+            points.append(NetWorthPoint(date=start, assets=assets, liabilities=liabilities, net_worth=assets - liabilities))
+        net_worth_cache.set(cache_key, points)
+    return RestGetNetWorthReportResponse(code=1, status="SUCCESS", message="Net worth report retrieved successfully", interval=interval, points=points)
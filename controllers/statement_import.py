@@ -0,0 +1,288 @@
+import os
+import tempfile
+from decimal import Decimal
+from typing import BinaryIO, Iterator, Optional, Union
+from uuid import UUID
+from fastapi import BackgroundTasks, Request
+from sqlalchemy import func, or_, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+from models import UserModel,TransactionModel,StatementImportModel,ImportStatus,EntryType
+from serializers import CreateStatementImport,StatementImportInfo,RestStatementImportResponse,ImportRule,BulkRowError
+from utilities.statements import StatementEntry,parse_statement
+from config import config
+from .authorization import check_user_in_family
+from .transaction_bulk import get_family_references,insert_transactions,with_fingerprint
+from .ledger import invalidate_net_worth
+
+# Only the first row errors are stored with the import, the others are counted in rows_failed
+MAX_REPORTED_ERRORS = 100
+AMOUNT_SCALE = Decimal("0.001")
+
+async def get_statement_import_by_id(import_id: str, db: AsyncSession) -> Optional[StatementImportModel]:
+    try:
+        import_uuid = UUID(import_id)
+    except ValueError:
+        return None
+    result = await db.execute(select(StatementImportModel).where(StatementImportModel.id == import_uuid))
+    return result.scalars().first()
+
+async def create_statement_import(family_id: str, new_import: CreateStatementImport, current_user: UserModel, db: AsyncSession)->RestStatementImportResponse:
+    """
+    Create a pending statement import, the statement itself is uploaded afterwards with upload_statement_content.
+    Args:
+        family_id (str): The unique identifier of the family the transactions are imported into.
+        new_import (CreateStatementImport): The format, the default account and category, the CSV mapping and the rules of the import.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestStatementImportResponse: The created import, or a response with code 0 if an account or category is not part of the family.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    family_uuid = UUID(family_id)
+    account_ids = {rule.account_id for rule in new_import.rules if rule.account_id} | ({new_import.default_account_id} if new_import.default_account_id else set())
+    category_ids = {rule.category_id for rule in new_import.rules if rule.category_id} | ({new_import.default_category_id} if new_import.default_category_id else set())
+    accounts, categories = await get_family_references(family_uuid, account_ids, category_ids, db)
+    if account_ids - accounts:
+        return RestStatementImportResponse(code=0, status="FAILED", message="Account not found in the family")
+    if category_ids - categories:
+        return RestStatementImportResponse(code=0, status="FAILED", message="Category not found in the family")
+    statement_import = StatementImportModel(family_id=family_uuid, user_id=current_user.id, format=new_import.format, status=ImportStatus.PENDING,
+                                            default_account_id=new_import.default_account_id, default_category_id=new_import.default_category_id,
+                                            settings=new_import.model_dump(mode="json", include={"column_map", "date_format", "rules"}))
+    db.add(statement_import)
+    try:
+        await db.commit()
+        await db.refresh(statement_import)
+        return RestStatementImportResponse(code=1, status="SUCCESS", message="Statement import created successfully", statement_import=StatementImportInfo.model_validate(statement_import, from_attributes=True))
+    except Exception as e:
+        await db.rollback()
+        return RestStatementImportResponse(code=0, status="FAILED", message=f"Failed to create statement import: {str(e)}")
+
+async def get_statement_import(import_id: str, current_user: UserModel, db: AsyncSession)->RestStatementImportResponse:
+    """
+    Report the progress of a statement import.
+    Args:
+        import_id (str): The unique identifier of the import.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestStatementImportResponse: The import with its status and row counters.
+    Raises:
+        HTTPException: If the user is not a member of the family of the import.
+    """
+    statement_import = await get_statement_import_by_id(import_id, db)
+    if not statement_import:
+        return RestStatementImportResponse(code=0, status="FAILED", message="Statement import not found")
+    await check_user_in_family(str(statement_import.family_id), current_user.id, db)
+    return RestStatementImportResponse(code=1, status="SUCCESS", message="Statement import retrieved successfully", statement_import=StatementImportInfo.model_validate(statement_import, from_attributes=True))
+
+async def upload_statement_content(import_id: str, request: Request, background_tasks: BackgroundTasks, current_user: UserModel, db: AsyncSession)->RestStatementImportResponse:
+    """
+    Receive the statement of a pending import and start processing it in the background.
+    The request body is copied to a staging file chunk by chunk as it arrives, so the statement is never held in memory.
+    Args:
+        import_id (str): The unique identifier of the import.
+        request (Request): The request whose body is the raw statement.
+        background_tasks (BackgroundTasks): The tasks run once the response has been sent.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestStatementImportResponse: The import in the processing status, or a response with code 0 if it cannot receive a statement.
+    Raises:
+        HTTPException: If the user is not a member of the family of the import.
+    """
+    statement_import = await get_statement_import_by_id(import_id, db)
+    if not statement_import:
+        return RestStatementImportResponse(code=0, status="FAILED", message="Statement import not found")
+    await check_user_in_family(str(statement_import.family_id), current_user.id, db)
+    if statement_import.status != ImportStatus.PENDING:
+        return RestStatementImportResponse(code=0, status="FAILED", message="The statement of this import has already been uploaded")
+    if int(request.headers.get("content-length") or 0) > config.import_max_bytes:
+        return RestStatementImportResponse(code=0, status="FAILED", message=f"The statement exceeds {config.import_max_bytes} bytes")
+    import_uuid, suffix = statement_import.id, f".{statement_import.format.value}"
+    # Claim the import before the body is read, a concurrent upload of the same import then finds it processing and is refused
+    claimed = await db.execute(update(StatementImportModel).where(StatementImportModel.id == import_uuid, StatementImportModel.status == ImportStatus.PENDING)
+                               .values(status=ImportStatus.PROCESSING, started_at=func.now()))
+    if claimed.rowcount != 1:
+        await db.rollback()
+        return RestStatementImportResponse(code=0, status="FAILED", message="The statement of this import has already been uploaded")
+    await db.commit()
+    try:
+        path, size = await stage_statement(request, suffix)
+    except Exception:
+        await release_statement_import(import_uuid, db)
+        raise
+    if path is None:
+        await release_statement_import(import_uuid, db)
+        return RestStatementImportResponse(code=0, status="FAILED", message=f"The statement exceeds {config.import_max_bytes} bytes")
+    try:
+        statement_import = await get_statement_import_by_id(import_id, db)
+        statement_import.bytes_received = size
+        await db.commit()
+        await db.refresh(statement_import)
+    except Exception as e:
+        await db.rollback()
+        await run_in_threadpool(os.remove, path)
+        await release_statement_import(import_uuid, db)
+        return RestStatementImportResponse(code=0, status="FAILED", message=f"Failed to start the statement import: {str(e)}")
+    background_tasks.add_task(process_statement_import, db.bind, statement_import.id, path)
+    return RestStatementImportResponse(code=1, status="SUCCESS", message="Statement received, the import is processing", statement_import=StatementImportInfo.model_validate(statement_import, from_attributes=True))
+
+async def stage_statement(request: Request, suffix: str) -> tuple[Optional[str], int]:
+    """
+    Copy the body of a request to a staging file chunk by chunk as it arrives, the file is written from the thread pool.
+    Args:
+        request (Request): The request whose body is the raw statement.
+        suffix (str): The suffix of the staging file, the extension of the statement format.
+    Returns:
+        tuple[Optional[str], int]: The path of the staging file and its size, no path if the statement exceeds the import limit.
+    """
+    descriptor, path = await run_in_threadpool(tempfile.mkstemp, prefix="statement-", suffix=suffix, dir=config.import_tmp_dir)
+    size = 0
+    try:
+        with os.fdopen(descriptor, "wb") as staging:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > config.import_max_bytes:
+                    break
+                await run_in_threadpool(staging.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    if size > config.import_max_bytes:
+        await run_in_threadpool(os.remove, path)
+        return None, size
+    return path, size
+
+async def release_statement_import(import_id: UUID, db: AsyncSession):
+    """
+    Put a claimed import back in the pending status when its statement could not be staged, so it can be uploaded again.
+    Args:
+        import_id (UUID): The unique identifier of the import.
+        db (AsyncSession): The asynchronous database session.
+    """
+    await db.rollback()
+    await db.execute(update(StatementImportModel).where(StatementImportModel.id == import_id, StatementImportModel.status == ImportStatus.PROCESSING)
+                     .values(status=ImportStatus.PENDING, started_at=None, bytes_received=0))
+    await db.commit()
+
+def read_lines(staging: BinaryIO) -> Iterator[str]:
+    """
+    Decode the staged statement one line at a time, dropping the UTF-8 byte order mark.
+    """
+    for number, raw in enumerate(staging):
+        line = raw.decode("utf-8", errors="replace")
+        yield line.lstrip("\ufeff") if number == 0 else line
+
+def map_entry(entry: StatementEntry, rules: list[ImportRule], statement_import: StatementImportModel) -> Union[dict, str]:
+    """
+    Turn a statement entry into transaction values using the first matching rule and the import defaults.
+    Args:
+        entry (StatementEntry): The statement entry.
+        rules (list[ImportRule]): The rules of the import.
+        statement_import (StatementImportModel): The import holding the default account and category.
+    Returns:
+        Union[dict, str]: The transaction values, or the reason the entry cannot be imported.
+    """
+    account_id, category_id, transaction_type = statement_import.default_account_id, statement_import.default_category_id, None
+    for rule in rules:
+        text = entry.description if rule.field == "description" else entry.category
+        if text and rule.contains.lower() in text.lower():
+            account_id = rule.account_id or account_id
+            category_id = rule.category_id or category_id
+            transaction_type = rule.transaction_type
+            break
+    if transaction_type is None and entry.transaction_type:
+        try:
+            transaction_type = EntryType(entry.transaction_type.strip().lower())
+        except ValueError:
+            return f"Unknown transaction type {entry.transaction_type!r}"
+    if transaction_type is None:
+        transaction_type = EntryType.EXPENSE if entry.amount < 0 else EntryType.INCOME
+    if account_id is None:
+        return "No rule or default account matched the row"
+    if category_id is None:
+        return "No rule or default category matched the row"
+    return {"account_id": account_id, "category_id": category_id, "amount": abs(entry.amount).quantize(AMOUNT_SCALE), "date": entry.date,
+            "description": entry.description, "transaction_type": transaction_type}
+
+async def find_existing_fingerprints(statement_import: StatementImportModel, fingerprints: set, db: AsyncSession) -> set:
+    """
+    Find which fingerprints of a chunk already belong to transactions of the family that this import did not create.
+    Every fingerprint is an index lookup on (family_id, fingerprint).
+    Rows repeated inside the statement itself are all kept, such as two identical card payments on the same day.
+    Args:
+        statement_import (StatementImportModel): The running import.
+        fingerprints (set): The fingerprints of the mapped rows of the chunk.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        set: The fingerprints of the existing transactions.
+    """
+    result = await db.execute(select(TransactionModel.fingerprint)
+                              .where(TransactionModel.family_id == statement_import.family_id, TransactionModel.fingerprint.in_(fingerprints),
+                                     or_(TransactionModel.statement_import_id.is_(None), TransactionModel.statement_import_id != statement_import.id)))
+    return set(result.scalars().all())
+
+async def import_chunk(statement_import: StatementImportModel, items: list, rules: list[ImportRule], errors: list, bytes_processed: int, db: AsyncSession):
+    """
+    Map, deduplicate and insert one chunk of statement items and record the progress, in one database transaction.
+    """
+    chunk, failed = [], 0
+    for item in items:
+        values = map_entry(item, rules, statement_import) if isinstance(item, StatementEntry) else item.message
+        if isinstance(values, str):
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(BulkRowError(row=item.row, errors=[values]).model_dump())
+            continue
+        chunk.append(with_fingerprint({**values, "family_id": statement_import.family_id, "user_id": statement_import.user_id, "statement_import_id": statement_import.id}))
+    existing = await find_existing_fingerprints(statement_import, {values["fingerprint"] for values in chunk}, db) if chunk else set()
+    new_rows = [values for values in chunk if values["fingerprint"] not in existing]
+    await insert_transactions(new_rows, db)
+    await db.execute(update(StatementImportModel).where(StatementImportModel.id == statement_import.id).values(
+        rows_parsed=StatementImportModel.rows_parsed + len(items),
+        rows_inserted=StatementImportModel.rows_inserted + len(new_rows),
+        rows_duplicate=StatementImportModel.rows_duplicate + len(chunk) - len(new_rows),
+        rows_failed=StatementImportModel.rows_failed + failed,
+        bytes_processed=bytes_processed,
+        errors=list(errors)))
+    await db.commit()
+    if new_rows:
+        invalidate_net_worth([statement_import.family_id])
+
+async def process_statement_import(bind: AsyncEngine, import_id: UUID, path: str):
+    """
+    Import a staged statement in chunks of import_chunk_size rows, committing the progress after every chunk.
+    Runs as a background task with its own session and removes the staging file when done.
+    Args:
+        bind (AsyncEngine): The engine to open the session on.
+        import_id (UUID): The unique identifier of the import.
+        path (str): The path of the staged statement.
+    """
+    try:
+        async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+            statement_import = await db.get(StatementImportModel, import_id)
+            settings = statement_import.settings or {}
+            rules = [ImportRule.model_validate(rule) for rule in settings.get("rules", [])]
+            errors = []
+            try:
+                with open(path, "rb") as staging:
+                    items = []
+                    for item in parse_statement(statement_import.format.value, read_lines(staging), settings.get("column_map"), settings.get("date_format")):
+                        items.append(item)
+                        if len(items) >= config.import_chunk_size:
+                            await import_chunk(statement_import, items, rules, errors, staging.tell(), db)
+                            items = []
+                    await import_chunk(statement_import, items, rules, errors, staging.tell(), db)
+                status, error = ImportStatus.COMPLETED, None
+            except Exception as e:
+                await db.rollback()
+                status, error = ImportStatus.FAILED, str(e)
+            await db.execute(update(StatementImportModel).where(StatementImportModel.id == import_id).values(status=status, error=error, finished_at=func.now()))
+            await db.commit()
+    finally:
+        os.remove(path)
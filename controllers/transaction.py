@@ -1,39 +1,127 @@
-from models import UserModel,TransactionModel
+from models import UserModel,TransactionModel,ATTACHMENT_METADATA_COLUMNS
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, load_only, raiseload
 from serializers import CreateTransaction, UpdateTransaction, RestCreatedTransactionResponse, RestGetTransactionResponse, RestGetAllTransactionsOfamilyResponse, BaseRestResponse
-from serializers import TransactionInfo
+from serializers import TransactionInfo,TransactionFilter,DuplicateTransactionGroup,RestGetDuplicateTransactionsResponse
+from sqlalchemy import Select, func
+from utilities import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE,transaction_fingerprint
+from typing import Optional
 from .authorization import check_user_in_family, check_user_is_family_owner
-from .family import get_family_by_id,get_family_by_id_with_transactions
+from .ledger import ledger_entry, record_transaction_changes, invalidate_net_worth
 from uuid import UUID
 
-async def get_all_transactions_of_family(family_id: str, current_user: UserModel, db: AsyncSession)->RestGetAllTransactionsOfamilyResponse:
+def filter_transactions(statement: Select, filters: TransactionFilter) -> Select:
     """
-    Retrieve all transactions associated with a specific family.
+    Push the transaction list filters down into the SQL statement.
+    Equality filters on account_id and category_id come first so the (family_id, account_id, date, id) and
+    (family_id, category_id, date, id) indexes can serve the date range, other filters are evaluated on the rows read.
+    Args:
+        statement (Select): The statement selecting the transactions of a family.
+        filters (TransactionFilter): The filters received with the request.
+    Returns:
+        Select: The statement restricted to the matching transactions.
+    """
+    if filters.account_id:
+        statement = statement.where(TransactionModel.account_id == filters.account_id)
+    if filters.category_id:
+        statement = statement.where(TransactionModel.category_id == filters.category_id)
+    if filters.date_from:
+        statement = statement.where(TransactionModel.date >= filters.date_from)
+    if filters.date_to:
+        statement = statement.where(TransactionModel.date < filters.date_to)
+    if filters.transaction_type:
+        statement = statement.where(TransactionModel.transaction_type == filters.transaction_type)
+    if filters.amount_min is not None:
+        statement = statement.where(TransactionModel.amount >= filters.amount_min)
+    if filters.amount_max is not None:
+        statement = statement.where(TransactionModel.amount <= filters.amount_max)
+    if filters.description:
+        # Escape LIKE wildcards so the text is matched literally
+        pattern = filters.description.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        statement = statement.where(TransactionModel.description.ilike(f"%{pattern}%", escape="\\"))
+    return statement
+
+async def get_all_transactions_of_family(family_id: str, current_user: UserModel, db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, filters: Optional[TransactionFilter] = None)->RestGetAllTransactionsOfamilyResponse:
+    """
+    Retrieve a page of the transactions associated with a specific family, ordered by date.
     Args:
         family_id (str): The unique identifier of the family.
         current_user (UserModel): The currently authenticated user.
         db (AsyncSession): The asynchronous database session.
+        cursor (Optional[str]): The next_cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of transactions in the page.
+        filters (Optional[TransactionFilter]): The filters narrowing the transactions, None to list every transaction.
     Returns:
-        RestGetAllTransactionsOfamilyResponse: A response object containing the status, message, and a list of transactions for the specified family.
+        RestGetAllTransactionsOfamilyResponse: A response object containing the status, message, a page of transactions for the specified family and the cursor of the next page.
     Raises:
         HTTPException: If the user is not a member of the family or if the family does not exist.
     Notes:
         - The function first checks if the current user is a member of the specified family.
-        - If the family exists, it retrieves and returns all transactions associated with the family.
+        - If the family exists, it retrieves a page of transactions directly from the transactions table using the (family_id, date, id) index.
     """
 
-    # Check if the user is a member of the family
+    # Check if the user is a member of the family, this also confirms the family exists
     await check_user_in_family(family_id, current_user.id, db)
-    # Get family
-    family = await get_family_by_id_with_transactions(family_id, db)
-    if not family:
-        return BaseRestResponse(code=0, status="FAILED", message="Family not found")
-    # Return all transactions of the family from the family
-    return RestGetAllTransactionsOfamilyResponse(code=1, status="SUCCESS", message="Family transactions retrieved successfully", transactions=[TransactionInfo(**transaction.__dict__) for transaction in family.transaction])
+    # Return a page of transactions of the family without loading the family itself
+    statement = select(TransactionModel).where(TransactionModel.family_id == UUID(family_id))
+    if filters and filters.has_empty_range():
+        return RestGetAllTransactionsOfamilyResponse(code=0, status="FAILED", message="Invalid filter range")
+    if filters:
+        statement = filter_transactions(statement, filters)
+    try:
+        statement = paginate(statement, TransactionModel.date, TransactionModel.id, cursor, limit)
+    except InvalidCursorError:
+        return RestGetAllTransactionsOfamilyResponse(code=0, status="FAILED", message="Invalid cursor")
+    result = await db.execute(statement)
+    transactions, next_cursor = page_results(result.scalars().all(), "date", limit)
+    return RestGetAllTransactionsOfamilyResponse(code=1, status="SUCCESS", message="Family transactions retrieved successfully", transactions=[TransactionInfo(**transaction.__dict__) for transaction in transactions], next_cursor=next_cursor)
+
+async def find_duplicate_transaction(family_id: UUID, fingerprint: str, db: AsyncSession) -> Optional[UUID]:
+    """
+    Find a transaction of the family with the given fingerprint, an index lookup on (family_id, fingerprint).
+    Args:
+        family_id (UUID): The unique identifier of the family.
+        fingerprint (str): The fingerprint of the transaction being entered.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        Optional[UUID]: The id of an existing transaction with the same fingerprint, None if there is none.
+    """
+    result = await db.execute(select(TransactionModel.id).where(TransactionModel.family_id == family_id, TransactionModel.fingerprint == fingerprint).limit(1))
+    return result.scalars().first()
 
-async def create_transaction_for_family(family_id: str, new_transaction: CreateTransaction, current_user: UserModel, db: AsyncSession)-> RestCreatedTransactionResponse:
+async def get_duplicate_transactions_of_family(family_id: str, current_user: UserModel, db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE)->RestGetDuplicateTransactionsResponse:
+    """
+    List the likely duplicate transactions of a family, grouped by fingerprint, the most recent groups first.
+    The groups are found by grouping the (family_id, fingerprint) index of the family, then only the transactions of those groups are loaded.
+    Args:
+        family_id (str): The unique identifier of the family.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        limit (int): The maximum number of groups returned.
+    Returns:
+        RestGetDuplicateTransactionsResponse: The groups of at least two transactions sharing a fingerprint.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    family_uuid = UUID(family_id)
+    groups = await db.execute(select(TransactionModel.fingerprint)
+                              .where(TransactionModel.family_id == family_uuid, TransactionModel.fingerprint.is_not(None))
+                              .group_by(TransactionModel.fingerprint).having(func.count() > 1)
+                              .order_by(func.max(TransactionModel.date).desc(), TransactionModel.fingerprint).limit(limit))
+    fingerprints = groups.scalars().all()
+    duplicates = {fingerprint: [] for fingerprint in fingerprints}
+    if fingerprints:
+        result = await db.execute(select(TransactionModel)
+                                  .where(TransactionModel.family_id == family_uuid, TransactionModel.fingerprint.in_(fingerprints))
+                                  .order_by(TransactionModel.date, TransactionModel.id))
+        for transaction in result.scalars().all():
+            duplicates[transaction.fingerprint].append(TransactionInfo(**transaction.__dict__))
+    return RestGetDuplicateTransactionsResponse(code=1, status="SUCCESS", message="Duplicate transactions retrieved successfully",
+                                                duplicates=[DuplicateTransactionGroup(fingerprint=fingerprint, transactions=transactions) for fingerprint, transactions in duplicates.items()])
+
+async def create_transaction_for_family(family_id: str, new_transaction: CreateTransaction, current_user: UserModel, db: AsyncSession, reject_duplicates: bool = False)-> RestCreatedTransactionResponse:
     """
     Creates a new transaction for a specified family if the current user is the family owner.
     Args:
@@ -41,8 +129,9 @@ async def create_transaction_for_family(family_id: str, new_transaction: CreateT
         new_transaction (CreateTransaction): The transaction data to be created.
         current_user (UserModel): The user attempting to create the transaction.
         db (AsyncSession): The asynchronous database session.
+        reject_duplicates (bool): Refuse the transaction if the family already has one with the same account, amount, day and description.
     Returns:
-        RestCreatedTransactionResponse: Response containing the created transaction info on success.
+        RestCreatedTransactionResponse: Response containing the created transaction info on success, or the id of the existing transaction in duplicate_of when it is rejected as a duplicate.
         BaseRestResponse: Response with error message on failure.
     Raises:
         Exception: If the transaction creation fails or the user is not a member of th family.
@@ -50,11 +139,19 @@ async def create_transaction_for_family(family_id: str, new_transaction: CreateT
 
     # Check if the user is a member of the family
     await check_user_in_family(family_id, current_user.id, db)
+    family_uuid = UUID(family_id)
+    fingerprint = transaction_fingerprint(family_uuid, new_transaction.account_id, new_transaction.amount, new_transaction.date, new_transaction.description)
+    if reject_duplicates:
+        duplicate_of = await find_duplicate_transaction(family_uuid, fingerprint, db)
+        if duplicate_of:
+            return RestCreatedTransactionResponse(code=0, status="FAILED", message="A transaction with the same account, amount, day and description already exists", duplicate_of=duplicate_of)
     # Create new transaction
-    new_transaction = TransactionModel(**new_transaction.model_dump(), family_id=UUID(family_id), user_id=current_user.id)
+    new_transaction = TransactionModel(**new_transaction.model_dump(), family_id=family_uuid, user_id=current_user.id, fingerprint=fingerprint)
     db.add(new_transaction)
     try:
+        await record_transaction_changes(db, added=[ledger_entry(new_transaction)])
         await db.commit()
+        invalidate_net_worth([family_uuid])
         await db.refresh(new_transaction)
         return RestCreatedTransactionResponse(code=1, status="SUCCESS", message="Transaction created successfully", transaction=TransactionInfo(**new_transaction.__dict__))
     except Exception as e:
@@ -102,20 +199,22 @@ async def update_transaction(transaction_id: str, updated_transaction: UpdateTra
         - Commits the changes to the database and refreshes the transaction instance.
     """
 
-    # Check if the user is the owner of the family
-    transaction = await get_transaction_by_id(transaction_id, db)
+    # Check if the user is the owner of the family, the row is locked so the ledger entry taken from it is the committed one
+    transaction = await get_transaction_by_id(transaction_id, db, for_update=True)
     if not transaction:
         return BaseRestResponse(code=0, status="FAILED", message="Transaction not found")
     await check_user_is_family_owner(str(transaction.family_id), current_user.id, db)
-    print(transaction.__dict__)
+    previous = ledger_entry(transaction)
     # Update transaction
     for key, value in updated_transaction.model_dump().items():
         if value is not None:
             setattr(transaction, key, value)
-    print(transaction.__dict__)
+    transaction.fingerprint = transaction_fingerprint(transaction.family_id, transaction.account_id, transaction.amount, transaction.date, transaction.description)
     try:
         await db.flush()
+        await record_transaction_changes(db, removed=[previous], added=[ledger_entry(transaction)])
         await db.commit()
+        invalidate_net_worth([previous["family_id"]])
         await db.refresh(transaction)
         return RestCreatedTransactionResponse(code=1, status="SUCCESS", message="Transaction updated successfully", transaction=TransactionInfo(**transaction.__dict__))
     except Exception as e:
@@ -137,30 +236,38 @@ async def delete_transaction(transaction_id: str, current_user: UserModel, db: A
         Exception: If an error occurs during the database commit operation.
     """
 
-    # Check if the user is the owner of the family
-    transaction = await get_transaction_by_id(transaction_id, db)
+    # Check if the user is the owner of the family, the row is locked so the ledger entry taken from it is the committed one
+    transaction = await get_transaction_by_id(transaction_id, db, for_update=True)
     if not transaction:
         return BaseRestResponse(code=0, status="FAILED", message="Transaction not found")
     await check_user_is_family_owner(str(transaction.family_id), current_user.id, db)
     # Delete transaction
+    removed = ledger_entry(transaction)
     await db.delete(transaction)
     try:
+        await record_transaction_changes(db, removed=[removed])
         await db.commit()
+        invalidate_net_worth([removed["family_id"]])
         return BaseRestResponse(code=1, status="SUCCESS", message="Transaction deleted successfully")
     except Exception as e:
         await db.rollback()
         return BaseRestResponse(code=0, status="FAILED", message=f"Failed to delete transaction: {str(e)}")
 
-async def get_transaction_by_id(transaction_id: str, db: AsyncSession)->TransactionModel:
+async def get_transaction_by_id(transaction_id: str, db: AsyncSession, for_update: bool = False)->TransactionModel:
     """
     Retrieve a transaction by its ID.
     Args:
         transaction_id (str): The unique identifier of the transaction.
         db (AsyncSession): The asynchronous database session.
+        for_update (bool): Lock the row until the end of the database transaction and reload it over any copy already in the session,
+            so a concurrent update or delete of the same transaction waits and then sees the committed row.
     Returns:
         TransactionModel: The transaction object if found, None otherwise.
     """
-    result = await db.execute(select(TransactionModel).where(TransactionModel.id == UUID(transaction_id)))
+    statement = select(TransactionModel).where(TransactionModel.id == UUID(transaction_id))
+    if for_update:
+        statement = statement.with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(statement)
     return result.scalars().first()
 
 async def get_transaction_by_id_with_family(transaction_id: str, db: AsyncSession)->TransactionModel:
@@ -184,5 +291,7 @@ async def get_transaction_by_id_with_attachment_family(transaction_id: str, db:
     Returns:
         TransactionModel: The transaction object if found, None otherwise.
     """
-    result = await db.execute(select(TransactionModel).options(selectinload(TransactionModel.attachment), selectinload(TransactionModel.family)).where(TransactionModel.id == UUID(transaction_id)))
+    # Only the metadata of the attachments is loaded, never their relationships
+    result = await db.execute(select(TransactionModel).options(selectinload(TransactionModel.attachments).options(load_only(*ATTACHMENT_METADATA_COLUMNS), raiseload("*")),
+                                                               selectinload(TransactionModel.family)).where(TransactionModel.id == UUID(transaction_id)))
     return result.scalars().first()
\ No newline at end of file
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+from typing import Iterable
+from uuid import UUID
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy import insert, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models import UserModel,TransactionModel,AccountModel,CategoryModel
+from serializers import CreateTransaction,BulkRowError,RestBulkCreateTransactionsResponse
+from config import config
+from utilities import transaction_fingerprint
+from .authorization import check_user_in_family
+from .ledger import record_transaction_changes, invalidate_net_worth
+
+class BulkPayloadError(ValueError):
+    """
+    Raised when the body of a bulk request cannot be read as a list of rows.
+    """
+
+def parse_csv_rows(content: bytes) -> list[dict]:
+    """
+    Parse a CSV document with a header line into rows, empty cells are left out so optional fields keep their defaults.
+    Args:
+        content (bytes): The UTF-8 encoded CSV document.
+    Returns:
+        list[dict]: One dictionary per data line.
+    Raises:
+        BulkPayloadError: If the document is not valid UTF-8.
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise BulkPayloadError("The CSV file must be UTF-8 encoded") from e
+    return [{key: value for key, value in line.items() if key and value not in (None, "")} for line in csv.DictReader(io.StringIO(text))]
+
+async def read_bulk_rows(request: Request) -> list[dict]:
+    """
+    Read the rows of a bulk request sent as a JSON array, a text/csv body or a multipart upload with a file field.
+    Args:
+        request (Request): The incoming request.
+    Returns:
+        list[dict]: The raw rows, not validated yet.
+    Raises:
+        BulkPayloadError: If the body is not one of the supported formats.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise BulkPayloadError("The multipart upload must contain a file field")
+        return parse_csv_rows(await upload.read())
+    if content_type in ("text/csv", "application/csv"):
+        return parse_csv_rows(await request.body())
+    try:
+        rows = json.loads(await request.body())
+    except ValueError as e:
+        raise BulkPayloadError("The body must be a JSON array of transactions") from e
+    if not isinstance(rows, list):
+        raise BulkPayloadError("The body must be a JSON array of transactions")
+    return rows
+
+def validate_rows(rows: Iterable) -> tuple[list[CreateTransaction], list[int], list[BulkRowError]]:
+    """
+    Validate every row against CreateTransaction.
+    Args:
+        rows (Iterable): The raw rows.
+    Returns:
+        tuple[list[CreateTransaction], list[int], list[BulkRowError]]: The valid transactions, their 1-based row numbers and the errors of the invalid rows.
+    """
+    transactions, numbers, errors = [], [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            transactions.append(CreateTransaction.model_validate(row))
+            numbers.append(number)
+        except ValidationError as e:
+            errors.append(BulkRowError(row=number, errors=[f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()]))
+    return transactions, numbers, errors
+
+async def get_family_references(family_id: UUID, account_ids: set, category_ids: set, db: AsyncSession) -> tuple[set, set]:
+    """
+    Find which of the given accounts and categories belong to the family with one set based query.
+    Args:
+        family_id (UUID): The unique identifier of the family.
+        account_ids (set): The account ids referenced by the rows.
+        category_ids (set): The category ids referenced by the rows.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        tuple[set, set]: The account ids and the category ids that belong to the family.
+    """
+    statement = union_all(
+        select(literal("account").label("kind"), AccountModel.id).where(AccountModel.family_id == family_id, AccountModel.id.in_(account_ids)),
+        select(literal("category").label("kind"), CategoryModel.id).where(CategoryModel.family_id == family_id, CategoryModel.id.in_(category_ids)))
+    accounts, categories = set(), set()
+    for kind, reference_id in (await db.execute(statement)).all():
+        (accounts if kind == "account" else categories).add(reference_id)
+    return accounts, categories
+
+async def check_references(family_id: UUID, transactions: list[CreateTransaction], numbers: list[int], db: AsyncSession) -> list[BulkRowError]:
+    """
+    Report the rows referencing an account or a category of another family.
+    Args:
+        family_id (UUID): The unique identifier of the family.
+        transactions (list[CreateTransaction]): The validated transactions.
+        numbers (list[int]): The row number of each transaction.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        list[BulkRowError]: The errors of the rows with foreign references.
+    """
+    accounts, categories = await get_family_references(family_id, {transaction.account_id for transaction in transactions},
+                                                       {transaction.category_id for transaction in transactions}, db)
+    errors = []
+    for number, transaction in zip(numbers, transactions):
+        messages = []
+        if transaction.account_id not in accounts:
+            messages.append("account_id: Account not found in the family")
+        if transaction.category_id not in categories:
+            messages.append("category_id: Category not found in the family")
+        if messages:
+            errors.append(BulkRowError(row=number, errors=messages))
+    return errors
+
+def with_fingerprint(values: dict) -> dict:
+    """
+    Add the fingerprint to the column values of a transaction unless the caller computed it already.
+    Args:
+        values (dict): The column values of the transaction, including family_id.
+    Returns:
+        dict: The values with their fingerprint.
+    """
+    if values.get("fingerprint"):
+        return values
+    return {**values, "fingerprint": transaction_fingerprint(values["family_id"], values["account_id"], values["amount"], values["date"], values.get("description"))}
+
+async def insert_transactions(values: list[dict], db: AsyncSession):
+    """
+    Insert transaction rows with a single executemany statement, without loading ORM objects, and add them to the rollups.
+    The caller drops the cached net-worth reports of the families once the rows are committed.
+    Args:
+        values (list[dict]): The column values of every transaction, including family_id and user_id.
+        db (AsyncSession): The asynchronous database session.
+    """
+    if values:
+        await db.execute(insert(TransactionModel), [with_fingerprint(row) for row in values])
+        await record_transaction_changes(db, added=values)
+
+async def bulk_create_transactions(family_id: str, request: Request, allow_partial: bool, current_user: UserModel, db: AsyncSession)->RestBulkCreateTransactionsResponse:
+    """
+    Create many transactions of a family in one request.
+    The rows are validated, the accounts and categories they reference are checked in one query and
+    the valid rows are inserted with a single executemany in one transaction.
+    Args:
+        family_id (str): The unique identifier of the family.
+        request (Request): The request carrying a JSON array, a CSV body or a multipart CSV upload.
+        allow_partial (bool): Insert the valid rows even if other rows are invalid, otherwise nothing is inserted when a row is invalid.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestBulkCreateTransactionsResponse: The number of inserted transactions and the errors of every rejected row.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    try:
+        rows = await read_bulk_rows(request)
+    except BulkPayloadError as e:
+        return RestBulkCreateTransactionsResponse(code=0, status="FAILED", message=str(e))
+    if len(rows) > config.bulk_max_rows:
+        return RestBulkCreateTransactionsResponse(code=0, status="FAILED", message=f"A bulk request accepts at most {config.bulk_max_rows} transactions")
+    family_uuid = UUID(family_id)
+    transactions, numbers, errors = validate_rows(rows)
+    if transactions:
+        reference_errors = await check_references(family_uuid, transactions, numbers, db)
+        if reference_errors:
+            rejected = {error.row for error in reference_errors}
+            transactions = [transaction for transaction, number in zip(transactions, numbers) if number not in rejected]
+            errors = sorted(errors + reference_errors, key=lambda error: error.row)
+    if errors and not allow_partial:
+        return RestBulkCreateTransactionsResponse(code=0, status="FAILED", message=f"{len(errors)} of {len(rows)} transactions are invalid, nothing was inserted", errors=errors)
+    values = [{**transaction.model_dump(), "family_id": family_uuid, "user_id": current_user.id} for transaction in transactions]
+    try:
+        await insert_transactions(values, db)
+        await db.commit()
+        invalidate_net_worth([family_uuid])
+    except Exception as e:
+        await db.rollback()
+        return RestBulkCreateTransactionsResponse(code=0, status="FAILED", message=f"Failed to create transactions: {str(e)}")
+    return RestBulkCreateTransactionsResponse(code=1, status="SUCCESS", message=f"{len(values)} transactions created successfully", inserted=len(values), errors=errors or None)
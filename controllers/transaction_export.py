@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Literal, Optional, Union
+from uuid import UUID
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+from models import UserModel,TransactionModel
+from serializers import BaseRestResponse,TransactionFilter
+from .authorization import check_user_in_family
+from .transaction import filter_transactions
+
+# Number of rows fetched from the server side cursor and encoded per chunk
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (TransactionModel.id, TransactionModel.family_id, TransactionModel.category_id, TransactionModel.account_id,
+                  TransactionModel.user_id, TransactionModel.amount, TransactionModel.date, TransactionModel.description,
+                  TransactionModel.transaction_type)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+def encode_csv(rows: list, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for transaction_id, family_id, category_id, account_id, user_id, amount, date, description, transaction_type in rows:
+        writer.writerow((transaction_id, family_id, category_id, account_id, user_id, amount, date.isoformat(), description or "", transaction_type.value))
+    return buffer.getvalue()
+
+def encode_ndjson(rows: list, header: bool) -> str:
+    return "".join(json.dumps({"id": str(transaction_id), "family_id": str(family_id), "category_id": str(category_id), "account_id": str(account_id),
+                               "user_id": str(user_id), "amount": float(amount), "date": date.isoformat(), "description": description,
+                               "transaction_type": transaction_type.value}) + "\n"
+                   for transaction_id, family_id, category_id, account_id, user_id, amount, date, description, transaction_type in rows)
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+async def stream_transactions(bind: AsyncEngine, family_id: UUID, filters: Optional[TransactionFilter], export_format: str) -> AsyncIterator[bytes]:
+    """
+    Stream the encoded transactions of a family in chunks of EXPORT_BATCH_SIZE rows.
+    The generator runs after the request dependencies have been closed, so it reads through its own session.
+    Args:
+        bind (AsyncEngine): The engine of the request session.
+        family_id (UUID): The unique identifier of the family.
+        filters (Optional[TransactionFilter]): The filters narrowing the exported transactions.
+        export_format (str): Either csv or ndjson.
+    Yields:
+        bytes: The encoded rows of one batch.
+    """
+    statement = select(*EXPORT_COLUMNS).where(TransactionModel.family_id == family_id)
+    if filters:
+        statement = filter_transactions(statement, filters)
+    statement = statement.order_by(TransactionModel.date, TransactionModel.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    encode = ENCODERS[export_format]
+    header = True
+    async with AsyncSession(bind=bind) as session:
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield encode(rows, header).encode()
+            header = False
+    if header:
+        # No rows, a CSV export still starts with its header
+        yield encode([], header).encode()
+
+async def export_transactions_of_family(family_id: str, export_format: Literal["csv", "ndjson"], current_user: UserModel, db: AsyncSession, filters: Optional[TransactionFilter] = None)->Union[StreamingResponse, BaseRestResponse]:
+    """
+    Export the transactions of a family as CSV or newline delimited JSON, ordered by date.
+    Rows are read through a server side cursor and written straight to the response, so memory use does not grow with the ledger.
+    Args:
+        family_id (str): The unique identifier of the family.
+        export_format (Literal["csv", "ndjson"]): The format of the export.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+        filters (Optional[TransactionFilter]): The filters narrowing the exported transactions, None to export every transaction.
+    Returns:
+        Union[StreamingResponse, BaseRestResponse]: The streamed export, or a response with code 0 if the filters are invalid.
+    Raises:
+        HTTPException: If the user is not a member of the family or if the family does not exist.
+    """
+    await check_user_in_family(family_id, current_user.id, db)
+    if filters and filters.has_empty_range():
+        return BaseRestResponse(code=0, status="FAILED", message="Invalid filter range")
+    return StreamingResponse(stream_transactions(db.bind, UUID(family_id), filters, export_format),
+                             media_type=EXPORT_MEDIA_TYPES[export_format],
+                             headers={"Content-Disposition": f'attachment; filename="transactions-{family_id}.{export_format}"'})
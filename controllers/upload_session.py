@@ -0,0 +1,283 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+from models import UserModel,AttachmentModel,UploadSessionModel
+from serializers import CreateUploadSession,UploadSessionInfo,RestUploadSessionResponse,RestCreateAttachmentResponse,AttachmentInfo,BaseRestResponse
+from utilities import get_blob_store,compression_for_content_type,UploadError,parse_upload_checksum,receive_chunk,append_chunk,discard_chunk,store_staged_upload,staged_upload_path,remove_staged_files,remove_stale_chunks
+from config import config
+from .authorization import check_user_in_family
+from .transaction import get_transaction_by_id
+from .attachment import get_family_attachment_bytes,release_blob,lock_blobs
+
+logger = logging.getLogger(__name__)
+
+def upload_expiry() -> datetime:
+    # Naive UTC, like the other DateTime columns
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=config.upload_session_ttl)
+
+async def get_upload_session_by_id(upload_id: str, db: AsyncSession, for_update: bool = False) -> Optional[UploadSessionModel]:
+    """
+    Retrieve an upload session that has not expired.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        db (AsyncSession): The asynchronous database session.
+        for_update (bool): Lock the row until the transaction ends and read its current values, so concurrent chunks are appended one at a time.
+    Returns:
+        Optional[UploadSessionModel]: The upload session, None if it does not exist or has expired.
+    """
+    try:
+        upload_uuid = UUID(upload_id)
+    except ValueError:
+        return None
+    statement = select(UploadSessionModel).where(UploadSessionModel.id == upload_uuid, UploadSessionModel.expires_at > datetime.now(timezone.utc).replace(tzinfo=None))
+    if for_update:
+        statement = statement.with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(statement)
+    return result.scalars().first()
+
+async def create_upload_session(transaction_id: str, new_upload: CreateUploadSession, current_user: UserModel, db: AsyncSession)->RestUploadSessionResponse:
+    """
+    Start a resumable upload of an attachment of a transaction. The file is then sent in chunks with upload_chunk
+    and becomes an attachment with finalize_upload_session.
+    Args:
+        transaction_id (str): The unique identifier of the transaction.
+        new_upload (CreateUploadSession): The size, name, media type and optional SHA-256 of the file.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestUploadSessionResponse: The upload at offset 0, or a response with code 0 if the transaction does not exist or the file is too large.
+    Raises:
+        HTTPException: If the user is not a member of the family of the transaction.
+    """
+    transaction = await get_transaction_by_id(transaction_id, db)
+    if not transaction:
+        return RestUploadSessionResponse(code=0, status="FAILED", message="Transaction not found")
+    await check_user_in_family(str(transaction.family_id), current_user.id, db)
+    if new_upload.size > config.attachment_max_bytes:
+        return RestUploadSessionResponse(code=0, status="FAILED", message=f"The file exceeds {config.attachment_max_bytes} bytes")
+    if await get_family_attachment_bytes(transaction.family_id, db) + new_upload.size > config.attachment_max_family_bytes:
+        return RestUploadSessionResponse(code=0, status="FAILED", message=f"The file exceeds the {config.attachment_max_family_bytes} bytes a family may store")
+    upload = UploadSessionModel(user_id=current_user.id, family_id=transaction.family_id, transaction_id=transaction.id, filename=new_upload.filename,
+                                content_type=new_upload.content_type, size=new_upload.size, upload_offset=0, digest=new_upload.digest, expires_at=upload_expiry())
+    db.add(upload)
+    try:
+        await db.commit()
+        await db.refresh(upload)
+    except Exception as e:
+        await db.rollback()
+        return RestUploadSessionResponse(code=0, status="FAILED", message=f"Failed to create the upload: {str(e)}")
+    return RestUploadSessionResponse(code=1, status="SUCCESS", message="Upload created successfully", upload=UploadSessionInfo.model_validate(upload, from_attributes=True))
+
+async def get_upload_session(upload_id: str, current_user: UserModel, db: AsyncSession)->RestUploadSessionResponse:
+    """
+    Retrieve an upload and the offset its next chunk starts at.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestUploadSessionResponse: The upload, or a response with code 0 if it does not exist or has expired.
+    Raises:
+        HTTPException: If the user is not a member of the family of the upload.
+    """
+    upload = await get_upload_session_by_id(upload_id, db)
+    if not upload:
+        return RestUploadSessionResponse(code=0, status="FAILED", message="Upload not found")
+    await check_user_in_family(str(upload.family_id), current_user.id, db)
+    return RestUploadSessionResponse(code=1, status="SUCCESS", message="Upload retrieved successfully", upload=UploadSessionInfo.model_validate(upload, from_attributes=True))
+
+async def get_upload_offset(upload_id: str, current_user: UserModel, db: AsyncSession)->Response:
+    """
+    Report the offset of an upload in the Upload-Offset and Upload-Length headers, for HEAD requests.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        Response: An empty response with the offset headers, a 404 if the upload does not exist or has expired.
+    Raises:
+        HTTPException: If the user is not a member of the family of the upload.
+    """
+    upload = await get_upload_session_by_id(upload_id, db)
+    if not upload:
+        return Response(status_code=404, headers={"Cache-Control": "no-store"})
+    await check_user_in_family(str(upload.family_id), current_user.id, db)
+    return Response(status_code=200, headers={"Upload-Offset": str(upload.upload_offset), "Upload-Length": str(upload.size), "Cache-Control": "no-store"})
+
+async def upload_chunk(upload_id: str, request: Request, current_user: UserModel, db: AsyncSession)->RestUploadSessionResponse:
+    """
+    Append the body of the request to an upload. The Upload-Offset header must equal the offset of the upload,
+    and an optional Upload-Checksum header, such as "sha256 <base64 digest>", is checked before the chunk is appended.
+    The chunk is received into a file of its own without holding a database connection, then appended while the
+    upload row is locked, so an interrupted, invalid or concurrent chunk never corrupts the bytes received so far.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        request (Request): The request whose body is the chunk.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestUploadSessionResponse: The upload at its new offset, or a response with code 0 and the current offset if the chunk was not appended.
+    Raises:
+        HTTPException: If the user is not a member of the family of the upload.
+    """
+    upload = await get_upload_session_by_id(upload_id, db)
+    if not upload:
+        return RestUploadSessionResponse(code=0, status="FAILED", message="Upload not found")
+    await check_user_in_family(str(upload.family_id), current_user.id, db)
+    upload_info = UploadSessionInfo.model_validate(upload, from_attributes=True)
+    try:
+        offset = int(request.headers["upload-offset"])
+        checksum = parse_upload_checksum(request.headers.get("upload-checksum"))
+    except (KeyError, ValueError):
+        return RestUploadSessionResponse(code=0, status="FAILED", message="The Upload-Offset header must hold the offset of the chunk", upload=upload_info)
+    except UploadError as e:
+        return RestUploadSessionResponse(code=0, status="FAILED", message=str(e), upload=upload_info)
+    if offset != upload_info.upload_offset:
+        return RestUploadSessionResponse(code=0, status="FAILED", message=f"The upload continues at offset {upload_info.upload_offset}, not {offset}", upload=upload_info)
+    # Give the connection back to the pool while the chunk is received
+    await db.commit()
+    try:
+        chunk = await receive_chunk(config.upload_staging_dir, upload_info.id, request.stream(), upload_info.size - offset, checksum)
+    except UploadError as e:
+        return RestUploadSessionResponse(code=0, status="FAILED", message=str(e), upload=upload_info)
+    try:
+        upload = await get_upload_session_by_id(upload_id, db, for_update=True)
+        if not upload or upload.upload_offset != offset:
+            # Another chunk was appended, or the upload finished or expired, while this one was received
+            await db.rollback()
+            await run_in_threadpool(discard_chunk, chunk)
+            return RestUploadSessionResponse(code=0, status="FAILED", message="The upload moved on while the chunk was received, query its offset and resume")
+        await run_in_threadpool(append_chunk, staged_upload_path(config.upload_staging_dir, upload.id), chunk, offset)
+        upload.upload_offset = offset + chunk.size
+        upload.expires_at = upload_expiry()
+        await db.commit()
+        await db.refresh(upload)
+    except Exception as e:
+        await db.rollback()
+        await run_in_threadpool(discard_chunk, chunk)
+        return RestUploadSessionResponse(code=0, status="FAILED", message=f"Failed to append the chunk: {str(e)}", upload=upload_info)
+    return RestUploadSessionResponse(code=1, status="SUCCESS", message="Chunk received successfully", upload=UploadSessionInfo.model_validate(upload, from_attributes=True))
+
+async def finalize_upload_session(upload_id: str, current_user: UserModel, db: AsyncSession)->RestCreateAttachmentResponse:
+    """
+    Turn a complete upload into an attachment of its transaction. The staged file is copied to the blob store,
+    checked against the SHA-256 announced when the upload was created, then the upload and its staged file are removed.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        RestCreateAttachmentResponse: The created attachment, or a response with code 0 if the upload is incomplete, corrupt or over the family limit.
+    Raises:
+        HTTPException: If the user is not a member of the family of the upload.
+    """
+    upload = await get_upload_session_by_id(upload_id, db)
+    if not upload:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message="Upload not found")
+    await check_user_in_family(str(upload.family_id), current_user.id, db)
+    upload_info = UploadSessionInfo.model_validate(upload, from_attributes=True)
+    if upload_info.upload_offset != upload_info.size:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"The upload has received {upload_info.upload_offset} of {upload_info.size} bytes")
+    if await get_family_attachment_bytes(upload_info.family_id, db) + upload_info.size > config.attachment_max_family_bytes:
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"The file exceeds the {config.attachment_max_family_bytes} bytes a family may store")
+    # Give the connection back to the pool while the file is copied to the blob store
+    await db.commit()
+    compression = compression_for_content_type(upload_info.content_type, config.attachment_compression)
+    digest, size, stored_size = await run_in_threadpool(store_staged_upload, staged_upload_path(config.upload_staging_dir, upload_info.id), get_blob_store(), compression)
+    upload = await get_upload_session_by_id(upload_id, db, for_update=True)
+    if not upload:
+        await db.rollback()
+        await release_blob(digest, db, compression)
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message="Upload not found")
+    if upload_info.digest and digest != upload_info.digest:
+        # The staged bytes are not the announced file, the upload cannot be resumed from them
+        await db.delete(upload)
+        await db.commit()
+        await release_blob(digest, db, compression)
+        await run_in_threadpool(remove_staged_files, config.upload_staging_dir, upload_info.id)
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message="The uploaded file does not match its digest, the upload was discarded")
+    # A concurrent release may have removed the blob the upload found already stored, the staged file is still there to store it again
+    await lock_blobs([digest], db)
+    if not await run_in_threadpool(get_blob_store().exists, digest, compression):
+        digest, size, stored_size = await run_in_threadpool(store_staged_upload, staged_upload_path(config.upload_staging_dir, upload_info.id), get_blob_store(), compression)
+    attachment = AttachmentModel(transaction_id=upload_info.transaction_id, family_id=upload_info.family_id, digest=digest, size=size,
+                                 compression=compression, stored_size=stored_size, content_type=upload_info.content_type, filename=upload_info.filename)
+    db.add(attachment)
+    await db.delete(upload)
+    try:
+        await db.commit()
+        await db.refresh(attachment)
+    except Exception as e:
+        await db.rollback()
+        await release_blob(digest, db, compression)
+        return RestCreateAttachmentResponse(code=0, status="FAILED", message=f"Failed to create attachment: {str(e)}")
+    await run_in_threadpool(remove_staged_files, config.upload_staging_dir, upload_info.id)
+    attachment_info = AttachmentInfo(**attachment.__dict__)
+    return RestCreateAttachmentResponse(code=1, status="SUCCESS", message="Attachment created successfully", attachment=attachment_info, attachments=[attachment_info])
+
+async def delete_upload_session(upload_id: str, current_user: UserModel, db: AsyncSession)->BaseRestResponse:
+    """
+    Abandon an upload and remove the bytes staged for it.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel): The currently authenticated user.
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        BaseRestResponse: The result of the deletion.
+    Raises:
+        HTTPException: If the user is not a member of the family of the upload.
+    """
+    upload = await get_upload_session_by_id(upload_id, db)
+    if not upload:
+        return BaseRestResponse(code=0, status="FAILED", message="Upload not found")
+    await check_user_in_family(str(upload.family_id), current_user.id, db)
+    upload_uuid = upload.id
+    try:
+        await db.delete(upload)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        return BaseRestResponse(code=0, status="FAILED", message=f"Failed to delete the upload: {str(e)}")
+    await run_in_threadpool(remove_staged_files, config.upload_staging_dir, upload_uuid)
+    return BaseRestResponse(code=1, status="SUCCESS", message="Upload deleted successfully")
+
+async def sweep_expired_upload_sessions(bind: AsyncEngine) -> int:
+    """
+    Remove the uploads that received no chunk for upload_session_ttl seconds, with their staged files,
+    and the chunk files left behind by interrupted requests.
+    Args:
+        bind (AsyncEngine): The engine to open the session on.
+    Returns:
+        int: The number of removed uploads.
+    """
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        result = await db.execute(delete(UploadSessionModel).where(UploadSessionModel.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None))
+                                  .returning(UploadSessionModel.id))
+        expired = result.scalars().all()
+        await db.commit()
+    for upload_id in expired:
+        await run_in_threadpool(remove_staged_files, config.upload_staging_dir, upload_id)
+    await run_in_threadpool(remove_stale_chunks, config.upload_staging_dir, config.upload_session_ttl)
+    return len(expired)
+
+async def run_upload_sweeper(bind: AsyncEngine, interval: float):
+    """
+    Sweep the expired uploads every interval seconds until cancelled, started with the application.
+    Args:
+        bind (AsyncEngine): The engine to open the sessions on.
+        interval (float): The seconds between two sweeps.
+    """
+    while True:
+        try:
+            await sweep_expired_upload_sessions(bind)
+        except Exception:
+            logger.exception("Failed to sweep the expired uploads")
+        await asyncio.sleep(interval)
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from models import UserModel
 from serializers import UserCreationResponse,CreateUser,UserLogin,RestUserLoginResponse,UserLoginResponse,RestUserCreationResponse,BaseRestResponse,RestGetllAllUsers
 from utilities import verify_password,generate_token
+from .get_current_user import invalidate_principal
 from uuid import UUID
 
 async def get_all_users(db: AsyncSession) -> RestGetllAllUsers:
@@ -54,6 +55,7 @@ async def create_user(user: CreateUser,db: AsyncSession)->RestUserCreationRespon
         - Commits the transaction and refreshes the user instance.
     """
 
+    await user.hash_password()
     db_user = UserModel(**user.model_dump(exclude={'plain_password'}))
     db.add(db_user)
     try:
@@ -132,11 +134,13 @@ async def update_user(user_id: str, updated_user: CreateUser,current_user: UserM
         return RestUserCreationResponse(code=0,status="FAILED",message="User not found")
     if db_user.id != current_user.id:
         return RestUserCreationResponse(code=0,status="FAILED",message="Operation forbidden")
+    await updated_user.hash_password()
     for key, value in updated_user.model_dump(exclude_unset=True,exclude={'plain_password'}).items():
         if value is not None:
             setattr(db_user, key, value)
     try:
         await db.commit()
+        invalidate_principal(current_user.id)
         await db.refresh(db_user)
         user_response = UserCreationResponse(**db_user.__dict__)
         return RestUserCreationResponse(code=1,status="SUCCESSFUL",message="User updated successfully",user=user_response)
@@ -164,6 +168,7 @@ async def delete_user(user_id: str,current_user:UserModel, db: AsyncSession) ->
     try:
         await db.delete(db_user)
         await db.commit()
+        invalidate_principal(current_user.id)
         return BaseRestResponse(code=1,status="SUCCESSFUL",message="User deleted successfully")
     except Exception as e:
         await db.rollback()
@@ -5,10 +5,17 @@ from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from asyncio import current_task
 from config import config
+from utilities.connection_pool import InstrumentedAsyncQueuePool
 
 # Connect FastAPI with SQLAlchemy
 db_url=f"postgresql+asyncpg://{config.db_user}:{config.db_password}@{config.db_host}:{config.db_port}/{config.db_name}"
-engine = create_async_engine(db_url)
+engine = create_async_engine(db_url,
+                             poolclass=InstrumentedAsyncQueuePool,
+                             pool_size=config.db_pool_size,
+                             max_overflow=config.db_max_overflow,
+                             pool_timeout=config.db_pool_timeout,
+                             pool_recycle=config.db_pool_recycle,
+                             pool_pre_ping=config.db_pool_pre_ping)
 SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 async_session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 async_session = scoped_session(async_session_factory, scopefunc=current_task)
@@ -1,16 +1,24 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from database import async_session
+from database import async_session,engine
+from config import config
+from controllers import run_upload_sweeper,run_balance_reconciler
 from routes import UsersRouter,FamiliesRouter,FamilyUsersRouter,AccountsRouter,AttachmentsRouter
-from routes import BudgetsRouter,CategoriesRouter,TransactionsRouter,GoalsRouter,BudgetsTransactionsRouter
+from routes import BudgetsRouter,CategoriesRouter,TransactionsRouter,GoalsRouter,BudgetsTransactionsRouter,MetricsRouter,StatementImportsRouter,UploadsRouter,ReportsRouter
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Closes database connections when the applications is down
+    Starts the sweeper of the expired uploads and the reconciler of the account balances, then stops them and closes database connections when the applications is down
     """
+    tasks = [asyncio.create_task(run_upload_sweeper(engine, config.upload_sweep_interval))]
+    if config.balance_reconcile_interval > 0:
+        tasks.append(asyncio.create_task(run_balance_reconciler(engine, config.balance_reconcile_interval)))
     yield
+    for task in tasks:
+        task.cancel()
     async_session
     if async_session is not None:
         await async_session.close()
@@ -32,4 +40,8 @@ app.include_router(router=CategoriesRouter, tags=["Category","Family"])
 app.include_router(router=TransactionsRouter, tags=["Transaction","Family"])
 app.include_router(router=GoalsRouter, tags=["Goal","Family"])
 app.include_router(router=BudgetsTransactionsRouter, tags=["Budget","Transaction"])
-app.include_router(router=AttachmentsRouter, tags=["Attachment","Transaction"])
\ No newline at end of file
+app.include_router(router=AttachmentsRouter, tags=["Attachment","Transaction"])
+app.include_router(router=StatementImportsRouter, tags=["Import","Transaction"])
+app.include_router(router=UploadsRouter, tags=["Attachment","Upload"])
+app.include_router(router=ReportsRouter, tags=["Report","Family"])
+app.include_router(router=MetricsRouter, tags=["Metrics"])
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Baseline schema created by seed.py before migrations were introduced
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The enum types are shared between tables, so they are created once here instead of by each create_table.
+# SQLAlchemy stores the enum member names, not their values.
+account_type = postgresql.ENUM("INCOME", "EXPENSE", "ASSET", "LIABILITY", name="account_type", create_type=False)
+entry_type = postgresql.ENUM("INCOME", "EXPENSE", "TRANSFER", name="entry_type", create_type=False)
+role_enum = postgresql.ENUM("OWNER", "PARENT", "BIG_SIBLING", "CHILD", "GUEST", name="role_enum", create_type=False)
+
+
+def base_columns() -> list:
+    return [sa.Column("id", sa.UUID(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("modified_at", sa.DateTime(), nullable=True)]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for enum in (account_type, entry_type, role_enum):
+        enum.create(bind, checkfirst=True)
+    op.create_table("users",
+                    sa.Column("name", sa.String(length=150), nullable=True),
+                    sa.Column("email", sa.String(length=255), nullable=False),
+                    sa.Column("password", sa.String(), nullable=False),
+                    *base_columns(),
+                    sa.PrimaryKeyConstraint("id"),
+                    sa.UniqueConstraint("email"))
+    op.create_table("families",
+                    sa.Column("name", sa.String(), nullable=False),
+                    *base_columns(),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("accounts",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("name", sa.String(), nullable=False),
+                    sa.Column("type", account_type, nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"]),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("categories",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("name", sa.String(), nullable=False),
+                    sa.Column("type", entry_type, nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("families_users",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("role", role_enum, nullable=False),
+                    sa.Column("joined_at", sa.DateTime(), nullable=True),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("goals",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("name", sa.String(), nullable=False),
+                    sa.Column("target_amount", sa.Numeric(scale=3), nullable=True),
+                    sa.Column("saved_amount", sa.Numeric(scale=3), nullable=True),
+                    sa.Column("due_date", sa.DateTime(), nullable=True),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("budgets",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("category_id", sa.UUID(), nullable=False),
+                    sa.Column("account_id", sa.UUID(), nullable=True),
+                    sa.Column("amount", sa.Numeric(scale=3), nullable=False),
+                    sa.Column("start_date", sa.DateTime(), nullable=False),
+                    sa.Column("end_date", sa.DateTime(), nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["category_id"], ["categories.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("transactions",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("account_id", sa.UUID(), nullable=False),
+                    sa.Column("category_id", sa.UUID(), nullable=False),
+                    sa.Column("amount", sa.Numeric(scale=3), nullable=False),
+                    sa.Column("date", sa.DateTime(), nullable=False),
+                    sa.Column("description", sa.String(), nullable=True),
+                    sa.Column("transaction_type", entry_type, nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+                    sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"]),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("attachments",
+                    sa.Column("transaction_id", sa.UUID(), nullable=False),
+                    sa.Column("file_content", sa.LargeBinary(), nullable=False),
+                    sa.Column("upload_date", sa.DateTime(), nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["transaction_id"], ["transactions.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_table("budgets_transactions",
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("budget_id", sa.UUID(), nullable=False),
+                    sa.Column("transaction_id", sa.UUID(), nullable=False),
+                    sa.Column("assigned_amount", sa.Numeric(scale=3), nullable=False),
+                    *base_columns(),
+                    sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["transaction_id"], ["transactions.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+
+
+def downgrade() -> None:
+    for table in ("budgets_transactions", "attachments", "transactions", "budgets", "goals",
+                  "families_users", "categories", "accounts", "families", "users"):
+        op.drop_table(table)
+    bind = op.get_bind()
+    for enum in (role_enum, entry_type, account_type):
+        enum.drop(bind, checkfirst=True)
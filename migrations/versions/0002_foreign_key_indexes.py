@@ -0,0 +1,72 @@
+"""Index every foreign key and the paginated list lookups, make family membership unique
+
+Revision ID: 0002_foreign_key_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 00:00:01
+
+A foreign key column that leads a composite index, such as family_id in (family_id, created_at, id),
+is served by that index and does not get a single column index of its own.
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside of a transaction,
+so the tables stay writable while the migration runs.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "0002_foreign_key_indexes"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_accounts_user_id", "accounts", ["user_id"]),
+    ("ix_accounts_family_id_created_at_id", "accounts", ["family_id", "created_at", "id"]),
+    ("ix_attachments_transaction_id", "attachments", ["transaction_id"]),
+    ("ix_budgets_user_id", "budgets", ["user_id"]),
+    ("ix_budgets_category_id", "budgets", ["category_id"]),
+    ("ix_budgets_account_id", "budgets", ["account_id"]),
+    ("ix_budgets_family_id_created_at_id", "budgets", ["family_id", "created_at", "id"]),
+    ("ix_budgets_transactions_budget_id", "budgets_transactions", ["budget_id"]),
+    ("ix_budgets_transactions_transaction_id", "budgets_transactions", ["transaction_id"]),
+    ("ix_budgets_transactions_family_id_created_at_id", "budgets_transactions", ["family_id", "created_at", "id"]),
+    ("ix_categories_user_id", "categories", ["user_id"]),
+    ("ix_categories_family_id_created_at_id", "categories", ["family_id", "created_at", "id"]),
+    ("ix_families_users_user_id", "families_users", ["user_id"]),
+    ("ix_goals_user_id", "goals", ["user_id"]),
+    ("ix_goals_family_id_created_at_id", "goals", ["family_id", "created_at", "id"]),
+    ("ix_transactions_user_id", "transactions", ["user_id"]),
+    ("ix_transactions_account_id", "transactions", ["account_id"]),
+    ("ix_transactions_category_id", "transactions", ["category_id"]),
+    ("ix_transactions_family_id_date_id", "transactions", ["family_id", "date", "id"]),
+    ("ix_transactions_family_id_category_id_date_id", "transactions", ["family_id", "category_id", "date", "id"]),
+    ("ix_transactions_family_id_account_id_date_id", "transactions", ["family_id", "account_id", "date", "id"]),
+]
+
+
+# The roles from the strongest to the weakest, a duplicated membership keeps its strongest role
+ROLE_RANKS = ("OWNER", "PARENT", "BIG_SIBLING", "CHILD", "GUEST")
+
+
+def remove_duplicate_memberships() -> None:
+    # Keep one membership per (family_id, user_id) so the unique index can be built: the one with the strongest role,
+    # then the earliest, so an owner is never left with a weaker duplicate of their membership
+    rank = " ".join(f"WHEN '{role}' THEN {position}" for position, role in enumerate(ROLE_RANKS))
+    op.execute("DELETE FROM families_users WHERE id IN ("
+               "SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY family_id, user_id "
+               f"ORDER BY CASE CAST(role AS VARCHAR) {rank} ELSE {len(ROLE_RANKS)} END, created_at, id) AS membership_rank "
+               "FROM families_users) AS ranked WHERE membership_rank > 1)")
+
+
+def upgrade() -> None:
+    remove_duplicate_memberships()
+    with op.get_context().autocommit_block():
+        op.create_index("ix_families_users_family_id_user_id", "families_users", ["family_id", "user_id"], unique=True, postgresql_concurrently=True)
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.drop_index("ix_families_users_family_id_user_id", table_name="families_users", postgresql_concurrently=True)
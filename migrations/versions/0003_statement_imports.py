@@ -0,0 +1,82 @@
+"""Add statement imports and link the imported transactions to their import
+
+Revision ID: 0003_statement_imports
+Revises: 0002_foreign_key_indexes
+Create Date: 2026-10-17 00:00:02
+
+transactions.statement_import_id is nullable, so adding it does not rewrite the table on PostgreSQL.
+Its index is built concurrently like the other foreign key indexes.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0003_statement_imports"
+down_revision: Union[str, None] = "0002_foreign_key_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+statement_format = postgresql.ENUM("CSV", "OFX", "QIF", name="statement_format", create_type=False)
+import_status = postgresql.ENUM("PENDING", "PROCESSING", "COMPLETED", "FAILED", name="import_status", create_type=False)
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_statement_imports_user_id", "statement_imports", ["user_id"]),
+    ("ix_statement_imports_default_account_id", "statement_imports", ["default_account_id"]),
+    ("ix_statement_imports_default_category_id", "statement_imports", ["default_category_id"]),
+    ("ix_statement_imports_family_id_created_at_id", "statement_imports", ["family_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for enum in (statement_format, import_status):
+        enum.create(bind, checkfirst=True)
+    op.create_table("statement_imports",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("format", statement_format, nullable=False),
+                    sa.Column("status", import_status, nullable=False),
+                    sa.Column("default_account_id", sa.UUID(), nullable=True),
+                    sa.Column("default_category_id", sa.UUID(), nullable=True),
+                    sa.Column("settings", sa.JSON(), nullable=False),
+                    sa.Column("bytes_received", sa.BigInteger(), nullable=False),
+                    sa.Column("bytes_processed", sa.BigInteger(), nullable=False),
+                    sa.Column("rows_parsed", sa.Integer(), nullable=False),
+                    sa.Column("rows_inserted", sa.Integer(), nullable=False),
+                    sa.Column("rows_duplicate", sa.Integer(), nullable=False),
+                    sa.Column("rows_failed", sa.Integer(), nullable=False),
+                    sa.Column("errors", sa.JSON(), nullable=False),
+                    sa.Column("error", sa.String(), nullable=True),
+                    sa.Column("started_at", sa.DateTime(), nullable=True),
+                    sa.Column("finished_at", sa.DateTime(), nullable=True),
+                    sa.Column("id", sa.UUID(), nullable=False),
+                    sa.Column("created_at", sa.DateTime(), nullable=True),
+                    sa.Column("modified_at", sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["default_account_id"], ["accounts.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["default_category_id"], ["categories.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    with op.batch_alter_table("transactions") as batch:
+        batch.add_column(sa.Column("statement_import_id", sa.UUID(), nullable=True))
+        batch.create_foreign_key("transactions_statement_import_id_fkey", "statement_imports", ["statement_import_id"], ["id"], deferrable=True)
+    with op.get_context().autocommit_block():
+        op.create_index("ix_transactions_statement_import_id", "transactions", ["statement_import_id"], postgresql_concurrently=True)
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.drop_index("ix_transactions_statement_import_id", table_name="transactions", postgresql_concurrently=True)
+    with op.batch_alter_table("transactions") as batch:
+        batch.drop_constraint("transactions_statement_import_id_fkey", type_="foreignkey")
+        batch.drop_column("statement_import_id")
+    op.drop_table("statement_imports")
+    bind = op.get_bind()
+    for enum in (import_status, statement_format):
+        enum.drop(bind, checkfirst=True)
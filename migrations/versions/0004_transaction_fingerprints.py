@@ -0,0 +1,60 @@
+"""Add the transaction fingerprint used to detect duplicates and backfill it
+
+Revision ID: 0004_transaction_fingerprints
+Revises: 0003_statement_imports
+Create Date: 2026-10-17 00:00:03
+
+The fingerprint hashes a normalized description, so it is computed in Python with the function the
+application uses and written back in batches. The (family_id, fingerprint) index is built concurrently afterwards.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from utilities.fingerprint import transaction_fingerprint
+
+revision: str = "0004_transaction_fingerprints"
+down_revision: Union[str, None] = "0003_statement_imports"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+transactions = sa.table("transactions",
+                        sa.column("id", sa.UUID()),
+                        sa.column("family_id", sa.UUID()),
+                        sa.column("account_id", sa.UUID()),
+                        sa.column("amount", sa.Numeric(scale=3)),
+                        sa.column("date", sa.DateTime()),
+                        sa.column("description", sa.String()),
+                        sa.column("fingerprint", sa.String(64)))
+
+
+def backfill_fingerprints() -> None:
+    # Walk the table in primary key order so every batch is a range scan
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        statement = sa.select(transactions.c.id, transactions.c.family_id, transactions.c.account_id, transactions.c.amount,
+                              transactions.c.date, transactions.c.description).order_by(transactions.c.id).limit(BACKFILL_BATCH_SIZE)
+        if last_id is not None:
+            statement = statement.where(transactions.c.id > last_id)
+        rows = bind.execute(statement).all()
+        if not rows:
+            break
+        bind.execute(sa.update(transactions).where(transactions.c.id == sa.bindparam("row_id")).values(fingerprint=sa.bindparam("row_fingerprint")),
+                     [{"row_id": row.id, "row_fingerprint": transaction_fingerprint(row.family_id, row.account_id, row.amount, row.date, row.description)} for row in rows])
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("transactions", sa.Column("fingerprint", sa.String(length=64), nullable=True))
+    backfill_fingerprints()
+    with op.get_context().autocommit_block():
+        op.create_index("ix_transactions_family_id_fingerprint", "transactions", ["family_id", "fingerprint"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_transactions_family_id_fingerprint", table_name="transactions", postgresql_concurrently=True)
+    with op.batch_alter_table("transactions") as batch:
+        batch.drop_column("fingerprint")
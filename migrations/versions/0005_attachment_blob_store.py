@@ -0,0 +1,87 @@
+"""Move attachment contents out of the attachments table into the blob store
+
+Revision ID: 0005_attachment_blob_store
+Revises: 0004_transaction_fingerprints
+Create Date: 2026-10-17 00:00:04
+
+Every file_content is written to the configured blob store in batches and replaced by its digest and size.
+The content type of the existing attachments was never recorded, they become application/octet-stream.
+Downgrading reads the contents back from the blob store, the blobs themselves are left in place.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from utilities.blob_store import get_blob_store
+
+revision: str = "0005_attachment_blob_store"
+down_revision: Union[str, None] = "0004_transaction_fingerprints"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+attachments = sa.table("attachments",
+                       sa.column("id", sa.UUID()),
+                       sa.column("file_content", sa.LargeBinary()),
+                       sa.column("digest", sa.String(64)),
+                       sa.column("size", sa.BigInteger()),
+                       sa.column("content_type", sa.String()))
+
+
+def batches(statement):
+    # Walk the attachments in primary key order, a few blobs at a time
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        page = statement.order_by(attachments.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            page = page.where(attachments.c.id > last_id)
+        rows = bind.execute(page).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("attachments") as batch:
+        batch.add_column(sa.Column("digest", sa.String(length=64), nullable=True))
+        batch.add_column(sa.Column("size", sa.BigInteger(), nullable=True))
+        batch.add_column(sa.Column("content_type", sa.String(), nullable=True))
+    store = get_blob_store()
+    bind = op.get_bind()
+    for rows in batches(sa.select(attachments.c.id, attachments.c.file_content)):
+        values = []
+        for row in rows:
+            digest, size = store.put(row.file_content)
+            values.append({"row_id": row.id, "row_digest": digest, "row_size": size})
+        bind.execute(sa.update(attachments).where(attachments.c.id == sa.bindparam("row_id"))
+                     .values(digest=sa.bindparam("row_digest"), size=sa.bindparam("row_size"), content_type=DEFAULT_CONTENT_TYPE), values)
+    with op.batch_alter_table("attachments") as batch:
+        batch.alter_column("digest", existing_type=sa.String(length=64), nullable=False)
+        batch.alter_column("size", existing_type=sa.BigInteger(), nullable=False)
+        batch.alter_column("content_type", existing_type=sa.String(), nullable=False)
+        batch.drop_column("file_content")
+    with op.get_context().autocommit_block():
+        op.create_index("ix_attachments_digest", "attachments", ["digest"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_attachments_digest", table_name="attachments", postgresql_concurrently=True)
+    with op.batch_alter_table("attachments") as batch:
+        batch.add_column(sa.Column("file_content", sa.LargeBinary(), nullable=True))
+    store = get_blob_store()
+    bind = op.get_bind()
+    for rows in batches(sa.select(attachments.c.id, attachments.c.digest)):
+        values = []
+        for row in rows:
+            with store.open(row.digest) as blob:
+                values.append({"row_id": row.id, "row_content": blob.read()})
+        bind.execute(sa.update(attachments).where(attachments.c.id == sa.bindparam("row_id")).values(file_content=sa.bindparam("row_content")), values)
+    with op.batch_alter_table("attachments") as batch:
+        batch.alter_column("file_content", existing_type=sa.LargeBinary(), nullable=False)
+        batch.drop_column("content_type")
+        batch.drop_column("size")
+        batch.drop_column("digest")
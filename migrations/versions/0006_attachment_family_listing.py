@@ -0,0 +1,51 @@
+"""Let a transaction have several attachments and list the attachments of a family
+
+Revision ID: 0006_attachment_family_listing
+Revises: 0005_attachment_blob_store
+Create Date: 2026-10-17 00:00:05
+
+The family of an attachment is copied from its transaction so the family listing and quota read
+the attachments table alone. The single column transaction_id index is replaced by the
+(transaction_id, created_at, id) index the paginated listing of a transaction walks.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006_attachment_family_listing"
+down_revision: Union[str, None] = "0005_attachment_blob_store"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+attachments = sa.table("attachments",
+                       sa.column("transaction_id", sa.UUID()),
+                       sa.column("family_id", sa.UUID()))
+transactions = sa.table("transactions",
+                        sa.column("id", sa.UUID()),
+                        sa.column("family_id", sa.UUID()))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("attachments") as batch:
+        batch.add_column(sa.Column("family_id", sa.UUID(), nullable=True))
+        batch.add_column(sa.Column("filename", sa.String(), nullable=True))
+    op.execute(sa.update(attachments).values(family_id=sa.select(transactions.c.family_id)
+                                             .where(transactions.c.id == attachments.c.transaction_id).scalar_subquery()))
+    with op.batch_alter_table("attachments") as batch:
+        batch.alter_column("family_id", existing_type=sa.UUID(), nullable=False)
+        batch.create_foreign_key("attachments_family_id_fkey", "families", ["family_id"], ["id"], deferrable=True)
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_attachments_transaction_id", table_name="attachments", postgresql_concurrently=True)
+        op.create_index("ix_attachments_transaction_id_created_at_id", "attachments", ["transaction_id", "created_at", "id"], postgresql_concurrently=True)
+        op.create_index("ix_attachments_family_id_created_at_id", "attachments", ["family_id", "created_at", "id"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_attachments_family_id_created_at_id", table_name="attachments", postgresql_concurrently=True)
+        op.drop_index("ix_attachments_transaction_id_created_at_id", table_name="attachments", postgresql_concurrently=True)
+        op.create_index("ix_attachments_transaction_id", "attachments", ["transaction_id"], postgresql_concurrently=True)
+    with op.batch_alter_table("attachments") as batch:
+        batch.drop_constraint("attachments_family_id_fkey", type_="foreignkey")
+        batch.drop_column("filename")
+        batch.drop_column("family_id")
@@ -0,0 +1,52 @@
+"""Add the sessions of resumable attachment uploads
+
+Revision ID: 0007_upload_sessions
+Revises: 0006_attachment_family_listing
+Create Date: 2026-10-17 00:00:06
+
+The table starts empty, its indexes are created with it. expires_at is indexed for the sweeper.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007_upload_sessions"
+down_revision: Union[str, None] = "0006_attachment_family_listing"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, columns)
+INDEXES = [
+    ("ix_upload_sessions_user_id", ["user_id"]),
+    ("ix_upload_sessions_family_id", ["family_id"]),
+    ("ix_upload_sessions_transaction_id", ["transaction_id"]),
+    ("ix_upload_sessions_expires_at", ["expires_at"]),
+]
+
+
+def upgrade() -> None:
+    op.create_table("upload_sessions",
+                    sa.Column("user_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("transaction_id", sa.UUID(), nullable=False),
+                    sa.Column("filename", sa.String(), nullable=True),
+                    sa.Column("content_type", sa.String(), nullable=False),
+                    sa.Column("size", sa.BigInteger(), nullable=False),
+                    sa.Column("upload_offset", sa.BigInteger(), nullable=False),
+                    sa.Column("digest", sa.String(length=64), nullable=True),
+                    sa.Column("expires_at", sa.DateTime(), nullable=False),
+                    sa.Column("id", sa.UUID(), nullable=False),
+                    sa.Column("created_at", sa.DateTime(), nullable=True),
+                    sa.Column("modified_at", sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(["user_id"], ["users.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["transaction_id"], ["transactions.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    for name, columns in INDEXES:
+        op.create_index(name, "upload_sessions", columns)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="upload_sessions")
+    op.drop_table("upload_sessions")
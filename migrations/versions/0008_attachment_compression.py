@@ -0,0 +1,35 @@
+"""Record how attachments are stored in the blob store and the bytes they take there
+
+Revision ID: 0008_attachment_compression
+Revises: 0007_upload_sessions
+Create Date: 2026-10-17 00:00:07
+
+The existing attachments are stored as is, so their stored size is their size.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0008_attachment_compression"
+down_revision: Union[str, None] = "0007_upload_sessions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+attachments = sa.table("attachments",
+                       sa.column("size", sa.BigInteger()),
+                       sa.column("stored_size", sa.BigInteger()))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("attachments") as batch:
+        batch.add_column(sa.Column("compression", sa.String(), nullable=True))
+        batch.add_column(sa.Column("stored_size", sa.BigInteger(), nullable=True))
+    op.execute(sa.update(attachments).values(stored_size=attachments.c.size))
+    with op.batch_alter_table("attachments") as batch:
+        batch.alter_column("stored_size", existing_type=sa.BigInteger(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("attachments") as batch:
+        batch.drop_column("stored_size")
+        batch.drop_column("compression")
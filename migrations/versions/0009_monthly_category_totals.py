@@ -0,0 +1,80 @@
+"""Add the monthly totals of every family per category and type and backfill them
+
+Revision ID: 0009_monthly_category_totals
+Revises: 0008_attachment_compression
+Create Date: 2026-10-17 00:00:08
+
+The totals are grouped in the database, one row per family, month, category and type, and inserted with
+ids generated in Python. From then on the application keeps them in step with every transaction write.
+"""
+import uuid
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0009_monthly_category_totals"
+down_revision: Union[str, None] = "0008_attachment_compression"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+entry_type = postgresql.ENUM("INCOME", "EXPENSE", "TRANSFER", name="entry_type", create_type=False)
+
+transactions = sa.table("transactions",
+                        sa.column("family_id", sa.UUID()),
+                        sa.column("category_id", sa.UUID()),
+                        sa.column("transaction_type", entry_type),
+                        sa.column("amount", sa.Numeric(scale=3)),
+                        sa.column("date", sa.DateTime()))
+
+totals = sa.table("family_monthly_category_totals",
+                  sa.column("id", sa.UUID()),
+                  sa.column("family_id", sa.UUID()),
+                  sa.column("month", sa.Date()),
+                  sa.column("category_id", sa.UUID()),
+                  sa.column("transaction_type", entry_type),
+                  sa.column("total", sa.Numeric(scale=3)),
+                  sa.column("transaction_count", sa.Integer()),
+                  sa.column("created_at", sa.DateTime()),
+                  sa.column("modified_at", sa.DateTime()))
+
+
+def backfill_totals() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        month = sa.cast(sa.func.date_trunc("month", transactions.c.date), sa.Date)
+    else:
+        month = sa.func.date(transactions.c.date, "start of month", type_=sa.Date)
+    rows = bind.execute(sa.select(transactions.c.family_id, month.label("month"), transactions.c.category_id, transactions.c.transaction_type,
+                                  sa.func.sum(transactions.c.amount).label("total"), sa.func.count().label("transaction_count"))
+                        .group_by(transactions.c.family_id, month, transactions.c.category_id, transactions.c.transaction_type)).all()
+    if rows:
+        bind.execute(sa.insert(totals).values(created_at=sa.func.now(), modified_at=sa.func.now()), [{"id": uuid.uuid4(), "family_id": row.family_id, "month": row.month, "category_id": row.category_id,
+                                          "transaction_type": row.transaction_type, "total": row.total, "transaction_count": row.transaction_count}
+                                         for row in rows])
+
+
+def upgrade() -> None:
+    op.create_table("family_monthly_category_totals",
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("month", sa.Date(), nullable=False),
+                    sa.Column("category_id", sa.UUID(), nullable=False),
+                    sa.Column("transaction_type", entry_type, nullable=False),
+                    sa.Column("total", sa.Numeric(scale=3), nullable=False),
+                    sa.Column("transaction_count", sa.Integer(), nullable=False),
+                    sa.Column("id", sa.UUID(), nullable=False),
+                    sa.Column("created_at", sa.DateTime(), nullable=True),
+                    sa.Column("modified_at", sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["category_id"], ["categories.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_index("ix_family_monthly_category_totals_family_id_month_category", "family_monthly_category_totals",
+                    ["family_id", "month", "category_id", "transaction_type"], unique=True)
+    op.create_index("ix_family_monthly_category_totals_category_id", "family_monthly_category_totals", ["category_id"])
+    backfill_totals()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_family_monthly_category_totals_category_id", table_name="family_monthly_category_totals")
+    op.drop_index("ix_family_monthly_category_totals_family_id_month_category", table_name="family_monthly_category_totals")
+    op.drop_table("family_monthly_category_totals")
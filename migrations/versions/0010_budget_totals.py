@@ -0,0 +1,90 @@
+"""Keep the spent and assigned totals of every budget and index the budget transactions by budget and transaction
+
+Revision ID: 0010_budget_totals
+Revises: 0009_monthly_category_totals
+Create Date: 2026-10-17 00:00:09
+
+The totals of the existing budgets are computed with one grouped query over their transactions and written back
+with an executemany, the application keeps them in step from then on. Recomputing the totals of a budget checks
+which of its transactions are assigned to it, the (budget_id, transaction_id) index answers that with one lookup
+and replaces the single column budget_id index.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0010_budget_totals"
+down_revision: Union[str, None] = "0009_monthly_category_totals"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (column, type)
+TOTAL_COLUMNS = [
+    ("spent", sa.Numeric(scale=3)),
+    ("spent_count", sa.Integer()),
+    ("assigned", sa.Numeric(scale=3)),
+    ("assigned_spent", sa.Numeric(scale=3)),
+    ("assigned_count", sa.Integer()),
+]
+
+budgets = sa.table("budgets",
+                   sa.column("id", sa.UUID()),
+                   sa.column("family_id", sa.UUID()),
+                   sa.column("category_id", sa.UUID()),
+                   sa.column("account_id", sa.UUID()),
+                   sa.column("start_date", sa.DateTime()),
+                   sa.column("end_date", sa.DateTime()),
+                   *(sa.column(name, column_type) for name, column_type in TOTAL_COLUMNS))
+transactions = sa.table("transactions",
+                        sa.column("id", sa.UUID()),
+                        sa.column("family_id", sa.UUID()),
+                        sa.column("category_id", sa.UUID()),
+                        sa.column("account_id", sa.UUID()),
+                        sa.column("amount", sa.Numeric(scale=3)),
+                        sa.column("date", sa.DateTime()))
+budgets_transactions = sa.table("budgets_transactions",
+                                sa.column("budget_id", sa.UUID()),
+                                sa.column("transaction_id", sa.UUID()),
+                                sa.column("assigned_amount", sa.Numeric(scale=3)))
+
+
+def backfill_totals() -> None:
+    bind = op.get_bind()
+    matches = sa.and_(transactions.c.category_id == budgets.c.category_id, transactions.c.date >= budgets.c.start_date, transactions.c.date <= budgets.c.end_date,
+                      sa.or_(budgets.c.account_id.is_(None), transactions.c.account_id == budgets.c.account_id))
+    assignments = budgets_transactions.c.budget_id == budgets.c.id
+    assigned_transactions = (sa.select(transactions.c.amount).join(budgets_transactions, budgets_transactions.c.transaction_id == transactions.c.id)
+                             .where(assignments, matches).subquery())
+    rows = bind.execute(sa.select(budgets.c.id,
+                                  sa.func.coalesce(sa.func.sum(transactions.c.amount), 0).label("spent"),
+                                  sa.func.count(transactions.c.id).label("spent_count"),
+                                  sa.select(sa.func.coalesce(sa.func.sum(budgets_transactions.c.assigned_amount), 0)).where(assignments).scalar_subquery().label("assigned"),
+                                  sa.select(sa.func.coalesce(sa.func.sum(assigned_transactions.c.amount), 0)).scalar_subquery().label("assigned_spent"),
+                                  sa.select(sa.func.count()).select_from(assigned_transactions).scalar_subquery().label("assigned_count"))
+                        .outerjoin(transactions, sa.and_(transactions.c.family_id == budgets.c.family_id, matches))
+                        .group_by(budgets.c.id)).all()
+    if rows:
+        bind.execute(sa.update(budgets).where(budgets.c.id == sa.bindparam("budget_id")).values(**{name: sa.bindparam(f"{name}_total") for name, _ in TOTAL_COLUMNS}),
+                     [{"budget_id": row.id, **{f"{name}_total": getattr(row, name) for name, _ in TOTAL_COLUMNS}} for row in rows])
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("budgets") as batch:
+        for name, column_type in TOTAL_COLUMNS:
+            batch.add_column(sa.Column(name, column_type, nullable=False, server_default="0"))
+    backfill_totals()
+    with op.batch_alter_table("budgets") as batch:
+        for name, column_type in TOTAL_COLUMNS:
+            batch.alter_column(name, existing_type=column_type, existing_nullable=False, server_default=None)
+    with op.get_context().autocommit_block():
+        op.create_index("ix_budgets_transactions_budget_id_transaction_id", "budgets_transactions", ["budget_id", "transaction_id"], postgresql_concurrently=True)
+        op.drop_index("ix_budgets_transactions_budget_id", table_name="budgets_transactions", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_budgets_transactions_budget_id", "budgets_transactions", ["budget_id"], postgresql_concurrently=True)
+        op.drop_index("ix_budgets_transactions_budget_id_transaction_id", table_name="budgets_transactions", postgresql_concurrently=True)
+    with op.batch_alter_table("budgets") as batch:
+        for name, _ in reversed(TOTAL_COLUMNS):
+            batch.drop_column(name)
@@ -0,0 +1,94 @@
+"""Keep the balance of every account and its daily changes and backfill them
+
+Revision ID: 0011_account_balances
+Revises: 0010_budget_totals
+Create Date: 2026-10-17 00:00:10
+
+The daily changes are grouped in the database, incomes and transfers added and expenses subtracted, and inserted
+with ids generated in Python. The balance of an account is the sum of its daily changes.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0011_account_balances"
+down_revision: Union[str, None] = "0010_budget_totals"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+entry_type = postgresql.ENUM("INCOME", "EXPENSE", "TRANSFER", name="entry_type", create_type=False)
+
+accounts = sa.table("accounts",
+                    sa.column("id", sa.UUID()),
+                    sa.column("balance", sa.Numeric(scale=3)))
+transactions = sa.table("transactions",
+                        sa.column("family_id", sa.UUID()),
+                        sa.column("account_id", sa.UUID()),
+                        sa.column("transaction_type", entry_type),
+                        sa.column("amount", sa.Numeric(scale=3)),
+                        sa.column("date", sa.DateTime()))
+daily_balances = sa.table("account_daily_balances",
+                          sa.column("id", sa.UUID()),
+                          sa.column("account_id", sa.UUID()),
+                          sa.column("family_id", sa.UUID()),
+                          sa.column("day", sa.Date()),
+                          sa.column("net_change", sa.Numeric(scale=3)),
+                          sa.column("transaction_count", sa.Integer()),
+                          sa.column("created_at", sa.DateTime()),
+                          sa.column("modified_at", sa.DateTime()))
+
+
+def backfill_balances() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        day = sa.cast(transactions.c.date, sa.Date)
+    else:
+        day = sa.func.date(transactions.c.date, type_=sa.Date)
+    signed_amount = sa.case((transactions.c.transaction_type == "EXPENSE", -transactions.c.amount), else_=transactions.c.amount)
+    rows = bind.execute(sa.select(transactions.c.account_id, transactions.c.family_id, day.label("day"),
+                                  sa.func.sum(signed_amount).label("net_change"), sa.func.count().label("transaction_count"))
+                        .group_by(transactions.c.account_id, transactions.c.family_id, day)).all()
+    if not rows:
+        return
+    bind.execute(sa.insert(daily_balances).values(created_at=sa.func.now(), modified_at=sa.func.now()),
+                 [{"id": uuid.uuid4(), "account_id": row.account_id, "family_id": row.family_id, "day": row.day, "net_change": row.net_change,
+                   "transaction_count": row.transaction_count} for row in rows])
+    balances = defaultdict(Decimal)
+    for row in rows:
+        balances[row.account_id] += Decimal(row.net_change)
+    bind.execute(sa.update(accounts).where(accounts.c.id == sa.bindparam("account_id")).values(balance=sa.bindparam("account_balance")),
+                 [{"account_id": account_id, "account_balance": balance} for account_id, balance in balances.items()])
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("accounts") as batch:
+        batch.add_column(sa.Column("balance", sa.Numeric(scale=3), nullable=False, server_default="0"))
+    op.create_table("account_daily_balances",
+                    sa.Column("account_id", sa.UUID(), nullable=False),
+                    sa.Column("family_id", sa.UUID(), nullable=False),
+                    sa.Column("day", sa.Date(), nullable=False),
+                    sa.Column("net_change", sa.Numeric(scale=3), nullable=False),
+                    sa.Column("transaction_count", sa.Integer(), nullable=False),
+                    sa.Column("id", sa.UUID(), nullable=False),
+                    sa.Column("created_at", sa.DateTime(), nullable=True),
+                    sa.Column("modified_at", sa.DateTime(), nullable=True),
+                    sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], deferrable=True),
+                    sa.ForeignKeyConstraint(["family_id"], ["families.id"], deferrable=True),
+                    sa.PrimaryKeyConstraint("id"))
+    op.create_index("ix_account_daily_balances_account_id_day", "account_daily_balances", ["account_id", "day"], unique=True)
+    op.create_index("ix_account_daily_balances_family_id_day", "account_daily_balances", ["family_id", "day"])
+    backfill_balances()
+    with op.batch_alter_table("accounts") as batch:
+        batch.alter_column("balance", existing_type=sa.Numeric(scale=3), existing_nullable=False, server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_account_daily_balances_family_id_day", table_name="account_daily_balances")
+    op.drop_index("ix_account_daily_balances_account_id_day", table_name="account_daily_balances")
+    op.drop_table("account_daily_balances")
+    with op.batch_alter_table("accounts") as batch:
+        batch.drop_column("balance")
@@ -0,0 +1,50 @@
+"""Link goals to an account or a category and keep their saved amount from the transactions
+
+Revision ID: 0012_goal_links
+Revises: 0011_account_balances
+Create Date: 2026-10-18 00:00:12
+
+The existing goals have no link, their saved amount stays as it was edited, missing amounts become 0. Their start
+date, from which the transactions count and the saving rate is measured, is the date they were created on.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0012_goal_links"
+down_revision: Union[str, None] = "0011_account_balances"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+goals = sa.table("goals",
+                 sa.column("created_at", sa.DateTime()),
+                 sa.column("saved_amount", sa.Numeric(scale=3)),
+                 sa.column("start_date", sa.DateTime()))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("goals") as batch:
+        batch.add_column(sa.Column("account_id", sa.UUID(), nullable=True))
+        batch.add_column(sa.Column("category_id", sa.UUID(), nullable=True))
+        batch.add_column(sa.Column("start_date", sa.DateTime(), nullable=True))
+        batch.create_foreign_key("fk_goals_account_id_accounts", "accounts", ["account_id"], ["id"], deferrable=True)
+        batch.create_foreign_key("fk_goals_category_id_categories", "categories", ["category_id"], ["id"], deferrable=True)
+    op.execute(sa.update(goals).values(start_date=goals.c.created_at))
+    op.execute(sa.update(goals).where(goals.c.saved_amount.is_(None)).values(saved_amount=0))
+    with op.batch_alter_table("goals") as batch:
+        batch.alter_column("start_date", existing_type=sa.DateTime(), nullable=False)
+    with op.get_context().autocommit_block():
+        op.create_index("ix_goals_account_id", "goals", ["account_id"], postgresql_concurrently=True)
+        op.create_index("ix_goals_category_id", "goals", ["category_id"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_goals_category_id", table_name="goals", postgresql_concurrently=True)
+        op.drop_index("ix_goals_account_id", table_name="goals", postgresql_concurrently=True)
+    with op.batch_alter_table("goals") as batch:
+        batch.drop_constraint("fk_goals_category_id_categories", type_="foreignkey")
+        batch.drop_constraint("fk_goals_account_id_accounts", type_="foreignkey")
+        batch.drop_column("start_date")
+        batch.drop_column("category_id")
+        batch.drop_column("account_id")
@@ -3,9 +3,13 @@ from .user import UserModel
 from .family import FamilyModel
 from .account import AccountModel,AccountType
 from .transaction import TransactionModel
-from .attachment import AttachmentModel
+from .attachment import AttachmentModel,ATTACHMENT_METADATA_COLUMNS
 from .budget_transaction import BudgetTransactionModel
 from .budget import BudgetModel
 from .category import CategoryModel
 from .family_users import FamilyUserModel,Role as FamilyUserRole
-from .goal import GoalModel
\ No newline at end of file
+from .goal import GoalModel
+from .statement_import import StatementImportModel,StatementFormat,ImportStatus
+from .upload_session import UploadSessionModel
+from .monthly_total import FamilyMonthlyCategoryTotalModel
+from .account_balance import AccountDailyBalanceModel
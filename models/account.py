@@ -1,4 +1,4 @@
-from sqlalchemy import Column,ForeignKey,UUID,String,Enum as EnumSQL
+from sqlalchemy import Column,ForeignKey,UUID,String,Enum as EnumSQL,Index,Numeric
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 from enum import Enum
@@ -18,15 +18,18 @@ class AccountModel(BaseModel):
         family_id (UUID): Foreign key referencing the ID of the family associated with the account.
         name (str): The name of the account.
         type (AccountType): The type of the account, represented as an enumeration.
+        balance (Numeric): The sum of the transactions of the account, incomes and transfers added and expenses subtracted, kept by every transaction write.
         user (UserModel): Relationship to the UserModel, representing the user who owns the account.
         family (FamilyModel): Relationship to the FamilyModel, representing the family associated with the account.
     """
 
     __tablename__ = "accounts"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    __table_args__ = (Index("ix_accounts_family_id_created_at_id", "family_id", "created_at", "id"),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id'), nullable=False)
     name = Column(String, nullable=False)
     type= Column(EnumSQL(AccountType, name="account_type", native_enum=True),nullable=False)
+    balance=Column(Numeric(scale=3),nullable=False,default=0)
     user=relationship('UserModel',back_populates='account')
     family=relationship('FamilyModel',back_populates='account')
     budget=relationship('BudgetModel',back_populates='account')
@@ -0,0 +1,24 @@
+from sqlalchemy import Column,Date,Integer,Numeric,UUID,ForeignKey,Index
+from .base import BaseModel
+
+class AccountDailyBalanceModel(BaseModel):
+    """
+    AccountDailyBalanceModel is the net change of the balance of an account on one day, the running sum of the changes up to a day is the balance at the end of it.
+    The changes are stored instead of the balances so a transaction dated in the past updates one row, not every later day.
+    Attributes:
+        __tablename__ (str): The name of the database table, "account_daily_balances".
+        account_id (UUID): Foreign key referencing the account.
+        family_id (UUID): Foreign key referencing the family of the account.
+        day (Date): The day the transactions are dated on.
+        net_change (Numeric): The signed sum of the transactions of the account on the day, with a scale of 3 decimal places.
+        transaction_count (int): The number of transactions, rows reaching 0 are removed.
+    """
+
+    __tablename__ = "account_daily_balances"
+    __table_args__ = (Index("ix_account_daily_balances_account_id_day", "account_id", "day", unique=True),
+                      Index("ix_account_daily_balances_family_id_day", "family_id", "day"))
+    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id',deferrable=True), nullable=False)
+    family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
+    day=Column(Date(), nullable=False)
+    net_change=Column(Numeric(scale=3), nullable=False, default=0)
+    transaction_count=Column(Integer, nullable=False, default=0)
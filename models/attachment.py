@@ -1,22 +1,41 @@
-from sqlalchemy import Column,LargeBinary,UUID,ForeignKey,DateTime,func
+from sqlalchemy import Column,String,BigInteger,UUID,ForeignKey,DateTime,func,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class AttachmentModel(BaseModel):
     """
     AttachementModel represents the database model for storing file attachments 
-    associated with transactions.
+    associated with transactions, a transaction can have several attachments.
+    The content of the file is kept in the blob store under its digest, the table only holds its metadata.
     Attributes:
         __tablename__ (str): The name of the database table, "attachments".
         transaction_id (UUID): A foreign key referencing the ID of a user in the "users" table.
-        file_content (LargeBinary): The binary content of the uploaded file.
+        family_id (UUID): A foreign key referencing the family of the transaction, so the attachments of a family are listed without a join.
+        digest (str): The SHA-256 of the file content, the key of the file in the blob store.
+        size (int): The size of the file in bytes.
+        compression (str): The codec the file is stored with in the blob store, None when stored as is.
+        stored_size (int): The bytes the file takes in the blob store, smaller than size once compressed.
+        content_type (str): The media type of the file.
+        filename (str): The name of the file on the device it was uploaded from.
         upload_date (DateTime): The timestamp when the file was uploaded. Defaults to the current time.
         transaction (relationship): A relationship to the TransactionModel, allowing access to 
             the associated transaction for this attachment.
     """
     
     __tablename__ = "attachments"
+    __table_args__ = (Index("ix_attachments_transaction_id_created_at_id", "transaction_id", "created_at", "id"),
+                      Index("ix_attachments_family_id_created_at_id", "family_id", "created_at", "id"))
     transaction_id=Column(UUID(as_uuid=True), ForeignKey('transactions.id',deferrable=True), nullable=False)
-    file_content = Column(LargeBinary, nullable=False)
+    family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
+    digest=Column(String(64), nullable=False, index=True)
+    size=Column(BigInteger, nullable=False)
+    compression=Column(String(), nullable=True)
+    stored_size=Column(BigInteger, nullable=False)
+    content_type=Column(String(), nullable=False, default="application/octet-stream")
+    filename=Column(String(), nullable=True)
     upload_date=Column(DateTime(),default=func.now(),nullable=False)
-    transaction=relationship('TransactionModel',back_populates='attachment')
\ No newline at end of file
+    transaction=relationship('TransactionModel',back_populates='attachments')
+
+# The columns metadata reads load, with load_only, so new heavy columns are never fetched by them
+ATTACHMENT_METADATA_COLUMNS = (AttachmentModel.id, AttachmentModel.transaction_id, AttachmentModel.family_id, AttachmentModel.digest, AttachmentModel.size, AttachmentModel.compression, AttachmentModel.stored_size,
+                               AttachmentModel.content_type, AttachmentModel.filename, AttachmentModel.upload_date, AttachmentModel.created_at)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Numeric,DateTime,UUID,ForeignKey
+from sqlalchemy import Column,Numeric,DateTime,UUID,ForeignKey,Index,Integer
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 class BudgetModel(BaseModel):
@@ -12,6 +12,11 @@ class BudgetModel(BaseModel):
         amount (Numeric): The budgeted amount with a precision of up to 3 decimal places.
         start_date (DateTime): The start date of the budget period.
         end_date (DateTime): The end date of the budget period.
+        spent (Numeric): The total of the transactions of the category, and of the account when set, dated from start_date to end_date included.
+        spent_count (int): The number of transactions counted in spent.
+        assigned (Numeric): The total assigned_amount of the budget transactions of the budget.
+        assigned_spent (Numeric): The total amount of the transactions counted in spent that are assigned to the budget.
+        assigned_count (int): The number of transactions counted in spent that are assigned to the budget.
         user (UserModel): Relationship to the UserModel, representing the user associated with the budget.
         family (FamilyModel): Relationship to the FamilyModel, representing the family associated with the budget.
         category (CategoryModel): Relationship to the CategoryModel, representing the category associated with the budget.
@@ -19,13 +24,19 @@ class BudgetModel(BaseModel):
     """
 
     __tablename__ = "budgets"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False)
+    __table_args__ = (Index("ix_budgets_family_id_created_at_id", "family_id", "created_at", "id"),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
-    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id',deferrable=True), nullable=False)
-    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id',deferrable=True), nullable=True)
+    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id',deferrable=True), nullable=False, index=True)
+    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id',deferrable=True), nullable=True, index=True)
     amount=Column(Numeric(scale=3),nullable=False)
     start_date=Column(DateTime(),nullable=False)
     end_date=Column(DateTime(),nullable=False)
+    spent=Column(Numeric(scale=3),nullable=False,default=0)
+    spent_count=Column(Integer,nullable=False,default=0)
+    assigned=Column(Numeric(scale=3),nullable=False,default=0)
+    assigned_spent=Column(Numeric(scale=3),nullable=False,default=0)
+    assigned_count=Column(Integer,nullable=False,default=0)
     user=relationship('UserModel',back_populates='budget')
     family=relationship('FamilyModel',back_populates='budget')
     category=relationship('CategoryModel',back_populates='budget')
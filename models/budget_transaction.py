@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Numeric,UUID,ForeignKey
+from sqlalchemy import Column,Numeric,UUID,ForeignKey,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -21,9 +21,11 @@ class BudgetTransactionModel(BaseModel):
     """
 
     __tablename__ = "budgets_transactions"
+    __table_args__ = (Index("ix_budgets_transactions_family_id_created_at_id", "family_id", "created_at", "id"),
+                      Index("ix_budgets_transactions_budget_id_transaction_id", "budget_id", "transaction_id"))
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
     budget_id=Column(UUID(as_uuid=True), ForeignKey('budgets.id',deferrable=True), nullable=False)
-    transaction_id=Column(UUID(as_uuid=True), ForeignKey('transactions.id',deferrable=True), nullable=False)
+    transaction_id=Column(UUID(as_uuid=True), ForeignKey('transactions.id',deferrable=True), nullable=False, index=True)
     assigned_amount=Column(Numeric(scale=3),nullable=False)
     transaction=relationship('TransactionModel',back_populates='budgets')
     budget=relationship('BudgetModel',back_populates='transactions')
\ No newline at end of file
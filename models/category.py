@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Enum as EnumSQL,UUID,ForeignKey
+from sqlalchemy import Column,String,Enum as EnumSQL,UUID,ForeignKey,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel,EntryType
 class CategoryModel(BaseModel):
@@ -15,7 +15,8 @@ class CategoryModel(BaseModel):
     """
     
     __tablename__ = "categories"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False)
+    __table_args__ = (Index("ix_categories_family_id_created_at_id", "family_id", "created_at", "id"),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
     name = Column(String, nullable=False)
     type= Column(EnumSQL(EntryType, name="entry_type", native_enum=True),nullable=False)
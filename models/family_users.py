@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Enum as EnumSQL,DateTime,func,UUID,ForeignKey
+from sqlalchemy import Column,Enum as EnumSQL,DateTime,func,UUID,ForeignKey,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -25,7 +25,8 @@ class FamilyUserModel(BaseModel):
     """
 
     __tablename__ = "families_users"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False)
+    __table_args__ = (Index("ix_families_users_family_id_user_id", "family_id", "user_id", unique=True),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
     role = Column(EnumSQL(Role, name="role_enum", native_enum=True),nullable=False)
     joined_at=Column(DateTime, default=func.now())
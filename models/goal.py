@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Numeric,DateTime,UUID,ForeignKey
+from sqlalchemy import Column,String,Numeric,DateTime,UUID,ForeignKey,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -11,18 +11,26 @@ class GoalModel(BaseModel):
         family_id (UUID): Foreign key referencing the ID of the associated family.
         name (str): The name of the financial goal.
         target_amount (Decimal): The target amount to be saved for the goal, with a precision of 3 decimal places.
-        saved_amount (Decimal): The amount already saved towards the goal, with a precision of 3 decimal places.
+        saved_amount (Decimal): The amount already saved towards the goal, with a precision of 3 decimal places. It is edited by hand on goals
+            without an account or a category, and kept by every transaction write on linked goals.
         due_date (datetime): The due date for achieving the goal.
+        account_id (UUID): Foreign key referencing the account the goal saves in, the transactions of the account add their signed amount.
+        category_id (UUID): Foreign key referencing the category of the contributions to the goal, the transactions of the category add their amount.
+        start_date (datetime): The transactions dated before it do not count towards the goal, the saving rate of the projection is measured from it.
         user (UserModel): Relationship to the UserModel, representing the user associated with the goal.
         family (FamilyModel): Relationship to the FamilyModel, representing the family associated with the goal.
     """
 
     __tablename__ = "goals"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False)
+    __table_args__ = (Index("ix_goals_family_id_created_at_id", "family_id", "created_at", "id"),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
     name = Column(String(), nullable=False)
     target_amount=Column(Numeric(scale=3),nullable=True)
-    saved_amount=Column(Numeric(scale=3),nullable=True)
+    saved_amount=Column(Numeric(scale=3),nullable=True,default=0)
     due_date=Column(DateTime(),nullable=True)
+    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id',deferrable=True), nullable=True, index=True)
+    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id',deferrable=True), nullable=True, index=True)
+    start_date=Column(DateTime(),nullable=False)
     user=relationship('UserModel',back_populates='goal')
     family=relationship('FamilyModel',back_populates='goal')
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlalchemy import Column,Date,Integer,Numeric,UUID,ForeignKey,Enum as EnumSQL,Index
+from .base import BaseModel,EntryType
+
+class FamilyMonthlyCategoryTotalModel(BaseModel):
+    """
+    FamilyMonthlyCategoryTotalModel is the running total of the transactions of a family per month, category and type.
+    The rows are maintained in the same database transaction as every transaction write, so the monthly report reads them instead of the transactions.
+    Attributes:
+        __tablename__ (str): The name of the database table, "family_monthly_category_totals".
+        family_id (UUID): Foreign key referencing the family of the transactions.
+        month (Date): The first day of the month the transactions are dated in.
+        category_id (UUID): Foreign key referencing the category of the transactions.
+        transaction_type (EntryType): The type of the transactions.
+        total (Numeric): The sum of the amounts of the transactions, with a scale of 3 decimal places.
+        transaction_count (int): The number of transactions, rows reaching 0 are removed.
+    """
+
+    __tablename__ = "family_monthly_category_totals"
+    __table_args__ = (Index("ix_family_monthly_category_totals_family_id_month_category", "family_id", "month", "category_id", "transaction_type", unique=True),)
+    family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
+    month=Column(Date(), nullable=False)
+    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id',deferrable=True), nullable=False, index=True)
+    transaction_type=Column(EnumSQL(EntryType, name="entry_type", native_enum=True), nullable=False)
+    total=Column(Numeric(scale=3), nullable=False, default=0)
+    transaction_count=Column(Integer, nullable=False, default=0)
@@ -0,0 +1,60 @@
+from sqlalchemy import Column,String,DateTime,UUID,ForeignKey,Integer,BigInteger,JSON,Enum as EnumSQL,Index
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+from enum import Enum
+
+class StatementFormat(Enum):
+    CSV = "csv"
+    OFX = "ofx"
+    QIF = "qif"
+
+class ImportStatus(Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class StatementImportModel(BaseModel):
+    """
+    StatementImportModel tracks the import of a bank statement into the transactions of a family.
+    Attributes:
+        __tablename__ (str): The name of the database table, "statement_imports".
+        user_id (UUID): Foreign key referencing the user who started the import.
+        family_id (UUID): Foreign key referencing the family the transactions are imported into.
+        format (Enum): The format of the statement, csv, ofx or qif.
+        status (Enum): The progress of the import, pending until the statement is uploaded.
+        default_account_id (UUID): The account used for rows no rule assigns an account to.
+        default_category_id (UUID): The category used for rows no rule assigns a category to.
+        settings (JSON): The CSV column mapping, the date format and the rules mapping rows to accounts and categories.
+        bytes_received (int): The size of the uploaded statement.
+        bytes_processed (int): The number of bytes of the statement parsed so far.
+        rows_parsed (int): The number of statement rows read so far.
+        rows_inserted (int): The number of transactions created.
+        rows_duplicate (int): The number of rows skipped because the transaction already existed.
+        rows_failed (int): The number of rows that could not be parsed or mapped.
+        errors (JSON): The first row errors, as a list of {"row", "errors"} objects.
+        error (str): The reason the import failed as a whole.
+        started_at (DateTime): When the processing started.
+        finished_at (DateTime): When the processing ended.
+    """
+
+    __tablename__ = "statement_imports"
+    __table_args__ = (Index("ix_statement_imports_family_id_created_at_id", "family_id", "created_at", "id"),)
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
+    family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False)
+    format=Column(EnumSQL(StatementFormat, name="statement_format", native_enum=True), nullable=False)
+    status=Column(EnumSQL(ImportStatus, name="import_status", native_enum=True), nullable=False, default=ImportStatus.PENDING)
+    default_account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id',deferrable=True), nullable=True, index=True)
+    default_category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id',deferrable=True), nullable=True, index=True)
+    settings=Column(JSON, nullable=False, default=dict)
+    bytes_received=Column(BigInteger, nullable=False, default=0)
+    bytes_processed=Column(BigInteger, nullable=False, default=0)
+    rows_parsed=Column(Integer, nullable=False, default=0)
+    rows_inserted=Column(Integer, nullable=False, default=0)
+    rows_duplicate=Column(Integer, nullable=False, default=0)
+    rows_failed=Column(Integer, nullable=False, default=0)
+    errors=Column(JSON, nullable=False, default=list)
+    error=Column(String(), nullable=True)
+    started_at=Column(DateTime(), nullable=True)
+    finished_at=Column(DateTime(), nullable=True)
+    transactions=relationship('TransactionModel',back_populates='statement_import')
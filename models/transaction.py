@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Numeric,DateTime,UUID,ForeignKey,Enum as EnumSQL,func
+from sqlalchemy import Column,String,Numeric,DateTime,UUID,ForeignKey,Enum as EnumSQL,func,Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel,EntryType
 class TransactionModel(BaseModel):
@@ -14,26 +14,36 @@ class TransactionModel(BaseModel):
         date (DateTime): The timestamp of when the transaction occurred. Defaults to the current time.
         description (str): An optional description or note about the transaction.
         transaction_type (Enum): The type of transaction (e.g., income, expense) based on the EntryType enum.
-        attachment (AttachmentModel): A one-to-one relationship with the AttachmentModel, representing any associated file.
+        statement_import_id (UUID): Foreign key referencing the statement import that created the transaction, if any.
+        fingerprint (str): SHA-256 of the family, account, amount, day and normalized description, equal for likely duplicates.
+        attachments (list[AttachmentModel]): A one-to-many relationship with the AttachmentModel, representing the associated files.
         user (UserModel): A relationship to the UserModel, representing the user who created the transaction.
         family (FamilyModel): A relationship to the FamilyModel, representing the family associated with the transaction.
         account (AccountModel): A relationship to the AccountModel, representing the account involved in the transaction.
         category (CategoryModel): A relationship to the CategoryModel, representing the category of the transaction.
         budgets (list[BudgetTransactionModel]): A relationship to BudgetTransactionModel, representing budget allocations for the transaction.
+        statement_import (StatementImportModel): A relationship to the StatementImportModel that created the transaction.
     """
 
     __tablename__ = "transactions"
-    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    __table_args__ = (Index("ix_transactions_family_id_date_id", "family_id", "date", "id"),
+                      Index("ix_transactions_family_id_category_id_date_id", "family_id", "category_id", "date", "id"),
+                      Index("ix_transactions_family_id_account_id_date_id", "family_id", "account_id", "date", "id"),
+                      Index("ix_transactions_family_id_fingerprint", "family_id", "fingerprint"))
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
     family_id=Column(UUID(as_uuid=True), ForeignKey('families.id'), nullable=False)
-    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id'), nullable=False)
-    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id'), nullable=False)
+    account_id=Column(UUID(as_uuid=True), ForeignKey('accounts.id'), nullable=False, index=True)
+    category_id=Column(UUID(as_uuid=True), ForeignKey('categories.id'), nullable=False, index=True)
     amount=Column(Numeric(scale=3),nullable=False)
     date=Column(DateTime(),default=func.now(),nullable=False)
     description=Column(String(),nullable=True)
     transaction_type=Column(EnumSQL(EntryType, name="entry_type", native_enum=True),nullable=False)
-    attachment=relationship('AttachmentModel',back_populates='transaction',uselist=False)
+    statement_import_id=Column(UUID(as_uuid=True), ForeignKey('statement_imports.id',deferrable=True), nullable=True, index=True)
+    fingerprint=Column(String(64), nullable=True)
+    attachments=relationship('AttachmentModel',back_populates='transaction')
     user=relationship('UserModel',back_populates='transaction')
     family=relationship('FamilyModel',back_populates='transaction')
     account=relationship('AccountModel',back_populates='transaction')
     category=relationship('CategoryModel',back_populates='transaction')
-    budgets=relationship('BudgetTransactionModel',back_populates='transaction')
\ No newline at end of file
+    budgets=relationship('BudgetTransactionModel',back_populates='transaction')
+    statement_import=relationship('StatementImportModel',back_populates='transactions')
\ No newline at end of file
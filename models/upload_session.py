@@ -0,0 +1,29 @@
+from sqlalchemy import Column,String,DateTime,UUID,ForeignKey,BigInteger
+from .base import BaseModel
+
+class UploadSessionModel(BaseModel):
+    """
+    UploadSessionModel tracks a resumable attachment upload, sent in chunks that are appended to a staging file.
+    Attributes:
+        __tablename__ (str): The name of the database table, "upload_sessions".
+        user_id (UUID): Foreign key referencing the user who started the upload.
+        family_id (UUID): Foreign key referencing the family of the transaction.
+        transaction_id (UUID): Foreign key referencing the transaction the file is attached to once complete.
+        filename (str): The name of the file on the device it is uploaded from.
+        content_type (str): The media type of the file.
+        size (int): The announced size of the file in bytes.
+        upload_offset (int): The number of bytes received and staged so far, the offset the next chunk starts at.
+        digest (str): The SHA-256 the client announced for the whole file, checked before the attachment is created.
+        expires_at (DateTime): The UTC time after which the sweeper removes an upload that did not progress.
+    """
+
+    __tablename__ = "upload_sessions"
+    user_id=Column(UUID(as_uuid=True), ForeignKey('users.id',deferrable=True), nullable=False, index=True)
+    family_id=Column(UUID(as_uuid=True), ForeignKey('families.id',deferrable=True), nullable=False, index=True)
+    transaction_id=Column(UUID(as_uuid=True), ForeignKey('transactions.id',deferrable=True), nullable=False, index=True)
+    filename=Column(String(), nullable=True)
+    content_type=Column(String(), nullable=False, default="application/octet-stream")
+    size=Column(BigInteger, nullable=False)
+    upload_offset=Column(BigInteger, nullable=False, default=0)
+    digest=Column(String(64), nullable=True)
+    expires_at=Column(DateTime(), nullable=False, index=True)
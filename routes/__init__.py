@@ -7,4 +7,8 @@ from .budgets import router as BudgetsRouter
 from .categories import router as CategoriesRouter
 from .transactions import router as TransactionsRouter
 from .goals import router as GoalsRouter
-from .budgets_transactions import router as BudgetsTransactionsRouter
\ No newline at end of file
+from .budgets_transactions import router as BudgetsTransactionsRouter
+from .metrics import router as MetricsRouter
+from .statement_imports import router as StatementImportsRouter
+from .uploads import router as UploadsRouter
+from .reports import router as ReportsRouter
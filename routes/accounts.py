@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user
@@ -11,11 +13,11 @@ router = APIRouter()
 
 # Get a list of all accounts belongs to a family
 @router.get("/api/v1/families/{family_id}/accounts", response_model=RestGetAllAccountsOfamilyResponse,summary="Get all accounts of a family",description="Get all accounts of a family")
-async def get_all_family_accounts(family_id: str, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def get_all_family_accounts(family_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     Get all accounts of a family
     """
-    return await ControllerGetAllFamilyAccounts(family_id, current_user, db)
+    return await ControllerGetAllFamilyAccounts(family_id, current_user, db, cursor, limit)
 
 # Post a new account that belongs to a family
 @router.post("/api/v1/families/{family_id}/accounts", response_model=RestCreateAccountResponse,summary="Create a new account",description="Create a new account")
@@ -1,60 +1,85 @@
-from fastapi import APIRouter, Depends,UploadFile
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from controllers import get_current_user,ControllerGetAttachementOfTransaction,ControllerUploadAttachmentForTransaction,ControllerRetrieveAttachment,ControllerDeleteAttachment
+from controllers import get_current_user,ControllerGetAttachementOfTransaction,ControllerUploadAttachmentForTransaction,ControllerRetrieveAttachment,ControllerDeleteAttachment,ControllerGetAllAttachmentsOfFamily
 from models import UserModel
-from serializers import RestGetAttachmentOfTransactionResponse,RestCreateAttachmentResponse,BaseRestResponse
+from serializers import RestGetAttachmentOfTransactionResponse,RestCreateAttachmentResponse,RestGetAllAttachmentsOfFamilyResponse,BaseRestResponse
 
 router = APIRouter()
 
-# Get an attachment of a transaction /api/v1/transactions/{transaction_id}/attachments
-@router.get(path="/api/v1/transactions/{transaction_id}/attachments",response_model=RestGetAttachmentOfTransactionResponse, description="Get an attachment of a transaction",summary="Get an attachment of a transaction")
-async def get_attachment_of_transaction(transaction_id: str, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestGetAttachmentOfTransactionResponse:
+# Get the attachments of a transaction /api/v1/transactions/{transaction_id}/attachments
+@router.get(path="/api/v1/transactions/{transaction_id}/attachments",response_model=RestGetAttachmentOfTransactionResponse, description="Get a page of the attachments of a transaction, the first one is also returned in attachment",summary="Get the attachments of a transaction")
+async def get_attachment_of_transaction(transaction_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestGetAttachmentOfTransactionResponse:
     """
-    Get an attachment of a transaction.
+    Get the attachments of a transaction.
     
     Args:
         transaction_id (str): The ID of the transaction.
+        cursor (Optional[str]): The next_cursor returned with the previous page.
+        limit (int): The maximum number of attachments in the page.
         current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
         db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
     
     Returns:
-        RestGetAttachmentOfTransactionResponse: The response containing the attachment information.
+        RestGetAttachmentOfTransactionResponse: The response containing the page of attachments.
     """
-    return await ControllerGetAttachementOfTransaction(transaction_id=transaction_id, current_user=current_user, db=db)
+    return await ControllerGetAttachementOfTransaction(transaction_id=transaction_id, current_user=current_user, db=db, cursor=cursor, limit=limit)
 
-# Upload an attachment for a transaction /api/v1/transactions/{transaction_id}/attachments using fastapi UploadFile class
-@router.post(path="/api/v1/transactions/{transaction_id}/attachments",response_model=RestCreateAttachmentResponse, description="Upload an attachment for a transaction",summary="Upload an attachment for a transaction")
-async def upload_attachment_for_transaction(transaction_id: str, file: UploadFile, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestCreateAttachmentResponse:
+# Get the attachments of a family /api/v1/families/{family_id}/attachments
+@router.get(path="/api/v1/families/{family_id}/attachments",response_model=RestGetAllAttachmentsOfFamilyResponse, description="Get a page of the attachments of every transaction of a family",summary="Get the attachments of a family")
+async def get_all_attachments_of_family(family_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestGetAllAttachmentsOfFamilyResponse:
     """
-    Upload an attachment for a transaction.
+    Get the attachments of a family.
+    
+    Args:
+        family_id (str): The ID of the family.
+        cursor (Optional[str]): The next_cursor returned with the previous page.
+        limit (int): The maximum number of attachments in the page.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    
+    Returns:
+        RestGetAllAttachmentsOfFamilyResponse: The response containing the page of attachments.
+    """
+    return await ControllerGetAllAttachmentsOfFamily(family_id=family_id, current_user=current_user, db=db, cursor=cursor, limit=limit)
+
+# Upload attachments for a transaction /api/v1/transactions/{transaction_id}/attachments, the multipart body is streamed to the blob store
+@router.post(path="/api/v1/transactions/{transaction_id}/attachments",response_model=RestCreateAttachmentResponse, description="Upload one or more attachments for a transaction, every file part of the multipart/form-data body is stored",summary="Upload attachments for a transaction",
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 "multipart/form-data": {"schema": {"type": "object", "required": ["files"], "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}}}}}}})
+async def upload_attachment_for_transaction(transaction_id: str, request: Request, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestCreateAttachmentResponse:
+    """
+    Upload attachments for a transaction.
     
     Args:
         transaction_id (str): The ID of the transaction.
-        file (UploadFile): The file to be uploaded.
+        request (Request): The multipart/form-data request carrying the files.
         current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
         db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
     
     Returns:
-        RestGetAttachmentOfTransactionResponse: The response containing the attachment information.
+        RestCreateAttachmentResponse: The response containing the created attachments.
     """
-    return await ControllerUploadAttachmentForTransaction(transaction_id=transaction_id, file=file,current_user=current_user, db=db)
+    return await ControllerUploadAttachmentForTransaction(transaction_id=transaction_id, request=request, current_user=current_user, db=db)
 
-# Retrieve an attachment /api/v1/attachments/{attachment_id} as StreamingResponse
-@router.get(path="/api/v1/attachments/{attachment_id}",description="Retrieve an attachment",summary="Retrieve an attachment")
-async def retrieve_attachment(attachment_id: str, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+# Retrieve an attachment /api/v1/attachments/{attachment_id} as a FileResponse supporting Range and conditional requests
+@router.get(path="/api/v1/attachments/{attachment_id}",description="Retrieve an attachment, Range, If-Range and If-None-Match are supported and the ETag is the SHA-256 of the content",summary="Retrieve an attachment")
+async def retrieve_attachment(attachment_id: str, request: Request, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     Retrieve an attachment.
     
     Args:
         attachment_id (str): The ID of the attachment.
+        request (Request): The request, holding the Range and conditional headers.
         current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
         db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
     
     Returns:
-        StreamingResponse: The response containing the attachment file.
+        FileResponse: The response containing the attachment file, or part of it for a Range request.
     """
-    return await ControllerRetrieveAttachment(attachment_id=attachment_id, current_user=current_user, db=db)
+    return await ControllerRetrieveAttachment(attachment_id=attachment_id, request=request, current_user=current_user, db=db)
 
 # Delete an attachment /api/v1/attachments/{attachment_id}
 @router.delete(path="/api/v1/attachments/{attachment_id}",response_model=BaseRestResponse,description="Delete an attachment",summary="Delete an attachment")
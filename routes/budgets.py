@@ -1,21 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user
 from models import UserModel
-from controllers import ControllerGetAllBudgetsOfFamily,ControllerCreateBudgetForFamily,ControllerUpdateBudget,ControllerDeleteBudget
-from serializers.budget import CreateBudget,UpdateBudget,RestGetAllBudgetsOfamilyResponse,RestCreateBudgetResponse
+from controllers import ControllerGetAllBudgetsOfFamily,ControllerCreateBudgetForFamily,ControllerUpdateBudget,ControllerDeleteBudget,ControllerGetBudgetUtilizationOfFamily
+from serializers.budget import CreateBudget,UpdateBudget,RestGetAllBudgetsOfamilyResponse,RestCreateBudgetResponse,RestGetBudgetUtilizationResponse
 
 router = APIRouter()
 
 # Get all budgets of a family through family_id (/api/v1/families/{family_id}/budgets)
 @router.get(path="/api/v1/families/{family_id}/budgets",response_model=RestGetAllBudgetsOfamilyResponse,summary="Get all budgets of a family through family_id", description="Get all budgets of a family through family_id")
-async def get_all_budgets_of_family(family_id: str,current_user: UserModel = Depends(get_current_user),db: AsyncSession = Depends(get_db)):
+async def get_all_budgets_of_family(family_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user),db: AsyncSession = Depends(get_db)):
     """
     Get all budgets of a family through family_id
     """
     # Call the controller function to get all budgets of a family
-    return await ControllerGetAllBudgetsOfFamily(family_id,current_user,db)
+    return await ControllerGetAllBudgetsOfFamily(family_id,current_user,db,cursor,limit)
+
+# Get how much of every budget of a family is assigned and spent (/api/v1/families/{family_id}/budgets/utilization)
+@router.get(path="/api/v1/families/{family_id}/budgets/utilization",response_model=RestGetBudgetUtilizationResponse,summary="Get the utilization of the budgets of a family", description="Get the assigned, spent and remaining amounts of every budget of a family, with the matching transactions not assigned to the budget yet")
+async def get_budget_utilization_of_family(family_id: str, current_user: UserModel = Depends(get_current_user),db: AsyncSession = Depends(get_db)):
+    """
+    Get the utilization of the budgets of a family through family_id
+    """
+    # Call the controller function to compute the utilization of every budget
+    return await ControllerGetBudgetUtilizationOfFamily(family_id,current_user,db)
 
 # Create a budget through family_id (/api/v1/families/{family_id}/budgets)
 @router.post(path="/api/v1/families/{family_id}/budgets",response_model=RestCreateBudgetResponse,summary="Create a budget through family_id", description="Create a budget through family_id")
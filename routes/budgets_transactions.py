@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user
@@ -10,18 +12,20 @@ router = APIRouter()
 
 #GET all budget transactions of a family
 @router.get(path="/api/v1/families/{family_id}/budget_transactions", response_model=RestGetAllBudgetTransactionsOfamilyResponse, summary="Get all budget transactions of a family", description="Retrieve all budget transactions associated with a specific family.")
-async def get_all_budget_transactions_of_family(family_id: str, current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestGetAllBudgetTransactionsOfamilyResponse:
+async def get_all_budget_transactions_of_family(family_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> RestGetAllBudgetTransactionsOfamilyResponse:
     """
     Retrieve all budget transactions associated with a specific family.
     Args:
         family_id (str): The unique identifier of the family whose budget transactions are to be retrieved.
+        cursor (Optional[str]): The next_cursor returned with the previous page, omitted for the first page.
+        limit (int): The maximum number of budget transactions in the page.
         current_user (UserModel, optional): The currently authenticated user, injected by dependency. Defaults to Depends(get_current_user).
         db (AsyncSession, optional): The asynchronous database session, injected by dependency. Defaults to Depends(get_db).
     Returns:
         RestGetAllBudgetTransactionsOfamilyResponse: The response object containing all budget transactions for the specified family.
     """
 
-    return await ControllerGetAllBudgetTransactionsOfFamily(family_id=family_id, current_user=current_user, db=db)
+    return await ControllerGetAllBudgetTransactionsOfFamily(family_id=family_id, current_user=current_user, db=db, cursor=cursor, limit=limit)
 
 #POST a new budget transaction for a family
 @router.post(path="/api/v1/families/{family_id}/budget_transactions", response_model=RestCreateBudgetTransactionResponse, summary="Create a new budget transaction", description="Create a new budget transaction for a specified family.")
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user,ControllerGetAllCategoriesOfFamily,ControllerCreateCategoryForFamily,ControllerRetrieveCategory,ControllerUpdateCategory,ControllerDeleteCategory
@@ -9,11 +11,11 @@ router = APIRouter()
 
 # Get (/api/v1/families/{family_id}/categories) all categories of a family
 @router.get("/api/v1/families/{family_id}/categories",response_model=RestGetAllCategoriesOfamilyResponse,summary="Get all categories of a family",description="Get all categories of a family")
-async def get_all_family_categories(family_id: str,current_user:UserModel=Depends(get_current_user),db:AsyncSession=Depends(get_db))->RestGetAllCategoriesOfamilyResponse:
+async def get_all_family_categories(family_id: str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user:UserModel=Depends(get_current_user),db:AsyncSession=Depends(get_db))->RestGetAllCategoriesOfamilyResponse:
     """
     Get all categories of a family
     """
-    return await ControllerGetAllCategoriesOfFamily(family_id,current_user,db)
+    return await ControllerGetAllCategoriesOfFamily(family_id,current_user,db,cursor,limit)
 
 # Create (/api/v1/families/{family_id}/categories) a new category
 @router.post("/api/v1/families/{family_id}/categories",response_model=RestCreateCategoryResponse,summary="Create a new category",description="Create a new category")
@@ -1,26 +1,31 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user
-from controllers import ControllerGetAllGoalsOfFamily,ControllerCreateGoalForFamily,ControllerUpdateGoal, ControllerDeleteGoal,ControllerRetrieveGoal
+from controllers import ControllerGetAllGoalsOfFamily,ControllerCreateGoalForFamily,ControllerUpdateGoal, ControllerDeleteGoal,ControllerRetrieveGoal,ControllerRecomputeGoalsOfFamily
 from models import UserModel
-from serializers import CreateGoal, UpdateGoal,RestGetAllGoalsOfamilyResponse,RestCreateGoalResponse,RestGetGoalResponse,BaseRestResponse
+from serializers import CreateGoal, UpdateGoal,RestGetAllGoalsOfamilyResponse,RestCreateGoalResponse,RestGetGoalResponse,BaseRestResponse,RestRecomputeGoalsResponse
 
 router = APIRouter()
 
 # Get all goals of a family
 @router.get(path="/api/v1/families/{family_id}/goals",response_model=RestGetAllGoalsOfamilyResponse,summary="Get all goals of a family",description="Retrieve all financial goals associated with a specific family.")
-async def get_all_goals_of_family(family_id:str, db: AsyncSession = Depends(get_db))->RestGetAllGoalsOfamilyResponse:
+async def get_all_goals_of_family(family_id:str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user: UserModel = Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestGetAllGoalsOfamilyResponse:
     """
     Retrieve all goals associated with a specific family.
     Args:
         family_id (str): The unique identifier of the family whose goals are to be retrieved.
+        cursor (Optional[str]): The next_cursor returned with the previous page, omitted for the first page.
+        limit (int): The maximum number of goals in the page.
+        current_user (UserModel, optional): The currently authenticated user dependency.
         db (AsyncSession, optional): The asynchronous database session dependency.
     Returns:
         RestGetAllGoalsOfamilyResponse: The response object containing all goals for the specified family.
     """
     
-    return await ControllerGetAllGoalsOfFamily(family_id=family_id, db=db)
+    return await ControllerGetAllGoalsOfFamily(family_id=family_id, current_user=current_user, db=db, cursor=cursor, limit=limit)
 
 #Create a new goal for a family
 @router.post(path="/api/v1/families/{family_id}/goals",response_model=RestCreateGoalResponse,summary="Create a new goal",description="Create a new financial goal for a specified family.")
@@ -38,6 +43,21 @@ async def create_new_goal(family_id:str,new_goal: CreateGoal,current_user:UserMo
 
     return await ControllerCreateGoalForFamily(family_id=family_id, new_goal=new_goal, current_user=current_user, db=db)
 
+# Recompute the saved amount of the linked goals of a family
+@router.post(path="/api/v1/families/{family_id}/goals:recompute",response_model=RestRecomputeGoalsResponse,summary="Recompute the goals of a family",description="Recompute the saved amount of every goal of a family linked to an account or a category from its transactions.")
+async def recompute_goals_of_family(family_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestRecomputeGoalsResponse:
+    """
+    Recompute the saved amount of the goals of a family linked to an account or a category.
+    Args:
+        family_id (str): The unique identifier of the family whose goals are recomputed.
+        current_user (UserModel, optional): The currently authenticated user, injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session, injected by dependency.
+    Returns:
+        RestRecomputeGoalsResponse: The response object containing the number of goals recomputed.
+    """
+
+    return await ControllerRecomputeGoalsOfFamily(family_id=family_id, current_user=current_user, db=db)
+
 #Retrieve a goal
 @router.get(path="/api/v1/goals/{goal_id}",response_model=RestGetGoalResponse,summary="Get a goal",description="Retrieve a specific goal by its ID.")
 async def get_goal(goal_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestGetGoalResponse:
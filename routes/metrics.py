@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from controllers import get_current_user,ControllerGetMetrics
+from models import UserModel
+from serializers import RestGetMetricsResponse
+
+router = APIRouter()
+
+# Get the runtime metrics of the application
+@router.get(path="/api/v1/metrics",response_model=RestGetMetricsResponse,summary="Get runtime metrics",description="Get the hit, miss and eviction counters of the in-process caches, the queue depth of the worker pools and the occupancy and checkout wait times of the database connection pool")
+async def get_metrics(current_user: UserModel = Depends(get_current_user))->RestGetMetricsResponse:
+    """
+    Retrieve the runtime metrics of the application.
+    Args:
+        current_user (UserModel, optional): The currently authenticated user, injected by dependency.
+    Returns:
+        RestGetMetricsResponse: The response object containing the cache, worker pool and connection pool statistics.
+    """
+    return await ControllerGetMetrics(current_user=current_user)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from datetime import date
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from controllers import get_current_user,ControllerGetMonthlyReport,ControllerGetNetWorthReport
+from models import UserModel
+from serializers import RestGetMonthlyReportResponse,RestGetNetWorthReportResponse,NetWorthInterval
+
+router = APIRouter()
+
+# Get the monthly totals of a family per category
+@router.get("/api/v1/families/{family_id}/reports/monthly",response_model=RestGetMonthlyReportResponse,summary="Get the monthly report of a family",description="Get the income, expense and transfer totals of a family per month and category, read from totals maintained on every transaction write")
+async def get_monthly_report(family_id:str, month_from: Optional[date] = Query(None, alias="from"), month_to: Optional[date] = Query(None, alias="to"), category_id: Optional[UUID] = None, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestGetMonthlyReportResponse:
+    """
+    Retrieve the monthly report of a family.
+    Args:
+        family_id (str): The unique identifier of the family.
+        month_from (Optional[date]): The first reported month, passed as the from query parameter.
+        month_to (Optional[date]): The last reported month, passed as the to query parameter.
+        category_id (Optional[UUID]): Only report this category.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestGetMonthlyReportResponse: The totals of every month, oldest first.
+    """
+    return await ControllerGetMonthlyReport(family_id=family_id, current_user=current_user, db=db, month_from=month_from, month_to=month_to, category_id=category_id)
+
+# Get the net worth of a family over time
+@router.get("/api/v1/families/{family_id}/reports/net-worth",response_model=RestGetNetWorthReportResponse,summary="Get the net worth of a family over time",description="Get the assets, liabilities and net worth of a family at the end of every day, week or month of a range, computed from the daily balance changes of its accounts")
+async def get_net_worth_report(family_id:str, date_from: Optional[date] = Query(None, alias="from"), date_to: Optional[date] = Query(None, alias="to"), interval: NetWorthInterval = NetWorthInterval.MONTH, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestGetNetWorthReportResponse:
+    """
+    Retrieve the net-worth report of a family.
+    Args:
+        family_id (str): The unique identifier of the family.
+        date_from (Optional[date]): The first reported day, passed as the from query parameter.
+        date_to (Optional[date]): The last reported day, passed as the to query parameter.
+        interval (NetWorthInterval): Report a point per day, week or month, month by default.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestGetNetWorthReportResponse: The points of the report, oldest first.
+    """
+    return await ControllerGetNetWorthReport(family_id=family_id, current_user=current_user, db=db, date_from=date_from, date_to=date_to, interval=interval)
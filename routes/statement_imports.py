@@ -0,0 +1,58 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from controllers import get_current_user,ControllerCreateStatementImport,ControllerGetStatementImport,ControllerUploadStatementContent
+from models import UserModel
+from serializers import CreateStatementImport,RestStatementImportResponse
+
+router = APIRouter()
+
+# Create a statement import for a family
+@router.post("/api/v1/families/{family_id}/imports",response_model=RestStatementImportResponse,summary="Create a statement import",description="Create a pending import of a CSV, OFX or QIF bank statement with its default account and category, the CSV column mapping and the rules assigning accounts and categories to the rows")
+async def create_statement_import(family_id:str, new_import: CreateStatementImport, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestStatementImportResponse:
+    """
+    Creates a statement import for a specified family.
+    Args:
+        family_id (str): The unique identifier of the family the transactions are imported into.
+        new_import (CreateStatementImport): The settings of the import.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestStatementImportResponse: The created import.
+    """
+    return await ControllerCreateStatementImport(family_id=family_id, new_import=new_import, current_user=current_user, db=db)
+
+# Upload the statement of a pending import
+@router.put("/api/v1/imports/{import_id}/content",response_model=RestStatementImportResponse,summary="Upload the statement of an import",description="Stream the raw statement as the request body, it is imported in the background and the progress is reported by GET /api/v1/imports/{import_id}",
+            openapi_extra={"requestBody": {"required": True, "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ofx": {"schema": {"type": "string"}},
+                "application/qif": {"schema": {"type": "string"}},
+                "application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}})
+async def upload_statement_content(import_id:str, request: Request, background_tasks: BackgroundTasks, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestStatementImportResponse:
+    """
+    Uploads the statement of a pending import and starts importing it.
+    Args:
+        import_id (str): The unique identifier of the import.
+        request (Request): The request whose body is the statement.
+        background_tasks (BackgroundTasks): The tasks run once the response has been sent.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestStatementImportResponse: The import in the processing status.
+    """
+    return await ControllerUploadStatementContent(import_id=import_id, request=request, background_tasks=background_tasks, current_user=current_user, db=db)
+
+# Get the progress of an import
+@router.get("/api/v1/imports/{import_id}",response_model=RestStatementImportResponse,summary="Get a statement import",description="Get the status, the byte and row counters and the first row errors of a statement import")
+async def get_statement_import(import_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestStatementImportResponse:
+    """
+    Retrieves the progress of a statement import.
+    Args:
+        import_id (str): The unique identifier of the import.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestStatementImportResponse: The import with its progress.
+    """
+    return await ControllerGetStatementImport(import_id=import_id, current_user=current_user, db=db)
@@ -1,33 +1,87 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Literal, Optional
+from utilities import DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from controllers import get_current_user,ControllerGetAllTransactionsOfFamily,ControllerCreateTransactionForFamily
-from controllers import ControllerRetrieveTransaction,ControllerUpdateTransaction,ControllerDeleteTransaction
+from controllers import ControllerRetrieveTransaction,ControllerUpdateTransaction,ControllerDeleteTransaction,ControllerExportTransactionsOfFamily,ControllerBulkCreateTransactions,ControllerGetDuplicateTransactionsOfFamily
 from models import UserModel
-from serializers import CreateTransaction,UpdateTransaction,BaseRestResponse,RestGetAllTransactionsOfamilyResponse,RestCreatedTransactionResponse,RestGetTransactionResponse
+from serializers import CreateTransaction,UpdateTransaction,BaseRestResponse,RestGetAllTransactionsOfamilyResponse,RestCreatedTransactionResponse,RestGetTransactionResponse,TransactionFilter,RestBulkCreateTransactionsResponse,RestGetDuplicateTransactionsResponse
 
 router = APIRouter()
 
 # Get all transactions of a family
 @router.get("/api/v1/families/{family_id}/transactions")
-async def get_all_transactions_of_family(family_id:str, current_user:UserModel=Depends(get_current_user),db: AsyncSession = Depends(get_db))->RestGetAllTransactionsOfamilyResponse:
-    return await ControllerGetAllTransactionsOfFamily(family_id=family_id,current_user=current_user, db=db)
+async def get_all_transactions_of_family(family_id:str, cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), filters: TransactionFilter = Depends(), current_user:UserModel=Depends(get_current_user),db: AsyncSession = Depends(get_db))->RestGetAllTransactionsOfamilyResponse:
+    return await ControllerGetAllTransactionsOfFamily(family_id=family_id,current_user=current_user, db=db, cursor=cursor, limit=limit, filters=filters)
+
+# Export all transactions of a family as a CSV or NDJSON stream
+@router.get("/api/v1/families/{family_id}/transactions/export",summary="Export the transactions of a family",description="Stream the transactions of a family ordered by date as CSV or newline delimited JSON, the list filters are supported")
+async def export_transactions_of_family(family_id:str, export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"), filters: TransactionFilter = Depends(), current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Export the transactions of a family.
+    Args:
+        family_id (str): The unique identifier of the family whose transactions are exported.
+        export_format (Literal["csv", "ndjson"]): The format of the export, passed as the format query parameter.
+        filters (TransactionFilter): The optional filters narrowing the exported transactions.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        StreamingResponse: The exported transactions, or a BaseRestResponse with code 0 if the filters are invalid.
+    """
+    return await ControllerExportTransactionsOfFamily(family_id=family_id, export_format=export_format, current_user=current_user, db=db, filters=filters)
+
+# List the likely duplicate transactions of a family
+@router.get("/api/v1/families/{family_id}/transactions/duplicates",response_model=RestGetDuplicateTransactionsResponse,summary="List likely duplicate transactions",description="Group the transactions of a family that share the same account, amount, day and normalized description, the most recent groups first")
+async def get_duplicate_transactions_of_family(family_id:str, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestGetDuplicateTransactionsResponse:
+    """
+    Retrieve the likely duplicate transactions of a family.
+    Args:
+        family_id (str): The unique identifier of the family.
+        limit (int): The maximum number of duplicate groups returned.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestGetDuplicateTransactionsResponse: The groups of transactions sharing a fingerprint.
+    """
+    return await ControllerGetDuplicateTransactionsOfFamily(family_id=family_id, current_user=current_user, db=db, limit=limit)
+
+# Create many transactions for a family from a JSON array or a CSV file
+@router.post("/api/v1/families/{family_id}/transactions:bulk",response_model=RestBulkCreateTransactionsResponse,summary="Create many transactions",description="Create many transactions of a family from a JSON array, a text/csv body or a multipart/form-data upload with a file field, CSV columns use the CreateTransaction field names",
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/CreateTransaction"}}},
+                 "text/csv": {"schema": {"type": "string"}},
+                 "multipart/form-data": {"schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}}}}})
+async def bulk_create_transactions(family_id:str, request: Request, allow_partial: bool = False, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestBulkCreateTransactionsResponse:
+    """
+    Creates many transactions for a specified family in one request.
+    Args:
+        family_id (str): The unique identifier of the family for which the transactions are being created.
+        request (Request): The request carrying the transactions.
+        allow_partial (bool): Insert the valid rows even if other rows are invalid.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestBulkCreateTransactionsResponse: The number of created transactions and the errors of the rejected rows.
+    """
+    return await ControllerBulkCreateTransactions(family_id=family_id, request=request, allow_partial=allow_partial, current_user=current_user, db=db)
 
 # Create a new transaction for a family
 @router.post("/api/v1/families/{family_id}/transactions")
-async def create_new_transaction(family_id:str,new_transaction: CreateTransaction,current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestCreatedTransactionResponse:
+async def create_new_transaction(family_id:str,new_transaction: CreateTransaction,reject_duplicates: bool = False,current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestCreatedTransactionResponse:
     """
     Creates a new transaction for a specified family.
     Args:
         family_id (str): The unique identifier of the family for which the transaction is being created.
         new_transaction (CreateTransaction): The transaction data to be created.
+        reject_duplicates (bool): Refuse the transaction if the family already has one with the same account, amount, day and description.
         current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
         db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
     Returns:
         RestCreatedTransactionResponse: The response containing details of the newly created transaction.
     """
     
-    return await ControllerCreateTransactionForFamily(family_id=family_id, new_transaction=new_transaction, current_user=current_user, db=db)
+    return await ControllerCreateTransactionForFamily(family_id=family_id, new_transaction=new_transaction, current_user=current_user, db=db, reject_duplicates=reject_duplicates)
 
 # Get a specific transaction
 @router.get("/api/v1/transactions/{transaction_id}")
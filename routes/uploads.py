@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from controllers import get_current_user,ControllerCreateUploadSession,ControllerGetUploadSession,ControllerGetUploadOffset
+from controllers import ControllerUploadChunk,ControllerFinalizeUploadSession,ControllerDeleteUploadSession
+from models import UserModel
+from serializers import CreateUploadSession,RestUploadSessionResponse,RestCreateAttachmentResponse,BaseRestResponse
+
+router = APIRouter()
+
+# Start a resumable upload of an attachment /api/v1/transactions/{transaction_id}/uploads
+@router.post("/api/v1/transactions/{transaction_id}/uploads",response_model=RestUploadSessionResponse,summary="Start a resumable upload",description="Create an upload session for an attachment of a transaction, the file is then sent in chunks with PATCH /api/v1/uploads/{upload_id}")
+async def create_upload_session(transaction_id:str, new_upload: CreateUploadSession, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestUploadSessionResponse:
+    """
+    Starts a resumable upload for a transaction.
+    Args:
+        transaction_id (str): The unique identifier of the transaction.
+        new_upload (CreateUploadSession): The size, name, media type and optional SHA-256 of the file.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestUploadSessionResponse: The created upload.
+    """
+    return await ControllerCreateUploadSession(transaction_id=transaction_id, new_upload=new_upload, current_user=current_user, db=db)
+
+# Get the offset of an upload in the Upload-Offset header
+@router.head("/api/v1/uploads/{upload_id}",summary="Get the offset of an upload",description="Return the offset the next chunk starts at in the Upload-Offset header and the size of the file in Upload-Length")
+async def get_upload_offset(upload_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Reports the offset of an upload.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        Response: An empty response with the Upload-Offset and Upload-Length headers.
+    """
+    return await ControllerGetUploadOffset(upload_id=upload_id, current_user=current_user, db=db)
+
+# Get an upload
+@router.get("/api/v1/uploads/{upload_id}",response_model=RestUploadSessionResponse,summary="Get an upload",description="Get an upload session and the offset its next chunk starts at")
+async def get_upload_session(upload_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestUploadSessionResponse:
+    """
+    Retrieves an upload.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestUploadSessionResponse: The upload.
+    """
+    return await ControllerGetUploadSession(upload_id=upload_id, current_user=current_user, db=db)
+
+# Send a chunk of an upload
+@router.patch("/api/v1/uploads/{upload_id}",response_model=RestUploadSessionResponse,summary="Send a chunk of an upload",description="Append the raw request body to the upload, the Upload-Offset header must equal its offset and an optional Upload-Checksum header such as \"sha256 <base64 digest>\" is checked first",
+              openapi_extra={"parameters": [
+                  {"name": "Upload-Offset", "in": "header", "required": True, "schema": {"type": "integer"}},
+                  {"name": "Upload-Checksum", "in": "header", "required": False, "schema": {"type": "string"}}],
+                  "requestBody": {"required": True, "content": {"application/offset+octet-stream": {"schema": {"type": "string", "format": "binary"}}}}})
+async def upload_chunk(upload_id:str, request: Request, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestUploadSessionResponse:
+    """
+    Sends a chunk of an upload.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        request (Request): The request whose body is the chunk.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestUploadSessionResponse: The upload at its new offset.
+    """
+    return await ControllerUploadChunk(upload_id=upload_id, request=request, current_user=current_user, db=db)
+
+# Turn a complete upload into an attachment
+@router.post("/api/v1/uploads/{upload_id}/finalize",response_model=RestCreateAttachmentResponse,summary="Finalize an upload",description="Create the attachment of a complete upload, checking the SHA-256 announced when the upload was created")
+async def finalize_upload_session(upload_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->RestCreateAttachmentResponse:
+    """
+    Finalizes an upload.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        RestCreateAttachmentResponse: The created attachment.
+    """
+    return await ControllerFinalizeUploadSession(upload_id=upload_id, current_user=current_user, db=db)
+
+# Abandon an upload
+@router.delete("/api/v1/uploads/{upload_id}",response_model=BaseRestResponse,summary="Delete an upload",description="Abandon an upload and remove the bytes received for it")
+async def delete_upload_session(upload_id:str, current_user:UserModel=Depends(get_current_user), db: AsyncSession = Depends(get_db))->BaseRestResponse:
+    """
+    Deletes an upload.
+    Args:
+        upload_id (str): The unique identifier of the upload.
+        current_user (UserModel, optional): The currently authenticated user. Automatically injected by dependency.
+        db (AsyncSession, optional): The asynchronous database session. Automatically injected by dependency.
+    Returns:
+        BaseRestResponse: The result of the deletion.
+    """
+    return await ControllerDeleteUploadSession(upload_id=upload_id, current_user=current_user, db=db)
@@ -1,5 +1,9 @@
 import database
 from models import Base
+from alembic import command
+from alembic.config import Config
 import asyncio
 
-asyncio.run(database.recreate_db(Base))
\ No newline at end of file
+asyncio.run(database.recreate_db(Base))
+# The tables now match the latest migration, record it so alembic upgrade head only applies newer ones
+command.stamp(Config("alembic.ini"), "head")
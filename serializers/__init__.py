@@ -1,15 +1,21 @@
-from .attachment import RestCreateAttachmentResponse,RestGetAttachmentOfTransactionResponse
+from .attachment import RestCreateAttachmentResponse,RestGetAttachmentOfTransactionResponse,RestGetAllAttachmentsOfFamilyResponse
 from .attachment import AttachmentInfo
 from .account import CreateAccount,UpdateAccount,AccountInfo,RestCreateAccountResponse,RestGetAllAccountsOfamilyResponse,RestGetAccountResponse
 from .base import BaseResponse,BaseRestResponse
 from .budget import CreateBudget,UpdateBudget,RestCreateBudgetResponse,RestGetBudgetResponse,RestGetAllBudgetsOfamilyResponse,BudgetInfo
+from .budget import BudgetUtilization,RestGetBudgetUtilizationResponse
 from .budget_transaction import CreateBudgetTransaction, RestGetAllBudgetTransactionsOfamilyResponse, RestCreateBudgetTransactionResponse,RestGetBudgetTransactionResponse
 from .budget_transaction import BudgetTransactionInfo
 from .category import CreateCategory,UpdateCategory,CreatedCategory,RestCreateCategoryResponse,RestGetCategoryResponse,RestGetAllCategoriesOfamilyResponse
-from .user import CreateUser,RestUserCreationResponse,UserCreationResponse,UserLogin,RestUserLoginResponse,UserLoginResponse,UserUpdate,RestGetllAllUsers
+from .user import CreateUser,RestUserCreationResponse,UserCreationResponse,UserLogin,RestUserLoginResponse,UserLoginResponse,UserUpdate,RestGetllAllUsers,AuthenticatedUser
 from .family import CreateFamily,RestFamilyCreationResponse,RestGetAllFamiliesResponse,FamilyInfo,RestGetAllUsersInFamilyResponse
 from .family_users import AddUserToFamily,RestAddUserToFamilyResponse,RestGetFamiliesUserBelongsToResponse,FamilyUserInfo
 from .goal import CreateGoal,UpdateGoal, RestGetAllGoalsOfamilyResponse, RestCreateGoalResponse, RestGetGoalResponse
-from .goal import GoalInfo
+from .goal import GoalInfo,RestRecomputeGoalsResponse
 from .transaction import CreateTransaction,UpdateTransaction,TransactionInfo,RestGetAllTransactionsOfamilyResponse,RestCreatedTransactionResponse,RestGetTransactionResponse
-from .transaction import TransactionInfo
+from .transaction import TransactionInfo,TransactionFilter,BulkRowError,RestBulkCreateTransactionsResponse,DuplicateTransactionGroup,RestGetDuplicateTransactionsResponse
+
+from .metrics import CacheStats,ExecutorStats,PoolStats,HistogramBucket,RestGetMetricsResponse
+from .statement_import import CsvColumnMap,ImportRule,CreateStatementImport,StatementImportInfo,RestStatementImportResponse
+from .upload_session import CreateUploadSession,UploadSessionInfo,RestUploadSessionResponse
+from .report import MonthlyCategoryTotal,MonthlyTotals,RestGetMonthlyReportResponse,NetWorthInterval,NetWorthPoint,RestGetNetWorthReportResponse
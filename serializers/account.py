@@ -16,12 +16,14 @@ class AccountInfo(BaseModel):
     id: UUID
     name: str
     type: AccountType
+    balance: float = 0
 
 class RestCreateAccountResponse(BaseRestResponse):
     account: Optional[AccountInfo]=None
 
 class RestGetAllAccountsOfamilyResponse(BaseRestResponse):
     accounts: Optional[List[AccountInfo]]=None
+    next_cursor: Optional[str]=None
 
 class RestGetAccountResponse(BaseRestResponse):
     account: Optional[AccountInfo]=None
\ No newline at end of file
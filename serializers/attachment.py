@@ -1,16 +1,29 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
 from .base import BaseRestResponse
 from datetime import datetime
 
 class AttachmentInfo(BaseModel):
     id: UUID
     transaction_id: UUID
+    family_id: UUID
+    digest: str
+    size: int
+    compression: Optional[str]=None
+    stored_size: int
+    content_type: str
+    filename: Optional[str]=None
     upload_date:datetime
 
 class RestCreateAttachmentResponse(BaseRestResponse):
     attachment: Optional[AttachmentInfo]=None
+    attachments: Optional[List[AttachmentInfo]]=None
 
 class RestGetAttachmentOfTransactionResponse(RestCreateAttachmentResponse):
-    attachtment: Optional[AttachmentInfo]=None
\ No newline at end of file
+    attachtment: Optional[AttachmentInfo]=None
+    next_cursor: Optional[str]=None
+
+class RestGetAllAttachmentsOfFamilyResponse(BaseRestResponse):
+    attachments: Optional[List[AttachmentInfo]]=None
+    next_cursor: Optional[str]=None
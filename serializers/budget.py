@@ -41,6 +41,20 @@ class BudgetInfo(BaseModel):
     start_date: datetime
     end_date: datetime
 
+class BudgetUtilization(BaseModel):
+    budget_id: UUID
+    category_id: UUID
+    account_id: Optional[UUID] = None
+    amount: float
+    start_date: datetime
+    end_date: datetime
+    assigned: float
+    spent: float
+    remaining: float
+    transaction_count: int
+    unassigned_amount: float
+    unassigned_count: int
+
 class RestCreateBudgetResponse(BaseRestResponse):
     budget: Optional[BudgetInfo] = None
 
@@ -48,4 +62,8 @@ class RestGetBudgetResponse(BaseRestResponse):
     budget: Optional[BudgetInfo] = None
 
 class RestGetAllBudgetsOfamilyResponse(BaseRestResponse):
-    budgets: Optional[List[BudgetInfo]]=None
\ No newline at end of file
+    budgets: Optional[List[BudgetInfo]]=None
+    next_cursor: Optional[str]=None
+
+class RestGetBudgetUtilizationResponse(BaseRestResponse):
+    budgets: Optional[List[BudgetUtilization]]=None
@@ -30,6 +30,7 @@ class BudgetTransactionInfo(BaseModel):
 
 class RestGetAllBudgetTransactionsOfamilyResponse(BaseRestResponse):
     budget_transactions: Optional[List[BudgetTransactionInfo]] = None
+    next_cursor: Optional[str] = None
 
 class RestCreateBudgetTransactionResponse(BaseRestResponse):
     budget_transaction: Optional[BudgetTransactionInfo] = None
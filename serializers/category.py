@@ -26,4 +26,5 @@ class RestGetCategoryResponse(BaseRestResponse):
     category: Optional[CreatedCategory]=None
 
 class RestGetAllCategoriesOfamilyResponse(BaseRestResponse):
-    categories: Optional[List[CreatedCategory]]=None
\ No newline at end of file
+    categories: Optional[List[CreatedCategory]]=None
+    next_cursor: Optional[str]=None
\ No newline at end of file
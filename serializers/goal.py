@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional,List
-from datetime import datetime
+from datetime import date,datetime
 from uuid import UUID
 from .base import BaseRestResponse
 
@@ -9,12 +9,18 @@ class CreateGoal(BaseModel):
     target_amount: float
     saved_amount: Optional[float] = 0.0
     due_date: datetime
+    account_id: Optional[UUID] = None
+    category_id: Optional[UUID] = None
+    start_date: Optional[datetime] = None
 
 class UpdateGoal(BaseModel):
     name: Optional[str] = None
     target_amount: Optional[float] = None
     saved_amount: Optional[float] = None
     due_date: Optional[datetime] = None
+    account_id: Optional[UUID] = None
+    category_id: Optional[UUID] = None
+    start_date: Optional[datetime] = None
 
 class GoalInfo(BaseModel):
     id: UUID
@@ -24,12 +30,20 @@ class GoalInfo(BaseModel):
     target_amount: float
     saved_amount: float
     due_date: datetime
+    account_id: Optional[UUID] = None
+    category_id: Optional[UUID] = None
+    start_date: datetime
+    projected_completion_date: Optional[date] = None
 
 class RestGetAllGoalsOfamilyResponse(BaseRestResponse):
     goals: Optional[List[GoalInfo]]=None
+    next_cursor: Optional[str]=None
 
 class RestCreateGoalResponse(BaseRestResponse):
-    goal:GoalInfo
+    goal: Optional[GoalInfo] = None
 
 class RestGetGoalResponse(BaseRestResponse):
-    goal:GoalInfo
+    goal: Optional[GoalInfo] = None
+
+class RestRecomputeGoalsResponse(BaseRestResponse):
+    recomputed: Optional[int]=None
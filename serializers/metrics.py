@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import Optional,List
+from .base import BaseRestResponse
+
+class CacheStats(BaseModel):
+    name: str
+    maxsize: int
+    ttl: float
+    size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    invalidations: int
+
+class ExecutorStats(BaseModel):
+    name: str
+    max_workers: int
+    queued: int
+    running: int
+    completed: int
+    peak_queued: int
+
+class HistogramBucket(BaseModel):
+    le: float
+    count: int
+
+class PoolStats(BaseModel):
+    name: str
+    size: int
+    max_overflow: int
+    timeout: float
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_count: int
+    wait_sum: float
+    wait_max: float
+    wait_histogram: List[HistogramBucket]
+
+class RestGetMetricsResponse(BaseRestResponse):
+    caches: Optional[List[CacheStats]]=None
+    executors: Optional[List[ExecutorStats]]=None
+    pools: Optional[List[PoolStats]]=None
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import Optional,List
+from datetime import date
+from enum import Enum
+from uuid import UUID
+from models import EntryType
+from .base import BaseRestResponse
+
+class MonthlyCategoryTotal(BaseModel):
+    category_id: UUID
+    transaction_type: EntryType
+    total: float
+    transaction_count: int
+
+class MonthlyTotals(BaseModel):
+    month: date
+    income: float
+    expense: float
+    transfer: float
+    categories: List[MonthlyCategoryTotal]
+
+class RestGetMonthlyReportResponse(BaseRestResponse):
+    months: Optional[List[MonthlyTotals]]=None
+
+class NetWorthInterval(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class NetWorthPoint(BaseModel):
+    date: date
+    assets: float
+    liabilities: float
+    net_worth: float
+
+class RestGetNetWorthReportResponse(BaseRestResponse):
+    interval: Optional[NetWorthInterval]=None
+    points: Optional[List[NetWorthPoint]]=None
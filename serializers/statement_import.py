@@ -0,0 +1,63 @@
+from pydantic import BaseModel,Field
+from typing import Optional,List
+from datetime import datetime
+from uuid import UUID
+from models import EntryType,StatementFormat,ImportStatus
+from .base import BaseRestResponse
+from .transaction import BulkRowError
+
+class CsvColumnMap(BaseModel):
+    date: str = "date"
+    amount: Optional[str] = "amount"
+    debit: Optional[str] = None
+    credit: Optional[str] = None
+    description: Optional[str] = "description"
+    category: Optional[str] = None
+    transaction_type: Optional[str] = None
+
+class ImportRule(BaseModel):
+    """
+    Assigns an account, a category or a type to the statement rows it matches, the first matching rule wins.
+    Attributes:
+        contains (str): The text the field must contain, case insensitive.
+        field (str): The statement field the text is searched in, description or category.
+        account_id (Optional[UUID]): The account of the matching rows.
+        category_id (Optional[UUID]): The category of the matching rows.
+        transaction_type (Optional[EntryType]): The type of the matching rows, otherwise negative amounts are expenses and positive amounts incomes.
+    """
+    contains: str = Field(min_length=1)
+    field: str = Field(default="description", pattern="^(description|category)$")
+    account_id: Optional[UUID] = None
+    category_id: Optional[UUID] = None
+    transaction_type: Optional[EntryType] = None
+
+class CreateStatementImport(BaseModel):
+    format: StatementFormat
+    default_account_id: Optional[UUID] = None
+    default_category_id: Optional[UUID] = None
+    column_map: CsvColumnMap = CsvColumnMap()
+    date_format: Optional[str] = None
+    rules: List[ImportRule] = []
+
+class StatementImportInfo(BaseModel):
+    id: UUID
+    family_id: UUID
+    user_id: UUID
+    format: StatementFormat
+    status: ImportStatus
+    default_account_id: Optional[UUID] = None
+    default_category_id: Optional[UUID] = None
+    bytes_received: int
+    bytes_processed: int
+    rows_parsed: int
+    rows_inserted: int
+    rows_duplicate: int
+    rows_failed: int
+    errors: List[BulkRowError] = []
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class RestStatementImportResponse(BaseRestResponse):
+    statement_import: Optional[StatementImportInfo]=None
@@ -31,12 +31,64 @@ class TransactionInfo(BaseModel):
     date: datetime
     description: Optional[str] = None
     transaction_type:EntryType
+    fingerprint: Optional[str] = None
+
+class TransactionFilter(BaseModel):
+    """
+    Optional query parameters narrowing the transactions list of a family.
+    Every filter that is set is combined with AND and evaluated in SQL.
+    Attributes:
+        date_from (Optional[datetime]): Only transactions on or after this moment.
+        date_to (Optional[datetime]): Only transactions before this moment.
+        account_id (Optional[UUID]): Only transactions of this account.
+        category_id (Optional[UUID]): Only transactions of this category.
+        transaction_type (Optional[EntryType]): Only transactions of this type.
+        amount_min (Optional[float]): Only transactions with an amount greater than or equal to this value.
+        amount_max (Optional[float]): Only transactions with an amount lower than or equal to this value.
+        description (Optional[str]): Only transactions whose description contains this text, case insensitive.
+    """
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    account_id: Optional[UUID] = None
+    category_id: Optional[UUID] = None
+    transaction_type: Optional[EntryType] = None
+    amount_min: Optional[float] = None
+    amount_max: Optional[float] = None
+    description: Optional[str] = None
+
+    def has_empty_range(self) -> bool:
+        """
+        Check whether the date or amount bounds exclude every transaction.
+        Returns:
+            bool: True if date_from is after date_to or amount_min is greater than amount_max.
+        """
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            return True
+        return self.amount_min is not None and self.amount_max is not None and self.amount_min > self.amount_max
 
 class RestGetAllTransactionsOfamilyResponse(BaseRestResponse):
     transactions: Optional[List[TransactionInfo]]=None
+    next_cursor: Optional[str]=None
 
 class RestCreatedTransactionResponse(BaseRestResponse):
     transaction: Optional[TransactionInfo]=None
+    duplicate_of: Optional[UUID]=None
 
 class RestGetTransactionResponse(BaseRestResponse):
     transaction: Optional[TransactionInfo]=None
+
+
+class BulkRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class RestBulkCreateTransactionsResponse(BaseRestResponse):
+    inserted: int=0
+    errors: Optional[List[BulkRowError]]=None
+
+class DuplicateTransactionGroup(BaseModel):
+    fingerprint: str
+    transactions: List[TransactionInfo]
+
+class RestGetDuplicateTransactionsResponse(BaseRestResponse):
+    duplicates: Optional[List[DuplicateTransactionGroup]]=None
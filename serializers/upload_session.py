@@ -0,0 +1,25 @@
+from pydantic import BaseModel,Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from .base import BaseRestResponse
+
+class CreateUploadSession(BaseModel):
+    size: int = Field(ge=1)
+    filename: Optional[str] = None
+    content_type: str = "application/octet-stream"
+    digest: Optional[str] = Field(default=None, pattern="^[0-9a-f]{64}$")
+
+class UploadSessionInfo(BaseModel):
+    id: UUID
+    transaction_id: UUID
+    family_id: UUID
+    filename: Optional[str] = None
+    content_type: str
+    size: int
+    upload_offset: int
+    digest: Optional[str] = None
+    expires_at: datetime
+
+class RestUploadSessionResponse(BaseRestResponse):
+    upload: Optional[UploadSessionInfo]=None
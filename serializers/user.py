@@ -1,6 +1,6 @@
-from pydantic import EmailStr,computed_field,BaseModel
+from pydantic import EmailStr,computed_field,BaseModel,ConfigDict,PrivateAttr
 from .base import BaseRestResponse,BaseResponse
-from utilities import hash_a_password
+from utilities import hash_a_password,hash_password
 from datetime import datetime
 from typing import Optional,List
 from uuid import UUID
@@ -10,28 +10,58 @@ class CreateUser(BaseModel):
     name:str
     email:EmailStr
     plain_password:str
+    _password_hash: Optional[str] = PrivateAttr(default=None)
+
+    async def hash_password(self) -> str:
+        """
+        Hashes the plain password once in the hashing pool and memoizes the result on the model.
+        Returns:
+            str: The hashed password.
+        """
+        if self._password_hash is None:
+            self._password_hash = await hash_password(self.plain_password)
+        return self._password_hash
 
     @computed_field
     @property
     def password(self) -> str:
-        return hash_a_password(self.plain_password)
+        if self._password_hash is None:
+            self._password_hash = hash_a_password(self.plain_password)
+        return self._password_hash
 
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     plain_password: Optional[str] = None
+    _password_hash: Optional[str] = PrivateAttr(default=None)
+
+    async def hash_password(self) -> Optional[str]:
+        """
+        Hashes the plain password once in the hashing pool and memoizes the result on the model.
+        Returns:
+            Optional[str]: The hashed password, None when no new password was provided.
+        """
+        if self.plain_password and self._password_hash is None:
+            self._password_hash = await hash_password(self.plain_password)
+        return self._password_hash
 
     @computed_field
     @property
     def password(self) -> Optional[str]:
-        if self.plain_password:
-            return hash_a_password(self.plain_password)
-        return None
+        if self.plain_password and self._password_hash is None:
+            self._password_hash = hash_a_password(self.plain_password)
+        return self._password_hash
 
 class UserCreationResponse(BaseResponse):
     id: UUID
     name:str
     email:str
 
+class AuthenticatedUser(BaseResponse):
+    id: UUID
+    name: Optional[str] = None
+    email: str
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
 class RestUserCreationResponse(BaseRestResponse):
     user:UserCreationResponse = None
 
@@ -10,6 +10,7 @@ from main import app
 from database import get_db
 from datetime import datetime
 from models import Base
+from utilities import LocalBlobStore, set_blob_store
 
 # Use SQLite for testing (async, in-memory)
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -41,4 +42,24 @@ async def create_test_db():
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
-    yield
\ No newline at end of file
+    yield
+
+@pytest.fixture(autouse=True, scope="function")
+def blob_store(tmp_path):
+    """
+    Keep the attachments of every test in its own temporary folder.
+    """
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    set_blob_store(store)
+    yield store
+    set_blob_store(None)
+
+@pytest.fixture(autouse=True, scope="function")
+def upload_staging_dir(tmp_path, monkeypatch):
+    """
+    Stage the resumable uploads of every test in its own temporary folder.
+    """
+    from config import config
+    directory = str(tmp_path / "uploads")
+    monkeypatch.setattr(config, "upload_staging_dir", directory)
+    yield directory
@@ -1,4 +1,9 @@
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from httpx import AsyncClient
+from sqlalchemy import Select, Update, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 def login(test_app: TestClient, email: str, password: str):
     # Attempt to log in with the provided credentials
@@ -141,4 +146,39 @@ def create_attachment(test_app: TestClient, transaction_id: str, file_path: str,
         response = test_app.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
     if response.status_code != 200:
         raise Exception(f"Attachment upload failed: {response.json().get('detail', 'Unknown error')}")
-    return response.json()
\ No newline at end of file
+    return response.json()
+async def login_headers(client: AsyncClient, credentials: dict) -> dict:
+    # Log in with the given email and password and return the authorization headers
+    login_resp = await client.post("/api/v1/users/login", json=credentials)
+    return {"Authorization": login_resp.json()["user_key"]["authorization"]}
+
+async def register_and_login(client: AsyncClient, user: dict) -> dict:
+    # Register the user and return the authorization headers of its session
+    await client.post("/api/v1/users/", json=user)
+    return await login_headers(client, {"email": user["email"], "password": user["plain_password"]})
+
+async def create_family_with_references(client: AsyncClient, test_data: dict):
+    # Register the user of the test data and create its family with the categories and the account to book transactions on
+    headers = await register_and_login(client, test_data["user"])
+    family_id = (await client.post("/api/v1/families/", json=test_data["family"], headers=headers)).json()["family"]["id"]
+    category_ids = [(await client.post(f"/api/v1/families/{family_id}/categories", json=category, headers=headers)).json()["category"]["id"]
+                    for category in test_data["categories"]]
+    account_id = (await client.post(f"/api/v1/families/{family_id}/accounts", json=test_data["account"], headers=headers)).json()["account"]["id"]
+    return family_id, category_ids, account_id, headers
+
+def transaction(category_id: str, account_id: str, amount: float, date: str, transaction_type: str = "expense") -> dict:
+    # Build the payload of a transaction
+    return {"category_id": category_id, "account_id": account_id, "amount": amount, "date": date, "transaction_type": transaction_type}
+
+@contextmanager
+def recorded_statements(engine: AsyncEngine):
+    # Record the SELECT and UPDATE statements run on the engine, compiled for PostgreSQL since SQLite drops the row locks
+    statements = []
+    def record(connection, clauseelement, multiparams, params, execution_options):
+        if isinstance(clauseelement, (Select, Update)):
+            statements.append(str(clauseelement.compile(dialect=postgresql.dialect())))
+    event.listen(engine.sync_engine, "before_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_execute", record)
@@ -1,6 +1,10 @@
 import pytest
-from httpx import AsyncClient
+import sqlalchemy as sa
+from uuid import UUID
+from httpx import ASGITransport, AsyncClient
+from conftest import test_engine
 from main import app
+from controllers import reconcile_account_balances
 
 account_test_data = {
     "user1": {"name": "AccountUser1", "email": "accountuser1@example.com", "plain_password": "Pass123!"},
@@ -75,6 +79,29 @@ async def test_get_all_family_accounts_success():
         assert response.json()["status"].upper().startswith("SUCCESS")
         assert len(response.json()["accounts"]) >= 2
 
+@pytest.mark.asyncio
+async def test_get_all_family_accounts_paginated():
+    from httpx import ASGITransport, AsyncClient
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=account_test_data["user1"])
+        login_resp = await client.post("/api/v1/users/login", json=account_test_data["user1_login"])
+        token = login_resp.json().get("user_key", {}).get("authorization")
+        headers = {"Authorization": token} if token else {}
+        family_resp = await client.post("/api/v1/families/", json=account_test_data["family1"], headers=headers)
+        family_id = family_resp.json()["family"]["id"]
+        for index in range(3):
+            await client.post(f"/api/v1/families/{family_id}/accounts", json={**account_test_data["account1"], "name": f"Account {index}"}, headers=headers)
+        first_page = await client.get(f"/api/v1/families/{family_id}/accounts", params={"limit": 2}, headers=headers)
+        assert first_page.status_code == 200
+        assert len(first_page.json()["accounts"]) == 2
+        assert first_page.json()["next_cursor"]
+        second_page = await client.get(f"/api/v1/families/{family_id}/accounts", params={"limit": 2, "cursor": first_page.json()["next_cursor"]}, headers=headers)
+        assert len(second_page.json()["accounts"]) == 1
+        assert second_page.json()["next_cursor"] is None
+        ids = [account["id"] for account in first_page.json()["accounts"] + second_page.json()["accounts"]]
+        assert len(set(ids)) == 3
+
 @pytest.mark.asyncio
 async def test_get_all_family_accounts_unauthenticated():
     from httpx import ASGITransport, AsyncClient
@@ -192,3 +219,35 @@ async def test_delete_account_not_found():
         assert response.status_code == 200
         assert response.json()["code"] == 0
         assert response.json()["status"].upper().startswith("FAILED")
+
+@pytest.mark.asyncio
+async def test_account_balance_follows_transactions():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=account_test_data["user1"])
+        login_resp = await client.post("/api/v1/users/login", json=account_test_data["user1_login"])
+        headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+        family_id = (await client.post("/api/v1/families/", json=account_test_data["family1"], headers=headers)).json()["family"]["id"]
+        account_id = (await client.post(f"/api/v1/families/{family_id}/accounts", json=account_test_data["account1"], headers=headers)).json()["account"]["id"]
+        category_id = (await client.post(f"/api/v1/families/{family_id}/categories", json={"name": "Misc", "type": "expense"}, headers=headers)).json()["category"]["id"]
+        transaction_ids = []
+        for amount, transaction_type in ((100.0, "income"), (30.5, "expense"), (-20.0, "transfer")):
+            transaction = {"category_id": category_id, "account_id": account_id, "amount": amount, "date": "2024-03-01T10:00:00", "transaction_type": transaction_type}
+            transaction_ids.append((await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction, headers=headers)).json()["transaction"]["id"])
+        response = await client.get(f"/api/v1/accounts/{account_id}", headers=headers)
+        assert response.json()["account"]["balance"] == 49.5
+        # Turning the expense into an income flips its sign, deleting the transfer takes it out
+        await client.put(f"/api/v1/transactions/{transaction_ids[1]}", json={"amount": 40.0, "transaction_type": "income"}, headers=headers)
+        await client.delete(f"/api/v1/transactions/{transaction_ids[2]}", headers=headers)
+        accounts = (await client.get(f"/api/v1/families/{family_id}/accounts", headers=headers)).json()["accounts"]
+        assert [account["balance"] for account in accounts] == [140.0]
+
+        assert await reconcile_account_balances(test_engine, UUID(family_id)) == []
+        async with test_engine.begin() as connection:
+            await connection.execute(sa.text("UPDATE accounts SET balance = 0 WHERE id = :id"), {"id": account_id.replace("-", "")})
+            await connection.execute(sa.text("DELETE FROM account_daily_balances"))
+        drifts = await reconcile_account_balances(test_engine)
+        assert [(str(drift.account_id), drift.stored, drift.expected, drift.days) for drift in drifts] == [(account_id, 0, 140, 1)]
+        response = await client.get(f"/api/v1/accounts/{account_id}", headers=headers)
+        assert response.json()["account"]["balance"] == 140.0
+        assert await reconcile_account_balances(test_engine) == []
@@ -1,6 +1,9 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 from main import app
+from utilities import LocalBlobStore, set_blob_store
+import os
+import hashlib
 from pathlib import Path
 from datetime import datetime
 
@@ -98,7 +101,8 @@ async def test_retrieve_attachment_success(tmp_path):
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         response = await client.get(f"/api/v1/attachments/{attachment_id}", headers=headers)
         assert response.status_code == 200
-        assert response.headers["content-type"].startswith("application/octet-stream")
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.content == b"This is a test attachment file."
 
 @pytest.mark.asyncio
 async def test_delete_attachment_success(tmp_path):
@@ -121,3 +125,231 @@ async def test_delete_attachment_not_found():
         assert response.status_code == 200
         assert response.json()["code"] == 0
         assert response.json()["status"].upper().startswith("FAILED")
+
+@pytest.mark.asyncio
+async def test_attachments_share_blobs(tmp_path, blob_store):
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(f"/api/v1/transactions/{transaction_id}/attachments", headers=headers)
+        digest = response.json()["attachment"]["digest"]
+        assert response.json()["attachment"]["size"] == len(b"This is a test attachment file.")
+        assert blob_store.exists(digest)
+        # The same content uploaded again is stored once
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files={"file": ("copy.txt", b"This is a test attachment file.", "text/plain")}, headers=headers)
+        second_id = response.json()["attachment"]["id"]
+        assert response.json()["attachment"]["digest"] == digest
+        await client.delete(f"/api/v1/attachments/{attachment_id}", headers=headers)
+        assert blob_store.exists(digest)
+        await client.delete(f"/api/v1/attachments/{second_id}", headers=headers)
+        assert not blob_store.exists(digest)
+
+@pytest.mark.asyncio
+async def test_upload_attachment_size_limits(tmp_path, blob_store, monkeypatch):
+    from config import config
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    monkeypatch.setattr(config, "attachment_max_bytes", 1000)
+    monkeypatch.setattr(config, "attachment_chunk_size", 256)
+    boundary = "limitboundary"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    sent = []
+    async def body(size):
+        yield head
+        for _ in range(size // 100):
+            sent.append(100)
+            yield b"x" * 100
+        yield tail
+    multipart_headers = {**headers, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        # Without Content-Length the upload is stopped once the file passes the limit
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", content=body(100000), headers=multipart_headers)
+        assert response.json()["code"] == 0
+        assert "exceeds" in response.json()["message"]
+        assert sum(sent) < 100000
+        assert os.listdir(blob_store.tmp_dir) == []
+        # A Content-Length over the limit is rejected before the body is read
+        sent.clear()
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", content=head + b"x" * 100000 + tail, headers=multipart_headers)
+        assert response.json()["code"] == 0
+        # Files within the limit are streamed in chunks with their content type
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", content=body(900), headers=multipart_headers)
+        assert response.json()["code"] == 1
+        assert response.json()["attachment"]["size"] == 900
+        assert response.json()["attachment"]["content_type"] == "application/pdf"
+        # The family limit counts the attachments already stored
+        monkeypatch.setattr(config, "attachment_max_family_bytes", 1000)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", content=body(500), headers=multipart_headers)
+        assert response.json()["code"] == 0
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", content=b"not multipart", headers=headers)
+        assert response.json()["code"] == 0
+
+@pytest.mark.asyncio
+async def test_retrieve_attachment_ranges_and_etag(tmp_path):
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    content = b"This is a test attachment file."
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers=headers)
+        etag = response.headers["etag"]
+        assert etag == f'"{hashlib.sha256(content).hexdigest()}"'
+        assert response.headers["content-length"] == str(len(content))
+        assert response.headers["accept-ranges"] == "bytes"
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "If-None-Match": '"stale"'})
+        assert response.status_code == 200
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "Range": "bytes=10-13"})
+        assert response.status_code == 206
+        assert response.content == content[10:14]
+        assert response.headers["content-range"] == f"bytes 10-13/{len(content)}"
+        # A Range whose If-Range no longer matches gets the whole file
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "Range": "bytes=10-13", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert response.content == content
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "Range": "bytes=10-13", "If-Range": etag})
+        assert response.status_code == 206
+        response = await client.get(f"/api/v1/attachments/{attachment_id}", headers={**headers, "Range": "bytes=500-"})
+        assert response.status_code == 416
+
+class MetadataOnlyBlobStore(LocalBlobStore):
+    """
+    A blob store failing the test as soon as the content of a blob is read.
+    """
+    def open(self, digest, compression=None):
+        raise AssertionError("A metadata endpoint read the content of a blob")
+
+    def iter_chunks(self, digest, chunk_size=65536, compression=None):
+        raise AssertionError("A metadata endpoint read the content of a blob")
+
+    def local_path(self, digest, compression=None):
+        raise AssertionError("A metadata endpoint read the content of a blob")
+
+@pytest.mark.asyncio
+async def test_metadata_endpoints_never_read_blobs(tmp_path, blob_store):
+    from sqlalchemy import event
+    from conftest import test_engine
+    set_blob_store(MetadataOnlyBlobStore(blob_store.root))
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+        statements.clear()
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/api/v1/transactions/{transaction_id}/attachments", headers=headers)
+            assert response.json()["code"] == 1
+            response = await client.delete(f"/api/v1/attachments/{attachment_id}", headers=headers)
+            assert response.json()["code"] == 1
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+    # Only the metadata columns of the attachments are selected
+    attachment_selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT") and "FROM attachments" in statement]
+    assert attachment_selects
+    assert not any("attachments.modified_at" in statement for statement in attachment_selects)
+
+@pytest.mark.asyncio
+async def test_upload_several_attachments_and_list_pages(tmp_path, monkeypatch):
+    from config import config
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        files = [("files", (f"receipt-{index}.txt", f"receipt {index}".encode(), "text/plain")) for index in range(3)]
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
+        assert response.json()["code"] == 1
+        created = response.json()["attachments"]
+        assert [attachment["filename"] for attachment in created] == ["receipt-0.txt", "receipt-1.txt", "receipt-2.txt"]
+        assert response.json()["attachment"] == created[0]
+        family_id = created[0]["family_id"]
+        # The attachments of the transaction are listed page by page
+        listed, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get(f"/api/v1/transactions/{transaction_id}/attachments", params=params, headers=headers)
+            assert response.json()["code"] == 1
+            assert len(response.json()["attachments"]) <= 2
+            listed += [attachment["id"] for attachment in response.json()["attachments"]]
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        assert sorted(listed) == sorted([attachment_id] + [attachment["id"] for attachment in created])
+        response = await client.get(f"/api/v1/families/{family_id}/attachments", params={"limit": 3}, headers=headers)
+        assert response.json()["code"] == 1
+        assert len(response.json()["attachments"]) == 3
+        response = await client.get(f"/api/v1/families/{family_id}/attachments", params={"cursor": response.json()["next_cursor"]}, headers=headers)
+        assert {attachment["id"] for attachment in response.json()["attachments"]} <= set(listed)
+        assert response.json()["next_cursor"] is None
+        response = await client.get(f"/api/v1/families/{family_id}/attachments", params={"cursor": "garbage"}, headers=headers)
+        assert response.json()["code"] == 0
+        # An upload carrying more files than attachment_max_files is refused
+        monkeypatch.setattr(config, "attachment_max_files", 2)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
+        assert response.json()["code"] == 0
+
+@pytest.mark.asyncio
+async def test_compressed_attachments(tmp_path, blob_store, monkeypatch):
+    from config import config
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    monkeypatch.setattr(config, "attachment_compression", "text/*=zlib,application/json=lzma")
+    csv_content = "".join(f"2024-03-{day % 28 + 1:02d},Coffee shop,{day}.50\n" for day in range(5000)).encode()
+    json_content = b'{"rows": [' + b",".join(b'{"amount": 12.5, "description": "groceries"}' for _ in range(3000)) + b"]}"
+    image_content = os.urandom(5000)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        files = [("files", ("export.csv", csv_content, "text/csv; charset=utf-8")), ("files", ("export.json", json_content, "application/json")),
+                 ("files", ("receipt.jpg", image_content, "image/jpeg"))]
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
+        assert response.json()["code"] == 1
+        csv_attachment, json_attachment, image_attachment = response.json()["attachments"]
+        assert (csv_attachment["compression"], json_attachment["compression"], image_attachment["compression"]) == ("zlib", "lzma", None)
+        assert csv_attachment["size"] == len(csv_content) and csv_attachment["stored_size"] < len(csv_content) // 4
+        assert json_attachment["stored_size"] < len(json_content) // 10
+        assert image_attachment["stored_size"] == len(image_content)
+        assert os.path.getsize(blob_store.path(csv_attachment["digest"], "zlib")) == csv_attachment["stored_size"]
+        # Downloads are decompressed while they are streamed, the ETag stays the digest of the original content
+        for attachment, content in ((csv_attachment, csv_content), (json_attachment, json_content), (image_attachment, image_content)):
+            response = await client.get(f"/api/v1/attachments/{attachment['id']}", headers=headers)
+            assert response.content == content
+            assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+        response = await client.delete(f"/api/v1/attachments/{csv_attachment['id']}", headers=headers)
+        assert response.json()["code"] == 1
+        assert not blob_store.exists(csv_attachment["digest"], "zlib")
+
+@pytest.mark.asyncio
+async def test_upload_refuses_a_blob_released_before_its_row(tmp_path, blob_store, monkeypatch):
+    import controllers.attachment
+    attachment_id, transaction_id, headers = await test_upload_attachment_success(tmp_path)
+    store_multipart_upload = controllers.attachment.store_multipart_upload
+    async def store_then_release(*args, **kwargs):
+        # A concurrent delete of the last attachment sharing the content removes the blob the upload found stored
+        uploads = await store_multipart_upload(*args, **kwargs)
+        for upload in uploads:
+            blob_store.delete(upload.digest, upload.compression)
+        return uploads
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        monkeypatch.setattr(controllers.attachment, "store_multipart_upload", store_then_release)
+        files = {"file": ("copy.txt", b"This is a test attachment file.", "text/plain")}
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.get(f"/api/v1/transactions/{transaction_id}/attachments", headers=headers)
+        assert [attachment["id"] for attachment in response.json()["attachments"]] == [attachment_id]
+        monkeypatch.undo()
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/attachments", files=files, headers=headers)
+        assert response.json()["code"] == 1
+        response = await client.get(f"/api/v1/attachments/{response.json()['attachment']['id']}", headers=headers)
+        assert response.content == b"This is a test attachment file."
+
+def test_incomplete_blob_store_fails_when_instantiated(tmp_path):
+    from utilities import BlobStore
+    class ReadOnlyBlobStore(BlobStore):
+        def open(self, digest, compression=None):
+            return open(tmp_path / digest, "rb")
+        def exists(self, digest, compression=None):
+            return (tmp_path / digest).exists()
+    with pytest.raises(TypeError):
+        ReadOnlyBlobStore()
@@ -1,6 +1,8 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 from main import app
+from conftest import test_engine
+from lib import create_family_with_references, recorded_statements
 from datetime import datetime, timedelta
 
 budget_test_data = {
@@ -176,3 +178,64 @@ async def test_delete_budget_not_found():
         assert response.status_code == 200
         assert response.json()["code"] == 0
         assert response.json()["status"].upper().startswith("FAILED")
+
+@pytest.mark.asyncio
+async def test_get_budget_utilization():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=budget_test_data["user"])
+        login_resp = await client.post("/api/v1/users/login", json=budget_test_data["user_login"])
+        headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+        family_id = (await client.post("/api/v1/families/", json=budget_test_data["family"], headers=headers)).json()["family"]["id"]
+        category_id = (await client.post(f"/api/v1/families/{family_id}/categories", json=budget_test_data["category"], headers=headers)).json()["category"]["id"]
+        other_category_id = (await client.post(f"/api/v1/families/{family_id}/categories", json={"name": "Other", "type": "expense"}, headers=headers)).json()["category"]["id"]
+        account_id = (await client.post(f"/api/v1/families/{family_id}/accounts", json=budget_test_data["account"], headers=headers)).json()["account"]["id"]
+        budget = {"amount": 300.0, "start_date": "2024-03-01T00:00:00", "end_date": "2024-03-31T23:59:59", "entry_category_id": category_id, "entry_account_id": account_id}
+        budget_id = (await client.post(f"/api/v1/families/{family_id}/budgets", json=budget, headers=headers)).json()["budget"]["id"]
+        empty_budget = {**budget, "start_date": "2024-05-01T00:00:00", "end_date": "2024-05-31T23:59:59"}
+        empty_budget_id = (await client.post(f"/api/v1/families/{family_id}/budgets", json=empty_budget, headers=headers)).json()["budget"]["id"]
+        transaction_ids = []
+        for amount, date, category in ((100.0, "2024-03-05T10:00:00", category_id), (50.5, "2024-03-31T12:00:00", category_id),
+                                       (999.0, "2024-04-01T00:00:00", category_id), (70.0, "2024-03-10T10:00:00", other_category_id)):
+            transaction = {"category_id": category, "account_id": account_id, "amount": amount, "date": date, "transaction_type": "expense"}
+            transaction_ids.append((await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction, headers=headers)).json()["transaction"]["id"])
+        assignment = {"entry_budget_id": budget_id, "entry_transaction_id": transaction_ids[0], "assigned_amount": 80.0}
+        assignment_resp = await client.post(f"/api/v1/families/{family_id}/budget_transactions", json=assignment, headers=headers)
+        assert assignment_resp.json()["code"] == 1
+
+        response = await client.get(f"/api/v1/families/{family_id}/budgets/utilization", headers=headers)
+        assert response.json()["code"] == 1
+        budgets = {item["budget_id"]: item for item in response.json()["budgets"]}
+        assert [item["budget_id"] for item in response.json()["budgets"]] == [budget_id, empty_budget_id]
+        utilization = budgets[budget_id]
+        assert (utilization["assigned"], utilization["spent"], utilization["remaining"]) == (80.0, 150.5, 149.5)
+        assert (utilization["transaction_count"], utilization["unassigned_count"], utilization["unassigned_amount"]) == (2, 1, 50.5)
+        empty = budgets[empty_budget_id]
+        assert (empty["assigned"], empty["spent"], empty["remaining"], empty["transaction_count"], empty["unassigned_count"]) == (0, 0, 300.0, 0, 0)
+
+        async def utilization_of(budget: str) -> tuple:
+            items = (await client.get(f"/api/v1/families/{family_id}/budgets/utilization", headers=headers)).json()["budgets"]
+            item = next(item for item in items if item["budget_id"] == budget)
+            return item["assigned"], item["spent"], item["transaction_count"], item["unassigned_count"], item["unassigned_amount"]
+
+        # The assigned transaction moves out of the period, it is no longer spent but stays assigned
+        await client.put(f"/api/v1/transactions/{transaction_ids[0]}", json={"date": "2024-04-02T10:00:00"}, headers=headers)
+        assert await utilization_of(budget_id) == (80.0, 50.5, 1, 1, 50.5)
+        # Widening the period recomputes the totals of the budget
+        await client.put(f"/api/v1/budgets/{budget_id}", json={"end_date": "2024-04-30T23:59:59"}, headers=headers)
+        assert await utilization_of(budget_id) == (80.0, 1149.5, 3, 2, 1049.5)
+        await client.delete(f"/api/v1/budget_transactions/{assignment_resp.json()['budget_transaction']['id']}", headers=headers)
+        assert await utilization_of(budget_id) == (0, 1149.5, 3, 3, 1149.5)
+
+@pytest.mark.asyncio
+async def test_create_budget_locks_the_budget_before_its_totals():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, [category_id], account_id, headers = await create_family_with_references(client, {**budget_test_data, "categories": [budget_test_data["category"]]})
+        budget_data = {**budget_test_data["budget"], "entry_category_id": category_id, "entry_account_id": account_id}
+        # A transaction write that updated the totals while the refresh waited commits first and is part of the recomputed totals
+        with recorded_statements(test_engine) as statements:
+            assert (await client.post(f"/api/v1/families/{family_id}/budgets", json=budget_data, headers=headers)).json()["code"] == 1
+        locks = [index for index, statement in enumerate(statements) if statement.startswith("SELECT budgets.id") and statement.endswith("ORDER BY budgets.id FOR UPDATE")]
+        updates = [index for index, statement in enumerate(statements) if statement.startswith("UPDATE budgets SET")]
+        assert len(locks) == 1 and len(updates) == 1 and locks[0] < updates[0]
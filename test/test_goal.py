@@ -0,0 +1,103 @@
+import pytest
+import sqlalchemy as sa
+from httpx import ASGITransport, AsyncClient
+from conftest import test_engine
+from main import app
+from lib import create_family_with_references, recorded_statements, register_and_login, transaction
+from datetime import datetime, timedelta
+
+goal_test_data = {
+    "user": {"name": "GoalUser", "email": "goaluser@example.com", "plain_password": "GoalPass123!"},
+    "other_user": {"name": "OtherGoalUser", "email": "othergoaluser@example.com", "plain_password": "OtherGoalPass123!"},
+    "family": {"name": "Goal Family"},
+    "categories": [{"name": "Savings", "type": "expense"}, {"name": "Salary", "type": "income"}],
+    "account": {"name": "Savings Account", "type": "Asset"},
+    "goal": {"name": "Holiday", "target_amount": 1000.0, "saved_amount": 100.0, "due_date": (datetime.utcnow() + timedelta(days=365)).isoformat()},
+}
+
+@pytest.mark.asyncio
+async def test_goal_crud_checks_the_family_of_the_goal():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = await register_and_login(client, goal_test_data["user"])
+        other_headers = await register_and_login(client, goal_test_data["other_user"])
+        family_id = (await client.post("/api/v1/families/", json=goal_test_data["family"], headers=headers)).json()["family"]["id"]
+        response = (await client.post(f"/api/v1/families/{family_id}/goals", json=goal_test_data["goal"], headers=headers)).json()
+        assert response["code"] == 1 and response["goal"]["saved_amount"] == 100 and response["goal"]["account_id"] is None
+        goal_id = response["goal"]["id"]
+
+        response = (await client.get(f"/api/v1/goals/{goal_id}", headers=headers)).json()
+        assert response["code"] == 1 and response["goal"]["name"] == "Holiday"
+        # A goal without a link keeps the saved amount it is given
+        response = (await client.put(f"/api/v1/goals/{goal_id}", json={"saved_amount": 250.0}, headers=headers)).json()
+        assert response["code"] == 1 and response["goal"]["saved_amount"] == 250
+        assert (await client.get(f"/api/v1/goals/{goal_id}", headers=other_headers)).status_code == 403
+        assert (await client.delete(f"/api/v1/goals/{goal_id}", headers=other_headers)).status_code == 403
+        assert (await client.delete(f"/api/v1/goals/{goal_id}", headers=headers)).json()["code"] == 1
+        assert (await client.get(f"/api/v1/goals/{goal_id}", headers=headers)).json()["code"] == 0
+
+@pytest.mark.asyncio
+async def test_linked_goals_follow_their_transactions():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (savings, salary), account_id, headers = await create_family_with_references(client, goal_test_data)
+        transactions_url = f"/api/v1/families/{family_id}/transactions"
+        # Transactions dated before the start of a goal do not count towards it
+        await client.post(transactions_url, json=transaction(salary, account_id, 500, "2023-12-31T10:00:00", "income"), headers=headers)
+        start = (datetime.utcnow() - timedelta(days=9)).replace(microsecond=0)
+        account_goal = (await client.post(f"/api/v1/families/{family_id}/goals", json={**goal_test_data["goal"], "account_id": account_id, "start_date": start.isoformat()},
+                                          headers=headers)).json()["goal"]
+        category_goal = (await client.post(f"/api/v1/families/{family_id}/goals", json={**goal_test_data["goal"], "category_id": savings, "start_date": start.isoformat()},
+                                           headers=headers)).json()["goal"]
+        assert (account_goal["saved_amount"], category_goal["saved_amount"], account_goal["projected_completion_date"]) == (0, 0, None)
+
+        day = (start + timedelta(days=1)).isoformat()
+        await client.post(transactions_url, json=transaction(salary, account_id, 400, day, "income"), headers=headers)
+        bulk = [transaction(savings, account_id, 150, day), transaction(savings, account_id, 50, day)]
+        assert (await client.post(f"{transactions_url}:bulk", json=bulk, headers=headers)).json()["inserted"] == 2
+        goals = {goal["id"]: goal for goal in (await client.get(f"/api/v1/families/{family_id}/goals", headers=headers)).json()["goals"]}
+        # The account goal follows the balance of the account, the category goal adds the amounts of the category
+        assert goals[account_goal["id"]]["saved_amount"] == 200 and goals[category_goal["id"]]["saved_amount"] == 200
+        # 200 saved in 10 days, the 800 left take 40 more days
+        today = datetime.utcnow().date()
+        assert goals[category_goal["id"]]["projected_completion_date"] == (today + timedelta(days=40)).isoformat()
+
+        salary_id = (await client.get(transactions_url, headers=headers, params={"category_id": salary, "date_from": start.isoformat()})).json()["transactions"][0]["id"]
+        await client.put(f"/api/v1/transactions/{salary_id}", json={"amount": 1200}, headers=headers)
+        response = (await client.get(f"/api/v1/goals/{account_goal['id']}", headers=headers)).json()
+        assert response["goal"]["saved_amount"] == 1000 and response["goal"]["projected_completion_date"] == today.isoformat()
+        await client.delete(f"/api/v1/transactions/{salary_id}", headers=headers)
+        assert (await client.get(f"/api/v1/goals/{account_goal['id']}", headers=headers)).json()["goal"]["saved_amount"] == -200
+
+        # The saved amount of a linked goal is not edited by hand, moving its start recomputes it
+        response = (await client.put(f"/api/v1/goals/{category_goal['id']}", json={"saved_amount": 10.0}, headers=headers)).json()
+        assert response["code"] == 0
+        response = (await client.put(f"/api/v1/goals/{account_goal['id']}", json={"start_date": "2023-01-01T00:00:00"}, headers=headers)).json()
+        assert response["code"] == 1 and response["goal"]["saved_amount"] == 300
+
+        # The batch recompute rebuilds every linked goal of the family
+        async with test_engine.begin() as connection:
+            await connection.execute(sa.text("UPDATE goals SET saved_amount = 0"))
+        response = (await client.post(f"/api/v1/families/{family_id}/goals:recompute", headers=headers)).json()
+        assert response["code"] == 1 and response["recomputed"] == 2
+        goals = {goal["id"]: goal["saved_amount"] for goal in (await client.get(f"/api/v1/families/{family_id}/goals", headers=headers)).json()["goals"]}
+        assert goals == {account_goal["id"]: 300, category_goal["id"]: 200}
+
+        # A goal cannot be linked to the account of another family
+        other_family_id = (await client.post("/api/v1/families/", json={"name": "Other Goal Family"}, headers=headers)).json()["family"]["id"]
+        response = (await client.post(f"/api/v1/families/{other_family_id}/goals", json={**goal_test_data["goal"], "account_id": account_id}, headers=headers)).json()
+        assert response["code"] == 0
+
+@pytest.mark.asyncio
+async def test_recompute_locks_the_goals_before_updating_them():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, _, account_id, headers = await create_family_with_references(client, goal_test_data)
+        for name in ("First", "Second"):
+            await client.post(f"/api/v1/families/{family_id}/goals", json={**goal_test_data["goal"], "name": name, "account_id": account_id}, headers=headers)
+        # A transaction write that applied its delta while the recompute waited commits first and is part of the sum
+        with recorded_statements(test_engine) as statements:
+            assert (await client.post(f"/api/v1/families/{family_id}/goals:recompute", headers=headers)).json()["recomputed"] == 2
+        locks = [index for index, statement in enumerate(statements) if statement.startswith("SELECT goals.id") and statement.endswith("ORDER BY goals.id FOR UPDATE")]
+        updates = [index for index, statement in enumerate(statements) if statement.startswith("UPDATE goals SET saved_amount")]
+        assert len(locks) == 1 and len(updates) == 1 and locks[0] < updates[0]
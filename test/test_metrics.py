@@ -0,0 +1,118 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from main import app
+from lib import login_headers
+from utilities import TTLCache,InstrumentedAsyncQueuePool
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+import time
+
+metrics_test_data = {
+    "owner": {"name": "MetricsOwner", "email": "metricsowner@example.com", "plain_password": "MetricsPass123!"},
+    "member": {"name": "MetricsMember", "email": "metricsmember@example.com", "plain_password": "MetricsPass123!"},
+    "owner_login": {"email": "metricsowner@example.com", "password": "MetricsPass123!"},
+    "member_login": {"email": "metricsmember@example.com", "password": "MetricsPass123!"},
+    "family": {"name": "Metrics Family"}
+}
+
+@pytest.mark.asyncio
+async def test_get_metrics_reports_membership_cache():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=metrics_test_data["owner"])
+        headers = await login_headers(client, metrics_test_data["owner_login"])
+        family_resp = await client.post("/api/v1/families/", json=metrics_test_data["family"], headers=headers)
+        family_id = family_resp.json()["family"]["id"]
+        await client.get(f"/api/v1/families/{family_id}", headers=headers)
+        await client.get(f"/api/v1/families/{family_id}", headers=headers)
+        response = await client.get("/api/v1/metrics", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["code"] == 1
+        membership = next(cache for cache in response.json()["caches"] if cache["name"] == "membership")
+        assert membership["hits"] >= 1
+        assert membership["size"] >= 1
+
+@pytest.mark.asyncio
+async def test_get_metrics_unauthenticated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/v1/metrics")
+        assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_membership_cache_invalidated_on_removal():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=metrics_test_data["owner"])
+        member_resp = await client.post("/api/v1/users/", json=metrics_test_data["member"])
+        member_id = member_resp.json()["user"]["id"]
+        owner_headers = await login_headers(client, metrics_test_data["owner_login"])
+        member_headers = await login_headers(client, metrics_test_data["member_login"])
+        family_resp = await client.post("/api/v1/families/", json=metrics_test_data["family"], headers=owner_headers)
+        family_id = family_resp.json()["family"]["id"]
+        # Cache the non member result before the member is added
+        response = await client.get(f"/api/v1/families/{family_id}", headers=member_headers)
+        assert response.json()["code"] == 0
+        await client.post(f"/api/v1/families/{family_id}/users", json={"user_id": member_id, "user_role": "parent"}, headers=owner_headers)
+        response = await client.get(f"/api/v1/families/{family_id}", headers=member_headers)
+        assert response.json()["code"] == 1
+        await client.delete(f"/api/v1/families/{family_id}/users/{member_id}", headers=owner_headers)
+        response = await client.get(f"/api/v1/families/{family_id}", headers=member_headers)
+        assert response.json()["code"] == 0
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(name="test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(name="test", maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a", "missing") == "missing"
+    assert cache.stats()["size"] == 0
+
+@pytest.mark.asyncio
+async def test_get_metrics_reports_hashing_pool():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=metrics_test_data["owner"])
+        headers = await login_headers(client, metrics_test_data["owner_login"])
+        response = await client.get("/api/v1/metrics", headers=headers)
+        assert response.status_code == 200
+        hashing = next(executor for executor in response.json()["executors"] if executor["name"] == "argon2")
+        assert hashing["completed"] >= 2
+        assert hashing["queued"] == 0
+        database = next(pool for pool in response.json()["pools"] if pool["name"] == "database")
+        assert database["checked_out"] == 0
+        assert len(database["wait_histogram"]) > 0
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_reports_occupancy_and_timeouts(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedAsyncQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+        stats = engine.pool.stats()
+        assert stats["checked_out"] == 1
+        assert stats["idle"] == 0
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_max"] >= 0.05
+    assert stats["wait_histogram"][-1]["count"] == 2
+    await engine.dispose()
+    # The counters survive the pool being recreated by dispose()
+    assert engine.pool.stats()["timeouts"] == 1
+    await engine.dispose()
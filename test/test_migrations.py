@@ -0,0 +1,217 @@
+import hashlib
+import sqlalchemy as sa
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID, uuid4
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from models import Base
+from utilities import transaction_fingerprint
+
+def alembic_config(database_path) -> Config:
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{database_path}")
+    config.attributes["configure_logger"] = False
+    return config
+
+def test_migrations_match_models(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    command.upgrade(alembic_config(database_path), "head")
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"compare_type": False})
+        assert compare_metadata(context, Base.metadata) == []
+    engine.dispose()
+
+def test_foreign_keys_are_indexed(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    command.upgrade(alembic_config(database_path), "head")
+    engine = create_engine(f"sqlite:///{database_path}")
+    inspector = inspect(engine)
+    for table in inspector.get_table_names():
+        leading_columns = {index["column_names"][0] for index in inspector.get_indexes(table)}
+        for foreign_key in inspector.get_foreign_keys(table):
+            assert foreign_key["constrained_columns"][0] in leading_columns, (table, foreign_key["constrained_columns"])
+    membership_index = next(index for index in inspector.get_indexes("families_users") if index["name"] == "ix_families_users_family_id_user_id")
+    assert membership_index["unique"]
+    engine.dispose()
+
+def test_migrations_downgrade_to_base(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    engine = create_engine(f"sqlite:///{database_path}")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+def test_fingerprints_are_backfilled(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0003_statement_imports")
+    transactions = sa.table("transactions", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "account_id", "category_id", "user_id")),
+                            sa.column("amount", sa.Numeric(scale=3)), sa.column("date", sa.DateTime()), sa.column("description", sa.String()),
+                            sa.column("transaction_type", sa.String()))
+    row = {"id": uuid4(), "family_id": uuid4(), "account_id": uuid4(), "category_id": uuid4(), "user_id": uuid4(),
+           "amount": Decimal("12.5"), "date": datetime(2024, 3, 1, 9, 30), "description": "Coffee Shop", "transaction_type": "EXPENSE"}
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(transactions), [row])
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        fingerprint = connection.execute(sa.text("SELECT fingerprint FROM transactions")).scalar_one()
+    assert fingerprint == transaction_fingerprint(row["family_id"], row["account_id"], "12.500", datetime(2024, 3, 1), "coffee  shop")
+    engine.dispose()
+
+def test_attachments_move_to_blob_store(tmp_path, blob_store):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0004_transaction_fingerprints")
+    attachments = sa.table("attachments", sa.column("id", sa.UUID()), sa.column("transaction_id", sa.UUID()),
+                           sa.column("file_content", sa.LargeBinary()), sa.column("upload_date", sa.DateTime()))
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(attachments).values(upload_date=sa.func.now()),
+                           [{"id": uuid4(), "transaction_id": uuid4(), "file_content": content} for content in (b"receipt", b"receipt", b"invoice")])
+    command.upgrade(config, "0005_attachment_blob_store")
+    with engine.connect() as connection:
+        rows = connection.execute(sa.text("SELECT digest, size, content_type FROM attachments")).all()
+    assert sorted(rows) == sorted((hashlib.sha256(content).hexdigest(), len(content), "application/octet-stream") for content in (b"receipt", b"receipt", b"invoice"))
+    assert blob_store.open(hashlib.sha256(b"invoice").hexdigest()).read() == b"invoice"
+    command.downgrade(config, "0004_transaction_fingerprints")
+    with engine.connect() as connection:
+        assert sorted(connection.execute(sa.text("SELECT file_content FROM attachments")).scalars().all()) == [b"invoice", b"receipt", b"receipt"]
+    engine.dispose()
+
+def test_attachment_families_are_backfilled(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0005_attachment_blob_store")
+    transactions = sa.table("transactions", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "account_id", "category_id", "user_id")),
+                            sa.column("amount", sa.Numeric(scale=3)), sa.column("date", sa.DateTime()), sa.column("transaction_type", sa.String()))
+    attachments = sa.table("attachments", sa.column("id", sa.UUID()), sa.column("transaction_id", sa.UUID()), sa.column("digest", sa.String()),
+                           sa.column("size", sa.BigInteger()), sa.column("content_type", sa.String()), sa.column("upload_date", sa.DateTime()))
+    transaction = {"id": uuid4(), "family_id": uuid4(), "account_id": uuid4(), "category_id": uuid4(), "user_id": uuid4(),
+                   "amount": 1, "date": sa.func.now(), "transaction_type": "EXPENSE"}
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(transactions).values(**transaction))
+        connection.execute(sa.insert(attachments).values(id=uuid4(), transaction_id=transaction["id"], digest="0" * 64, size=1,
+                                                         content_type="text/plain", upload_date=sa.func.now()))
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        family_id = connection.execute(sa.text("SELECT family_id FROM attachments")).scalar_one()
+    assert family_id == transaction["family_id"].hex
+    engine.dispose()
+
+def test_monthly_totals_are_backfilled(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0008_attachment_compression")
+    transactions = sa.table("transactions", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "account_id", "category_id", "user_id")),
+                            sa.column("amount", sa.Numeric(scale=3)), sa.column("date", sa.DateTime()), sa.column("transaction_type", sa.String()))
+    family_id, category_id = uuid4(), uuid4()
+    rows = [{"id": uuid4(), "family_id": family_id, "account_id": uuid4(), "category_id": category_id, "user_id": uuid4(),
+             "amount": Decimal(amount), "date": date, "transaction_type": "EXPENSE"}
+            for amount, date in (("10.5", datetime(2024, 3, 1, 9, 30)), ("4.5", datetime(2024, 3, 31, 23, 0)), ("7", datetime(2024, 4, 2)))]
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(transactions), rows)
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        totals = connection.execute(sa.text("SELECT month, total, transaction_count FROM family_monthly_category_totals ORDER BY month")).all()
+    assert [(month, Decimal(str(total)), count) for month, total, count in totals] == [("2024-03-01", Decimal("15"), 2), ("2024-04-01", Decimal("7"), 1)]
+    engine.dispose()
+
+def test_budget_totals_are_backfilled(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0009_monthly_category_totals")
+    ids = ("id", "family_id", "account_id", "category_id", "user_id")
+    transactions = sa.table("transactions", *(sa.column(name, sa.UUID()) for name in ids),
+                            sa.column("amount", sa.Numeric(scale=3)), sa.column("date", sa.DateTime()), sa.column("transaction_type", sa.String()))
+    budgets = sa.table("budgets", *(sa.column(name, sa.UUID()) for name in ids),
+                       sa.column("amount", sa.Numeric(scale=3)), sa.column("start_date", sa.DateTime()), sa.column("end_date", sa.DateTime()))
+    budgets_transactions = sa.table("budgets_transactions", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "budget_id", "transaction_id")),
+                                    sa.column("assigned_amount", sa.Numeric(scale=3)))
+    family_id, account_id, category_id, user_id, budget_id = uuid4(), uuid4(), uuid4(), uuid4(), uuid4()
+    rows = [{"id": uuid4(), "family_id": family_id, "account_id": account_id, "category_id": category_id, "user_id": user_id,
+             "amount": Decimal(amount), "date": date, "transaction_type": "EXPENSE"}
+            for amount, date in (("10.5", datetime(2024, 3, 1, 9, 30)), ("4.5", datetime(2024, 3, 31, 23, 0)), ("7", datetime(2024, 4, 2)))]
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(transactions), rows)
+        connection.execute(sa.insert(budgets), [{"id": budget_id, "family_id": family_id, "account_id": None, "category_id": category_id, "user_id": user_id,
+                                                 "amount": Decimal(100), "start_date": datetime(2024, 3, 1), "end_date": datetime(2024, 3, 31, 23, 59)}])
+        connection.execute(sa.insert(budgets_transactions), [{"id": uuid4(), "family_id": family_id, "budget_id": budget_id, "transaction_id": rows[0]["id"], "assigned_amount": Decimal(8)}])
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        totals = connection.execute(sa.text("SELECT spent, spent_count, assigned, assigned_spent, assigned_count FROM budgets")).one()
+    assert [Decimal(str(value)) for value in totals] == [Decimal(15), 2, Decimal(8), Decimal("10.5"), 1]
+    engine.dispose()
+
+def test_account_balances_are_backfilled(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0010_budget_totals")
+    ids = ("id", "family_id", "user_id")
+    accounts = sa.table("accounts", *(sa.column(name, sa.UUID()) for name in ids), sa.column("name", sa.String()), sa.column("type", sa.String()))
+    transactions = sa.table("transactions", *(sa.column(name, sa.UUID()) for name in (*ids, "account_id", "category_id")),
+                            sa.column("amount", sa.Numeric(scale=3)), sa.column("date", sa.DateTime()), sa.column("transaction_type", sa.String()))
+    family_id, user_id, account_id = uuid4(), uuid4(), uuid4()
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(accounts), [{"id": account_id, "family_id": family_id, "user_id": user_id, "name": "Checking", "type": "ASSET"}])
+        connection.execute(sa.insert(transactions), [{"id": uuid4(), "family_id": family_id, "user_id": user_id, "account_id": account_id, "category_id": uuid4(),
+                                                      "amount": Decimal(amount), "date": date, "transaction_type": transaction_type}
+                                                     for amount, date, transaction_type in (("100", datetime(2024, 3, 1, 9), "INCOME"), ("30.5", datetime(2024, 3, 1, 18), "EXPENSE"),
+                                                                                            ("12", datetime(2024, 3, 4), "EXPENSE"))])
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        balance = connection.execute(sa.text("SELECT balance FROM accounts")).scalar_one()
+        days = connection.execute(sa.text("SELECT day, net_change, transaction_count FROM account_daily_balances ORDER BY day")).all()
+    assert Decimal(str(balance)) == Decimal("57.5")
+    assert [(day, Decimal(str(change)), count) for day, change, count in days] == [("2024-03-01", Decimal("69.5"), 2), ("2024-03-04", Decimal(-12), 1)]
+    engine.dispose()
+
+def test_existing_goals_start_when_they_were_created(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0011_account_balances")
+    goals = sa.table("goals", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "user_id")), sa.column("name", sa.String()),
+                     sa.column("saved_amount", sa.Numeric(scale=3)), sa.column("created_at", sa.DateTime()), sa.column("modified_at", sa.DateTime()))
+    created_at = datetime(2024, 5, 1, 12, 30)
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(goals), [{"id": uuid4(), "family_id": uuid4(), "user_id": uuid4(), "name": "Car", "saved_amount": None,
+                                               "created_at": created_at, "modified_at": created_at}])
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        row = connection.execute(sa.text("SELECT saved_amount, start_date, account_id, category_id FROM goals")).one()
+    assert (row.saved_amount, row.start_date, row.account_id, row.category_id) == (0, "2024-05-01 12:30:00.000000", None, None)
+    engine.dispose()
+
+def test_duplicate_memberships_keep_the_strongest_role(tmp_path):
+    database_path = tmp_path / "migrations.db"
+    config = alembic_config(database_path)
+    command.upgrade(config, "0001_baseline")
+    memberships = sa.table("families_users", *(sa.column(name, sa.UUID()) for name in ("id", "family_id", "user_id")),
+                           sa.column("role", sa.String()), sa.column("created_at", sa.DateTime()), sa.column("modified_at", sa.DateTime()))
+    family_id, user_id = UUID(int=1), UUID(int=2)
+    # The owner row has the largest id and is not the earliest, it is still the one kept
+    rows = [(UUID(int=10), "GUEST", datetime(2024, 1, 1)), (UUID(int=11), "PARENT", datetime(2024, 1, 2)), (UUID(int=12), "OWNER", datetime(2024, 1, 3)),
+            (UUID(int=13), "PARENT", datetime(2024, 1, 1))]
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        connection.execute(sa.insert(memberships), [{"id": membership_id, "family_id": family_id, "user_id": user_id, "role": role, "created_at": created_at, "modified_at": created_at}
+                                                    for membership_id, role, created_at in rows])
+        connection.execute(sa.insert(memberships), [{"id": UUID(int=20), "family_id": family_id, "user_id": UUID(int=3), "role": "CHILD",
+                                                     "created_at": datetime(2024, 1, 5), "modified_at": datetime(2024, 1, 5)}])
+    command.upgrade(config, "0002_foreign_key_indexes")
+    with engine.connect() as connection:
+        kept = connection.execute(sa.text("SELECT role, created_at FROM families_users ORDER BY role")).all()
+    assert kept == [("CHILD", "2024-01-05 00:00:00.000000"), ("OWNER", "2024-01-03 00:00:00.000000")]
+    engine.dispose()
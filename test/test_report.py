@@ -0,0 +1,132 @@
+import pytest
+import sqlalchemy as sa
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from conftest import TestSessionLocal, test_engine
+from main import app
+from lib import create_family_with_references, register_and_login, transaction
+from controllers import ControllerUpdateTransaction,ControllerDeleteTransaction,reconcile_account_balances
+from controllers.ledger import net_worth_cache
+from controllers.transaction import get_transaction_by_id
+from models import UserModel
+from serializers import UpdateTransaction
+
+report_test_data = {
+    "user": {"name": "ReportUser", "email": "reportuser@example.com", "plain_password": "ReportPass123!"},
+    "family": {"name": "Report Family"},
+    "categories": [{"name": "Groceries", "type": "expense"}, {"name": "Salary", "type": "income"}],
+    "account": {"name": "Report Account", "type": "Asset", "balance": 0.0},
+}
+
+@pytest.mark.asyncio
+async def test_monthly_report_follows_transaction_writes():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (groceries, salary), account_id, headers = await create_family_with_references(client, report_test_data)
+        first = (await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, account_id, 40.25, "2024-01-05T10:00:00"), headers=headers)).json()["transaction"]["id"]
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, account_id, 9.75, "2024-01-31T23:00:00"), headers=headers)
+        bulk = [transaction(salary, account_id, 2000, "2024-01-28T08:00:00", "income"), transaction(groceries, account_id, 12.5, "2024-02-02T12:00:00")]
+        assert (await client.post(f"/api/v1/families/{family_id}/transactions:bulk", json=bulk, headers=headers)).json()["inserted"] == 2
+
+        report = (await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers)).json()
+        assert report["code"] == 1
+        assert [(month["month"], month["income"], month["expense"]) for month in report["months"]] == [("2024-01-01", 2000, 50), ("2024-02-01", 0, 12.5)]
+        january = {(row["category_id"], row["transaction_type"]): (row["total"], row["transaction_count"]) for row in report["months"][0]["categories"]}
+        assert january == {(groceries, "expense"): (50, 2), (salary, "income"): (2000, 1)}
+
+        # Moving a transaction to another month takes it out of the old month and into the new one
+        await client.put(f"/api/v1/transactions/{first}", json={"amount": 30, "date": "2024-02-10T10:00:00"}, headers=headers)
+        report = (await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers, params={"from": "2024-02-15"})).json()
+        assert [(month["month"], month["expense"], month["categories"][0]["transaction_count"]) for month in report["months"]] == [("2024-02-01", 42.5, 2)]
+        await client.delete(f"/api/v1/transactions/{first}", headers=headers)
+        report = (await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers, params={"category_id": groceries})).json()
+        assert [(month["month"], month["expense"]) for month in report["months"]] == [("2024-01-01", 9.75), ("2024-02-01", 12.5)]
+
+        response = await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers, params={"from": "2024-03-01", "to": "2024-01-01"})
+        assert response.json()["code"] == 0
+
+@pytest.mark.asyncio
+async def test_net_worth_report_follows_asset_and_liability_accounts():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = await register_and_login(client, {"name": "NetWorthUser", "email": "networthuser@example.com", "plain_password": "NetWorthPass123!"})
+        family_id = (await client.post("/api/v1/families/", json={"name": "Net Worth Family"}, headers=headers)).json()["family"]["id"]
+        groceries, salary = [(await client.post(f"/api/v1/families/{family_id}/categories", json=category, headers=headers)).json()["category"]["id"]
+                             for category in report_test_data["categories"]]
+        checking, card = [(await client.post(f"/api/v1/families/{family_id}/accounts", json={"name": name, "type": account_type}, headers=headers)).json()["account"]["id"]
+                          for name, account_type in (("Checking", "Asset"), ("Credit Card", "Liability"))]
+        url = f"/api/v1/families/{family_id}/reports/net-worth"
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(salary, checking, 1000, "2024-01-10T08:00:00", "income"), headers=headers)
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, card, 150, "2024-01-20T12:00:00"), headers=headers)
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, checking, 100, "2024-03-03T12:00:00"), headers=headers)
+
+        report = (await client.get(url, headers=headers, params={"to": "2024-03-31"})).json()
+        assert report["code"] == 1 and report["interval"] == "month"
+        assert [(point["date"], point["assets"], point["liabilities"], point["net_worth"]) for point in report["points"]] == [
+            ("2024-01-01", 1000, 150, 850), ("2024-02-01", 1000, 150, 850), ("2024-03-01", 900, 150, 750)]
+
+        # The opening balance comes from the days before the range, the weeks start on Monday so Sunday 2024-03-03 ends the second one
+        report = (await client.get(url, headers=headers, params={"from": "2024-02-20", "to": "2024-03-05", "interval": "week"})).json()
+        assert [(point["date"], point["net_worth"]) for point in report["points"]] == [("2024-02-19", 850), ("2024-02-26", 750), ("2024-03-04", 750)]
+        report = (await client.get(url, headers=headers, params={"from": "2024-01-19", "to": "2024-01-21", "interval": "day"})).json()
+        assert [(point["date"], point["net_worth"]) for point in report["points"]] == [("2024-01-19", 1000), ("2024-01-20", 850), ("2024-01-21", 850)]
+
+        # A write drops the cached report of the family
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(salary, card, 150, "2024-02-01T09:00:00", "income"), headers=headers)
+        report = (await client.get(url, headers=headers, params={"to": "2024-03-31"})).json()
+        assert [point["net_worth"] for point in report["points"]] == [850, 1000, 900]
+
+        assert (await client.get(url, headers=headers, params={"from": "2024-03-01", "to": "2024-01-01"})).json()["code"] == 0
+        assert (await client.get(url, headers=headers, params={"from": "2000-01-01", "to": "2024-01-01", "interval": "day"})).json()["code"] == 0
+        assert (await client.get(url, headers=headers, params={"interval": "year"})).status_code == 422
+
+@pytest.mark.asyncio
+async def test_writes_are_applied_against_the_committed_transaction():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (groceries, _), account_id, headers = await create_family_with_references(client, report_test_data)
+        transaction_id = (await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, account_id, 40, "2024-01-05T10:00:00"), headers=headers)).json()["transaction"]["id"]
+        async with TestSessionLocal() as db:
+            # The session still holds the transaction as it was before the concurrent update below
+            stale = await get_transaction_by_id(transaction_id, db)
+            assert float(stale.amount) == 40
+            await client.put(f"/api/v1/transactions/{transaction_id}", json={"amount": 30}, headers=headers)
+            user = (await db.execute(select(UserModel).where(UserModel.email == report_test_data["user"]["email"]))).scalar_one()
+            response = await ControllerUpdateTransaction(transaction_id, UpdateTransaction(amount=25), user, db)
+            assert response.code == 1
+        report = (await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers)).json()
+        assert [(month["month"], month["expense"]) for month in report["months"]] == [("2024-01-01", 25)]
+        # A second delete of the same transaction finds it gone instead of taking it out of the totals again
+        async with TestSessionLocal() as db:
+            stale = await get_transaction_by_id(transaction_id, db)
+            assert (await client.delete(f"/api/v1/transactions/{transaction_id}", headers=headers)).json()["code"] == 1
+            response = await ControllerDeleteTransaction(transaction_id, user, db)
+            assert response.code == 0 and response.message == "Transaction not found"
+        report = (await client.get(f"/api/v1/families/{family_id}/reports/monthly", headers=headers)).json()
+        assert report["months"] == []
+
+@pytest.mark.asyncio
+async def test_net_worth_cache_is_cleared_after_the_write_commits(monkeypatch):
+    events = []
+    commit = AsyncSession.commit
+    async def recorded_commit(session):
+        await commit(session)
+        events.append("commit")
+    monkeypatch.setattr(AsyncSession, "commit", recorded_commit)
+    monkeypatch.setattr(net_worth_cache, "discard_where", lambda predicate: events.append("invalidate"))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (groceries, _), account_id, headers = await create_family_with_references(client, report_test_data)
+        # A report read between the invalidation and the commit would cache the old balances until the entry expires
+        events.clear()
+        transaction_id = (await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction(groceries, account_id, 10, "2024-01-05T10:00:00"), headers=headers)).json()["transaction"]["id"]
+        await client.put(f"/api/v1/transactions/{transaction_id}", json={"amount": 20.0}, headers=headers)
+        await client.post(f"/api/v1/families/{family_id}/transactions:bulk", json=[transaction(groceries, account_id, 5, "2024-01-06T10:00:00")], headers=headers)
+        await client.delete(f"/api/v1/transactions/{transaction_id}", headers=headers)
+        assert events == ["commit", "invalidate"] * 4
+        events.clear()
+        async with test_engine.begin() as connection:
+            await connection.execute(sa.text("UPDATE accounts SET balance = 0"))
+        assert len(await reconcile_account_balances(test_engine)) == 1
+        assert events == ["commit", "invalidate"]
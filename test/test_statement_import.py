@@ -0,0 +1,164 @@
+import pytest
+from decimal import Decimal
+from httpx import ASGITransport, AsyncClient
+from main import app
+from config import config
+from lib import create_family_with_references
+from utilities.statements import StatementEntry, StatementRowError, parse_statement
+
+import_test_data = {
+    "user": {"name": "ImportUser", "email": "importuser@example.com", "plain_password": "ImportPass123!"},
+    "family": {"name": "Import Family"},
+    "categories": [{"name": "Misc", "type": "expense"}, {"name": "Salary", "type": "income"}],
+    "account": {"name": "Checking", "type": "Asset", "balance": 0},
+    "garbage_uuid": "00000000-0000-0000-0000-000000000000"
+}
+
+CSV_STATEMENT = """\ufeffDate,Details,Debit,Credit
+2024-03-01,COFFEE SHOP,3.50,
+2024-03-02,SALARY ACME,,2500.00
+2024-03-03,SUPERMARKET,42.10,
+yesterday,BROKEN ROW,1.00,
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240305120000[-5:EST]
+<TRNAMT>-12.00
+<NAME>BOOKSHOP
+<MEMO>Card 1234
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240306
+<TRNAMT>100.00
+<NAME>REFUND
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF_STATEMENT = """!Type:Bank
+D03/07/2024
+T-20.00
+PPHARMACY
+LHealth
+^
+D3/8'24
+U1,000.00
+PBONUS
+^
+"""
+
+async def run_import(client, family_id, settings, content, headers):
+    response = await client.post(f"/api/v1/families/{family_id}/imports", json=settings, headers=headers)
+    assert response.json()["code"] == 1
+    import_id = response.json()["statement_import"]["id"]
+    response = await client.put(f"/api/v1/imports/{import_id}/content", content=content.encode(), headers=headers)
+    assert response.json()["code"] == 1
+    response = await client.get(f"/api/v1/imports/{import_id}", headers=headers)
+    return response.json()["statement_import"]
+
+def test_parse_statement_formats():
+    entries = list(parse_statement("csv", CSV_STATEMENT.lstrip("\ufeff").splitlines(keepends=True), {"date": "Date", "debit": "Debit", "credit": "Credit", "description": "Details"}))
+    assert [entry.amount for entry in entries[:3]] == [Decimal("-3.50"), Decimal("2500.00"), Decimal("-42.10")]
+    assert isinstance(entries[3], StatementRowError) and entries[3].row == 4
+    entries = list(parse_statement("ofx", OFX_STATEMENT.splitlines(keepends=True)))
+    assert entries[0] == StatementEntry(1, entries[0].date, Decimal("-12.00"), description="BOOKSHOP Card 1234")
+    assert entries[0].date.day == 5 and entries[1].date.day == 6
+    entries = list(parse_statement("qif", QIF_STATEMENT.splitlines(keepends=True)))
+    assert [(entry.date.month, entry.date.day, entry.date.year) for entry in entries] == [(3, 7, 2024), (3, 8, 2024)]
+    assert entries[0].category == "Health" and entries[1].amount == Decimal("1000.00")
+
+@pytest.mark.asyncio
+async def test_import_csv_with_rules():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (category_id, salary_id), account_id, headers = await create_family_with_references(client, import_test_data)
+        settings = {"format": "csv", "default_account_id": account_id, "default_category_id": category_id,
+                    "column_map": {"date": "Date", "amount": None, "debit": "Debit", "credit": "Credit", "description": "Details"},
+                    "rules": [{"contains": "salary", "category_id": salary_id}]}
+        statement_import = await run_import(client, family_id, settings, CSV_STATEMENT, headers)
+        assert statement_import["status"] == "completed"
+        assert statement_import["rows_parsed"] == 4
+        assert statement_import["rows_inserted"] == 3
+        assert statement_import["rows_failed"] == 1
+        assert statement_import["errors"][0]["row"] == 4
+        assert statement_import["bytes_processed"] == statement_import["bytes_received"] == len(CSV_STATEMENT.encode())
+        listing = await client.get(f"/api/v1/families/{family_id}/transactions", headers=headers)
+        transactions = {transaction["description"]: transaction for transaction in listing.json()["transactions"]}
+        assert transactions["SALARY ACME"]["category_id"] == salary_id
+        assert transactions["SALARY ACME"]["transaction_type"] == "income"
+        assert transactions["COFFEE SHOP"]["transaction_type"] == "expense"
+        assert transactions["COFFEE SHOP"]["amount"] == 3.5
+        # Importing the same statement again only reports duplicates
+        statement_import = await run_import(client, family_id, settings, CSV_STATEMENT, headers)
+        assert statement_import["rows_inserted"] == 0
+        assert statement_import["rows_duplicate"] == 3
+
+@pytest.mark.asyncio
+async def test_import_ofx_and_qif():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (category_id, _), account_id, headers = await create_family_with_references(client, import_test_data)
+        settings = {"default_account_id": account_id, "default_category_id": category_id}
+        statement_import = await run_import(client, family_id, {**settings, "format": "ofx"}, OFX_STATEMENT, headers)
+        assert (statement_import["status"], statement_import["rows_inserted"]) == ("completed", 2)
+        statement_import = await run_import(client, family_id, {**settings, "format": "qif"}, QIF_STATEMENT, headers)
+        assert (statement_import["status"], statement_import["rows_inserted"]) == ("completed", 2)
+        listing = await client.get(f"/api/v1/families/{family_id}/transactions", params={"transaction_type": "income"}, headers=headers)
+        assert sorted(transaction["description"] for transaction in listing.json()["transactions"]) == ["BONUS", "REFUND"]
+
+@pytest.mark.asyncio
+async def test_import_validation_and_access():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (category_id, _), account_id, headers = await create_family_with_references(client, import_test_data)
+        response = await client.post(f"/api/v1/families/{family_id}/imports", json={"format": "csv", "default_account_id": import_test_data["garbage_uuid"]}, headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.post(f"/api/v1/families/{family_id}/imports", json={"format": "xls"}, headers=headers)
+        assert response.status_code == 422
+        statement_import = await run_import(client, family_id, {"format": "qif", "default_account_id": account_id}, QIF_STATEMENT, headers)
+        assert statement_import["rows_failed"] == 2
+        assert statement_import["errors"][0]["errors"] == ["No rule or default category matched the row"]
+        response = await client.put(f"/api/v1/imports/{statement_import['id']}/content", content=b"again", headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.get(f"/api/v1/imports/{import_test_data['garbage_uuid']}", headers=headers)
+        assert response.json()["code"] == 0
+        await client.post("/api/v1/users/", json={"name": "Outsider", "email": "outsider@example.com", "plain_password": "Outsider123!"})
+        login_resp = await client.post("/api/v1/users/login", json={"email": "outsider@example.com", "password": "Outsider123!"})
+        outsider = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+        response = await client.get(f"/api/v1/imports/{statement_import['id']}", headers=outsider)
+        assert response.status_code == 403
+        response = await client.post(f"/api/v1/families/{family_id}/imports", json={"format": "csv"}, headers=outsider)
+        assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_concurrent_uploads_import_the_statement_once(monkeypatch):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, (category_id, _), account_id, headers = await create_family_with_references(client, import_test_data)
+        response = await client.post(f"/api/v1/families/{family_id}/imports", json={"format": "qif", "default_account_id": account_id, "default_category_id": category_id}, headers=headers)
+        url = f"/api/v1/imports/{response.json()['statement_import']['id']}/content"
+        # A statement over the limit puts the import back in the pending status
+        monkeypatch.setattr(config, "import_max_bytes", 10)
+        async def oversized():
+            yield QIF_STATEMENT.encode()
+        assert (await client.put(url, content=oversized(), headers=headers)).json()["code"] == 0
+        assert (await client.get(url.removesuffix("/content"), headers=headers)).json()["statement_import"]["status"] == "pending"
+        monkeypatch.setattr(config, "import_max_bytes", 1024 * 1024)
+        # A second upload sent while the body of the first is still streaming is refused
+        concurrent = []
+        async def body():
+            concurrent.append((await client.put(url, content=QIF_STATEMENT.encode(), headers=headers)).json())
+            yield QIF_STATEMENT.encode()
+        response = (await client.put(url, content=body(), headers=headers)).json()
+        assert response["code"] == 1
+        assert concurrent[0]["code"] == 0
+        statement_import = (await client.get(url.removesuffix("/content"), headers=headers)).json()["statement_import"]
+        assert (statement_import["status"], statement_import["rows_inserted"]) == ("completed", 2)
+        listing = await client.get(f"/api/v1/families/{family_id}/transactions", headers=headers)
+        assert len(listing.json()["transactions"]) == 2
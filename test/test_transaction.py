@@ -1,6 +1,7 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 from main import app
+from lib import create_family_with_references
 from uuid import uuid4
 from datetime import datetime
 
@@ -9,6 +10,7 @@ transaction_test_data = {
     "user_login": {"email": "transuser@example.com", "password": "TransPass123!"},
     "family": {"name": "Transaction Family"},
     "category": {"name": "Groceries", "type": "expense"},
+    "categories": [{"name": "Groceries", "type": "expense"}],
     "account": {"name": "Wallet", "type": "Asset", "balance": 500.0},
     "transaction": {
         "amount": 100.0,
@@ -105,6 +107,225 @@ async def test_get_all_transactions_of_family_success():
         assert response.json()["status"].upper().startswith("SUCCESS")
         assert isinstance(response.json()["transactions"], list)
 
+@pytest.mark.asyncio
+async def test_get_all_transactions_of_family_paginated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=transaction_test_data["user"])
+        login_resp = await client.post("/api/v1/users/login", json=transaction_test_data["user_login"])
+        token = login_resp.json().get("user_key", {}).get("authorization")
+        headers = {"Authorization": token} if token else {}
+        family_resp = await client.post("/api/v1/families/", json=transaction_test_data["family"], headers=headers)
+        family_id = family_resp.json()["family"]["id"]
+        category_resp = await client.post(f"/api/v1/families/{family_id}/categories", json=transaction_test_data["category"], headers=headers)
+        category_id = category_resp.json()["category"]["id"]
+        account_resp = await client.post(f"/api/v1/families/{family_id}/accounts", json=transaction_test_data["account"], headers=headers)
+        account_id = account_resp.json()["account"]["id"]
+        # Two transactions share a date so the id breaks the tie between pages
+        for day in ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03", "2024-01-04"]:
+            transaction_data = {
+                "category_id": category_id,
+                "account_id": account_id,
+                "amount": transaction_test_data["transaction"]["amount"],
+                "date": f"{day}T10:00:00",
+                "description": transaction_test_data["transaction"]["description"],
+                "transaction_type": transaction_test_data["transaction"]["transaction_type"]
+            }
+            await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction_data, headers=headers)
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get(f"/api/v1/families/{family_id}/transactions", params=params, headers=headers)
+            assert response.status_code == 200
+            assert response.json()["code"] == 1
+            assert len(response.json()["transactions"]) <= 2
+            seen.extend(response.json()["transactions"])
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 5
+        assert len({transaction["id"] for transaction in seen}) == 5
+        assert [transaction["date"][:10] for transaction in seen] == ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03", "2024-01-04"]
+
+@pytest.mark.asyncio
+async def test_get_all_transactions_of_family_invalid_cursor():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=transaction_test_data["user"])
+        login_resp = await client.post("/api/v1/users/login", json=transaction_test_data["user_login"])
+        token = login_resp.json().get("user_key", {}).get("authorization")
+        headers = {"Authorization": token} if token else {}
+        family_resp = await client.post("/api/v1/families/", json=transaction_test_data["family"], headers=headers)
+        family_id = family_resp.json()["family"]["id"]
+        response = await client.get(f"/api/v1/families/{family_id}/transactions", params={"cursor": "not-a-cursor"}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["code"] == 0
+        response = await client.get(f"/api/v1/families/{family_id}/transactions", params={"limit": 0}, headers=headers)
+        assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_all_transactions_of_family_filtered():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/users/", json=transaction_test_data["user"])
+        login_resp = await client.post("/api/v1/users/login", json=transaction_test_data["user_login"])
+        token = login_resp.json().get("user_key", {}).get("authorization")
+        headers = {"Authorization": token} if token else {}
+        family_resp = await client.post("/api/v1/families/", json=transaction_test_data["family"], headers=headers)
+        family_id = family_resp.json()["family"]["id"]
+        category_resp = await client.post(f"/api/v1/families/{family_id}/categories", json=transaction_test_data["category"], headers=headers)
+        category_id = category_resp.json()["category"]["id"]
+        other_category_resp = await client.post(f"/api/v1/families/{family_id}/categories", json={"name": "Salary", "type": "income"}, headers=headers)
+        other_category_id = other_category_resp.json()["category"]["id"]
+        account_resp = await client.post(f"/api/v1/families/{family_id}/accounts", json=transaction_test_data["account"], headers=headers)
+        account_id = account_resp.json()["account"]["id"]
+        rows = [
+            (category_id, 25.0, "2024-01-15T10:00:00", "Weekly groceries", "expense"),
+            (category_id, 80.0, "2024-02-03T10:00:00", "Groceries 100%", "expense"),
+            (other_category_id, 2500.0, "2024-02-01T09:00:00", "January salary", "income"),
+            (category_id, 40.0, "2024-03-10T10:00:00", "Market", "expense"),
+        ]
+        for row_category_id, amount, date, description, transaction_type in rows:
+            transaction_data = {
+                "category_id": row_category_id,
+                "account_id": account_id,
+                "amount": amount,
+                "date": date,
+                "description": description,
+                "transaction_type": transaction_type
+            }
+            await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction_data, headers=headers)
+
+        async def descriptions(params):
+            response = await client.get(f"/api/v1/families/{family_id}/transactions", params=params, headers=headers)
+            assert response.status_code == 200
+            assert response.json()["code"] == 1
+            return [transaction["description"] for transaction in response.json()["transactions"]]
+
+        assert await descriptions({"date_from": "2024-02-01T00:00:00", "date_to": "2024-03-01T00:00:00"}) == ["January salary", "Groceries 100%"]
+        assert await descriptions({"category_id": category_id, "date_from": "2024-02-01T00:00:00"}) == ["Groceries 100%", "Market"]
+        assert await descriptions({"account_id": account_id, "transaction_type": "income"}) == ["January salary"]
+        assert await descriptions({"amount_min": 30, "amount_max": 100}) == ["Groceries 100%", "Market"]
+        assert await descriptions({"description": "GROCERIES"}) == ["Weekly groceries", "Groceries 100%"]
+        assert await descriptions({"description": "100%"}) == ["Groceries 100%"]
+        assert await descriptions({"description": "%"}) == ["Groceries 100%"]
+        response = await client.get(f"/api/v1/families/{family_id}/transactions", params={"amount_min": 100, "amount_max": 10}, headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.get(f"/api/v1/families/{family_id}/transactions", params={"transaction_type": "gift"}, headers=headers)
+        assert response.status_code == 422
+
+async def create_family_with_transactions(client, count):
+    family_id, [category_id], account_id, headers = await create_family_with_references(client, transaction_test_data)
+    for index in range(count):
+        transaction_data = {
+            "category_id": category_id,
+            "account_id": account_id,
+            "amount": 10.5 + index,
+            "date": f"2024-01-{index + 1:02d}T10:00:00",
+            "description": f"Item, {index}",
+            "transaction_type": "expense"
+        }
+        await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction_data, headers=headers)
+    return family_id, headers
+
+@pytest.mark.asyncio
+async def test_export_transactions_csv():
+    import csv, io
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, headers = await create_family_with_transactions(client, 3)
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/export", params={"format": "csv"}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["description"] for row in rows] == ["Item, 0", "Item, 1", "Item, 2"]
+        assert float(rows[1]["amount"]) == 11.5
+        assert rows[0]["transaction_type"] == "expense"
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/export", params={"format": "csv", "date_from": "2025-01-01T00:00:00"}, headers=headers)
+        assert response.text.strip() == "id,family_id,category_id,account_id,user_id,amount,date,description,transaction_type"
+
+@pytest.mark.asyncio
+async def test_export_transactions_ndjson():
+    import json
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, headers = await create_family_with_transactions(client, 3)
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/export", params={"format": "ndjson", "amount_min": 11}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["amount"] for row in rows] == [11.5, 12.5]
+        assert all(row["family_id"] == family_id for row in rows)
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/export", params={"format": "xml"}, headers=headers)
+        assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_export_transactions_not_member():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, _ = await create_family_with_transactions(client, 1)
+        await client.post("/api/v1/users/", json={"name": "Outsider", "email": "outsider@example.com", "plain_password": "Outsider123!"})
+        login_resp = await client.post("/api/v1/users/login", json={"email": "outsider@example.com", "password": "Outsider123!"})
+        headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/export", headers=headers)
+        assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_bulk_create_transactions_json():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, [category_id], account_id, headers = await create_family_with_references(client, transaction_test_data)
+        rows = [{"account_id": account_id, "category_id": category_id, "amount": index, "date": f"2024-02-{index + 1:02d}T00:00:00", "transaction_type": "expense"} for index in range(20)]
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", json=rows, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["code"] == 1
+        assert response.json()["inserted"] == 20
+        listing = await client.get(f"/api/v1/families/{family_id}/transactions", headers=headers)
+        assert len(listing.json()["transactions"]) == 20
+
+@pytest.mark.asyncio
+async def test_bulk_create_transactions_csv_upload():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, [category_id], account_id, headers = await create_family_with_references(client, transaction_test_data)
+        content = "account_id,category_id,amount,date,description,transaction_type\n"
+        content += f"{account_id},{category_id},12.5,2024-02-01T00:00:00,Bakery,expense\n"
+        content += f"{account_id},{category_id},40,2024-02-02T00:00:00,,income\n"
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", files={"file": ("history.csv", content, "text/csv")}, headers=headers)
+        assert response.json()["code"] == 1
+        assert response.json()["inserted"] == 2
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", content=content, headers={**headers, "Content-Type": "text/csv"})
+        assert response.json()["inserted"] == 2
+        listing = await client.get(f"/api/v1/families/{family_id}/transactions", params={"description": "Bakery"}, headers=headers)
+        assert len(listing.json()["transactions"]) == 2
+
+@pytest.mark.asyncio
+async def test_bulk_create_transactions_reports_row_errors():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, [category_id], account_id, headers = await create_family_with_references(client, transaction_test_data)
+        rows = [
+            {"account_id": account_id, "category_id": category_id, "amount": 5, "date": "2024-02-01T00:00:00", "transaction_type": "expense"},
+            {"account_id": account_id, "category_id": category_id, "amount": "five", "date": "2024-02-01T00:00:00", "transaction_type": "expense"},
+            {"account_id": transaction_test_data["garbage_uuid"], "category_id": category_id, "amount": 5, "date": "2024-02-01T00:00:00", "transaction_type": "expense"},
+        ]
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", json=rows, headers=headers)
+        assert response.json()["code"] == 0
+        assert response.json()["inserted"] == 0
+        assert [error["row"] for error in response.json()["errors"]] == [2, 3]
+        assert response.json()["errors"][0]["errors"][0].startswith("amount")
+        assert response.json()["errors"][1]["errors"] == ["account_id: Account not found in the family"]
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", params={"allow_partial": True}, json=rows, headers=headers)
+        assert response.json()["code"] == 1
+        assert response.json()["inserted"] == 1
+        assert len(response.json()["errors"]) == 2
+        response = await client.post(f"/api/v1/families/{family_id}/transactions:bulk", json={"amount": 5}, headers=headers)
+        assert response.json()["code"] == 0
+
 @pytest.mark.asyncio
 async def test_get_transaction_success():
     transport = ASGITransport(app=app)
@@ -233,3 +454,29 @@ async def test_delete_transaction_not_found():
         assert response.status_code == 200
         assert response.json()["code"] == 0
         assert response.json()["status"].upper().startswith("FAILED")
+
+@pytest.mark.asyncio
+async def test_duplicate_transactions():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        family_id, [category_id], account_id, headers = await create_family_with_references(client, transaction_test_data)
+        charge = {"account_id": account_id, "category_id": category_id, "amount": 42.1, "date": "2024-03-01T09:00:00", "description": "Corner Bakery", "transaction_type": "expense"}
+        first = await client.post(f"/api/v1/families/{family_id}/transactions", json=charge, headers=headers)
+        # The same charge entered later that day by someone else, with a different spelling
+        second = await client.post(f"/api/v1/families/{family_id}/transactions", json={**charge, "date": "2024-03-01T18:45:00", "description": "corner-bakery "}, headers=headers)
+        assert second.json()["code"] == 1
+        await client.post(f"/api/v1/families/{family_id}/transactions", json={**charge, "date": "2024-03-02T09:00:00"}, headers=headers)
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/duplicates", headers=headers)
+        assert response.json()["code"] == 1
+        groups = response.json()["duplicates"]
+        assert len(groups) == 1
+        assert [transaction["id"] for transaction in groups[0]["transactions"]] == [first.json()["transaction"]["id"], second.json()["transaction"]["id"]]
+        response = await client.post(f"/api/v1/families/{family_id}/transactions", params={"reject_duplicates": True}, json=charge, headers=headers)
+        assert response.json()["code"] == 0
+        assert response.json()["duplicate_of"] in (first.json()["transaction"]["id"], second.json()["transaction"]["id"])
+        response = await client.post(f"/api/v1/families/{family_id}/transactions", params={"reject_duplicates": True}, json={**charge, "amount": 42.2}, headers=headers)
+        assert response.json()["code"] == 1
+        # Moving the charge to another day removes it from the group
+        await client.put(f"/api/v1/transactions/{second.json()['transaction']['id']}", json={"date": "2024-03-05T09:00:00"}, headers=headers)
+        response = await client.get(f"/api/v1/families/{family_id}/transactions/duplicates", headers=headers)
+        assert response.json()["duplicates"] == []
@@ -0,0 +1,155 @@
+import pytest
+import base64
+import hashlib
+import os
+from datetime import datetime
+from httpx import ASGITransport, AsyncClient
+from main import app
+import utilities.resumable
+
+upload_test_data = {
+    "user": {"name": "UploadUser", "email": "uploaduser@example.com", "plain_password": "UploadPass123!"},
+    "user_login": {"email": "uploaduser@example.com", "password": "UploadPass123!"},
+    "family": {"name": "Upload Family"},
+    "category": {"name": "Upload Category", "type": "expense"},
+    "account": {"name": "Upload Account", "type": "Asset", "balance": 1000.0},
+}
+
+CONTENT = os.urandom(3000)
+
+async def create_transaction(client: AsyncClient):
+    await client.post("/api/v1/users/", json=upload_test_data["user"])
+    login_resp = await client.post("/api/v1/users/login", json=upload_test_data["user_login"])
+    headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+    family_id = (await client.post("/api/v1/families/", json=upload_test_data["family"], headers=headers)).json()["family"]["id"]
+    category_id = (await client.post(f"/api/v1/families/{family_id}/categories", json=upload_test_data["category"], headers=headers)).json()["category"]["id"]
+    account_id = (await client.post(f"/api/v1/families/{family_id}/accounts", json=upload_test_data["account"], headers=headers)).json()["account"]["id"]
+    transaction = {"category_id": category_id, "account_id": account_id, "amount": 25.0, "date": datetime.utcnow().isoformat(),
+                   "description": "Upload test transaction", "transaction_type": "expense"}
+    response = await client.post(f"/api/v1/families/{family_id}/transactions", json=transaction, headers=headers)
+    return response.json()["transaction"]["id"], headers
+
+def checksum(data: bytes) -> str:
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+@pytest.mark.asyncio
+async def test_resumable_upload(upload_staging_dir):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        transaction_id, headers = await create_transaction(client)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers,
+                                     json={"size": len(CONTENT), "filename": "receipt.pdf", "content_type": "application/pdf", "digest": hashlib.sha256(CONTENT).hexdigest()})
+        assert response.json()["code"] == 1
+        upload_id = response.json()["upload"]["id"]
+        response = await client.head(f"/api/v1/uploads/{upload_id}", headers=headers)
+        assert response.headers["upload-offset"] == "0"
+        assert response.headers["upload-length"] == str(len(CONTENT))
+        first, rest = CONTENT[:1000], CONTENT[1000:]
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=first, headers={**headers, "Upload-Offset": "0", "Upload-Checksum": checksum(first)})
+        assert response.json()["code"] == 1
+        assert response.json()["upload"]["upload_offset"] == 1000
+        # A chunk sent for another offset, a corrupt chunk or a chunk past the size are refused and leave the offset unchanged
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=rest, headers={**headers, "Upload-Offset": "0"})
+        assert response.json()["code"] == 0
+        assert response.json()["upload"]["upload_offset"] == 1000
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=rest, headers={**headers, "Upload-Offset": "1000", "Upload-Checksum": checksum(first)})
+        assert response.json()["code"] == 0
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=rest + b"x", headers={**headers, "Upload-Offset": "1000"})
+        assert response.json()["code"] == 0
+        response = await client.post(f"/api/v1/uploads/{upload_id}/finalize", headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.get(f"/api/v1/uploads/{upload_id}", headers=headers)
+        assert response.json()["upload"]["upload_offset"] == 1000
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=rest, headers={**headers, "Upload-Offset": "1000", "Upload-Checksum": checksum(rest)})
+        assert response.json()["upload"]["upload_offset"] == len(CONTENT)
+        response = await client.post(f"/api/v1/uploads/{upload_id}/finalize", headers=headers)
+        assert response.json()["code"] == 1
+        attachment = response.json()["attachment"]
+        assert attachment["filename"] == "receipt.pdf"
+        assert attachment["digest"] == hashlib.sha256(CONTENT).hexdigest()
+        response = await client.get(f"/api/v1/attachments/{attachment['id']}", headers=headers)
+        assert response.content == CONTENT
+        # The upload and its staged bytes are gone once the attachment exists
+        response = await client.get(f"/api/v1/uploads/{upload_id}", headers=headers)
+        assert response.json()["code"] == 0
+        assert os.listdir(upload_staging_dir) == []
+
+@pytest.mark.asyncio
+async def test_upload_digest_mismatch_discards_upload(upload_staging_dir):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        transaction_id, headers = await create_transaction(client)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers, json={"size": 4, "digest": "0" * 64})
+        upload_id = response.json()["upload"]["id"]
+        await client.patch(f"/api/v1/uploads/{upload_id}", content=b"data", headers={**headers, "Upload-Offset": "0"})
+        response = await client.post(f"/api/v1/uploads/{upload_id}/finalize", headers=headers)
+        assert response.json()["code"] == 0
+        response = await client.head(f"/api/v1/uploads/{upload_id}", headers=headers)
+        assert response.status_code == 404
+        assert os.listdir(upload_staging_dir) == []
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers, json={"size": 10 ** 12})
+        assert response.json()["code"] == 0
+
+@pytest.mark.asyncio
+async def test_sweeper_removes_expired_uploads(upload_staging_dir):
+    import sqlalchemy as sa
+    from conftest import test_engine
+    from controllers.upload_session import sweep_expired_upload_sessions
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        transaction_id, headers = await create_transaction(client)
+        upload_ids = []
+        for _ in range(2):
+            response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers, json={"size": 100})
+            upload_ids.append(response.json()["upload"]["id"])
+            await client.patch(f"/api/v1/uploads/{upload_ids[-1]}", content=b"x" * 10, headers={**headers, "Upload-Offset": "0"})
+        async with test_engine.begin() as connection:
+            await connection.execute(sa.text("UPDATE upload_sessions SET expires_at = :past WHERE id = :id"),
+                                     {"past": datetime(2000, 1, 1), "id": upload_ids[0].replace("-", "")})
+        assert await sweep_expired_upload_sessions(test_engine) == 1
+        assert os.listdir(upload_staging_dir) == [f"{upload_ids[1]}.part"]
+        response = await client.get(f"/api/v1/uploads/{upload_ids[1]}", headers=headers)
+        assert response.json()["upload"]["upload_offset"] == 10
+
+@pytest.mark.asyncio
+async def test_finalize_stores_a_blob_released_before_its_row(upload_staging_dir, blob_store, monkeypatch):
+    import controllers.upload_session
+    store_staged_upload = controllers.upload_session.store_staged_upload
+    calls = []
+    def store_then_release(*args, **kwargs):
+        # The first copy is removed by a concurrent release, as if it had found the content already stored
+        digest, size, stored_size = store_staged_upload(*args, **kwargs)
+        if not calls:
+            blob_store.delete(digest, args[2] if len(args) > 2 else None)
+        calls.append(digest)
+        return digest, size, stored_size
+    monkeypatch.setattr(controllers.upload_session, "store_staged_upload", store_then_release)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        transaction_id, headers = await create_transaction(client)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers,
+                                     json={"size": len(CONTENT), "filename": "receipt.pdf", "content_type": "application/pdf"})
+        upload_id = response.json()["upload"]["id"]
+        await client.patch(f"/api/v1/uploads/{upload_id}", content=CONTENT, headers={**headers, "Upload-Offset": "0"})
+        response = await client.post(f"/api/v1/uploads/{upload_id}/finalize", headers=headers)
+        assert response.json()["code"] == 1 and len(calls) == 2
+        response = await client.get(f"/api/v1/attachments/{response.json()['attachment']['id']}", headers=headers)
+        assert response.content == CONTENT
+
+@pytest.mark.asyncio
+async def test_chunks_are_written_from_the_thread_pool(upload_staging_dir, monkeypatch):
+    offloaded = []
+    run_in_threadpool = utilities.resumable.run_in_threadpool
+    async def recorded_run_in_threadpool(function, *args, **kwargs):
+        offloaded.append(getattr(function, "__name__", None))
+        return await run_in_threadpool(function, *args, **kwargs)
+    monkeypatch.setattr(utilities.resumable, "run_in_threadpool", recorded_run_in_threadpool)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        transaction_id, headers = await create_transaction(client)
+        response = await client.post(f"/api/v1/transactions/{transaction_id}/uploads", headers=headers,
+                                     json={"size": len(CONTENT), "filename": "receipt.pdf", "content_type": "application/pdf"})
+        upload_id = response.json()["upload"]["id"]
+        response = await client.patch(f"/api/v1/uploads/{upload_id}", content=CONTENT, headers={**headers, "Upload-Offset": "0"})
+        assert response.json()["upload"]["upload_offset"] == len(CONTENT)
+        assert offloaded[:2] == ["makedirs", "mkstemp"] and offloaded.count("write") >= 1
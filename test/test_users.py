@@ -163,3 +163,58 @@ def test_get_non_existing_user():
     assert response.json()["status"].lower() == "failed"
     assert "not found" in response.json()["message"].lower()
 
+
+def test_get_current_user_reflects_update():
+    create_resp = client.post("/api/v1/users/", json=user_test_data["user1"])
+    user_id = create_resp.json()["user"]["id"]
+    login_resp = client.post("/api/v1/users/login", json={"email": user_test_data["user1"]["email"], "password": user_test_data["user1"]["plain_password"]})
+    headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+    # The first call caches the principal, the update must evict it
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.json()["user"]["name"] == user_test_data["user1"]["name"]
+    client.put(f"/api/v1/users/{user_id}", json=user_test_data["user1_update"], headers=headers)
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.json()["user"]["name"] == user_test_data["user1_update"]["name"]
+
+def test_deleted_user_token_rejected():
+    create_resp = client.post("/api/v1/users/", json=user_test_data["valid_user"])
+    user_id = create_resp.json()["user"]["id"]
+    login_resp = client.post("/api/v1/users/login", json=user_test_data["login"])
+    headers = {"Authorization": login_resp.json()["user_key"]["authorization"]}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    client.delete(f"/api/v1/users/{user_id}", headers=headers)
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code in [401, 403]
+
+class CountingHasher:
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.calls = 0
+
+    def hash(self, password):
+        self.calls += 1
+        return self.hasher.hash(password)
+
+    def verify(self, hashed_password, password):
+        return self.hasher.verify(hashed_password, password)
+
+def test_create_user_hashes_password_once(monkeypatch):
+    from utilities import hashing
+    counting_hasher = CountingHasher(hashing.password_hasher)
+    monkeypatch.setattr(hashing, "password_hasher", counting_hasher)
+    response = client.post("/api/v1/users/", json=user_test_data["valid_user"])
+    assert response.json()["code"] == 1
+    assert counting_hasher.calls == 1
+
+def test_user_serializers_memoize_password_hash(monkeypatch):
+    from utilities import hashing
+    from serializers import CreateUser, UserUpdate
+    counting_hasher = CountingHasher(hashing.password_hasher)
+    monkeypatch.setattr(hashing, "password_hasher", counting_hasher)
+    new_user = CreateUser(**user_test_data["valid_user"])
+    hashed_password = new_user.model_dump()["password"]
+    assert new_user.model_dump()["password"] == hashed_password
+    assert new_user.password == hashed_password
+    assert counting_hasher.calls == 1
+    assert UserUpdate(name="No Password").model_dump()["password"] is None
+    assert counting_hasher.calls == 1
@@ -1,2 +1,10 @@
-from .hashing import hash_a_password,verify_password
-from .tokenization import generate_token, decode_token
\ No newline at end of file
+from .hashing import hash_a_password,hash_password,verify_password,hashing_executor
+from .tokenization import generate_token, decode_token, decode_token_claims
+from .caching import TTLCache
+from .pagination import paginate,page_results,InvalidCursorError,DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
+from .connection_pool import InstrumentedAsyncQueuePool,PoolTelemetry,WAIT_BUCKETS
+from .fingerprint import transaction_fingerprint,normalize_description
+from .compression import CODECS,Codec,get_codec,compression_for_content_type
+from .blob_store import BlobStore,BlobWriter,LocalBlobStore,BlobNotFoundError,get_blob_store,set_blob_store
+from .uploads import store_multipart_upload,StoredUpload,UploadError,UploadTooLargeError,MULTIPART_OVERHEAD
+from .resumable import parse_upload_checksum,receive_chunk,append_chunk,discard_chunk,store_staged_upload,staged_upload_path,remove_staged_files,remove_stale_chunks,StagedChunk,ChecksumMismatchError
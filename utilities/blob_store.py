@@ -0,0 +1,271 @@
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Callable, Iterator, Optional
+from config import config
+from .compression import get_codec
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+READ_CHUNK_SIZE = 64 * 1024
+
+class BlobNotFoundError(FileNotFoundError):
+    """
+    Raised when no blob is stored under a digest.
+    """
+
+class BlobWriter(ABC):
+    """
+    Receives the content of a blob chunk by chunk and hashes it on the fly.
+    The digest and size are those of the original content, also when the blob is stored compressed.
+    Attributes:
+        size (int): The number of bytes written so far.
+        compression (Optional[str]): The codec the blob is stored with, None when stored as is.
+        stored_size (int): The bytes the blob takes in the store, known once committed.
+    """
+
+    def __init__(self, compression: Optional[str] = None):
+        self.size = 0
+        self.compression = compression
+        self.stored_size = 0
+        self._hash = hashlib.sha256()
+
+    @property
+    def digest(self) -> str:
+        """
+        The hexadecimal SHA-256 of the bytes written so far.
+        """
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes):
+        """
+        Append a chunk to the blob.
+        Args:
+            chunk (bytes): The next bytes of the content.
+        """
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    @abstractmethod
+    def commit(self) -> str:
+        """
+        Make the blob durable under its digest.
+        Returns:
+            str: The digest of the blob.
+        """
+
+    @abstractmethod
+    def abort(self):
+        """
+        Discard the bytes written so far.
+        """
+
+class BlobStore(ABC):
+    """
+    Stores immutable blobs addressed by the SHA-256 of their content, so identical files are stored once.
+    A blob may be stored compressed with one of the codecs of utilities.compression, the same content
+    stored with different codecs makes distinct blobs, so every read and delete names the codec.
+    Backends implement writer, open, exists and delete, and may return a local path for zero-copy reads.
+    """
+
+    @abstractmethod
+    def writer(self, compression: Optional[str] = None) -> BlobWriter:
+        """
+        Start writing a new blob.
+        Args:
+            compression (Optional[str]): The codec to store the blob with, None to store it as is.
+        Returns:
+            BlobWriter: The writer receiving the content, committed once complete.
+        """
+
+    @abstractmethod
+    def open(self, digest: str, compression: Optional[str] = None) -> BinaryIO:
+        """
+        Open a stored blob for reading, compressed blobs are decompressed as they are read.
+        Args:
+            digest (str): The digest of the blob.
+            compression (Optional[str]): The codec the blob is stored with.
+        Returns:
+            BinaryIO: The original content of the blob.
+        Raises:
+            BlobNotFoundError: If no blob is stored under the digest.
+        """
+
+    @abstractmethod
+    def exists(self, digest: str, compression: Optional[str] = None) -> bool:
+        """
+        Check whether a blob is stored under a digest.
+        """
+
+    @abstractmethod
+    def delete(self, digest: str, compression: Optional[str] = None):
+        """
+        Remove a blob, removing a missing blob is not an error.
+        """
+
+    def local_path(self, digest: str, compression: Optional[str] = None) -> Optional[str]:
+        """
+        The path of the blob content on the local filesystem, None for remote backends and compressed blobs.
+        """
+        return None
+
+    def put(self, content: bytes) -> tuple[str, int]:
+        """
+        Store a blob held in memory.
+        Args:
+            content (bytes): The content of the blob.
+        Returns:
+            tuple[str, int]: The digest and the size of the blob.
+        """
+        writer = self.writer()
+        try:
+            writer.write(content)
+            return writer.commit(), writer.size
+        except BaseException:
+            writer.abort()
+            raise
+
+    def iter_chunks(self, digest: str, chunk_size: int = READ_CHUNK_SIZE, compression: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Read the original content of a blob in chunks of chunk_size bytes.
+        Args:
+            digest (str): The digest of the blob.
+            chunk_size (int): The size of the chunks.
+            compression (Optional[str]): The codec the blob is stored with.
+        Yields:
+            bytes: The next chunk of the blob.
+        """
+        with self.open(digest, compression) as blob:
+            while chunk := blob.read(chunk_size):
+                yield chunk
+
+class LocalBlobWriter(BlobWriter):
+    """
+    Writes a blob to a temporary file of the store, compressing it on the way if asked to,
+    then renames it to its digest path once complete.
+    """
+
+    def __init__(self, store: "LocalBlobStore", compression: Optional[str] = None):
+        super().__init__(compression)
+        self._store = store
+        self._compressor = get_codec(compression).compressor() if compression else None
+        descriptor, self._path = tempfile.mkstemp(dir=store.tmp_dir, prefix="blob-")
+        self._file = os.fdopen(descriptor, "wb")
+
+    def write(self, chunk: bytes):
+        super().write(chunk)
+        self._file.write(self._compressor.compress(chunk) if self._compressor else chunk)
+
+    def commit(self) -> str:
+        digest = self.digest
+        if self._compressor:
+            self._file.write(self._compressor.flush())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.stored_size = self._file.tell()
+        self._file.close()
+        final_path = self._store.path(digest, self.compression)
+        if os.path.exists(final_path):
+            # The same content is already stored, keep the existing copy
+            os.remove(self._path)
+            self.stored_size = os.path.getsize(final_path)
+            return digest
+        directory = os.path.dirname(final_path)
+        os.makedirs(directory, exist_ok=True)
+        os.replace(self._path, final_path)
+        fsync_directory(directory)
+        return digest
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+def fsync_directory(directory: str):
+    # Persist the rename itself, not only the file content
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores blobs as files named by their digest under root/ab/cd/, written through root/tmp and renamed atomically.
+    Compressed blobs are named by their digest and the codec, such as root/ab/cd/<digest>.zlib.
+    Attributes:
+        root (str): The folder holding the blobs.
+        tmp_dir (str): The folder holding the blobs being written, on the same filesystem so the rename is atomic.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, digest: str, compression: Optional[str] = None) -> str:
+        """
+        The path a blob is stored at.
+        Args:
+            digest (str): The digest of the blob.
+            compression (Optional[str]): The codec the blob is stored with.
+        Returns:
+            str: The path of the blob.
+        Raises:
+            ValueError: If the digest is not a hexadecimal SHA-256 or the codec is unknown.
+        """
+        if not DIGEST_PATTERN.match(digest):
+            raise ValueError(f"Invalid blob digest {digest!r}")
+        name = f"{digest}.{get_codec(compression).name}" if compression else digest
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    def writer(self, compression: Optional[str] = None) -> LocalBlobWriter:
+        return LocalBlobWriter(self, compression)
+
+    def open(self, digest: str, compression: Optional[str] = None) -> BinaryIO:
+        try:
+            blob = open(self.path(digest, compression), "rb")
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(digest) from e
+        return get_codec(compression).reader(blob) if compression else blob
+
+    def exists(self, digest: str, compression: Optional[str] = None) -> bool:
+        return os.path.exists(self.path(digest, compression))
+
+    def delete(self, digest: str, compression: Optional[str] = None):
+        try:
+            os.remove(self.path(digest, compression))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, digest: str, compression: Optional[str] = None) -> Optional[str]:
+        # The bytes of a compressed blob on disk are not its content
+        return None if compression else self.path(digest)
+
+BLOB_STORE_BACKENDS: dict[str, Callable[[str], BlobStore]] = {"local": LocalBlobStore}
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """
+    The blob store of the application, created from blob_store_backend and blob_store_root on first use.
+    Returns:
+        BlobStore: The shared blob store.
+    """
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BLOB_STORE_BACKENDS[config.blob_store_backend](config.blob_store_root)
+    return _blob_store
+
+def set_blob_store(store: Optional[BlobStore]):
+    """
+    Replace the blob store of the application, None recreates it from the configuration on next use.
+    Args:
+        store (Optional[BlobStore]): The blob store to use.
+    """
+    global _blob_store
+    _blob_store = store
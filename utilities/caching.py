@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    A bounded in-process cache with per entry time to live and least recently used eviction.
+    Attributes:
+        name (str): The name reported with the cache statistics.
+        maxsize (int): The maximum number of entries kept before the least recently used one is evicted.
+        ttl (float): The default number of seconds an entry stays valid.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not found or had expired.
+        evictions (int): The number of entries dropped because the cache was full.
+        expirations (int): The number of entries dropped because their time to live passed.
+        invalidations (int): The number of entries dropped explicitly by callers.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for the key and mark it as recently used.
+        Args:
+            key (Hashable): The cache key.
+            default (Any): The value returned when the key is missing or expired.
+        Returns:
+            Any: The cached value, or the default.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries when the cache is full.
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+            ttl (Optional[float]): Seconds the entry stays valid, capped by the cache default ttl.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Remove a single entry if it is cached.
+        Args:
+            key (Hashable): The cache key.
+        """
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Remove every entry for which the predicate returns True.
+        Args:
+            predicate (Callable[[Hashable, Any], bool]): Called with each key and value.
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def stats(self) -> dict:
+        """
+        Return the counters used to size the cache.
+        Returns:
+            dict: The cache name, size limits, current size and hit/miss/eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"name": self.name,
+                    "maxsize": self.maxsize,
+                    "ttl": self.ttl,
+                    "size": len(self._entries),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_ratio": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions,
+                    "expirations": self.expirations,
+                    "invalidations": self.invalidations}
@@ -0,0 +1,153 @@
+import io
+import lzma
+import zlib
+from functools import lru_cache
+from typing import BinaryIO, Callable, Optional
+
+# Compressed bytes read from the blob at a time while decompressing
+COMPRESSED_READ_SIZE = 64 * 1024
+
+class ZlibDecoder:
+    """
+    Decompresses a zlib stream from a file, never producing more than the bytes asked for at once.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._decompressor = zlib.decompressobj()
+
+    def read(self, size: int) -> bytes:
+        while True:
+            if self._decompressor.unconsumed_tail:
+                data = self._decompressor.unconsumed_tail
+            elif self._decompressor.eof:
+                return b""
+            else:
+                data = self._raw.read(COMPRESSED_READ_SIZE)
+                if not data:
+                    raise EOFError("The compressed blob is truncated")
+            output = self._decompressor.decompress(data, size)
+            if output:
+                return output
+
+class LzmaDecoder:
+    """
+    Decompresses an xz stream from a file, never producing more than the bytes asked for at once.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._decompressor = lzma.LZMADecompressor()
+
+    def read(self, size: int) -> bytes:
+        while True:
+            if self._decompressor.eof:
+                return b""
+            data = b""
+            if self._decompressor.needs_input:
+                data = self._raw.read(COMPRESSED_READ_SIZE)
+                if not data:
+                    raise EOFError("The compressed blob is truncated")
+            output = self._decompressor.decompress(data, size)
+            if output:
+                return output
+
+class DecompressingReader(io.RawIOBase):
+    """
+    A readable file over a compressed blob, the content is decompressed as it is read so memory stays bounded by the read size.
+    """
+
+    def __init__(self, raw: BinaryIO, decoder_factory: Callable):
+        self._raw = raw
+        self._decoder = decoder_factory(raw)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._decoder.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+class Codec:
+    """
+    A compression format blobs can be stored in.
+    Attributes:
+        name (str): The name of the codec, used as the suffix of the stored blobs.
+    """
+
+    def __init__(self, name: str, compressor_factory: Callable, decoder_factory: Callable):
+        self.name = name
+        self._compressor_factory = compressor_factory
+        self._decoder_factory = decoder_factory
+
+    def compressor(self):
+        """
+        A new compressor object with compress(bytes) and flush() methods.
+        """
+        return self._compressor_factory()
+
+    def reader(self, raw: BinaryIO) -> BinaryIO:
+        """
+        Wrap a file holding compressed bytes into a buffered file returning the original content.
+        Args:
+            raw (BinaryIO): The compressed file, closed with the reader.
+        Returns:
+            BinaryIO: The decompressed content.
+        """
+        return io.BufferedReader(DecompressingReader(raw, self._decoder_factory), COMPRESSED_READ_SIZE)
+
+CODECS: dict[str, Codec] = {
+    "zlib": Codec("zlib", lambda: zlib.compressobj(6), ZlibDecoder),
+    "lzma": Codec("lzma", lambda: lzma.LZMACompressor(preset=6), LzmaDecoder),
+}
+
+def get_codec(name: str) -> Codec:
+    """
+    The codec registered under a name.
+    Raises:
+        ValueError: If no codec has this name.
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown compression {name!r}, use one of {', '.join(CODECS)}") from None
+
+@lru_cache(maxsize=16)
+def parse_compression_rules(rules: str) -> dict[str, str]:
+    """
+    Parse attachment_compression, a comma separated list of media type=codec pairs such as "text/*=zlib,application/json=lzma".
+    Args:
+        rules (str): The rules, empty to store every attachment uncompressed.
+    Returns:
+        dict[str, str]: The codec of every media type or type/* wildcard.
+    Raises:
+        ValueError: If a rule is malformed or names an unknown codec.
+    """
+    parsed = {}
+    for rule in filter(None, (rule.strip() for rule in rules.split(","))):
+        media_type, separator, codec = rule.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid compression rule {rule!r}, expected media/type=codec")
+        parsed[media_type.strip().lower()] = get_codec(codec.strip()).name
+    return parsed
+
+def compression_for_content_type(content_type: Optional[str], rules: str) -> Optional[str]:
+    """
+    Choose the codec of an attachment from its media type, an exact rule wins over a type/* rule.
+    Args:
+        content_type (Optional[str]): The media type of the attachment, parameters such as charset are ignored.
+        rules (str): The attachment_compression setting.
+    Returns:
+        Optional[str]: The name of the codec, None to store the attachment as is.
+    """
+    parsed = parse_compression_rules(rules)
+    if not parsed or not content_type:
+        return None
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return parsed.get(media_type) or parsed.get(media_type.split("/", 1)[0] + "/*") or parsed.get("*/*")
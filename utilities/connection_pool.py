@@ -0,0 +1,110 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Any
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+# Upper bounds in seconds of the checkout wait histogram buckets, waits above the last bound are only counted in wait_count
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class PoolTelemetry:
+    """
+    Checkout counters of a connection pool, kept apart from the pool so they survive engine.dispose().
+    Attributes:
+        checkouts (int): The number of connections handed out.
+        timeouts (int): The number of checkouts that failed because the pool limit was reached.
+        wait_sum (float): The total seconds spent waiting for a connection.
+        wait_max (float): The longest wait observed in seconds.
+        bucket_counts (list[int]): The number of waits that fell in each WAIT_BUCKETS bucket.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.bucket_counts = [0] * len(WAIT_BUCKETS)
+        self._lock = Lock()
+
+    def record(self, wait: float, timed_out: bool = False):
+        """
+        Record the time a caller waited for a connection.
+        Args:
+            wait (float): The seconds spent in pool.connect().
+            timed_out (bool): Whether the wait ended with a pool timeout.
+        """
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum += wait
+            self.wait_max = max(self.wait_max, wait)
+            index = bisect_left(WAIT_BUCKETS, wait)
+            if index < len(WAIT_BUCKETS):
+                self.bucket_counts[index] += 1
+
+    def histogram(self) -> list[dict]:
+        """
+        Return the wait histogram with cumulative counts, each bucket counts the waits lower than or equal to its bound.
+        Returns:
+            list[dict]: The le bound and count of every bucket.
+        """
+        with self._lock:
+            buckets, total = [], 0
+            for bound, count in zip(WAIT_BUCKETS, self.bucket_counts):
+                total += count
+                buckets.append({"le": bound, "count": total})
+            return buckets
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    The asyncio queue pool used by create_async_engine, timing every checkout.
+    The wait covers queueing for a free slot, opening a new connection and the pre-ping.
+    Attributes:
+        telemetry (PoolTelemetry): The checkout counters, shared with the pools recreated from this one.
+    """
+
+    def __init__(self, *args: Any, telemetry: PoolTelemetry = None, **kw: Any):
+        super().__init__(*args, **kw)
+        self.telemetry = telemetry or PoolTelemetry()
+
+    def connect(self) -> PoolProxiedConnection:
+        started = perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record(perf_counter() - started, timed_out=True)
+            raise
+        self.telemetry.record(perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+    def stats(self, name: str = "database") -> dict:
+        """
+        Return the occupancy of the pool and the checkout wait statistics.
+        Args:
+            name (str): The name reported with the statistics.
+        Returns:
+            dict: The pool limits, the checked out, idle and overflow connections and the wait histogram.
+        """
+        telemetry = self.telemetry
+        return {"name": name,
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "timeout": self.timeout(),
+                "checked_out": self.checkedout(),
+                "idle": self.checkedin(),
+                # overflow() counts down from -size until every regular slot has been opened
+                "overflow": max(self.overflow(), 0),
+                "checkouts": telemetry.checkouts,
+                "timeouts": telemetry.timeouts,
+                "wait_count": telemetry.checkouts + telemetry.timeouts,
+                "wait_sum": telemetry.wait_sum,
+                "wait_max": telemetry.wait_max,
+                "wait_histogram": telemetry.histogram()}
@@ -0,0 +1,43 @@
+import hashlib
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Union
+from uuid import UUID
+
+AMOUNT_SCALE = Decimal("0.001")
+NON_WORD = re.compile(r"[\W_]+")
+
+def normalize_description(description: Optional[str]) -> str:
+    """
+    Reduce a description to the words it contains, so "Coffee-Shop  #12" and "coffee shop 12" compare equal.
+    Args:
+        description (Optional[str]): The description of the transaction.
+    Returns:
+        str: The lower case words separated by single spaces, empty when there is no description.
+    """
+    if not description:
+        return ""
+    text = unicodedata.normalize("NFKD", description)
+    text = "".join(character for character in text if not unicodedata.combining(character))
+    return NON_WORD.sub(" ", text.casefold()).strip()
+
+def transaction_fingerprint(family_id: UUID, account_id: UUID, amount: Union[Decimal, float, str], day: Union[datetime, date], description: Optional[str]) -> str:
+    """
+    Hash the fields two entries of the same charge share: the family, the account, the amount, the day and the normalized description.
+    The time of day is left out because the same charge is often entered at different times.
+    Args:
+        family_id (UUID): The family of the transaction.
+        account_id (UUID): The account of the transaction.
+        amount (Union[Decimal, float, str]): The amount of the transaction.
+        day (Union[datetime, date]): The date of the transaction.
+        description (Optional[str]): The description of the transaction.
+    Returns:
+        str: The hexadecimal SHA-256 digest, 64 characters long.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    amount = Decimal(str(amount)).quantize(AMOUNT_SCALE)
+    key = "|".join((str(family_id), str(account_id), str(amount), day.isoformat(), normalize_description(description)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
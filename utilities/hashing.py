@@ -1,28 +1,117 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock
+from typing import Any, Callable
 from argon2 import PasswordHasher, exceptions
+from config import config
+
+# Argon2 parameters are fixed for the process, so a single hasher is shared by every call
+password_hasher = PasswordHasher()
+
+class HashingExecutor:
+    """
+    A dedicated, size limited thread pool for Argon2 work so hashing never blocks the event loop.
+    argon2-cffi releases the GIL while hashing, so the pool scales with max_workers up to the number of cores.
+    Attributes:
+        max_workers (int): The number of threads hashing in parallel.
+        queued (int): The number of submitted calls waiting for a free thread.
+        running (int): The number of calls currently hashing.
+        completed (int): The number of calls that finished.
+        peak_queued (int): The highest queue depth observed.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.peak_queued = 0
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="argon2")
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """
+        Run a function in the pool and wait for its result without blocking the event loop.
+        Args:
+            function (Callable[..., Any]): The blocking function to run.
+            *args: The positional arguments passed to the function.
+        Returns:
+            Any: The value returned by the function.
+        """
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        future = self._executor.submit(self._call, function, args)
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, function: Callable[..., Any], args: tuple) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _release_cancelled(self, future: Future):
+        # A call cancelled while waiting in the queue never reaches _call
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        """
+        Return the queue depth counters of the pool.
+        Returns:
+            dict: The pool size and the queued, running, completed and peak queued counters.
+        """
+        with self._lock:
+            return {"name": "argon2",
+                    "max_workers": self.max_workers,
+                    "queued": self.queued,
+                    "running": self.running,
+                    "completed": self.completed,
+                    "peak_queued": self.peak_queued}
+
+hashing_executor = HashingExecutor(max_workers=config.hashing_max_workers)
 
 def hash_a_password(password:str)->str:
     """
     Hashes a password using Argon2 hashing algorithm.
+    This call blocks, use hash_password from asynchronous code.
+    Args:
+        password (str): The password to be hashed.
+    Returns:
+        str: The hashed password.
+    """
+    return password_hasher.hash(password)
+
+def _verify(password:str, hashed_password:str)->bool:
+    try:
+        return password_hasher.verify(hashed_password, password)
+    except exceptions.VerifyMismatchError:
+        return False
+
+async def hash_password(password:str)->str:
+    """
+    Hashes a password using Argon2 hashing algorithm in the hashing pool.
     Args:
         password (str): The password to be hashed.
     Returns:
         str: The hashed password.
     """
-    ph = PasswordHasher()
-    return ph.hash(password)
+    return await hashing_executor.run(hash_a_password, password)
 
 async def verify_password(password:str, hashed_password:str)->bool:
     """
-    Verifies a password against a hashed password.
+    Verifies a password against a hashed password in the hashing pool.
     Args:
         password (str): The password to verify.
         hashed_password (str): The hashed password to compare against.
     Returns:
         bool: True if the password matches the hashed password, False otherwise.
     """
-    ph = PasswordHasher()
-    try:
-        ph.verify(hashed_password, password)
-        return True
-    except exceptions.VerifyMismatchError:
-        return False
\ No newline at end of file
+    return await hashing_executor.run(_verify, password, hashed_password)
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import Select, func, select, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class InvalidCursorError(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """
+    Encodes the position of the last row of a page into an opaque cursor.
+    Args:
+        sort_value (datetime): The value of the sort column of the last row.
+        row_id (UUID): The primary key of the last row.
+    Returns:
+        str: The URL safe cursor.
+    """
+    payload = json.dumps([sort_value.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decodes a cursor created by encode_cursor.
+    Args:
+        cursor (str): The opaque cursor received from the client.
+    Returns:
+        tuple[datetime, UUID]: The sort value and primary key of the last row of the previous page.
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(payload)
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+def paginate(statement: Select, sort_column: Any, id_column: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Applies keyset pagination on (sort_column, id_column) to a select statement.
+    The sort value of the cursor row is read back in SQL, so the comparison always uses the stored value
+    and does not depend on how the driver formats datetimes. The value encoded in the cursor is only used
+    when that row has been deleted in the meantime.
+    One extra row is fetched so page_results can tell whether another page exists.
+    Args:
+        statement (Select): The select statement filtered to the rows to page through.
+        sort_column (Any): The column the rows are ordered by, such as date or created_at.
+        id_column (Any): The primary key column used to break ties.
+        cursor (Optional[str]): The cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of rows in the page.
+    Returns:
+        Select: The statement ordered, filtered after the cursor and limited.
+    Raises:
+        InvalidCursorError: If the cursor is malformed.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        stored_sort_value = select(sort_column).where(id_column == row_id).scalar_subquery()
+        statement = statement.where(tuple_(sort_column, id_column) > tuple_(func.coalesce(stored_sort_value, sort_value), row_id))
+    return statement.order_by(sort_column, id_column).limit(limit + 1)
+
+def page_results(rows: Sequence[Any], sort_attribute: str, limit: int) -> tuple[list, Optional[str]]:
+    """
+    Splits the rows fetched by a paginated statement into the page and the cursor of the next page.
+    Args:
+        rows (Sequence[Any]): The rows returned by the statement built with paginate.
+        sort_attribute (str): The name of the attribute holding the sort value.
+        limit (int): The page size passed to paginate.
+    Returns:
+        tuple[list, Optional[str]]: The rows of the page and the cursor of the next page, None on the last page.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(getattr(last, sort_attribute), last.id)
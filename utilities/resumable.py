@@ -0,0 +1,175 @@
+import base64
+import binascii
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+from uuid import UUID
+from starlette.concurrency import run_in_threadpool
+from .blob_store import BlobStore, fsync_directory
+from .uploads import UploadError, UploadTooLargeError
+
+# The algorithms a client may name in the Upload-Checksum header
+CHECKSUM_ALGORITHMS = ("sha1", "sha256", "md5")
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class ChecksumMismatchError(UploadError):
+    """
+    Raised when a chunk does not match the checksum sent with it.
+    """
+
+class StagedChunk(NamedTuple):
+    """
+    A chunk of a resumable upload, received into its own file before it is appended to the upload.
+    Attributes:
+        path (str): The path of the chunk file.
+        size (int): The size of the chunk in bytes.
+    """
+    path: str
+    size: int
+
+def parse_upload_checksum(header: Optional[str]) -> Optional[tuple[str, bytes]]:
+    """
+    Parse an Upload-Checksum header, the algorithm name followed by the base64 digest of the chunk.
+    Args:
+        header (Optional[str]): The header, such as "sha256 n4bQgYhMfWWaL+qgxVrQFaO/TxsrC4Is0V1sFbDwCgg=".
+    Returns:
+        Optional[tuple[str, bytes]]: The algorithm and the expected digest, None without a header.
+    Raises:
+        UploadError: If the header is malformed or names an unsupported algorithm.
+    """
+    if not header:
+        return None
+    algorithm, _, encoded = header.strip().partition(" ")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm {algorithm!r}, use one of {', '.join(CHECKSUM_ALGORITHMS)}")
+    try:
+        return algorithm, base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error as e:
+        raise UploadError("The Upload-Checksum digest must be base64 encoded") from e
+
+def staged_upload_path(directory: str, upload_id: UUID) -> str:
+    """
+    The path of the file holding the bytes of an upload received so far.
+    """
+    return os.path.join(directory, f"{upload_id}.part")
+
+async def receive_chunk(directory: str, upload_id: UUID, stream: AsyncIterator[bytes], max_size: int, checksum: Optional[tuple[str, bytes]]) -> StagedChunk:
+    """
+    Write the body of a chunk request to a file of its own, so an interrupted or invalid chunk never touches the upload.
+    The file is created and written from the thread pool, a slow disk does not hold up the event loop.
+    Args:
+        directory (str): The staging folder of the uploads.
+        upload_id (UUID): The unique identifier of the upload.
+        stream (AsyncIterator[bytes]): The body of the request.
+        max_size (int): The bytes the upload still expects, a longer chunk is refused.
+        checksum (Optional[tuple[str, bytes]]): The algorithm and digest the chunk must match.
+    Returns:
+        StagedChunk: The received chunk.
+    Raises:
+        UploadTooLargeError: If the chunk goes past the announced size of the upload.
+        ChecksumMismatchError: If the chunk does not match its checksum.
+    """
+    await run_in_threadpool(os.makedirs, directory, exist_ok=True)
+    descriptor, path = await run_in_threadpool(tempfile.mkstemp, dir=directory, prefix=f"{upload_id}-", suffix=".chunk")
+    hasher = hashlib.new(checksum[0]) if checksum else None
+    size = 0
+    try:
+        with os.fdopen(descriptor, "wb") as chunk_file:
+            async for data in stream:
+                size += len(data)
+                if size > max_size:
+                    raise UploadTooLargeError(f"The chunk goes past the {max_size} bytes the upload still expects")
+                if hasher:
+                    hasher.update(data)
+                await run_in_threadpool(chunk_file.write, data)
+        if hasher and hasher.digest() != checksum[1]:
+            raise ChecksumMismatchError("The chunk does not match its Upload-Checksum")
+    except BaseException:
+        os.remove(path)
+        raise
+    return StagedChunk(path, size)
+
+def append_chunk(part_path: str, chunk: StagedChunk, offset: int):
+    """
+    Append a received chunk to the staged upload at the offset it was sent for, then remove the chunk file.
+    Bytes past the offset, left by an append whose offset was never recorded, are cut off first.
+    Args:
+        part_path (str): The path of the staged upload.
+        chunk (StagedChunk): The chunk to append.
+        offset (int): The recorded offset of the upload.
+    """
+    with open(part_path, "ab") as part, open(chunk.path, "rb") as chunk_file:
+        part.truncate(offset)
+        shutil.copyfileobj(chunk_file, part, COPY_CHUNK_SIZE)
+        part.flush()
+        os.fsync(part.fileno())
+    os.remove(chunk.path)
+    fsync_directory(os.path.dirname(part_path))
+
+def discard_chunk(chunk: StagedChunk):
+    """
+    Remove a received chunk that was not appended.
+    """
+    try:
+        os.remove(chunk.path)
+    except FileNotFoundError:
+        pass
+
+def store_staged_upload(part_path: str, store: BlobStore, compression: Optional[str] = None) -> tuple[str, int, int]:
+    """
+    Copy a complete staged upload into the blob store, hashing it on the way.
+    Args:
+        part_path (str): The path of the staged upload.
+        store (BlobStore): The blob store receiving the file.
+        compression (Optional[str]): The codec to store the file with.
+    Returns:
+        tuple[str, int, int]: The digest, the size and the stored size of the blob.
+    """
+    writer = store.writer(compression)
+    try:
+        with open(part_path, "rb") as part:
+            while data := part.read(COPY_CHUNK_SIZE):
+                writer.write(data)
+        return writer.commit(), writer.size, writer.stored_size
+    except BaseException:
+        writer.abort()
+        raise
+
+def remove_staged_files(directory: str, upload_id: UUID):
+    """
+    Remove the staged upload and the chunks being received for an upload.
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith(str(upload_id)):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+def remove_stale_chunks(directory: str, max_age: float) -> int:
+    """
+    Remove the chunk files a crashed request left behind.
+    Args:
+        directory (str): The staging folder of the uploads.
+        max_age (float): The seconds since their last write after which chunk files are removed.
+    Returns:
+        int: The number of removed files.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".chunk") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
@@ -0,0 +1,198 @@
+import csv
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+class StatementEntry(NamedTuple):
+    """
+    A transaction read from a bank statement.
+    Attributes:
+        row (int): The 1-based number of the entry in the statement.
+        date (datetime): When the transaction was posted.
+        amount (Decimal): The signed amount, negative for money leaving the account.
+        description (Optional[str]): The payee and memo of the transaction.
+        category (Optional[str]): The category named by the statement, QIF and mapped CSV columns only.
+        transaction_type (Optional[str]): The type named by a mapped CSV column.
+    """
+    row: int
+    date: datetime
+    amount: Decimal
+    description: Optional[str] = None
+    category: Optional[str] = None
+    transaction_type: Optional[str] = None
+
+class StatementRowError(NamedTuple):
+    """
+    A statement entry that could not be read.
+    Attributes:
+        row (int): The 1-based number of the entry in the statement.
+        message (str): Why the entry was rejected.
+    """
+    row: int
+    message: str
+
+StatementItem = Union[StatementEntry, StatementRowError]
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Parse an amount such as "-1,234.50", "(12.00)" or "$ 7".
+    Args:
+        value (str): The amount as written in the statement.
+    Returns:
+        Decimal: The signed amount.
+    Raises:
+        ValueError: If the value is not a number.
+    """
+    value = value.strip()
+    negative = value.startswith("(") and value.endswith(")")
+    cleaned = re.sub(r"[^0-9.+-]", "", value)
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {value!r}")
+    return -abs(amount) if negative else amount
+
+def parse_date(value: str, date_format: Optional[str] = None) -> datetime:
+    """
+    Parse a statement date with the given strptime format, or as ISO 8601 when no format is given.
+    Args:
+        value (str): The date as written in the statement.
+        date_format (Optional[str]): The strptime format of the date.
+    Returns:
+        datetime: The parsed date.
+    Raises:
+        ValueError: If the value does not match the format.
+    """
+    value = value.strip()
+    return datetime.strptime(value, date_format) if date_format else datetime.fromisoformat(value)
+
+def parse_csv(lines: Iterable[str], column_map: dict, date_format: Optional[str] = None) -> Iterator[StatementItem]:
+    """
+    Read a CSV statement with a header line one row at a time.
+    The amount is read from the amount column, or from the debit and credit columns when the statement splits them.
+    Args:
+        lines (Iterable[str]): The lines of the statement.
+        column_map (dict): The header of the date, amount, debit, credit, description, category and transaction_type columns.
+        date_format (Optional[str]): The strptime format of the dates.
+    Yields:
+        StatementItem: An entry per data line, or the error that prevented reading it.
+    """
+    for row, line in enumerate(csv.DictReader(lines), start=1):
+        try:
+            date = parse_date(line[column_map["date"]], date_format)
+            if column_map.get("debit") or column_map.get("credit"):
+                debit = line.get(column_map.get("debit") or "") or "0"
+                credit = line.get(column_map.get("credit") or "") or "0"
+                amount = parse_amount(credit) - abs(parse_amount(debit))
+            else:
+                amount = parse_amount(line[column_map["amount"]])
+        except KeyError as e:
+            yield StatementRowError(row, f"Missing column {e.args[0]}")
+            continue
+        except (ValueError, TypeError) as e:
+            yield StatementRowError(row, str(e))
+            continue
+        yield StatementEntry(row, date, amount,
+                             description=(line.get(column_map.get("description") or "") or None),
+                             category=(line.get(column_map.get("category") or "") or None),
+                             transaction_type=(line.get(column_map.get("transaction_type") or "") or None))
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+def parse_ofx_date(value: str) -> datetime:
+    # OFX dates are YYYYMMDD optionally followed by HHMMSS, milliseconds and a [offset:TZ] suffix
+    digits = re.match(r"\d{8}(\d{6})?", value.strip())
+    if not digits:
+        raise ValueError(f"Invalid date {value!r}")
+    return datetime.strptime(digits.group(0), "%Y%m%d%H%M%S" if digits.group(1) else "%Y%m%d")
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[StatementItem]:
+    """
+    Read the STMTTRN records of an OFX statement, SGML (OFX 1.x) or XML (OFX 2.x), one record at a time.
+    Args:
+        lines (Iterable[str]): The lines of the statement.
+    Yields:
+        StatementItem: An entry per STMTTRN record, or the error that prevented reading it.
+    """
+    row, record = 0, None
+    for line in lines:
+        for closing, tag, text in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and record is not None:
+                    row += 1
+                    try:
+                        description = " ".join(part for part in (record.get("NAME"), record.get("MEMO")) if part) or None
+                        yield StatementEntry(row, parse_ofx_date(record["DTPOSTED"]), parse_amount(record["TRNAMT"]), description=description)
+                    except KeyError as e:
+                        yield StatementRowError(row, f"Missing {e.args[0]}")
+                    except ValueError as e:
+                        yield StatementRowError(row, str(e))
+                    record = None
+                elif not closing:
+                    record = {}
+            elif record is not None and not closing and text.strip():
+                record[tag] = text.strip()
+
+def parse_qif_date(value: str, date_format: Optional[str] = None) -> datetime:
+    # Quicken writes dates such as 1/31/2024, 01/31'24 or 1-31-24
+    value = value.strip().replace("'", "/").replace("-", "/").replace(" ", "")
+    if date_format:
+        return datetime.strptime(value, date_format)
+    month, day, year = value.split("/")
+    year = int(year)
+    if year < 100:
+        year += 2000 if year < 70 else 1900
+    return datetime(year, int(month), int(day))
+
+def parse_qif(lines: Iterable[str], date_format: Optional[str] = None) -> Iterator[StatementItem]:
+    """
+    Read the records of a QIF statement one record at a time, records end with a line holding ^.
+    Args:
+        lines (Iterable[str]): The lines of the statement.
+        date_format (Optional[str]): The strptime format of the dates, month/day/year when omitted.
+    Yields:
+        StatementItem: An entry per record, or the error that prevented reading it.
+    """
+    row, record = 0, {}
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code != "^":
+            # T and U both hold the amount, the first one wins
+            record.setdefault(code, value)
+            continue
+        if not record:
+            continue
+        row += 1
+        try:
+            description = " ".join(part for part in (record.get("P"), record.get("M")) if part) or None
+            yield StatementEntry(row, parse_qif_date(record["D"], date_format), parse_amount(record.get("T") or record["U"]),
+                                 description=description, category=record.get("L") or None)
+        except KeyError as e:
+            yield StatementRowError(row, f"Missing {'date' if e.args[0] == 'D' else 'amount'}")
+        except ValueError as e:
+            yield StatementRowError(row, str(e))
+        record = {}
+
+def parse_statement(statement_format: str, lines: Iterable[str], column_map: Optional[dict] = None, date_format: Optional[str] = None) -> Iterator[StatementItem]:
+    """
+    Read a statement of the given format as a stream of entries.
+    Args:
+        statement_format (str): csv, ofx or qif.
+        lines (Iterable[str]): The lines of the statement.
+        column_map (Optional[dict]): The CSV column mapping.
+        date_format (Optional[str]): The strptime format of CSV and QIF dates.
+    Returns:
+        Iterator[StatementItem]: The entries and row errors in statement order.
+    """
+    if statement_format == "csv":
+        return parse_csv(lines, column_map or {}, date_format)
+    if statement_format == "ofx":
+        return parse_ofx(lines)
+    if statement_format == "qif":
+        return parse_qif(lines, date_format)
+    raise ValueError(f"Unsupported statement format {statement_format}")
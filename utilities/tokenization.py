@@ -32,8 +32,18 @@ def decode_token(credentials:str)->str:
             str: The subject claim from the decoded JWT payload.
         """
         
-        payload = jwt.decode(credentials, config.token_secret, algorithms=["HS256"])
-        return payload.get("sub")
+        return decode_token_claims(credentials).get("sub")
+
+def decode_token_claims(credentials:str)->dict:
+        """
+        Decodes a JWT token and returns all of its claims.
+        Args:
+            credentials (str): The encoded JWT token.
+        Returns:
+            dict: The decoded JWT payload, including the "sub", "iat" and "exp" claims.
+        """
+
+        return jwt.decode(credentials, config.token_secret, algorithms=["HS256"])
 
 def generate_token_payload(id:uuid,expiration_time: int = 86400) -> dict:
     """
@@ -0,0 +1,186 @@
+import asyncio
+from typing import AsyncIterator, NamedTuple, Optional
+from python_multipart.exceptions import ParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from .blob_store import BlobStore, BlobWriter
+from .compression import compression_for_content_type
+
+# Bytes a multipart body adds around the files it carries: boundaries and part headers
+MULTIPART_OVERHEAD = 16 * 1024
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+class UploadError(ValueError):
+    """
+    Raised when a multipart upload cannot be read.
+    """
+
+class UploadTooLargeError(UploadError):
+    """
+    Raised as soon as an upload goes over one of its size limits, before the rest of the body is read.
+    """
+
+class StoredUpload(NamedTuple):
+    """
+    A file of a multipart upload, written to the blob store.
+    Attributes:
+        field_name (str): The form field the file was sent in.
+        filename (Optional[str]): The name of the file on the client.
+        content_type (str): The media type sent with the file.
+        digest (str): The SHA-256 of the content, the key of the blob.
+        size (int): The size of the file in bytes.
+        compression (Optional[str]): The codec the file is stored with, None when stored as is.
+        stored_size (int): The bytes the file takes in the blob store.
+    """
+    field_name: str
+    filename: Optional[str]
+    content_type: str
+    digest: str
+    size: int
+    compression: Optional[str] = None
+    stored_size: int = 0
+
+class FilePart:
+    def __init__(self, field_name: str, filename: Optional[str], content_type: str, writer: BlobWriter):
+        self.field_name = field_name
+        self.filename = filename
+        self.content_type = content_type
+        self.writer = writer
+        self.pending = bytearray()
+
+class MultipartUploadReader:
+    """
+    Feeds a multipart body to python-multipart chunk by chunk and writes every file part to a blob writer,
+    so the files are hashed and stored as they arrive and never held in memory as a whole.
+    Form fields that are not files are ignored.
+    Attributes:
+        max_file_size (int): The largest accepted file.
+        max_total_size (int): The largest accepted sum of the file sizes.
+        max_files (int): The largest accepted number of files.
+        chunk_size (int): The bytes gathered before they are written to the blob store.
+        compression_rules (str): The media type=codec rules choosing how every file is stored, see compression_for_content_type.
+    """
+
+    def __init__(self, store: BlobStore, max_file_size: int, max_total_size: int, max_files: int, chunk_size: int, compression_rules: str = ""):
+        self.store = store
+        self.compression_rules = compression_rules
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.max_files = max_files
+        self.chunk_size = chunk_size
+        self.parts: list[FilePart] = []
+        self.total_size = 0
+        self._current: Optional[FilePart] = None
+        self._headers: dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_part_begin(self):
+        self._current, self._headers = None, {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name, self._header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"filename" not in options:
+            return
+        if len(self.parts) >= self.max_files:
+            raise UploadTooLargeError(f"An upload accepts at most {self.max_files} files")
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip() or DEFAULT_CONTENT_TYPE
+        self._current = FilePart(options.get(b"name", b"").decode("utf-8", "replace"), options[b"filename"].decode("utf-8", "replace") or None,
+                                 content_type, self.store.writer(compression_for_content_type(content_type, self.compression_rules)))
+        self.parts.append(self._current)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._current is None:
+            return
+        length = end - start
+        if self._current.writer.size + len(self._current.pending) + length > self.max_file_size:
+            raise UploadTooLargeError(f"A file exceeds {self.max_file_size} bytes")
+        self.total_size += length
+        if self.total_size > self.max_total_size:
+            raise UploadTooLargeError(f"The upload exceeds the {self.max_total_size} bytes left")
+        self._current.pending += data[start:end]
+
+    def on_part_end(self):
+        self._current = None
+
+    async def flush(self, final: bool = False):
+        # Hand the gathered bytes to the blob writers once they fill a chunk, off the event loop
+        for part in self.parts:
+            if part.pending and (final or len(part.pending) >= self.chunk_size):
+                chunk, part.pending = bytes(part.pending), bytearray()
+                await run_in_threadpool(part.writer.write, chunk)
+
+    async def read(self, content_type: str, stream: AsyncIterator[bytes]) -> list[StoredUpload]:
+        """
+        Read a multipart body and store its files.
+        Args:
+            content_type (str): The Content-Type header of the request, holding the boundary.
+            stream (AsyncIterator[bytes]): The body of the request.
+        Returns:
+            list[StoredUpload]: The stored files in the order they were sent.
+        Raises:
+            UploadError: If the body is not multipart/form-data.
+            UploadTooLargeError: If a limit is exceeded, the files written so far are discarded.
+        """
+        media_type, params = parse_options_header(content_type)
+        if media_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError("The upload must be sent as multipart/form-data")
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self.on_part_begin, "on_part_data": self.on_part_data, "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field, "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end, "on_headers_finished": self.on_headers_finished})
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                await self.flush()
+            parser.finalize()
+            await self.flush(final=True)
+            # Commit the files concurrently, each commit waits on its own fsync and rename
+            digests = await asyncio.gather(*(run_in_threadpool(part.writer.commit) for part in self.parts))
+            return [StoredUpload(part.field_name, part.filename, part.content_type, digest, part.writer.size, part.writer.compression, part.writer.stored_size)
+                    for part, digest in zip(self.parts, digests)]
+        except ParseError as e:
+            self.abort()
+            raise UploadError(f"Invalid multipart upload: {e}") from e
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """
+        Discard every file of the upload that is not committed yet.
+        """
+        for part in self.parts:
+            part.writer.abort()
+
+async def store_multipart_upload(content_type: str, stream: AsyncIterator[bytes], store: BlobStore, max_file_size: int, max_total_size: int,
+                                 max_files: int, chunk_size: int, compression_rules: str = "") -> list[StoredUpload]:
+    """
+    Stream the files of a multipart/form-data body into the blob store, checking the size limits as the bytes arrive.
+    Args:
+        content_type (str): The Content-Type header of the request.
+        stream (AsyncIterator[bytes]): The body of the request.
+        store (BlobStore): The blob store receiving the files.
+        max_file_size (int): The largest accepted file.
+        max_total_size (int): The largest accepted sum of the file sizes.
+        max_files (int): The largest accepted number of files.
+        chunk_size (int): The bytes gathered before they are written to the blob store.
+        compression_rules (str): The media type=codec rules choosing how every file is stored.
+    Returns:
+        list[StoredUpload]: The stored files.
+    Raises:
+        UploadError: If the body is not a valid multipart upload.
+        UploadTooLargeError: If a limit is exceeded.
+    """
+    reader = MultipartUploadReader(store, max_file_size, max_total_size, max_files, chunk_size, compression_rules)
+    return await reader.read(content_type, stream)